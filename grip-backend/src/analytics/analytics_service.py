@@ -3,10 +3,29 @@ import numpy as np
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 import logging
+from sqlalchemy import func
 
 from .price_analyzer import PriceAnalyzer
 from .production_analyzer import ProductionAnalyzer
 from .ml_predictor import MLPredictor
+from .comparison_engine import ComparisonEngine
+from .correlation_analyzer import CorrelationAnalyzer
+from .monte_carlo import MonteCarloSimulator
+from .seasonal_decomposition import SeasonalDecomposer
+from .single_flight import SingleFlight
+from .ml_jobs import MLJobQueue
+from .trend_index import TrendIndexer
+from .price_stats import PriceStatsTracker
+from .price_anomalies import PriceAnomalyDetector
+from .concentration_index import ConcentrationIndexer
+from .supply_risk_index import SupplyRiskIndexer
+from .depletion_index import DepletionIndexer
+from .production_forecast_index import ProductionForecastIndexer
+from .batch_trends import batch_linear_trend
+from .volatility_surface import surface_cache
+from .data_loaders import load_price_frame, load_price_matrix, load_production_matrix
+from .production_cube import get_production_cube, MEASURES as VOLUME_MEASURES, AXES as CUBE_AXES
+from .model_registry import get_model_registry
 from ..models.user import db
 from ..models.commodity import Commodity
 from ..models.country import Country
@@ -17,28 +36,53 @@ from ..models.price_data import PriceData
 class AnalyticsService:
     """Service to orchestrate all analytics modules"""
     
+    # Price sections read by _generate_comprehensive_summary
+    SUMMARY_PRICE_SECTIONS = frozenset({'trend', 'volatility', 'risk_metrics'})
+    
     def __init__(self, app=None):
         self.app = app
         self.logger = logging.getLogger(__name__)
+        config = app.config if app is not None else {}
         
         # Initialize analyzers
         self.analyzers = {
             'price': PriceAnalyzer(),
             'production': ProductionAnalyzer(),
-            'ml': MLPredictor()
+            'ml': MLPredictor(gap=config.get('ML_CV_GAP', 0), n_jobs=config.get('ML_CV_JOBS', 1))
         }
+        self.comparison_engine = ComparisonEngine()
+        self.correlation_analyzer = CorrelationAnalyzer()
+        self.monte_carlo = MonteCarloSimulator()
+        self.seasonal_decomposer = SeasonalDecomposer()
+        self.trend_indexer = TrendIndexer()
+        self.price_stats = PriceStatsTracker()
+        self.anomaly_detector = PriceAnomalyDetector()
+        self.concentration_indexer = ConcentrationIndexer()
+        self.supply_risk_indexer = SupplyRiskIndexer()
+        self.depletion_indexer = DepletionIndexer()
+        self.forecast_indexer = ProductionForecastIndexer()
         
         # Analysis cache
         self.analysis_cache = {}
         self.cache_ttl = 3600  # 1 hour cache TTL
+        
+        # Coalesces concurrent cache misses for the same (commodity, type, data version)
+        self.single_flight = SingleFlight()
+        
+        # Background ML training, and the last ML output of every commodity:
+        # commodity_id -> (result, data_version, completed_at)
+        self.ml_jobs = MLJobQueue(max_workers=config.get('ML_JOB_WORKERS', 2))
+        self.latest_ml = {}
     
-    def analyze_commodity(self, commodity_id: int, analysis_types: List[str] = None) -> Dict[str, Any]:
+    def analyze_commodity(self, commodity_id: int, analysis_types: List[str] = None,
+                          price_sections=None) -> Dict[str, Any]:
         """
         Perform comprehensive analysis for a commodity
         
         Args:
             commodity_id: ID of the commodity to analyze
             analysis_types: List of analysis types to perform ['price', 'production', 'ml']
+            price_sections: PriceAnalyzer sections to compute (optional, defaults to all)
         """
         if analysis_types is None:
             analysis_types = ['price', 'production', 'ml']
@@ -59,7 +103,12 @@ class AnalyticsService:
             for analysis_type in analysis_types:
                 if analysis_type in self.analyzers:
                     try:
-                        analysis_result = self._perform_analysis(commodity_id, analysis_type)
+                        if analysis_type == 'ml':
+                            # Served from the last trained model; training runs in the background
+                            analysis_result = self._serve_ml_analysis(commodity_id)
+                        else:
+                            sections = price_sections if analysis_type == 'price' else None
+                            analysis_result = self._perform_analysis(commodity_id, analysis_type, sections)
                         results['analyses'][analysis_type] = analysis_result
                     except Exception as e:
                         self.logger.error(f"Error in {analysis_type} analysis: {e}")
@@ -72,15 +121,90 @@ class AnalyticsService:
             
             return results
     
-    def _perform_analysis(self, commodity_id: int, analysis_type: str) -> Dict[str, Any]:
-        """Perform a specific type of analysis"""
+    def _perform_analysis(self, commodity_id: int, analysis_type: str, sections=None) -> Dict[str, Any]:
+        """Perform a specific type of analysis, optionally limited to some sections"""
+        if analysis_type not in self.analyzers:
+            return {'error': f'Unknown analysis type: {analysis_type}'}
+        
+        data_version = self._get_data_version(commodity_id, analysis_type)
+        
+        # Analyzers that declare SECTIONS are cached section by section
+        if getattr(self.analyzers[analysis_type], 'SECTIONS', None):
+            return self._perform_sectioned_analysis(commodity_id, analysis_type, sections, data_version)
+        
         # Check cache first
         cache_key = f"{commodity_id}_{analysis_type}"
+        cached_result = self._get_cached(cache_key, data_version)
+        if cached_result is not None:
+            return cached_result
+        
+        # Concurrent callers for the same data wait on a single computation
+        flight_key = (commodity_id, analysis_type, None, data_version)
+        return self.single_flight.do(
+            flight_key,
+            lambda: self._compute_analysis(commodity_id, analysis_type, cache_key, data_version)
+        )
+    
+    def _perform_sectioned_analysis(self, commodity_id: int, analysis_type: str, sections,
+                                    data_version: str) -> Dict[str, Any]:
+        """
+        Assemble an analysis from independently cached sections
+        
+        The result header (data points, date range) is cached under
+        "{commodity}_{type}" and every section under
+        "{commodity}_{type}_{section}"; only the sections missing from the
+        cache are computed, in one analyzer call.
+        """
+        section_names = self.analyzers[analysis_type].SECTIONS
+        if sections is None:
+            sections = frozenset(section_names)
+        else:
+            sections = frozenset(sections)
+            unknown = sections - set(section_names)
+            if unknown:
+                return {'error': f"Unknown {analysis_type} analysis sections: {', '.join(sorted(unknown))}"}
+        
+        header_key = f"{commodity_id}_{analysis_type}"
+        header = self._get_cached(header_key, data_version)
+        if header is not None and 'error' in header:
+            return header
+        
+        # Cached sections are {section: value}, empty when the section does not apply
+        cached = {section: self._get_cached(f"{header_key}_{section}", data_version) for section in sections}
+        missing = frozenset(section for section, value in cached.items() if value is None)
+        
+        if header is None or missing:
+            # Concurrent callers missing the same sections wait on a single computation
+            flight_key = (commodity_id, analysis_type, missing, data_version)
+            computed = self.single_flight.do(
+                flight_key,
+                lambda: self._compute_analysis(commodity_id, analysis_type, header_key, data_version, missing)
+            )
+            if 'error' in computed:
+                return computed
+            header = {key: value for key, value in computed.items() if key not in section_names}
+            for section in missing:
+                cached[section] = {section: computed[section]} if section in computed else {}
+        
+        # Keep the canonical section order of the full analysis
+        result = dict(header)
+        for section in section_names:
+            if section in sections:
+                result.update(cached[section])
+        return result
+    
+    def _get_cached(self, cache_key: str, data_version: str) -> Optional[Dict[str, Any]]:
+        """Return a cached result if it matches the data version and is still fresh"""
         if cache_key in self.analysis_cache:
-            cached_result, timestamp = self.analysis_cache[cache_key]
-            if (datetime.utcnow() - timestamp).seconds < self.cache_ttl:
+            cached_result, timestamp, cached_version = self.analysis_cache[cache_key]
+            if (cached_version == data_version and
+                    (datetime.utcnow() - timestamp).total_seconds() < self.cache_ttl):
                 return cached_result
-        
+        return None
+    
+    def _compute_analysis(self, commodity_id: int, analysis_type: str,
+                          cache_key: str, data_version: str, sections=None) -> Dict[str, Any]:
+        """Load data, run the analyzer and cache the result"""
         # Get data based on analysis type
         if analysis_type == 'price':
             data = self._get_price_data(commodity_id)
@@ -95,60 +219,72 @@ class AnalyticsService:
             return {'error': f'Unknown analysis type: {analysis_type}'}
         
         if data.empty:
-            return {'error': f'No data available for {analysis_type} analysis'}
+            result = {'error': f'No data available for {analysis_type} analysis'}
+            if analysis_type == 'ml':
+                # Recorded like a trained model, so requests report it until the data changes
+                self.latest_ml[commodity_id] = (result, data_version, datetime.utcnow())
+            return result
         
         # Perform analysis
-        result = analyzer.analyze(data)
+        if sections is not None:
+            result = analyzer.analyze(data, sections=sections)
+            if 'error' not in result:
+                # Cache the header and every computed section separately
+                now = datetime.utcnow()
+                section_names = analyzer.SECTIONS
+                self.analysis_cache[cache_key] = ({key: value for key, value in result.items()
+                                                   if key not in section_names}, now, data_version)
+                for section in sections:
+                    value = {section: result[section]} if section in result else {}
+                    self.analysis_cache[f"{cache_key}_{section}"] = (value, now, data_version)
+                return result
+        elif analysis_type == 'ml':
+            # Models trained on this data version are reused across restarts
+            result = analyzer.analyze(data, registry=get_model_registry(),
+                                      commodity_id=commodity_id, fingerprint=data_version)
+        else:
+            result = analyzer.analyze(data)
         
         # Cache result
-        self.analysis_cache[cache_key] = (result, datetime.utcnow())
+        self.analysis_cache[cache_key] = (result, datetime.utcnow(), data_version)
+        if analysis_type == 'ml':
+            self.latest_ml[commodity_id] = (result, data_version, datetime.utcnow())
         
         return result
     
+    def _get_data_version(self, commodity_ids, analysis_type: str) -> str:
+        """Get a cheap fingerprint of the rows an analysis type depends on"""
+        if isinstance(commodity_ids, int):
+            commodity_ids = [commodity_ids]
+        
+        model = ProductionData if analysis_type == 'production' else PriceData
+        row_count, max_id, last_updated = (db.session.query(func.count(model.id),
+                                                            func.max(model.id),
+                                                            func.max(model.last_updated))
+                                           .filter(model.commodity_id.in_(list(commodity_ids)))
+                                           .one())
+        return f"{row_count}:{max_id}:{last_updated}"
+    
+    def _get_series_versions(self, commodity_ids: List[int]) -> Dict[int, str]:
+        """Price data fingerprint of every commodity with prices, in one grouped query"""
+        rows = (db.session.query(PriceData.commodity_id,
+                                 func.count(PriceData.id),
+                                 func.max(PriceData.id),
+                                 func.max(PriceData.last_updated))
+                .filter(PriceData.commodity_id.in_(list(commodity_ids)))
+                .group_by(PriceData.commodity_id)
+                .all())
+        # Same format as _get_data_version for a single commodity
+        return {commodity_id: f"{row_count}:{max_id}:{last_updated}"
+                for commodity_id, row_count, max_id, last_updated in rows}
+    
     def _get_price_data(self, commodity_id: int) -> pd.DataFrame:
         """Get price data for a commodity"""
-        price_records = PriceData.query.filter_by(commodity_id=commodity_id).order_by(PriceData.timestamp).all()
-        
-        if not price_records:
-            return pd.DataFrame()
-        
-        data = []
-        for record in price_records:
-            data.append({
-                'date': record.timestamp,
-                'price': float(record.price) if record.price else None,
-                'currency': record.currency,
-                'volume': float(record.volume) if record.volume else None,
-                'commodity_id': record.commodity_id
-            })
-        
-        df = pd.DataFrame(data)
-        df['date'] = pd.to_datetime(df['date'])
-        return df.dropna(subset=['price'])
+        return load_price_frame(commodity_id)
     
     def _get_production_data(self, commodity_id: int) -> pd.DataFrame:
-        """Get production data for a commodity"""
-        production_records = (ProductionData.query
-                            .filter_by(commodity_id=commodity_id)
-                            .join(Country)
-                            .order_by(ProductionData.year)
-                            .all())
-        
-        if not production_records:
-            return pd.DataFrame()
-        
-        data = []
-        for record in production_records:
-            data.append({
-                'year': record.year,
-                'production_volume': float(record.production_volume) if record.production_volume else None,
-                'unit': record.unit,
-                'country': record.country.name if record.country else 'Unknown',
-                'commodity_id': record.commodity_id
-            })
-        
-        df = pd.DataFrame(data)
-        return df.dropna(subset=['production_volume'])
+        """Get production data for a commodity from the production cube"""
+        return get_production_cube().frame([commodity_id])
     
     def _generate_comprehensive_summary(self, analyses: Dict[str, Any], commodity_name: str) -> Dict[str, Any]:
         """Generate a comprehensive summary of all analyses"""
@@ -219,7 +355,7 @@ class AnalyticsService:
             confidence_scores.append(0.7)  # Production analysis confidence
         
         # Extract insights from ML analysis
-        if 'ml' in analyses and 'error' not in analyses['ml']:
+        if 'ml' in analyses and 'error' not in analyses['ml'] and 'model_summary' in analyses['ml']:
             ml_analysis = analyses['ml']
             
             # Model performance
@@ -280,16 +416,10 @@ class AnalyticsService:
     def compare_commodities(self, commodity_ids: List[int], analysis_type: str = 'price') -> Dict[str, Any]:
         """Compare multiple commodities"""
         with self.app.app_context():
-            comparison_results = {}
-            
-            for commodity_id in commodity_ids:
-                commodity = Commodity.query.get(commodity_id)
-                if commodity:
-                    analysis = self._perform_analysis(commodity_id, analysis_type)
-                    comparison_results[commodity.name] = {
-                        'commodity_id': commodity_id,
-                        'analysis': analysis
-                    }
+            if analysis_type == 'price':
+                comparison_results = self._compare_prices(commodity_ids)
+            else:
+                comparison_results = self._compare_by_analysis(commodity_ids, analysis_type)
             
             # Generate comparison summary
             comparison_summary = self._generate_comparison_summary(comparison_results, analysis_type)
@@ -301,6 +431,41 @@ class AnalyticsService:
                 'analysis_date': datetime.utcnow().isoformat()
             }
     
+    def _compare_prices(self, commodity_ids: List[int]) -> Dict[str, Any]:
+        """Compare price histories of many commodities from one panel query"""
+        commodities = {c.id: c for c in Commodity.query.filter(Commodity.id.in_(commodity_ids)).all()}
+        panel = load_price_matrix(list(commodities.keys()), dtype=np.float64)
+        comparison = self.comparison_engine.analyze(panel)
+        
+        comparison_results = {}
+        for commodity_id in commodity_ids:
+            commodity = commodities.get(commodity_id)
+            if commodity:
+                comparison_results[commodity.name] = {
+                    'commodity_id': commodity_id,
+                    'analysis': comparison.get(commodity_id, {'error': 'No data available for price analysis'})
+                }
+        
+        return comparison_results
+    
+    def _compare_by_analysis(self, commodity_ids: List[int], analysis_type: str) -> Dict[str, Any]:
+        """Compare commodities by running a full analysis for each one"""
+        comparison_results = {}
+        
+        for commodity_id in commodity_ids:
+            commodity = Commodity.query.get(commodity_id)
+            if commodity:
+                if analysis_type == 'ml':
+                    analysis = self._serve_ml_analysis(commodity_id)
+                else:
+                    analysis = self._perform_analysis(commodity_id, analysis_type)
+                comparison_results[commodity.name] = {
+                    'commodity_id': commodity_id,
+                    'analysis': analysis
+                }
+        
+        return comparison_results
+    
     def _generate_comparison_summary(self, comparison_results: Dict[str, Any], analysis_type: str) -> Dict[str, Any]:
         """Generate a summary comparing multiple commodities"""
         summary = {
@@ -377,7 +542,8 @@ class AnalyticsService:
             
             for commodity in commodities[:10]:  # Limit to first 10 for performance
                 try:
-                    analysis = self.analyze_commodity(commodity.id, ['price'])
+                    analysis = self.analyze_commodity(commodity.id, ['price'],
+                                                      price_sections=self.SUMMARY_PRICE_SECTIONS)
                     summary = analysis.get('summary', {})
                     
                     commodity_summaries.append({
@@ -415,9 +581,571 @@ class AnalyticsService:
             
             return overview
     
+    def get_correlations(self, commodity_ids: List[int] = None, category: str = None,
+                         window: int = 12, frequency: str = 'monthly',
+                         rolling_windows: Optional[int] = 1) -> Dict[str, Any]:
+        """
+        Get full and rolling return correlations across a commodity universe
+        
+        Args:
+            commodity_ids: Commodities to include (defaults to every commodity with prices)
+            category: Optional commodity category filter
+            window: Rolling window length, in periods of `frequency`
+            frequency: Return frequency ('daily', 'weekly', 'monthly', 'quarterly')
+            rolling_windows: Most recent rolling windows with full matrices (None for all)
+        """
+        with self.app.app_context():
+            query = Commodity.query
+            if commodity_ids:
+                query = query.filter(Commodity.id.in_(commodity_ids))
+            if category:
+                query = query.filter(Commodity.category == category)
+            commodities = {c.id: c.name for c in query.order_by(Commodity.id).all()}
+            
+            universe = sorted(commodities)
+            if len(universe) < 2:
+                return {'error': 'At least 2 commodities required for correlation analysis'}
+            
+            data_version = self._get_data_version(universe, 'price')
+            cache_key = f"correlation_{','.join(map(str, universe))}_{window}_{frequency}_{rolling_windows}"
+            cached = self._get_cached(cache_key, data_version)
+            if cached is not None:
+                return cached
+            
+            def compute():
+                panel = load_price_matrix(universe)
+                if len(panel) == 0:
+                    return {'error': 'No price data available for correlation analysis'}
+                
+                result = self.correlation_analyzer.analyze(panel, window=window, frequency=frequency,
+                                                           rolling_windows=rolling_windows)
+                if 'error' not in result:
+                    result['commodities'] = [{'id': cid, 'name': commodities[cid]} for cid in result['series']]
+                    self.analysis_cache[cache_key] = (result, datetime.utcnow(), data_version)
+                return result
+            
+            return self.single_flight.do((cache_key, data_version), compute)
+    
+    def get_country_production(self, commodity_ids: List[int] = None) -> Dict[str, Any]:
+        """
+        Get the per-country production analysis of many commodities in one pass
+        
+        Args:
+            commodity_ids: Commodities to include (defaults to every commodity)
+        
+        Every commodity gets the country analysis and efficiency comparison
+        of ProductionAnalyzer, computed for all commodities together.
+        """
+        with self.app.app_context():
+            query = Commodity.query
+            if commodity_ids:
+                query = query.filter(Commodity.id.in_(commodity_ids))
+            commodities = {c.id: c.name for c in query.order_by(Commodity.id).all()}
+            
+            universe = sorted(commodities)
+            if not universe:
+                return {'error': 'No commodities found'}
+            
+            data_version = self._get_data_version(universe, 'production')
+            cache_key = f"production_countries_{','.join(map(str, universe))}"
+            cached = self._get_cached(cache_key, data_version)
+            if cached is not None:
+                return cached
+            
+            def compute():
+                data = get_production_cube().frame(universe)
+                if data.empty:
+                    return {'error': 'No production data available for country analysis'}
+                
+                analyses = self.analyzers['production'].analyze_countries(data, by='commodity_id')
+                result = {
+                    'analysis_date': datetime.utcnow().isoformat(),
+                    'commodities': [{'commodity_id': int(cid), 'commodity': commodities[int(cid)], **analysis}
+                                    for cid, analysis in analyses.items()]
+                }
+                self.analysis_cache[cache_key] = (result, datetime.utcnow(), data_version)
+                return result
+            
+            return self.single_flight.do((cache_key, data_version), compute)
+    
+    def get_production_cube_summary(self) -> Dict[str, Any]:
+        """Get the axes, memory use and fill of the production cube"""
+        with self.app.app_context():
+            return get_production_cube().describe()
+    
+    def aggregate_volumes(self, measure: str = 'production', by: List[str] = None,
+                          commodity_ids: List[int] = None, country_ids: List[int] = None,
+                          start_year: Optional[int] = None, end_year: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Sum production or reserves volumes over a slice of the production cube
+        
+        Args:
+            measure: 'production' or 'reserves'
+            by: Axes kept in the result ('commodity', 'country', 'year');
+                volumes are summed over the others
+            commodity_ids: Commodities to include (defaults to all)
+            country_ids: Countries to include (defaults to all)
+            start_year: First year to include
+            end_year: Last year to include
+        """
+        by = by or ['commodity', 'year']
+        if measure not in VOLUME_MEASURES:
+            return {'error': f'Unknown measure: {measure}'}
+        unknown = set(by) - set(CUBE_AXES)
+        if unknown:
+            return {'error': f"Unknown aggregation axes: {', '.join(sorted(unknown))}"}
+        
+        with self.app.app_context():
+            cube = get_production_cube()
+            totals, axes = cube.aggregate(measure, by=by, commodity_ids=commodity_ids, country_ids=country_ids,
+                                          start_year=start_year, end_year=end_year)
+            names = dict(db.session.query(Commodity.id, Commodity.name).all()) if 'commodity' in axes else {}
+            
+            records = []
+            for cell in zip(*np.nonzero(~np.isnan(totals))):
+                record = {}
+                for axis, code in zip(axes, cell):
+                    value = int(axes[axis][code])
+                    if axis == 'year':
+                        record['year'] = value
+                    else:
+                        record[f'{axis}_id'] = value
+                        record[axis] = names.get(value) if axis == 'commodity' else cube.country_names.get(value)
+                record['volume'] = float(totals[cell])
+                records.append(record)
+            
+            return {
+                'measure': measure,
+                'by': [axis for axis in CUBE_AXES if axis in by],
+                'record_count': len(records),
+                'records': records
+            }
+    
+    def _ensure_materialized(self, indexer):
+        """
+        Build an empty materialized index in full (afterwards it is maintained on ingest)
+        
+        Concurrent first requests share one build instead of racing to
+        delete and insert the same rows. Expects an active application context.
+        """
+        if not indexer.is_empty():
+            return
+        
+        def build():
+            # A build that finished just before this flight leaves nothing to do
+            return indexer.rebuild() if indexer.is_empty() else 0
+        
+        self.single_flight.do(('materialize', type(indexer).__name__), build)
+    
+    def get_concentration(self, commodity_id: Optional[int] = None, start_year: Optional[int] = None,
+                          end_year: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get the yearly production concentration (HHI, CR3/5/10, top-producer share)
+        
+        Args:
+            commodity_id: Only this commodity (defaults to every commodity)
+            start_year: First year to include
+            end_year: Last year to include
+        """
+        with self.app.app_context():
+            if commodity_id is not None and db.session.get(Commodity, commodity_id) is None:
+                return {'error': f'Commodity with ID {commodity_id} not found'}
+            
+            self._ensure_materialized(self.concentration_indexer)
+            
+            records = self.concentration_indexer.get_concentration(commodity_id, start_year, end_year)
+            return {
+                'commodity_id': commodity_id,
+                'from': start_year,
+                'to': end_year,
+                'record_count': len(records),
+                'records': records
+            }
+    
+    def get_supply_risk_ranking(self, limit: Optional[int] = None, level: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Rank commodities by stability-weighted production concentration
+        
+        Args:
+            limit: Number of highest-risk commodities to return (all by default)
+            level: Only commodities of this risk level ('Low', 'Moderate', 'High')
+        """
+        with self.app.app_context():
+            self._ensure_materialized(self.supply_risk_indexer)
+            
+            ranking = self.supply_risk_indexer.get_ranking(limit, level)
+            return {
+                'level': level,
+                'record_count': len(ranking),
+                'ranking': ranking
+            }
+    
+    def get_commodity_depletion(self, commodity_id: int) -> Dict[str, Any]:
+        """Get the world and per-country reserves-to-production ratios and depletion horizons of a commodity"""
+        with self.app.app_context():
+            commodity = db.session.get(Commodity, commodity_id)
+            if commodity is None:
+                return {'error': f'Commodity with ID {commodity_id} not found'}
+            
+            self._ensure_materialized(self.depletion_indexer)
+            
+            horizons = self.depletion_indexer.get_commodity(commodity_id)
+            return {
+                'commodity_id': commodity_id,
+                'commodity': commodity.name,
+                'world': horizons['world'],
+                'country_count': len(horizons['countries']),
+                'countries': horizons['countries']
+            }
+    
+    def get_country_depletion(self, country_id: int) -> Dict[str, Any]:
+        """Get the reserves-to-production ratios and depletion horizons of every commodity a country holds"""
+        with self.app.app_context():
+            country = db.session.get(Country, country_id)
+            if country is None:
+                return {'error': f'Country with ID {country_id} not found'}
+            
+            self._ensure_materialized(self.depletion_indexer)
+            
+            commodities = self.depletion_indexer.get_country(country_id)
+            return {
+                'country_id': country_id,
+                'country': country.name,
+                'commodity_count': len(commodities),
+                'commodities': commodities
+            }
+    
+    def get_production_forecasts(self, commodity_id: Optional[int] = None, country_id: Optional[int] = None,
+                                 model: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the stored per-country production forecasts
+        
+        Args:
+            commodity_id: Only this commodity (defaults to every commodity)
+            country_id: Only this country (defaults to every country)
+            model: Only series whose selected model is this one
+        """
+        with self.app.app_context():
+            if commodity_id is not None and db.session.get(Commodity, commodity_id) is None:
+                return {'error': f'Commodity with ID {commodity_id} not found'}
+            if country_id is not None and db.session.get(Country, country_id) is None:
+                return {'error': f'Country with ID {country_id} not found'}
+            
+            self._ensure_materialized(self.forecast_indexer)
+            
+            forecasts = self.forecast_indexer.get_forecasts(commodity_id, country_id, model)
+            return {
+                'commodity_id': commodity_id,
+                'country_id': country_id,
+                'model': model,
+                'record_count': len(forecasts),
+                'forecasts': forecasts
+            }
+    
+    def submit_ml_training(self, commodity_ids: List[int]) -> Dict[str, Any]:
+        """Queue ML training of commodities on the worker pool and return the job"""
+        with self.app.app_context():
+            found = {row[0] for row in db.session.query(Commodity.id).filter(Commodity.id.in_(commodity_ids)).all()}
+            missing = [commodity_id for commodity_id in commodity_ids if commodity_id not in found]
+            if missing:
+                return {'error': f"Commodities not found: {', '.join(str(c) for c in missing)}"}
+        
+        return self.ml_jobs.submit(commodity_ids, self._train_ml_model)
+    
+    def get_ml_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the status, progress, timings and results of a training job"""
+        return self.ml_jobs.get(job_id)
+    
+    def _train_ml_model(self, commodity_id: int) -> Dict[str, Any]:
+        """Train (or reuse) the ML model of a commodity on a worker thread"""
+        with self.app.app_context():
+            result = self._perform_analysis(commodity_id, 'ml')
+        if 'error' in result:
+            raise ValueError(result['error'])
+        
+        return {
+            'best_model': result['best_model'],
+            'r2_score': result['model_summary'].get('r2_score'),
+            'data_points': result['data_points'],
+            **result['training']
+        }
+    
+    def _serve_ml_analysis(self, commodity_id: int) -> Dict[str, Any]:
+        """
+        ML analysis entry of a commodity without training inline
+        
+        The last trained model's output with its staleness and training job,
+        or status 'training' while the first model is being trained.
+        """
+        latest = self.get_latest_ml_analysis(commodity_id)
+        if 'error' in latest:
+            return latest
+        
+        analysis = latest['analysis']
+        if analysis is None or ('error' in analysis and latest['stale']):
+            return {'status': 'training', 'training_job': latest['training_job']}
+        return {
+            **analysis,
+            'stale': latest['stale'],
+            'model_completed_at': latest['completed_at'],
+            'training_job': latest['training_job']
+        }
+    
+    def get_latest_ml_analysis(self, commodity_id: int, periods: int = MLPredictor.DEFAULT_PERIODS) -> Dict[str, Any]:
+        """
+        Get the output of the last trained ML model of a commodity without training inline
+        
+        The output is stale when prices changed since the model was trained;
+        stale or missing output queues a training job (unless one is already
+        running) reported as training_job. A model stored for the current
+        data is used directly. Predictions are limited to the first
+        `periods` steps of the model's forecast horizon.
+        """
+        with self.app.app_context():
+            if db.session.get(Commodity, commodity_id) is None:
+                return {'error': f'Commodity with ID {commodity_id} not found'}
+            
+            data_version = self._get_data_version(commodity_id, 'ml')
+            latest = self.latest_ml.get(commodity_id)
+            if latest is None or latest[1] != data_version:
+                registry = get_model_registry()
+                if registry is not None and registry.contains(commodity_id, 'price', data_version,
+                                                              self.analyzers['ml'].MODEL_VERSION):
+                    # Predicting with a stored model takes no training
+                    self._perform_analysis(commodity_id, 'ml')
+                    latest = self.latest_ml.get(commodity_id)
+        
+        stale = latest is None or latest[1] != data_version
+        training_job = None
+        if stale:
+            training_job = self.ml_jobs.submit_unless_active(commodity_id, self._train_ml_model)
+        
+        analysis = latest[0] if latest is not None else None
+        if analysis is not None and 'predictions' in analysis:
+            analysis = {**analysis, 'predictions': MLPredictor.limit_predictions(analysis['predictions'], periods)}
+        
+        return {
+            'commodity_id': commodity_id,
+            'analysis': analysis,
+            'stale': stale,
+            'completed_at': latest[2].isoformat() if latest is not None else None,
+            'training_job': training_job
+        }
+    
+    def get_registered_models(self, commodity_id: Optional[int] = None) -> Dict[str, Any]:
+        """List the stored ML models with their metrics and training time"""
+        with self.app.app_context():
+            registry = get_model_registry()
+            if registry is None:
+                return {'enabled': False, 'model_count': 0, 'models': []}
+            
+            models = registry.list(commodity_id)
+            return {
+                'enabled': True,
+                'model_count': len(models),
+                'models': models
+            }
+    
+    def get_market_trends(self) -> Dict[str, Any]:
+        """Get trend classification for every commodity from the trend index"""
+        with self.app.app_context():
+            self._ensure_materialized(self.trend_indexer)
+            
+            return self.trend_indexer.get_trends()
+    
+    def scan_trends(self, kind: str = 'price') -> Dict[str, Any]:
+        """
+        Fit a linear trend to every series of one kind in a single batched pass
+        
+        Args:
+            kind: 'price' for every commodity price series (against observation
+                index), or 'production' for every commodity/country production
+                series (against year)
+        """
+        if kind not in ('price', 'production'):
+            return {'error': f'Unknown trend scan kind: {kind}'}
+        
+        with self.app.app_context():
+            names = dict(db.session.query(Commodity.id, Commodity.name).all())
+            if not names:
+                return {'kind': kind, 'series_count': 0, 'series': []}
+            
+            if kind == 'price':
+                panel = load_price_matrix(list(names), dtype=np.float64)
+                if len(panel) == 0:
+                    return {'kind': kind, 'series_count': 0, 'series': []}
+                fit = batch_linear_trend(panel.left_aligned())
+                keys = [{'commodity_id': int(commodity_id)} for commodity_id in panel.codes]
+            else:
+                panel = load_production_matrix(list(names), dtype=np.float64)
+                if len(panel) == 0:
+                    return {'kind': kind, 'series_count': 0, 'series': []}
+                fit = batch_linear_trend(panel.values.T, x=panel.index.to_numpy())
+                keys = [{'commodity_id': commodity_id, 'country': country}
+                        for commodity_id, country in panel.labels]
+            
+            series = []
+            for i, key in enumerate(keys):
+                n = int(fit['n'][i])
+                fitted = n >= 2 and np.isfinite(fit['slope'][i])
+                series.append({
+                    **key,
+                    'commodity': names.get(key['commodity_id']),
+                    'trend': self.analyzers['price'].classify_trend(fit['slope'][i]) if fitted else 'insufficient_data',
+                    'slope': float(fit['slope'][i]) if fitted else 0,
+                    'intercept': float(fit['intercept'][i]) if fitted else None,
+                    'r_squared': float(fit['r_squared'][i]),
+                    'periods_analyzed': n
+                })
+            
+            series.sort(key=lambda entry: entry['r_squared'], reverse=True)
+            
+            return {
+                'kind': kind,
+                'analysis_date': datetime.utcnow().isoformat(),
+                'series_count': len(series),
+                'series': series
+            }
+    
+    def get_seasonal_decomposition(self, commodity_ids: List[int] = None, model: str = 'multiplicative',
+                                   include_components: bool = False) -> Dict[str, Any]:
+        """
+        Decompose the price series of many commodities into trend, seasonal and residual parts
+        
+        Results are cached per series and data version, so only series whose
+        prices changed are recomputed, together in one batched pass.
+        
+        Args:
+            commodity_ids: Commodities to include (defaults to every commodity with prices)
+            model: 'multiplicative' or 'additive'
+            include_components: Also return the dated components of every series
+        """
+        if model not in SeasonalDecomposer.MODELS:
+            return {'error': f'Unknown decomposition model: {model}'}
+        
+        with self.app.app_context():
+            query = Commodity.query
+            if commodity_ids:
+                query = query.filter(Commodity.id.in_(commodity_ids))
+            commodities = {c.id: c.name for c in query.order_by(Commodity.id).all()}
+            
+            versions = self._get_series_versions(sorted(commodities))
+            if not versions:
+                return {'error': 'No price data available for seasonal decomposition'}
+            
+            def cache_key(commodity_id):
+                return f"seasonal_{commodity_id}_{model}"
+            
+            results = {cid: self._get_cached(cache_key(cid), version) for cid, version in versions.items()}
+            stale = sorted(cid for cid, result in results.items() if result is None)
+            
+            def compute():
+                decomposition = self.seasonal_decomposer.analyze(load_price_matrix(stale), model=model,
+                                                                 include_components=True)
+                computed = {}
+                for cid in stale:
+                    if cid in decomposition['series']:
+                        result = {'decomposed': True, **decomposition['series'][cid]}
+                    else:
+                        result = {'decomposed': False,
+                                  'reason': decomposition['skipped'].get(cid, 'No price data available')}
+                    self.analysis_cache[cache_key(cid)] = (result, datetime.utcnow(), versions[cid])
+                    computed[cid] = result
+                return computed
+            
+            if stale:
+                results.update(self.single_flight.do(
+                    ('seasonal', model, tuple((cid, versions[cid]) for cid in stale)), compute))
+            
+            series = []
+            skipped = []
+            for cid in sorted(results):
+                result = results[cid]
+                entry = {'commodity_id': cid, 'commodity': commodities[cid]}
+                if not result['decomposed']:
+                    skipped.append({**entry, 'reason': result['reason']})
+                    continue
+                entry.update({key: value for key, value in result.items()
+                              if key != 'decomposed' and (include_components or key != 'components')})
+                series.append(entry)
+            
+            return {
+                'analysis_date': datetime.utcnow().isoformat(),
+                'model': model,
+                'series_count': len(series),
+                'recomputed': len(stale),
+                'series': series,
+                'skipped': skipped
+            }
+    
+    def simulate_prices(self, commodity_id: int, horizon: int = 30, paths: int = 10000,
+                        method: str = 'gbm', seed: Optional[int] = None,
+                        quantiles: Optional[List[float]] = None) -> Dict[str, Any]:
+        """Simulate future prices of a commodity and return a quantile fan chart"""
+        with self.app.app_context():
+            commodity = Commodity.query.get(commodity_id)
+            if not commodity:
+                return {'error': f'Commodity {commodity_id} not found'}
+            
+            data = self._get_price_data(commodity_id)
+            if data.empty:
+                return {'error': 'No price data available for simulation'}
+            
+            result = self.monte_carlo.analyze(data, horizon=horizon, paths=paths, method=method, seed=seed,
+                                              quantiles=quantiles or MonteCarloSimulator.DEFAULT_QUANTILES)
+            result['commodity_id'] = commodity_id
+            result['commodity'] = commodity.name
+            return result
+    
+    def get_price_statistics(self, commodity_id: int) -> Dict[str, Any]:
+        """Get price statistics for a commodity from its streaming state"""
+        with self.app.app_context():
+            commodity = Commodity.query.get(commodity_id)
+            if not commodity:
+                return {'error': f'Commodity {commodity_id} not found'}
+            
+            loaded = self.price_stats.load_state(commodity_id)
+            if loaded is None:
+                # Concurrent first requests share one build of the state
+                def build():
+                    return 0 if self.price_stats.load_state(commodity_id) else self.price_stats.rebuild([commodity_id])
+                
+                self.single_flight.do(('price_stats', commodity_id), build)
+                loaded = self.price_stats.load_state(commodity_id)
+            if loaded is None:
+                return {'error': 'No data available for analysis'}
+            
+            entry, stats = loaded
+            result = self.analyzers['price'].analyze_from_state(stats, commodity=commodity.name)
+            if 'error' not in result:
+                result['date_range'] = {
+                    'start': entry.first_timestamp.isoformat() if entry.first_timestamp else None,
+                    'end': entry.last_timestamp.isoformat() if entry.last_timestamp else None
+                }
+                result['last_price'] = entry.last_price
+            return result
+    
+    def get_price_anomalies(self, commodity_id: Optional[int] = None, since: Optional[datetime] = None,
+                            limit: int = 100) -> Dict[str, Any]:
+        """Get price anomalies flagged during ingestion"""
+        with self.app.app_context():
+            if commodity_id is not None and not Commodity.query.get(commodity_id):
+                return {'error': f'Commodity {commodity_id} not found'}
+            
+            names = dict(db.session.query(Commodity.id, Commodity.name).all())
+            anomalies = self.anomaly_detector.get_anomalies(commodity_id, since, limit)
+            for anomaly in anomalies:
+                anomaly['commodity'] = names.get(anomaly['commodity_id'])
+            
+            return {
+                'count': len(anomalies),
+                'anomalies': anomalies
+            }
+    
     def clear_cache(self):
         """Clear the analysis cache"""
         self.analysis_cache.clear()
+        surface_cache.clear()
         self.logger.info("Analysis cache cleared")
     
     def get_cache_stats(self) -> Dict[str, Any]:
@@ -425,6 +1153,9 @@ class AnalyticsService:
         return {
             'cache_size': len(self.analysis_cache),
             'cache_ttl': self.cache_ttl,
-            'cached_analyses': list(self.analysis_cache.keys())
+            'cached_analyses': list(self.analysis_cache.keys()),
+            'single_flight': self.single_flight.get_stats(),
+            'ml_jobs': self.ml_jobs.get_stats(),
+            'volatility_surfaces': surface_cache.get_stats()
         }
 
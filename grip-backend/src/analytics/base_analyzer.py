@@ -4,6 +4,9 @@ from abc import ABC, abstractmethod
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
+from .batch_trends import batch_linear_trend
+from .volatility_surface import get_volatility_surface
+from .panel import Panel
 
 class BaseAnalyzer(ABC):
     """Base class for all analytics modules"""
@@ -17,6 +20,10 @@ class BaseAnalyzer(ABC):
         """Perform analysis on the provided data"""
         pass
     
+    def analyze_panel(self, panel: Panel, **kwargs) -> Dict[int, Dict[str, Any]]:
+        """Analyze every series of a Panel, keyed by series code"""
+        return {int(code): self.analyze(panel.series_frame(code), **kwargs) for code in panel.codes}
+    
     def validate_data(self, data: pd.DataFrame, required_columns: List[str]) -> bool:
         """Validate that data contains required columns"""
         missing_columns = set(required_columns) - set(data.columns)
@@ -47,7 +54,7 @@ class BaseAnalyzer(ABC):
             'min': series.min(),
             'max': series.max(),
             'count': len(series),
-            'null_count': series.isnull().sum()
+            'null_count': int(series.isnull().sum())
         }
     
     def detect_outliers(self, series: pd.Series, method: str = 'iqr') -> pd.Series:
@@ -67,55 +74,50 @@ class BaseAnalyzer(ABC):
         else:
             raise ValueError(f"Unknown outlier detection method: {method}")
     
-    def calculate_trend(self, series: pd.Series, periods: int = None) -> Dict[str, Any]:
-        """Calculate trend information for a time series"""
+    def calculate_trend(self, series, periods: int = None) -> Dict[str, Any]:
+        """Calculate trend information for a time series (a Series or array)"""
         if periods is None:
             periods = min(len(series), 12)  # Default to 12 periods
         
         if len(series) < 2:
             return {'trend': 'insufficient_data', 'slope': 0, 'r_squared': 0}
         
-        # Simple linear regression for trend
-        x = np.arange(len(series))
-        y = series.values
-        
-        # Remove NaN values
-        mask = ~np.isnan(y)
-        if mask.sum() < 2:
+        # Closed-form linear regression against the observation index
+        fit = batch_linear_trend(np.asarray(series, dtype=np.float64))
+        n = int(fit['n'][0])
+        if n < 2:
             return {'trend': 'insufficient_data', 'slope': 0, 'r_squared': 0}
         
-        x_clean = x[mask]
-        y_clean = y[mask]
-        
-        # Calculate slope and R-squared
-        slope, intercept = np.polyfit(x_clean, y_clean, 1)
-        y_pred = slope * x_clean + intercept
-        ss_res = np.sum((y_clean - y_pred) ** 2)
-        ss_tot = np.sum((y_clean - np.mean(y_clean)) ** 2)
-        r_squared = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
-        
-        # Determine trend direction
-        if abs(slope) < 0.01:  # Threshold for "flat" trend
-            trend = 'stable'
-        elif slope > 0:
-            trend = 'increasing'
-        else:
-            trend = 'decreasing'
+        slope = float(fit['slope'][0])
         
         return {
-            'trend': trend,
+            'trend': self.classify_trend(slope),
             'slope': slope,
-            'r_squared': r_squared,
-            'periods_analyzed': len(x_clean)
+            'r_squared': float(fit['r_squared'][0]),
+            'periods_analyzed': n
         }
     
-    def calculate_volatility(self, series: pd.Series, window: int = 30) -> float:
-        """Calculate volatility (rolling standard deviation)"""
+    @staticmethod
+    def classify_trend(slope: float) -> str:
+        """Classify a trend slope as increasing, decreasing or stable"""
+        if abs(slope) < 0.01:  # Threshold for "flat" trend
+            return 'stable'
+        elif slope > 0:
+            return 'increasing'
+        else:
+            return 'decreasing'
+    
+    def calculate_volatility(self, series: pd.Series, window: int = 30, surface=None) -> float:
+        """Calculate volatility (rolling standard deviation), optionally from the series' surface"""
         if len(series) < window:
             return series.std()
         
-        rolling_std = series.rolling(window=window).std()
-        return rolling_std.mean()
+        # Rolling stds come from the shared surface cache for this series
+        if surface is None:
+            surface = get_volatility_surface(series.to_numpy(dtype=np.float64), windows=(window,))
+        else:
+            surface.add_windows((window,))
+        return surface.mean_std(window)
     
     def generate_summary(self, analysis_results: Dict[str, Any]) -> str:
         """Generate a human-readable summary of analysis results"""
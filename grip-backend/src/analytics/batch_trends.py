@@ -0,0 +1,138 @@
+import numpy as np
+from typing import Dict
+
+# Closed-form least-squares trends for many series at once.
+#
+# Series are rows of a 2-D (series x time) array; NaN marks a missing
+# observation. Every statistic is computed from masked, centered sums in a
+# few vectorized passes, so thousands of series are fitted without a
+# Python-level loop.
+
+
+def _as_2d(values) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    return values[None, :] if values.ndim == 1 else values
+
+
+def batch_linear_trend(values, x=None) -> Dict[str, np.ndarray]:
+    """
+    Fit y = slope * x + intercept to every row of a 2-D array
+
+    Args:
+        values: (series x time) array; NaN entries are ignored
+        x: Regressor, broadcastable to values (defaults to the column index)
+
+    Returns arrays with one entry per series: n, mean_x, mean_y, sxx, syy,
+    sxy (centered sums of squares and cross-products), slope, intercept and
+    r_squared. Series with fewer than two observations, or no spread in x,
+    get a NaN slope and intercept and an r² of 0.
+    """
+    y = _as_2d(values)
+    if x is None:
+        x = np.arange(y.shape[1], dtype=np.float64)
+    x = np.broadcast_to(np.asarray(x, dtype=np.float64), y.shape)
+
+    mask = ~np.isnan(y)
+    n = mask.sum(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_x = np.where(mask, x, 0).sum(axis=1) / n
+        mean_y = np.where(mask, y, 0).sum(axis=1) / n
+        dx = np.where(mask, x - mean_x[:, None], 0)
+        dy = np.where(mask, y - mean_y[:, None], 0)
+        sxx = np.einsum('ij,ij->i', dx, dx)
+        syy = np.einsum('ij,ij->i', dy, dy)
+        sxy = np.einsum('ij,ij->i', dx, dy)
+
+        fitted = (n >= 2) & (sxx > 0)
+        slope = np.where(fitted, sxy / sxx, np.nan)
+        intercept = mean_y - slope * mean_x
+        r_squared = np.where(fitted & (syy > 0), sxy * sxy / (sxx * syy), 0.0)
+
+    return {
+        'n': n,
+        'mean_x': mean_x,
+        'mean_y': mean_y,
+        'sxx': sxx,
+        'syy': syy,
+        'sxy': sxy,
+        'slope': slope,
+        'intercept': intercept,
+        'r_squared': r_squared
+    }
+
+
+def rolling_linear_trend(values, window: int, min_periods: int = None) -> Dict[str, np.ndarray]:
+    """
+    Trend of every trailing window of every row of a 2-D array
+
+    Args:
+        values: (series x time) array; NaN entries are ignored
+        window: Window length in columns
+        min_periods: Minimum observations for a fit (defaults to window)
+
+    Returns (series x time - window + 1) arrays of n, slope, intercept and
+    r_squared, where column k is the window ending at column k + window - 1
+    and x runs from 0 to window - 1 inside each window. Windows with too few
+    observations are NaN.
+    """
+    y = _as_2d(values)
+    n_series, n_time = y.shape
+    if min_periods is None:
+        min_periods = window
+    if n_time < window:
+        empty = np.empty((n_series, 0))
+        return {'n': empty, 'slope': empty, 'intercept': empty, 'r_squared': empty}
+
+    mask = ~np.isnan(y)
+    m = mask.astype(np.float64)
+    # Centering each row keeps the windowed sums of squares well conditioned
+    counts = mask.sum(axis=1)
+    row_mean = np.where(mask, y, 0).sum(axis=1) / np.maximum(counts, 1)
+    yc = np.where(mask, y - row_mean[:, None], 0.0)
+    t = np.arange(n_time, dtype=np.float64)
+
+    def window_sums(a):
+        c = np.concatenate([np.zeros((n_series, 1)), np.cumsum(a, axis=1)], axis=1)
+        return c[:, window:] - c[:, :-window]
+
+    # Raw sums use the absolute column index t; shifting x to t - start below
+    # expresses them relative to each window's first column
+    n = window_sums(m)
+    st = window_sums(m * t)
+    stt = window_sums(m * t * t)
+    sy = window_sums(yc)
+    syy = window_sums(yc * yc)
+    sty = window_sums(yc * t)
+
+    start = np.arange(n_time - window + 1, dtype=np.float64)
+    sx = st - start * n
+    sxx_raw = stt - 2 * start * st + start * start * n
+    sxy_raw = sty - start * sy
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sxx = sxx_raw - sx * sx / n
+        sxy = sxy_raw - sx * sy / n
+        syy_c = np.maximum(syy - sy * sy / n, 0)
+        fitted = (n >= max(min_periods, 2)) & (sxx > 0)
+        slope = np.where(fitted, sxy / sxx, np.nan)
+        intercept = np.where(fitted, (sy / n + row_mean[:, None]) - slope * sx / n, np.nan)
+        r_squared = np.where(fitted, np.where(syy_c > 0, sxy * sxy / (sxx * syy_c), 0.0), np.nan)
+
+    return {'n': n, 'slope': slope, 'intercept': intercept, 'r_squared': np.clip(r_squared, 0, 1)}
+
+
+def left_align(groups) -> np.ndarray:
+    """
+    Stack variable-length series into a left-aligned NaN-padded 2-D array
+
+    Args:
+        groups: Sequence of 1-D arrays, one per series
+    """
+    lengths = np.array([len(g) for g in groups], dtype=np.int64)
+    panel = np.full((len(groups), lengths.max() if len(groups) else 0), np.nan)
+    if len(groups):
+        rows = np.repeat(np.arange(len(groups)), lengths)
+        cols = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        panel[rows, cols] = np.concatenate(groups)
+    return panel
@@ -0,0 +1,159 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Any, Optional
+from .base_analyzer import BaseAnalyzer
+from .batch_trends import batch_linear_trend
+from .panel import Panel
+
+class ComparisonEngine(BaseAnalyzer):
+    """Vectorized comparison of many price series held in one aligned panel"""
+
+    PERFORMANCE_HORIZONS = {'1m': 30, '3m': 90, '1y': 365}
+
+    def __init__(self):
+        super().__init__("ComparisonEngine")
+
+    def analyze(self, data, volatility_window: int = 30, **kwargs) -> Dict[Any, Dict[str, Any]]:
+        """
+        Compare every series in a wide price panel
+
+        Args:
+            data: Panel, or DataFrame indexed by date with one price column per commodity
+            volatility_window: Rolling window (in observations) for volatility
+
+        Returns a dict keyed by column label. Series keep their own observation
+        counts, so a monthly series compared with a daily one is measured over
+        its own observations exactly as PriceAnalyzer would measure it.
+        """
+        if isinstance(data, Panel):
+            data = data.to_frame()
+        if data.empty:
+            return {}
+
+        values = self.align_observations(data.to_numpy(dtype=np.float64))
+        counts = (~np.isnan(values)).sum(axis=0)
+
+        trends = self.calculate_trends(values)
+        volatility = self.calculate_rolling_volatility(values, counts, volatility_window)
+        returns = self.calculate_return_statistics(values, counts)
+        performance = {label: self.calculate_performance(values, counts, days)
+                       for label, days in self.PERFORMANCE_HORIZONS.items()}
+
+        results = {}
+        for j, column in enumerate(data.columns):
+            if counts[j] == 0:
+                results[column] = {'error': 'No data available for analysis'}
+                continue
+
+            results[column] = {
+                'current_price': self._to_float(values[-1, j]),
+                'data_points': int(counts[j]),
+                'trend': {key: trends[key][j] for key in trends},
+                'volatility': {'daily': self._to_float(volatility[j])},
+                'returns': {key: self._to_float(returns[key][j]) for key in returns},
+                'performance': {label: self._to_float(performance[label][j])
+                                for label in self.PERFORMANCE_HORIZONS}
+            }
+
+        return results
+
+    def analyze_panel(self, panel: Panel, **kwargs) -> Dict[Any, Dict[str, Any]]:
+        """Compare all series of a Panel together"""
+        return self.analyze(panel, **kwargs)
+
+    @staticmethod
+    def align_observations(values: np.ndarray) -> np.ndarray:
+        """Right-align each column's observations so every series ends on the last row"""
+        mask = ~np.isnan(values)
+        # A stable sort of the mask moves NaNs up and keeps observation order
+        order = np.argsort(mask, axis=0, kind='stable')
+        return np.take_along_axis(values, order, axis=0)
+
+    def calculate_trends(self, values: np.ndarray) -> Dict[str, List[Any]]:
+        """Least-squares trend for every column against its observation index"""
+        fit = batch_linear_trend(values.T)
+        n = fit['n']
+        # Intercept relative to each series' first observation
+        first_row = values.shape[0] - n
+        intercept = fit['intercept'] + fit['slope'] * first_row
+
+        trends = {'trend': [], 'slope': [], 'intercept': [], 'r_squared': [], 'periods_analyzed': []}
+        for j in range(values.shape[1]):
+            if n[j] < 2:
+                trends['trend'].append('insufficient_data')
+                trends['slope'].append(0)
+                trends['intercept'].append(None)
+                trends['r_squared'].append(0)
+            else:
+                trends['trend'].append(self.classify_trend(fit['slope'][j]))
+                trends['slope'].append(float(fit['slope'][j]))
+                trends['intercept'].append(float(intercept[j]))
+                trends['r_squared'].append(float(fit['r_squared'][j]))
+            trends['periods_analyzed'].append(int(n[j]))
+
+        return trends
+
+    def calculate_rolling_volatility(self, values: np.ndarray, counts: np.ndarray, window: int) -> np.ndarray:
+        """Mean rolling standard deviation of every right-aligned column"""
+        rows, cols = values.shape
+        mask = ~np.isnan(values)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Center each column before the cumulative sums to limit cancellation
+            col_mean = np.where(mask, values, 0).sum(axis=0) / counts
+            centered = np.where(mask, values - col_mean, 0)
+            full_std = np.sqrt((centered * centered).sum(axis=0) / (counts - 1))
+
+        if rows < window:
+            return full_std
+
+        s1 = np.vstack([np.zeros(cols), np.cumsum(centered, axis=0)])
+        s2 = np.vstack([np.zeros(cols), np.cumsum(centered * centered, axis=0)])
+        window_sum = s1[window:] - s1[:-window]
+        window_sq = s2[window:] - s2[:-window]
+        window_var = np.maximum((window_sq - window_sum ** 2 / window) / (window - 1), 0)
+
+        # Window ending on row t is complete once it lies inside the series
+        end_rows = np.arange(window - 1, rows)[:, None]
+        complete = end_rows >= (rows - counts + window - 1)
+        n_windows = complete.sum(axis=0)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rolling_mean = np.where(complete, np.sqrt(window_var), 0).sum(axis=0) / n_windows
+
+        return np.where(counts < window, full_std, rolling_mean)
+
+    def calculate_return_statistics(self, values: np.ndarray, counts: np.ndarray) -> Dict[str, np.ndarray]:
+        """Simple return statistics for every right-aligned column"""
+        rows = values.shape[0]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            returns = values[1:] / values[:-1] - 1
+            valid = np.isfinite(returns)
+            n_returns = valid.sum(axis=0)
+            r = np.where(valid, returns, 0)
+            mean = r.sum(axis=0) / n_returns
+            centered = np.where(valid, returns - mean, 0)
+            std = np.sqrt((centered * centered).sum(axis=0) / (n_returns - 1))
+
+            first_index = np.clip(rows - counts, 0, rows - 1)
+            first = values[first_index, np.arange(values.shape[1])]
+            total = values[-1] / first - 1
+
+        return {'mean': mean, 'std': std, 'total': total}
+
+    def calculate_performance(self, values: np.ndarray, counts: np.ndarray, days: int) -> np.ndarray:
+        """Percentage change over the last `days` observations of every column"""
+        if values.shape[0] < days:
+            return np.full(values.shape[1], np.nan)
+
+        current = values[-1]
+        past = values[-days]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            performance = (current - past) / past * 100
+        return np.where(counts >= days, performance, np.nan)
+
+    @staticmethod
+    def _to_float(value) -> Optional[float]:
+        """Convert a NumPy scalar to a JSON-friendly float"""
+        return None if value is None or not np.isfinite(value) else float(value)
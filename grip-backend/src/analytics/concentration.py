@@ -0,0 +1,61 @@
+import numpy as np
+from typing import Dict, Sequence
+
+# Market concentration of production across producing countries.
+#
+# Shares of each commodity-year are sorted once in descending order; every
+# concentration ratio CR-n is then a read of the cumulative shares at rank
+# n, and the Herfindahl-Hirschman Index is the sum of squared shares.
+
+CONCENTRATION_RATIOS = (3, 5, 10)
+# HHI thresholds (0-10000 scale) between low, moderate and high concentration
+HHI_MODERATE = 1500
+HHI_HIGH = 2500
+
+
+def concentration_series(volumes: np.ndarray, ratios: Sequence[int] = CONCENTRATION_RATIOS) -> Dict[str, np.ndarray]:
+    """
+    HHI, concentration ratios and top-producer share of every commodity and year
+
+    Args:
+        volumes: (commodity x country x year) production volumes, NaN where a
+            country reported nothing
+        ratios: n of the CR-n ratios to compute
+
+    Returns (commodity x year) arrays: total production, producers (countries
+    reporting), hhi (0-10000), cr<n> and top_share (percent of total) and
+    top_country (position of the largest producer on the country axis).
+    Metrics of commodity-years without positive total production are NaN.
+    """
+    n_commodities, n_countries, n_years = volumes.shape
+    reported = ~np.isnan(volumes)
+    values = np.where(reported, volumes, 0.0)
+    total = values.sum(axis=1)
+    valid = total > 0
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shares = values / np.where(valid, total, np.nan)[:, None, :]
+    ranked = -np.sort(-shares, axis=1)
+    # cumulative[:, n] is the combined share of the n largest producers
+    cumulative = np.concatenate([np.zeros((n_commodities, 1, n_years)), np.cumsum(ranked, axis=1)], axis=1)
+
+    result = {
+        'total': total,
+        'producers': reported.sum(axis=1),
+        'hhi': np.where(valid, (shares * shares).sum(axis=1) * 10000, np.nan),
+        'top_share': np.where(valid, cumulative[:, min(1, n_countries)] * 100, np.nan),
+        'top_country': (np.argmax(values, axis=1) if n_countries
+                        else np.zeros((n_commodities, n_years), dtype=np.int64))
+    }
+    for n in ratios:
+        result[f'cr{n}'] = np.where(valid, cumulative[:, min(n, n_countries)] * 100, np.nan)
+    return result
+
+
+def concentration_level(hhi: float) -> str:
+    """Low, Moderate or High concentration of an HHI value"""
+    if hhi < HHI_MODERATE:
+        return 'Low'
+    if hhi < HHI_HIGH:
+        return 'Moderate'
+    return 'High'
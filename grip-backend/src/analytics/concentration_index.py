@@ -0,0 +1,62 @@
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from .concentration import concentration_series, concentration_level
+from .production_cube import get_production_cube
+from .production_index import ProductionIndexer
+from ..models.user import db
+from ..models.commodity import Commodity
+from ..models.country import Country
+from ..models.production_concentration import ProductionConcentration
+
+class ConcentrationIndexer(ProductionIndexer):
+    """Yearly production concentration of every commodity (/api/analytics/concentration)
+
+    Every ProductionConcentration row holds the HHI, concentration ratios
+    and top-producer share of one commodity and year, computed for all
+    years of the rebuilt commodities at once.
+    """
+
+    model = ProductionConcentration
+    row_description = 'commodity-years of production concentration'
+
+    def compute_rows(self, commodity_ids: Optional[List[int]]) -> List[Dict[str, Any]]:
+        volumes, axes = get_production_cube().slice('production', commodity_ids=commodity_ids)
+        metrics = concentration_series(volumes)
+
+        commodities, years = np.nonzero(metrics['total'] > 0)
+        rows = []
+        for c, y in zip(commodities, years):
+            hhi = float(metrics['hhi'][c, y])
+            rows.append({
+                'commodity_id': int(axes['commodity'][c]),
+                'year': int(axes['year'][y]),
+                'total_production': float(metrics['total'][c, y]),
+                'number_of_producers': int(metrics['producers'][c, y]),
+                'hhi': hhi,
+                'concentration_level': concentration_level(hhi),
+                'cr3': float(metrics['cr3'][c, y]),
+                'cr5': float(metrics['cr5'][c, y]),
+                'cr10': float(metrics['cr10'][c, y]),
+                'top_producer_share': float(metrics['top_share'][c, y]),
+                'top_producer_country_id': int(axes['country'][metrics['top_country'][c, y]])
+            })
+        return rows
+
+    def get_concentration(self, commodity_id: Optional[int] = None, start_year: Optional[int] = None,
+                          end_year: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Concentration rows ordered by commodity and year, with commodity and top producer names"""
+        query = (db.session.query(ProductionConcentration, Commodity.name, Country.name)
+                 .join(Commodity, ProductionConcentration.commodity_id == Commodity.id)
+                 .outerjoin(Country, ProductionConcentration.top_producer_country_id == Country.id))
+        if commodity_id is not None:
+            query = query.filter(ProductionConcentration.commodity_id == commodity_id)
+        if start_year is not None:
+            query = query.filter(ProductionConcentration.year >= start_year)
+        if end_year is not None:
+            query = query.filter(ProductionConcentration.year <= end_year)
+
+        rows = query.order_by(ProductionConcentration.commodity_id, ProductionConcentration.year).all()
+        return [{**entry.to_dict(), 'commodity': commodity, 'top_producer': country}
+                for entry, commodity, country in rows]
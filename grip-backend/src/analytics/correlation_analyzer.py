@@ -0,0 +1,188 @@
+import pandas as pd
+import numpy as np
+from collections import deque
+from typing import Dict, List, Any, Optional
+from datetime import datetime
+from .base_analyzer import BaseAnalyzer
+from .panel import Panel
+
+class CorrelationAnalyzer(BaseAnalyzer):
+    """Analyzer for cross-commodity return correlation and covariance"""
+
+    # Resampling rules for supported return frequencies; daily returns are
+    # taken over business days, so weekends do not break Monday's return
+    FREQUENCIES = {
+        'daily': 'B',
+        'weekly': 'W-FRI',
+        'monthly': 'ME',
+        'quarterly': 'QE'
+    }
+
+    def __init__(self):
+        super().__init__("CorrelationAnalyzer")
+
+    def analyze(self, data, window: int = 12, frequency: str = 'monthly',
+                min_periods: int = None, rolling_windows: Optional[int] = 1, **kwargs) -> Dict[str, Any]:
+        """
+        Analyze correlation structure across a panel of price series
+
+        Args:
+            data: Panel, or DataFrame indexed by date with one price column per series
+            window: Rolling window length, in periods of `frequency`
+            frequency: Return frequency ('daily', 'weekly', 'monthly', 'quarterly')
+            min_periods: Minimum overlapping returns for a rolling estimate (defaults to window)
+            rolling_windows: Number of most recent rolling windows whose full
+                matrices are returned (None for every window); the average
+                correlation is returned for every window
+        """
+        if frequency not in self.FREQUENCIES:
+            return {'error': f'Unknown frequency: {frequency}'}
+
+        if isinstance(data, Panel):
+            data = data.to_frame()
+
+        if data.shape[1] < 2:
+            return {'error': 'At least 2 series required for correlation analysis'}
+
+        returns = self.calculate_returns(data, frequency)
+        if len(returns) < 2:
+            return {'error': 'Insufficient overlapping data for correlation analysis'}
+
+        if min_periods is None:
+            min_periods = window
+
+        labels = list(returns.columns)
+        values = returns.to_numpy(dtype=np.float64)
+
+        correlation, covariance, pair_counts = self.correlation_matrices(values)
+        rolling_average, rolling_correlation, rolling_covariance = self.rolling_correlation_matrices(
+            values, window, min_periods, keep=rolling_windows)
+
+        rolling_dates = returns.index[window - 1:] if len(returns) >= window else returns.index[:0]
+        matrix_start = len(rolling_average) - len(rolling_correlation)
+
+        return {
+            'analysis_date': datetime.utcnow().isoformat(),
+            'series': labels,
+            'frequency': frequency,
+            'window': window,
+            'observations': len(returns),
+            'date_range': {
+                'start': returns.index.min().isoformat(),
+                'end': returns.index.max().isoformat()
+            },
+            'correlation': self._to_nested_list(correlation),
+            'covariance': self._to_nested_list(covariance),
+            'pair_observations': pair_counts.astype(int).tolist(),
+            'average_correlation': self._average_off_diagonal(correlation),
+            'rolling': {
+                'dates': [d.isoformat() for d in rolling_dates],
+                'average_correlation': rolling_average,
+                'matrix_dates': [d.isoformat() for d in rolling_dates[matrix_start:]],
+                'correlation': [self._to_nested_list(m) for m in rolling_correlation],
+                'covariance': [self._to_nested_list(m) for m in rolling_covariance]
+            }
+        }
+
+    def analyze_panel(self, panel: Panel, **kwargs) -> Dict[str, Any]:
+        """Analyze all series of a Panel together"""
+        return self.analyze(panel, **kwargs)
+
+    def calculate_returns(self, data: pd.DataFrame, frequency: str) -> pd.DataFrame:
+        """Resample prices to the requested frequency and compute simple returns"""
+        # Compact float32 panels are resampled first, then widened for the return arithmetic
+        prices = data.sort_index().resample(self.FREQUENCIES[frequency]).last().astype(np.float64)
+        returns = prices.pct_change(fill_method=None)
+        returns = returns.replace([np.inf, -np.inf], np.nan)
+        return returns.dropna(how='all')
+
+    def correlation_matrices(self, values: np.ndarray):
+        """Full-sample pairwise-complete correlation and covariance matrices"""
+        mask = (~np.isnan(values)).astype(np.float64)
+        x = np.where(mask > 0, values, 0.0)
+
+        # sums[i, j] are taken over the periods where both i and j are observed
+        n = mask.T @ mask
+        sx = x.T @ mask
+        sxx = (x * x).T @ mask
+        sxy = x.T @ x
+
+        correlation, covariance = self._from_sums(n, sx, sxx, sxy, min_periods=2)
+        return correlation, covariance, n
+
+    def rolling_correlation_matrices(self, values: np.ndarray, window: int, min_periods: int,
+                                     keep: Optional[int] = None):
+        """
+        Rolling pairwise-complete correlation and covariance matrices
+
+        The pairwise sums are updated incrementally: each step adds the period
+        entering the window and subtracts the one leaving it, so every window
+        costs O(N²) regardless of its length.
+
+        Returns the average off-diagonal correlation of every window, and the
+        correlation and covariance matrices of the last `keep` windows (all
+        windows when None); only those matrices are held in memory.
+        """
+        periods, n_series = values.shape
+        if periods < window:
+            return [], [], []
+
+        mask = (~np.isnan(values)).astype(np.float64)
+        x = np.where(mask > 0, values, 0.0)
+
+        n = np.zeros((n_series, n_series))
+        sx = np.zeros((n_series, n_series))
+        sxx = np.zeros((n_series, n_series))
+        sxy = np.zeros((n_series, n_series))
+
+        averages = []
+        correlations = deque(maxlen=keep)
+        covariances = deque(maxlen=keep)
+
+        for t in range(periods):
+            m_in, x_in = mask[t], x[t]
+            n += np.outer(m_in, m_in)
+            sx += np.outer(x_in, m_in)
+            sxx += np.outer(x_in * x_in, m_in)
+            sxy += np.outer(x_in, x_in)
+
+            if t >= window:
+                m_out, x_out = mask[t - window], x[t - window]
+                n -= np.outer(m_out, m_out)
+                sx -= np.outer(x_out, m_out)
+                sxx -= np.outer(x_out * x_out, m_out)
+                sxy -= np.outer(x_out, x_out)
+
+            if t >= window - 1:
+                correlation, covariance = self._from_sums(n, sx, sxx, sxy, min_periods)
+                averages.append(self._average_off_diagonal(correlation))
+                correlations.append(correlation)
+                covariances.append(covariance)
+
+        return averages, list(correlations), list(covariances)
+
+    def _from_sums(self, n, sx, sxx, sxy, min_periods: int):
+        """Turn pairwise sufficient statistics into correlation and covariance"""
+        n = np.rint(n)  # Counts may carry float error after incremental updates
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # sx[i, j] / n[i, j] is the mean of i over the periods shared with j
+            covariance = (sxy - sx * sx.T / n) / (n - 1)
+            var_i = np.maximum(sxx - sx * sx / n, 0) / (n - 1)
+            correlation = covariance / np.sqrt(var_i * var_i.T)
+
+        insufficient = n < max(min_periods, 2)
+        covariance = np.where(insufficient, np.nan, covariance)
+        correlation = np.where(insufficient, np.nan, np.clip(correlation, -1.0, 1.0))
+        return correlation, covariance
+
+    @staticmethod
+    def _to_nested_list(matrix: np.ndarray) -> List[List[Optional[float]]]:
+        """Convert a matrix to JSON-friendly nested lists (NaN becomes None)"""
+        return [[float(v) if np.isfinite(v) else None for v in row] for row in matrix]
+
+    @staticmethod
+    def _average_off_diagonal(matrix: np.ndarray) -> Optional[float]:
+        """Mean of the defined off-diagonal correlations"""
+        off_diagonal = matrix[~np.eye(matrix.shape[0], dtype=bool)]
+        off_diagonal = off_diagonal[np.isfinite(off_diagonal)]
+        return float(off_diagonal.mean()) if len(off_diagonal) else None
@@ -0,0 +1,201 @@
+import pandas as pd
+import numpy as np
+from typing import Optional, Sequence
+from sqlalchemy import select, cast, func, Float, String, type_coerce
+
+from .panel import Panel
+from ..models.user import db
+from ..models.country import Country
+from ..models.production_data import ProductionData
+from ..models.price_data import PriceData
+from ..models.reserves_data import ReservesData
+
+# Loaders that build analysis DataFrames straight from Core selects.
+#
+# Numeric columns are cast to floats in SQL (no per-row Decimal conversion),
+# related names come from explicit joins (no lazy relationship loads), and
+# each column is materialized once from the raw cursor rows with its final
+# dtype.
+
+
+def _execute(stmt):
+    """Execute a Core select and fetch all rows from the DBAPI cursor
+
+    Reading the cursor directly skips Row construction and result
+    processors, so every selected column must already have its final
+    Python type as returned by the driver.
+    """
+    connection = db.session.connection()
+    result = connection.execute(stmt)
+    try:
+        return result.cursor.fetchall()
+    finally:
+        result.close()
+
+
+def _timestamp_column():
+    """Timestamp column for price selects
+
+    SQLite stores DATETIME as ISO text, and SQLAlchemy would otherwise parse
+    it row by row; reading the raw text lets pandas parse it in one pass.
+    """
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return type_coerce(PriceData.timestamp, String).label('date')
+    return PriceData.timestamp.label('date')
+
+
+def _datetime_column(values: Sequence) -> pd.Series:
+    """Build a datetime64 column from fetched timestamps or ISO strings"""
+    if values and isinstance(values[0], str):
+        return pd.to_datetime(pd.Series(values), format='ISO8601')
+    return pd.to_datetime(pd.Series(values))
+
+
+def _float_column(values: Sequence) -> np.ndarray:
+    """Build a float64 column from fetched values (None becomes NaN)"""
+    return np.array(values, dtype=np.float64)
+
+
+def load_price_frame(commodity_ids) -> pd.DataFrame:
+    """
+    Load price history for one or more commodities
+
+    Returns a DataFrame with columns ['date', 'price', 'currency', 'volume',
+    'commodity_id'] sorted by commodity and date, with float64 prices and
+    rows without a price removed.
+    """
+    if isinstance(commodity_ids, int):
+        commodity_ids = [commodity_ids]
+
+    stmt = (select(_timestamp_column(),
+                   cast(PriceData.price, Float).label('price'),
+                   PriceData.currency,
+                   cast(PriceData.volume, Float).label('volume'),
+                   PriceData.commodity_id)
+            .where(PriceData.commodity_id.in_(list(commodity_ids)))
+            .order_by(PriceData.commodity_id, PriceData.timestamp))
+
+    rows = _execute(stmt)
+    if not rows:
+        return pd.DataFrame()
+
+    dates, prices, currencies, volumes, ids = zip(*rows)
+    df = pd.DataFrame({
+        'date': _datetime_column(dates),
+        'price': _float_column(prices),
+        'currency': pd.Categorical(currencies),
+        'volume': _float_column(volumes),
+        'commodity_id': np.array(ids, dtype=np.int64)
+    })
+    return df.dropna(subset=['price']).reset_index(drop=True)
+
+
+def load_production_frame(commodity_ids) -> pd.DataFrame:
+    """
+    Load production history for one or more commodities
+
+    Returns a DataFrame with columns ['year', 'production_volume', 'unit',
+    'country', 'commodity_id'] sorted by commodity and year, with a float64
+    volume and a categorical country column.
+    """
+    if isinstance(commodity_ids, int):
+        commodity_ids = [commodity_ids]
+
+    stmt = (select(ProductionData.year,
+                   cast(ProductionData.production_volume, Float).label('production_volume'),
+                   ProductionData.unit,
+                   Country.name.label('country'),
+                   ProductionData.commodity_id)
+            .join(Country, ProductionData.country_id == Country.id)
+            .where(ProductionData.commodity_id.in_(list(commodity_ids)))
+            .order_by(ProductionData.commodity_id, ProductionData.year))
+
+    rows = _execute(stmt)
+    if not rows:
+        return pd.DataFrame()
+
+    years, volumes, units, countries, ids = zip(*rows)
+    df = pd.DataFrame({
+        'year': np.array(years, dtype=np.int64),
+        'production_volume': _float_column(volumes),
+        'unit': pd.Categorical(units),
+        'country': pd.Categorical(countries),
+        'commodity_id': np.array(ids, dtype=np.int64)
+    })
+    return df.dropna(subset=['production_volume']).reset_index(drop=True)
+
+
+def load_volume_cells(measure: str):
+    """
+    Load every production or reserves volume as aligned arrays
+
+    Args:
+        measure: 'production' or 'reserves'
+
+    Returns (commodity_ids, country_ids, years, volumes) arrays for the rows
+    with a volume, and the number and largest id of all rows in the table.
+    """
+    model, column = ((ProductionData, ProductionData.production_volume) if measure == 'production'
+                     else (ReservesData, ReservesData.reserves_volume))
+
+    stmt = (select(model.commodity_id, model.country_id, model.year, cast(column, Float))
+            .where(column.isnot(None)))
+    rows = _execute(stmt)
+    row_count, max_id = db.session.query(func.count(model.id), func.max(model.id)).one()
+
+    if rows:
+        commodity_ids, country_ids, years, volumes = zip(*rows)
+    else:
+        commodity_ids = country_ids = years = volumes = ()
+    return (np.array(commodity_ids, dtype=np.int64), np.array(country_ids, dtype=np.int64),
+            np.array(years, dtype=np.int64), _float_column(volumes), (int(row_count), int(max_id or 0)))
+
+
+def load_price_matrix(commodity_ids, dtype=np.float32) -> Panel:
+    """
+    Load price histories for many commodities into a compact Panel
+
+    Only dates, prices and commodity ids are fetched, and the matrix is built
+    with one scatter: columns are coded by commodity id, dates a commodity
+    has no observation for are NaN, and duplicate timestamps keep the last
+    stored observation. Commodities without prices are absent.
+    """
+    if isinstance(commodity_ids, int):
+        commodity_ids = [commodity_ids]
+
+    stmt = (select(_timestamp_column(),
+                   cast(PriceData.price, Float).label('price'),
+                   PriceData.commodity_id)
+            .where(PriceData.commodity_id.in_(list(commodity_ids)))
+            .where(PriceData.price.isnot(None))
+            .order_by(PriceData.commodity_id, PriceData.timestamp, PriceData.id))
+
+    rows = _execute(stmt)
+    if not rows:
+        return Panel(np.empty((0, 0), dtype=dtype), pd.DatetimeIndex([]), [])
+
+    dates, prices, ids = zip(*rows)
+    return Panel.from_long(_datetime_column(dates).to_numpy(), ids, _float_column(prices), dtype=dtype)
+
+
+def load_production_matrix(commodity_ids, dtype=np.float32) -> Panel:
+    """
+    Load production histories into a compact Panel with one series per commodity and country
+
+    The index holds years; series codes index `labels`, a list of
+    (commodity_id, country) pairs. Volumes of the same commodity, country
+    and year are summed.
+    """
+    production = load_production_frame(commodity_ids)
+    if production.empty:
+        return Panel(np.empty((0, 0), dtype=dtype), pd.Index([], dtype=np.int64), [],
+                     labels=[], index_name='year', value_name='production_volume')
+
+    totals = (production.groupby(['commodity_id', 'country', 'year'], observed=True, sort=True)
+              ['production_volume'].sum().reset_index())
+    series_codes, keys = pd.factorize(pd.MultiIndex.from_frame(totals[['commodity_id', 'country']]))
+
+    return Panel.from_long(totals['year'].to_numpy(), series_codes, totals['production_volume'].to_numpy(),
+                           dtype=dtype, labels=[(int(c), country) for c, country in keys],
+                           index_name='year', value_name='production_volume')
+
@@ -0,0 +1,103 @@
+import numpy as np
+from typing import Dict
+
+# Reserves-to-production (R/P) ratios and depletion horizons.
+#
+# The R/P ratio is the number of years reserves last at the current
+# production rate. The depletion horizon lets production keep growing at
+# its recent trend: with continuous growth g, cumulative production
+# P * (e^(gT) - 1) / g exhausts reserves R after T = ln(1 + g * R / P) / g
+# years. A declining trend that never exhausts the reserves
+# (1 + g * R / P <= 0) has no horizon.
+
+# Years of production (up to and including the reference year) the growth trend is fitted on
+TREND_YEARS = 10
+# Observations required to fit a trend; fewer assume constant production
+MIN_TREND_POINTS = 3
+
+
+def production_growth(production: np.ndarray, latest: np.ndarray, window: int = TREND_YEARS,
+                      min_points: int = MIN_TREND_POINTS) -> np.ndarray:
+    """
+    Continuous growth rate of every series from a log-linear least-squares fit
+
+    Args:
+        production: (... x year) production volumes, NaN where unreported
+        latest: (...) position of each series' reference year, -1 for none
+        window: Years ending at the reference year included in the fit
+        min_points: Positive observations required for a fit
+
+    Returns the (...) slope of log production per year, NaN where too few
+    observations fall in the window.
+    """
+    positions = np.arange(production.shape[-1])
+    latest = latest[..., None]
+    in_window = (positions <= latest) & (positions > latest - window) & (latest >= 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        logs = np.where(in_window & (production > 0), np.log(production), np.nan)
+    observed = ~np.isnan(logs)
+
+    n = observed.sum(axis=-1)
+    x = np.where(observed, positions, 0.0)
+    y = np.where(observed, logs, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_mean = x.sum(axis=-1) / n
+        y_mean = y.sum(axis=-1) / n
+        dx = np.where(observed, positions - x_mean[..., None], 0.0)
+        dy = np.where(observed, logs - y_mean[..., None], 0.0)
+        slope = (dx * dy).sum(axis=-1) / (dx * dx).sum(axis=-1)
+    return np.where(n >= min_points, slope, np.nan)
+
+
+def depletion_years(rp_ratio: np.ndarray, growth: np.ndarray) -> np.ndarray:
+    """Years until reserves are exhausted when production grows at a continuous rate (NaN growth is constant)"""
+    growth = np.nan_to_num(growth)
+    steady = np.abs(growth) < 1e-12
+    with np.errstate(invalid='ignore', divide='ignore'):
+        base = 1 + growth * rp_ratio
+        horizon = np.log(np.where(base > 0, base, np.nan)) / np.where(steady, 1.0, growth)
+    return np.where(steady, rp_ratio, horizon)
+
+
+def depletion_horizons(production: np.ndarray, reserves: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    R/P ratios and depletion horizons of every commodity and producing country, and of world totals
+
+    Args:
+        production: (commodity x country x year) production volumes, NaN where unreported
+        reserves: Reserves volumes on the same axes
+
+    Each (commodity, country) series is evaluated at its latest year
+    reporting both reserves and positive production; world figures of a
+    commodity use the latest year with reserves and positive production
+    totals. Returns (commodity x country) arrays year (position on the year
+    axis, -1 if none), reserves, production, rp_ratio, growth (continuous
+    annual rate) and depletion_years, and the same per-commodity arrays
+    prefixed with 'world_'. Figures without a reference year are NaN.
+    """
+    def totals(volumes):
+        return np.where(np.isnan(volumes).all(axis=1), np.nan, np.nansum(volumes, axis=1))
+
+    result = {}
+    for prefix, prod, res in (('', production, reserves),
+                              ('world_', totals(production), totals(reserves))):
+        paired = (prod > 0) & (res >= 0)
+        has_pair = paired.any(axis=-1)
+        latest = np.where(has_pair, prod.shape[-1] - 1 - np.argmax(paired[..., ::-1], axis=-1), -1)
+
+        at = np.maximum(latest, 0)[..., None]
+        current_production = np.where(has_pair, np.take_along_axis(prod, at, axis=-1)[..., 0], np.nan)
+        current_reserves = np.where(has_pair, np.take_along_axis(res, at, axis=-1)[..., 0], np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rp_ratio = current_reserves / current_production
+        growth = production_growth(prod, latest)
+
+        result.update({
+            f'{prefix}year': latest,
+            f'{prefix}reserves': current_reserves,
+            f'{prefix}production': current_production,
+            f'{prefix}rp_ratio': rp_ratio,
+            f'{prefix}growth': growth,
+            f'{prefix}depletion_years': depletion_years(rp_ratio, growth)
+        })
+    return result
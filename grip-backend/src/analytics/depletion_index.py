@@ -0,0 +1,84 @@
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from .depletion import depletion_horizons
+from .production_cube import get_production_cube
+from .production_index import ProductionIndexer
+from ..models.user import db
+from ..models.commodity import Commodity
+from ..models.country import Country
+from ..models.depletion_horizon import DepletionHorizon
+
+class DepletionIndexer(ProductionIndexer):
+    """Reserves-to-production ratios and depletion horizons (/api/analytics/depletion)
+
+    Every DepletionHorizon row holds the R/P ratio, production trend and
+    depletion horizon of one commodity in one country, or of its world
+    totals (country_id NULL), from the production and reserves arrays of
+    the cube; ingested reserves rebuild a commodity too.
+    """
+
+    model = DepletionHorizon
+    uses_reserves = True
+    row_description = 'depletion horizons'
+
+    def compute_rows(self, commodity_ids: Optional[List[int]]) -> List[Dict[str, Any]]:
+        cube = get_production_cube()
+        production, axes = cube.slice('production', commodity_ids=commodity_ids)
+        reserves, _ = cube.slice('reserves', commodity_ids=commodity_ids)
+
+        rows = []
+        if production.size:
+            metrics = depletion_horizons(production, reserves)
+            years = axes['year']
+
+            def row(commodity, country, prefix, cell):
+                depletion = metrics[f'{prefix}depletion_years'][cell]
+                growth = metrics[f'{prefix}growth'][cell]
+                return {
+                    'commodity_id': int(commodity),
+                    'country_id': int(country) if country is not None else None,
+                    'year': int(years[metrics[f'{prefix}year'][cell]]),
+                    'reserves': float(metrics[f'{prefix}reserves'][cell]),
+                    'production': float(metrics[f'{prefix}production'][cell]),
+                    'rp_ratio': float(metrics[f'{prefix}rp_ratio'][cell]),
+                    'production_growth': float(growth) if np.isfinite(growth) else None,
+                    'depletion_years': float(depletion) if np.isfinite(depletion) else None
+                }
+
+            for c, k in zip(*np.nonzero(metrics['year'] >= 0)):
+                rows.append(row(axes['commodity'][c], axes['country'][k], '', (c, k)))
+            for c in np.flatnonzero(metrics['world_year'] >= 0):
+                rows.append(row(axes['commodity'][c], None, 'world_', c))
+        return rows
+
+    def get_commodity(self, commodity_id: int) -> Dict[str, Any]:
+        """World horizon of a commodity and its countries, shortest horizon first"""
+        rows = (db.session.query(DepletionHorizon, Country.name)
+                .outerjoin(Country, DepletionHorizon.country_id == Country.id)
+                .filter(DepletionHorizon.commodity_id == commodity_id).all())
+
+        world = None
+        countries = []
+        for entry, country in rows:
+            if entry.country_id is None:
+                world = entry.to_dict()
+            else:
+                countries.append({**entry.to_dict(), 'country': country})
+        countries.sort(key=self._horizon_order)
+        return {'world': world, 'countries': countries}
+
+    def get_country(self, country_id: int) -> List[Dict[str, Any]]:
+        """Horizons of every commodity a country holds reserves of, shortest horizon first"""
+        rows = (db.session.query(DepletionHorizon, Commodity.name)
+                .join(Commodity, DepletionHorizon.commodity_id == Commodity.id)
+                .filter(DepletionHorizon.country_id == country_id).all())
+        return sorted(({**entry.to_dict(), 'commodity': commodity} for entry, commodity in rows),
+                      key=self._horizon_order)
+
+    @staticmethod
+    def _horizon_order(record: Dict[str, Any]):
+        # Never-exhausted reserves sort last
+        depletion = record['depletion_years']
+        return (depletion is None, depletion if depletion is not None else 0, record['rp_ratio'])
@@ -0,0 +1,181 @@
+import numpy as np
+from typing import Tuple
+
+# Array kernels behind the price movement and risk analyses.
+#
+# Every kernel has a vectorized NumPy implementation and a single-pass loop
+# implementation. When Numba is installed the loops are compiled and used
+# instead; without it the NumPy versions run and the loops stay plain Python
+# (they are still exercised by the tests to keep both paths in agreement).
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    njit = None
+    HAS_NUMBA = False
+
+
+def _run_lengths_loop(condition):
+    lengths = np.empty(len(condition) // 2 + 1, dtype=np.int64)
+    count = 0
+    current = 0
+    for flag in condition:
+        if flag:
+            current += 1
+        elif current > 0:
+            lengths[count] = current
+            count += 1
+            current = 0
+    if current > 0:
+        lengths[count] = current
+        count += 1
+    return lengths[:count]
+
+
+def _max_drawdown_loop(values):
+    n = len(values)
+    if n == 0:
+        return np.nan, -1, -1
+    running_max = values[0]
+    running_max_index = 0
+    worst = 0.0
+    peak = 0
+    trough = 0
+    for i in range(n):
+        if values[i] > running_max:
+            running_max = values[i]
+            running_max_index = i
+        drawdown = values[i] / running_max - 1
+        if drawdown < worst:
+            worst = drawdown
+            peak = running_max_index
+            trough = i
+    return worst, peak, trough
+
+
+def _local_extrema_loop(values, window):
+    n = len(values)
+    minima = np.zeros(n, dtype=np.bool_)
+    maxima = np.zeros(n, dtype=np.bool_)
+    for i in range(max(window - 1, 1), n - 1):
+        value = values[i]
+        if np.isnan(value) or np.isnan(values[i - 1]) or np.isnan(values[i + 1]):
+            continue
+        lowest = value
+        highest = value
+        complete = True
+        for j in range(i - window + 1, i + 1):
+            if np.isnan(values[j]):
+                complete = False
+                break
+            lowest = min(lowest, values[j])
+            highest = max(highest, values[j])
+        if not complete:
+            continue
+        minima[i] = value == lowest and values[i - 1] > value and values[i + 1] > value
+        maxima[i] = value == highest and values[i - 1] < value and values[i + 1] < value
+    return minima, maxima
+
+
+if HAS_NUMBA:
+    _run_lengths_jit = njit(cache=True)(_run_lengths_loop)
+    _max_drawdown_jit = njit(cache=True)(_max_drawdown_loop)
+    _local_extrema_jit = njit(cache=True)(_local_extrema_loop)
+
+
+def run_lengths(condition: np.ndarray) -> np.ndarray:
+    """Lengths of the consecutive runs of True values, in order"""
+    condition = np.asarray(condition, dtype=bool)
+    if HAS_NUMBA:
+        return _run_lengths_jit(condition)
+
+    # Run boundaries are where the padded mask flips
+    edges = np.diff(np.concatenate(([0], condition.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return ends - starts
+
+
+def max_drawdown(values: np.ndarray) -> Tuple[float, int, int]:
+    """
+    Largest peak-to-trough decline of a positive series
+
+    Returns (drawdown, peak_index, trough_index) where drawdown is the
+    relative decline (<= 0). A series that never declines returns
+    (0.0, 0, 0); an empty one returns (nan, -1, -1).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if HAS_NUMBA:
+        worst, peak, trough = _max_drawdown_jit(values)
+        return float(worst), int(peak), int(trough)
+
+    if len(values) == 0:
+        return float('nan'), -1, -1
+
+    running_max = np.maximum.accumulate(values)
+    drawdown = values / running_max - 1
+    trough = int(np.argmin(drawdown))
+    if drawdown[trough] >= 0:
+        return 0.0, 0, 0
+
+    # The peak is where the running maximum in force at the trough was set
+    peak = int(np.argmax(values[:trough + 1]))
+    return float(drawdown[trough]), peak, trough
+
+
+def rolling_extreme(values: np.ndarray, window: int, ufunc=np.minimum) -> np.ndarray:
+    """
+    Minimum (or maximum, with ufunc=np.maximum) of every complete trailing window
+
+    Uses the van Herk/Gil-Werman block decomposition: each window spans the
+    suffix of one block and the prefix of the next, so the cost is O(n)
+    whatever the window length. NaNs propagate to every window containing
+    them. Returns len(values) - window + 1 values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n < window:
+        return np.empty(0)
+
+    fill = np.inf if ufunc is np.minimum else -np.inf
+    padded = np.concatenate([values, np.full(-n % window, fill)])
+    blocks = padded.reshape(-1, window)
+    prefix = ufunc.accumulate(blocks, axis=1).ravel()
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    return ufunc(suffix[:n - window + 1], prefix[window - 1:n])
+
+
+def local_extrema(values: np.ndarray, window: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Masks of local minima and maxima that are also trailing-window extremes
+
+    A point is a local minimum when it is strictly below both neighbours and
+    equal to the minimum of the `window` values ending at it (and likewise for
+    maxima). Windows that are incomplete or contain NaN never qualify.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if HAS_NUMBA:
+        return _local_extrema_jit(values, window)
+
+    minima = np.zeros(n, dtype=bool)
+    maxima = np.zeros(n, dtype=bool)
+    if n < max(window, 3):
+        return minima, maxima
+
+    # Index k of the rolling extremes is the window ending at position k + window - 1
+    lowest = rolling_extreme(values, window, np.minimum)[:-1]
+    highest = rolling_extreme(values, window, np.maximum)[:-1]
+    start = window - 1
+    if start == 0:
+        # The first point has no left neighbour
+        lowest, highest, start = lowest[1:], highest[1:], 1
+
+    center = values[start:-1]
+    left = values[start - 1:-2]
+    right = values[start + 1:]
+    with np.errstate(invalid='ignore'):
+        minima[start:-1] = (center == lowest) & (left > center) & (right > center)
+        maxima[start:-1] = (center == highest) & (left < center) & (right < center)
+    return minima, maxima
@@ -0,0 +1,169 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Job states; a finished job is completed (every commodity trained),
+# completed_with_errors or failed (none trained)
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+COMPLETED_WITH_ERRORS = 'completed_with_errors'
+FAILED = 'failed'
+FINISHED_STATES = frozenset({COMPLETED, COMPLETED_WITH_ERRORS, FAILED})
+
+
+class _Job:
+    """Progress of one training request over its commodities"""
+
+    def __init__(self, commodity_ids: List[int]):
+        self.id = uuid.uuid4().hex
+        self.commodity_ids = commodity_ids
+        self.status = QUEUED
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.results: Dict[int, Dict[str, Any]] = {commodity_id: {'status': QUEUED} for commodity_id in commodity_ids}
+        self.done = threading.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        completed = sum(1 for r in self.results.values() if r['status'] == COMPLETED)
+        failed = sum(1 for r in self.results.values() if r['status'] == FAILED)
+        end = self.finished_at or datetime.utcnow()
+        return {
+            'id': self.id,
+            'status': self.status,
+            'commodity_ids': self.commodity_ids,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'duration_seconds': (end - self.started_at).total_seconds() if self.started_at else None,
+            'progress': {
+                'completed': completed,
+                'failed': failed,
+                'total': len(self.commodity_ids),
+                'percent': (completed + failed) / len(self.commodity_ids) * 100
+            },
+            'results': {str(commodity_id): dict(result) for commodity_id, result in self.results.items()}
+        }
+
+
+class MLJobQueue:
+    """Runs ML training for commodities on a worker pool and tracks it as jobs
+
+    A job trains one or more commodities; each commodity is a separate task,
+    so the pool trains the commodities of one job in parallel. The training
+    function receives a commodity id and returns a summary of the trained
+    model (or raises). Jobs are kept in memory; finished jobs older than
+    `retention` seconds are forgotten when new jobs are submitted.
+    """
+
+    def __init__(self, max_workers: int = 2, retention: int = 3600):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ml-training')
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, _Job] = {}
+        self.retention = retention
+
+    def submit(self, commodity_ids: List[int], train: Callable[[int], Dict[str, Any]]) -> Dict[str, Any]:
+        """Queue training of the commodities and return the new job"""
+        job = _Job(list(dict.fromkeys(commodity_ids)))
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+            snapshot = job.to_dict()
+        self._start(job, train)
+        return snapshot
+
+    def submit_unless_active(self, commodity_id: int, train: Callable[[int], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        The unfinished job that trains a commodity, or a new job queued for it
+
+        The check and the submit happen under one lock, so concurrent
+        callers share a single job.
+        """
+        with self._lock:
+            active = self._active_job(commodity_id)
+            if active is not None:
+                return active.to_dict()
+            self._prune()
+            job = _Job([commodity_id])
+            self._jobs[job.id] = job
+            snapshot = job.to_dict()
+        self._start(job, train)
+        return snapshot
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job is not None else None
+
+    def active_job(self, commodity_id: int) -> Optional[Dict[str, Any]]:
+        """The most recent unfinished job that trains a commodity, if any"""
+        with self._lock:
+            job = self._active_job(commodity_id)
+            return job.to_dict() if job is not None else None
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Block until a job finishes (or the timeout passes) and return it"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        job.done.wait(timeout)
+        return self.get(job_id)
+
+    def _active_job(self, commodity_id: int) -> Optional[_Job]:
+        """The most recent unfinished job that trains a commodity (caller holds the lock)"""
+        for job in reversed(list(self._jobs.values())):
+            if job.status not in FINISHED_STATES and commodity_id in job.results:
+                return job
+        return None
+
+    def _start(self, job: _Job, train: Callable[[int], Dict[str, Any]]):
+        """Hand every commodity of a registered job to the pool"""
+        for commodity_id in job.commodity_ids:
+            self._executor.submit(self._run, job, commodity_id, train)
+
+    def _run(self, job: _Job, commodity_id: int, train: Callable[[int], Dict[str, Any]]):
+        started = datetime.utcnow()
+        with self._lock:
+            job.status = RUNNING
+            job.started_at = job.started_at or started
+            job.results[commodity_id] = {'status': RUNNING, 'started_at': started.isoformat()}
+
+        start = time.perf_counter()
+        try:
+            result = {'status': COMPLETED, **train(commodity_id)}
+        except Exception as e:
+            result = {'status': FAILED, 'error': str(e)}
+        result.update(started_at=started.isoformat(), finished_at=datetime.utcnow().isoformat(),
+                      duration_seconds=time.perf_counter() - start)
+
+        with self._lock:
+            job.results[commodity_id] = result
+            statuses = [r['status'] for r in job.results.values()]
+            if all(status in FINISHED_STATES for status in statuses):
+                job.finished_at = datetime.utcnow()
+                if all(status == COMPLETED for status in statuses):
+                    job.status = COMPLETED
+                elif any(status == COMPLETED for status in statuses):
+                    job.status = COMPLETED_WITH_ERRORS
+                else:
+                    job.status = FAILED
+                job.done.set()
+
+    def _prune(self):
+        """Forget finished jobs past the retention period (caller holds the lock)"""
+        now = datetime.utcnow()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and (now - job.finished_at).total_seconds() > self.retention]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {status: statuses.count(status)
+                for status in (QUEUED, RUNNING, COMPLETED, COMPLETED_WITH_ERRORS, FAILED)}
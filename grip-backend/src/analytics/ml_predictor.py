@@ -1,38 +1,123 @@
+import time
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline, make_pipeline
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split, TimeSeriesSplit
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from joblib import Parallel, delayed
 import warnings
 warnings.filterwarnings('ignore')
 
 from .base_analyzer import BaseAnalyzer
+from .volatility_surface import get_volatility_surface
+from .model_registry import ModelRegistry
+
+def _fit_and_score(model, X_train: pd.DataFrame, y_train: pd.Series, X_test: pd.DataFrame, y_test: pd.Series,
+                   score_train: bool = False) -> Dict[str, Any]:
+    """Fit a model on one training window and score it on the following test window"""
+    try:
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        scores = {}
+        if score_train:
+            y_pred_train = model.predict(X_train)
+            scores.update(train_mae=mean_absolute_error(y_train, y_pred_train),
+                          train_rmse=np.sqrt(mean_squared_error(y_train, y_pred_train)),
+                          train_r2=r2_score(y_train, y_pred_train))
+        y_pred_test = model.predict(X_test)
+        scores.update(test_mae=mean_absolute_error(y_test, y_pred_test),
+                      test_rmse=np.sqrt(mean_squared_error(y_test, y_pred_test)),
+                      test_r2=r2_score(y_test, y_pred_test))
+        
+        return {'model': model, 'scores': scores, 'fit_seconds': fit_seconds,
+                'score_seconds': time.perf_counter() - start}
+    except Exception as e:
+        return {'error': str(e)}
+
+
+class _HorizonModels:
+    """Fitted models of a direct forecaster, one per horizon, predicted together"""
+    
+    def __init__(self, estimators: List[Any]):
+        self.estimators_ = estimators
+    
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        return np.column_stack([estimator.predict(X) for estimator in self.estimators_])
+
 
 class MLPredictor(BaseAnalyzer):
-    """Machine Learning predictor for commodity data"""
+    """Machine Learning predictor for commodity data
+    
+    The predictor holds no fitted state: every training run builds its own
+    models and returns them, so one instance can serve concurrent analyses
+    from several threads.
+    
+    Models are validated walk-forward: every model is scored on a
+    chronological holdout (the last HOLDOUT_FRACTION of the rows) and
+    cross-validated on expanding windows of the rows before it, each
+    training window ending `gap` rows before its test window. The holdout
+    and fold fits of all models run in parallel on `n_jobs` workers.
     
-    def __init__(self):
+    Forecasts are direct: the selected model type is also fitted to the
+    log returns from every row to each of FORECAST_HORIZONS rows ahead (one
+    model per horizon, on every row with a target that far ahead), so a
+    whole forecast path comes from the latest features, interpolated
+    between the horizons.
+    """
+    
+    MODEL_NAMES = ('linear', 'random_forest', 'gradient_boosting')
+    # Bump when features, models or validation change, so registered models are retrained
+    MODEL_VERSION = 6
+    
+    HOLDOUT_FRACTION = 0.2
+    CV_SPLITS = 5
+    # Smallest training or test window worth scoring (r2 needs two points)
+    MIN_WINDOW = 2
+    
+    # Horizons (observations ahead) of the direct forecaster; a horizon is
+    # trained when at least MIN_FORECAST_ROWS rows have a target that far ahead
+    FORECAST_HORIZONS = (1, 2, 3, 5, 7, 10, 14, 21, 30, 45, 60, 90, 120, 180, 270, 365)
+    MIN_FORECAST_ROWS = 20
+    DEFAULT_PERIODS = 30
+    
+    def __init__(self, n_splits: int = CV_SPLITS, gap: int = 0, n_jobs: Optional[int] = 1):
         super().__init__("MLPredictor")
-        self.models = {
-            'linear': LinearRegression(),
+        if n_splits < 2 or gap < 0:
+            raise ValueError('n_splits must be at least 2 and gap non-negative')
+        self.n_splits = n_splits
+        self.gap = gap
+        self.n_jobs = n_jobs
+    
+    @staticmethod
+    def build_models() -> Dict[str, Any]:
+        """Fresh, unfitted models; the linear model scales its features in a pipeline"""
+        return {
+            'linear': make_pipeline(StandardScaler(), LinearRegression()),
             'random_forest': RandomForestRegressor(n_estimators=100, random_state=42),
             'gradient_boosting': GradientBoostingRegressor(n_estimators=100, random_state=42)
         }
-        self.scaler = StandardScaler()
-        self.trained_models = {}
-        self.feature_importance = {}
     
-    def analyze(self, data: pd.DataFrame, target_column: str = 'price', **kwargs) -> Dict[str, Any]:
+    def analyze(self, data: pd.DataFrame, target_column: str = 'price', registry: Optional[ModelRegistry] = None,
+                commodity_id: Optional[int] = None, fingerprint: Optional[str] = None, **kwargs) -> Dict[str, Any]:
         """
         Perform ML analysis and prediction
         
         Args:
             data: DataFrame with time series data
             target_column: Column to predict
+            registry: Model registry to reuse and store trained models in
+            commodity_id: Commodity the data belongs to (registry key)
+            fingerprint: Version of the data (registry key); a stored model
+                is reused only for the same fingerprint
         """
         if target_column not in data.columns:
             return {'error': f'Target column {target_column} not found in data'}
@@ -40,44 +125,108 @@ class MLPredictor(BaseAnalyzer):
         if len(data) < 20:
             return {'error': 'Insufficient data for ML analysis (minimum 20 records required)'}
         
-        # Prepare features
-        features_data = self.prepare_features(data, target_column)
-        
-        if features_data is None:
-            return {'error': 'Failed to prepare features'}
-        
-        X, y = features_data
-        
-        # Train and evaluate models
-        model_results = self.train_and_evaluate_models(X, y)
-        
-        # Select best model
-        best_model_name = max(model_results.keys(), key=lambda k: model_results[k]['r2_score'])
-        best_model = self.trained_models[best_model_name]
+        use_registry = registry is not None and commodity_id is not None and fingerprint is not None
+        bundle = (registry.load(commodity_id, target_column, fingerprint, self.MODEL_VERSION)
+                  if use_registry else None)
+        reused = bundle is not None
         
-        # Generate predictions
-        predictions = self.generate_predictions(data, best_model, target_column)
+        if bundle is None:
+            # Prepare features
+            features_data = self.prepare_features(data, target_column)
+            
+            if features_data is None:
+                return {'error': 'Failed to prepare features'}
+            
+            X, y = features_data
+            if len(X) - self.holdout_size(len(X)) - self.gap < self.MIN_WINDOW:
+                return {'error': 'Insufficient data for walk-forward validation'}
+            
+            # Horizons count every observation, including rows dropped from X
+            history = data.sort_values('date')[target_column] if 'date' in data.columns else data[target_column]
+            bundle = self.train(X, y, history)
+            
+            if use_registry:
+                try:
+                    registry.save(commodity_id, target_column, fingerprint, self.MODEL_VERSION, bundle)
+                except Exception as e:
+                    self.logger.error(f"Error storing trained model for commodity {commodity_id}: {e}")
         
-        # Feature importance
-        importance = self.get_feature_importance(best_model_name, X.columns)
+        # Forecast every trained horizon
+        predictions = self.generate_predictions(data, bundle['forecaster'], target_column)
         
         results = {
             'target_column': target_column,
             'analysis_date': datetime.utcnow().isoformat(),
             'data_points': len(data),
-            'best_model': best_model_name,
-            'model_performance': model_results,
+            'best_model': bundle['model_name'],
+            'model_performance': bundle['model_performance'],
             'predictions': predictions,
-            'feature_importance': importance,
-            'model_summary': self.generate_model_summary(model_results, best_model_name)
+            'feature_importance': bundle['feature_importance'],
+            'validation': bundle['validation'],
+            'model_summary': self.generate_model_summary(bundle['model_performance'], bundle['model_name']),
+            'training': {
+                'trained_at': bundle['trained_at'],
+                'training_seconds': bundle['training_seconds'],
+                'reused_stored_model': reused
+            }
         }
         
         return results
     
+    def train(self, X: pd.DataFrame, y: pd.Series, history: Optional[pd.Series] = None) -> Dict[str, Any]:
+        """
+        Train and evaluate every model and bundle the best one
+        
+        The model with the best holdout score is refitted on all rows, so
+        the served model has seen the most recent prices, and its type is
+        fitted as the direct multi-horizon forecaster. Returns both (with
+        their feature scaling) and the feature columns, the metrics of
+        every model, the validation report, the best model's feature
+        importance and the training time, as stored by the model registry.
+        `history` is the target of every observation, for the forecaster's
+        horizon targets (see train_forecaster).
+        """
+        start = time.perf_counter()
+        
+        # Train and evaluate models
+        model_results, trained_models, validation = self.train_and_evaluate_models(X, y)
+        
+        # Select best model and refit it on every row
+        best_model_name = max(trained_models, key=lambda k: model_results[k]['r2_score'])
+        refit_start = time.perf_counter()
+        best_model = clone(trained_models[best_model_name]).fit(X, y)
+        validation['refit_seconds'] = time.perf_counter() - refit_start
+        
+        forecaster_start = time.perf_counter()
+        forecaster = self.train_forecaster(best_model_name, X, y, history)
+        validation['forecaster_seconds'] = time.perf_counter() - forecaster_start
+        
+        return {
+            'model_name': best_model_name,
+            'model': best_model,
+            'forecaster': forecaster,
+            'forecast_horizons': forecaster['horizons'] if forecaster else [],
+            'feature_columns': list(X.columns),
+            'model_performance': model_results,
+            'validation': validation,
+            'feature_importance': self.get_feature_importance(best_model, X.columns),
+            'data_points': len(X),
+            'trained_at': datetime.utcnow().isoformat(),
+            'training_seconds': time.perf_counter() - start
+        }
+    
     def prepare_features(self, data: pd.DataFrame, target_column: str) -> Optional[Tuple[pd.DataFrame, pd.Series]]:
-        """Prepare features for ML models"""
+        """
+        Prepare features for ML models
+        
+        The features of row t only use data up to row t-1: rolling
+        statistics, indicators and other observed columns (such as volume)
+        are shifted one row, like the lags, so they never contain the target.
+        """
         try:
             data = data.copy().sort_values('date' if 'date' in data.columns else data.index)
+            observed_columns = [col for col in data.columns
+                                if col not in (target_column, 'date', 'commodity', 'country', 'commodity_id')]
             
             # Create time-based features
             if 'date' in data.columns:
@@ -91,11 +240,13 @@ class MLPredictor(BaseAnalyzer):
                 if len(data) > lag:
                     data[f'{target_column}_lag_{lag}'] = data[target_column].shift(lag)
             
-            # Create rolling statistics
+            # Create rolling statistics (shared with the analyzers via the surface cache)
+            surface = get_volatility_surface(data[target_column].to_numpy(dtype=np.float64))
             for window in [7, 30, 90]:
                 if len(data) > window:
-                    data[f'{target_column}_ma_{window}'] = data[target_column].rolling(window=window).mean()
-                    data[f'{target_column}_std_{window}'] = data[target_column].rolling(window=window).std()
+                    data[f'{target_column}_ma_{window}'] = surface.mean[window]
+                    data[f'{target_column}_std_{window}'] = surface.std[window]
+                    observed_columns += [f'{target_column}_ma_{window}', f'{target_column}_std_{window}']
             
             # Create technical indicators
             if len(data) > 14:
@@ -105,16 +256,22 @@ class MLPredictor(BaseAnalyzer):
                 loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
                 rs = gain / loss
                 data['rsi'] = 100 - (100 / (1 + rs))
+                observed_columns.append('rsi')
             
             # Create volatility features
             if len(data) > 20:
-                data['volatility_20'] = data[target_column].rolling(window=20).std()
+                data['volatility_20'] = surface.std[20]
+                observed_columns.append('volatility_20')
+            
+            # Values observed at row t are only known for predicting row t+1
+            data[observed_columns] = data[observed_columns].shift(1)
             
-            # Select feature columns (exclude target and non-numeric columns)
+            # Select feature columns (exclude target, identifiers, non-numeric and all-null columns)
             feature_columns = [col for col in data.columns 
                              if col != target_column 
-                             and col not in ['date', 'commodity', 'country']
-                             and data[col].dtype in ['int64', 'float64']]
+                             and col not in ['date', 'commodity', 'country', 'commodity_id']
+                             and data[col].dtype in ['int64', 'float64']
+                             and data[col].notna().any()]
             
             # Remove rows with NaN values
             data_clean = data[feature_columns + [target_column]].dropna()
@@ -131,74 +288,151 @@ class MLPredictor(BaseAnalyzer):
             self.logger.error(f"Error preparing features: {e}")
             return None
     
-    def train_and_evaluate_models(self, X: pd.DataFrame, y: pd.Series) -> Dict[str, Any]:
-        """Train and evaluate multiple ML models"""
+    def holdout_size(self, n_samples: int) -> int:
+        """Number of most recent rows held out for model selection"""
+        return max(self.MIN_WINDOW, int(round(n_samples * self.HOLDOUT_FRACTION)))
+    
+    def walk_forward_splits(self, n_samples: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Expanding-window (train, test) index pairs for cross-validation
+        
+        Uses up to n_splits folds, fewer when the rows cannot fill every
+        training and test window; no folds when even two cannot be filled.
+        """
+        for n_splits in range(self.n_splits, 1, -1):
+            test_size = n_samples // (n_splits + 1)
+            if test_size >= self.MIN_WINDOW and n_samples - self.gap - n_splits * test_size >= self.MIN_WINDOW:
+                return list(TimeSeriesSplit(n_splits=n_splits, gap=self.gap).split(np.arange(n_samples)))
+        return []
+    
+    def train_and_evaluate_models(self, X: pd.DataFrame, y: pd.Series) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+        """
+        Train and evaluate multiple ML models walk-forward
+        
+        Every model is fitted on the rows before the chronological holdout
+        and scored on it, and cross-validated on expanding windows of those
+        training rows; all fits run in parallel. Returns the metrics of
+        every model (an error entry for models that failed), the models
+        fitted on the training rows, and a validation report with the
+        windows and the fit and score time of every fold.
+        """
+        start = time.perf_counter()
+        
+        # Chronological split: the most recent rows are the holdout
+        n_test = self.holdout_size(len(X))
+        train_end = len(X) - n_test - self.gap
+        X_train, y_train = X.iloc[:train_end], y.iloc[:train_end]
+        X_test, y_test = X.iloc[-n_test:], y.iloc[-n_test:]
+        folds = self.walk_forward_splits(len(X_train))
+        
+        # One task per model for the holdout, then one per model and fold
+        models = self.build_models()
+        tasks = [(model_name, None) for model_name in models]
+        tasks += [(model_name, fold) for model_name in models for fold in range(len(folds))]
+        outputs = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_and_score)(clone(models[model_name]), X_train, y_train, X_test, y_test, score_train=True)
+            if fold is None else
+            delayed(_fit_and_score)(clone(models[model_name]),
+                                    X_train.iloc[folds[fold][0]], y_train.iloc[folds[fold][0]],
+                                    X_train.iloc[folds[fold][1]], y_train.iloc[folds[fold][1]])
+            for model_name, fold in tasks
+        )
+        
         results = {}
+        trained_models = {}
+        timings = {model_name: {'holdout': None, 'folds': []} for model_name in models}
+        cv_scores = {model_name: [] for model_name in models}
         
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        # Scale features for linear models
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
-        
-        for model_name, model in self.models.items():
-            try:
-                # Use scaled data for linear regression, original for tree-based models
-                if model_name == 'linear':
-                    X_train_model = X_train_scaled
-                    X_test_model = X_test_scaled
-                else:
-                    X_train_model = X_train
-                    X_test_model = X_test
-                
-                # Train model
-                model.fit(X_train_model, y_train)
-                self.trained_models[model_name] = model
-                
-                # Make predictions
-                y_pred_train = model.predict(X_train_model)
-                y_pred_test = model.predict(X_test_model)
-                
-                # Calculate metrics
-                train_mae = mean_absolute_error(y_train, y_pred_train)
-                test_mae = mean_absolute_error(y_test, y_pred_test)
-                train_rmse = np.sqrt(mean_squared_error(y_train, y_pred_train))
-                test_rmse = np.sqrt(mean_squared_error(y_test, y_pred_test))
-                train_r2 = r2_score(y_train, y_pred_train)
-                test_r2 = r2_score(y_test, y_pred_test)
-                
-                # Cross-validation
-                cv_scores = cross_val_score(model, X_train_model, y_train, cv=5, scoring='r2')
-                
-                results[model_name] = {
-                    'train_mae': train_mae,
-                    'test_mae': test_mae,
-                    'train_rmse': train_rmse,
-                    'test_rmse': test_rmse,
-                    'train_r2': train_r2,
-                    'test_r2': test_r2,
-                    'r2_score': test_r2,  # Primary metric for model selection
-                    'cv_mean': cv_scores.mean(),
-                    'cv_std': cv_scores.std(),
-                    'overfitting': train_r2 - test_r2  # Measure of overfitting
-                }
-                
-            except Exception as e:
-                self.logger.error(f"Error training {model_name}: {e}")
-                results[model_name] = {'error': str(e)}
+        for (model_name, fold), output in zip(tasks, outputs):
+            if 'error' in output:
+                if fold is None:
+                    self.logger.error(f"Error training {model_name}: {output['error']}")
+                    results[model_name] = {'error': output['error']}
+                continue
+            
+            timing = {'fit_seconds': output['fit_seconds'], 'score_seconds': output['score_seconds']}
+            if fold is None:
+                trained_models[model_name] = output['model']
+                results[model_name] = output['scores']
+                timings[model_name]['holdout'] = timing
+            else:
+                cv_scores[model_name].append(output['scores']['test_r2'])
+                timings[model_name]['folds'].append({'fold': fold, **timing})
         
-        return results
+        for model_name, scores in results.items():
+            if 'error' in scores:
+                continue
+            scores.update(
+                r2_score=scores['test_r2'],  # Primary metric for model selection
+                cv_mean=float(np.mean(cv_scores[model_name])) if cv_scores[model_name] else None,
+                cv_std=float(np.std(cv_scores[model_name])) if cv_scores[model_name] else None,
+                overfitting=scores['train_r2'] - scores['test_r2']  # Measure of overfitting
+            )
+        
+        validation = {
+            'method': 'walk_forward',
+            'gap': self.gap,
+            'n_jobs': self.n_jobs,
+            'holdout': {'train_size': len(X_train), 'test_size': n_test},
+            'folds': [{'fold': i, 'train_size': len(train), 'test_start': int(test[0]), 'test_size': len(test)}
+                      for i, (train, test) in enumerate(folds)],
+            'timings': timings,
+            'wall_seconds': time.perf_counter() - start
+        }
+        
+        return results, trained_models, validation
+    
+    def train_forecaster(self, model_name: str, X: pd.DataFrame, y: pd.Series,
+                         history: Optional[pd.Series] = None) -> Optional[Dict[str, Any]]:
+        """
+        Fit a direct multi-horizon forecaster of the given model type
+        
+        Targets are the log returns (differences, for series that are not
+        positive) from every row to each trainable horizon ahead, counted
+        in observations of `history`: the target of every observation in
+        time order, indexed like y, before rows with missing features were
+        dropped (y itself by default). Every horizon gets its own model,
+        fitted on all rows with a target that far ahead, so short horizons
+        learn from the most recent rows; the fits run in parallel on
+        `n_jobs` workers. Returns the fitted models, their horizons and the
+        target transform, or None when the series is too short for any
+        horizon.
+        """
+        history = (y if history is None else history).astype(np.float64)
+        transform = 'log_return' if (history.dropna() > 0).all() else 'difference'
+        base = np.log(history) if transform == 'log_return' else history
+        
+        # Shift on the full history, then keep the feature rows with a target
+        targets = {}
+        for h in self.FORECAST_HORIZONS:
+            target = (base.shift(-h) - base).reindex(X.index).dropna()
+            if len(target) >= self.MIN_FORECAST_ROWS:
+                targets[h] = target
+        if not targets:
+            return None
+        
+        estimator = self.build_models()[model_name]
+        estimators = Parallel(n_jobs=self.n_jobs)(
+            delayed(clone(estimator).fit)(X.loc[target.index], target.to_numpy())
+            for target in targets.values()
+        )
+        
+        return {'model': _HorizonModels(estimators), 'horizons': list(targets), 'transform': transform}
     
-    def generate_predictions(self, data: pd.DataFrame, model, target_column: str, 
-                           periods_ahead: int = 30) -> Dict[str, Any]:
-        """Generate future predictions"""
+    def generate_predictions(self, data: pd.DataFrame, forecaster: Optional[Dict[str, Any]], target_column: str,
+                             periods_ahead: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Generate future predictions with the direct forecaster
+        
+        Forecasts periods_ahead observations (by default every trained
+        horizon) from the latest feature row in one predict call; horizons
+        between the trained ones are interpolated.
+        """
         try:
-            # Prepare the most recent data for prediction
-            recent_data = data.tail(100).copy()  # Use last 100 points for context
+            if forecaster is None:
+                return {'error': f'Insufficient data for forecasting (minimum {self.MIN_FORECAST_ROWS + 1} feature rows required)'}
             
-            # Prepare features for the most recent point
-            features_data = self.prepare_features(recent_data, target_column)
+            features_data = self.prepare_features(data, target_column)
             if features_data is None:
                 return {'error': 'Could not prepare features for prediction'}
             
@@ -207,63 +441,57 @@ class MLPredictor(BaseAnalyzer):
             if len(X) == 0:
                 return {'error': 'No valid features for prediction'}
             
-            # Get the last valid feature vector
-            last_features = X.iloc[-1:].copy()
-            
-            # Generate predictions for future periods
-            predictions = []
-            current_features = last_features.copy()
-            
-            for i in range(periods_ahead):
-                # Make prediction
-                if hasattr(model, 'predict'):
-                    if isinstance(model, LinearRegression):
-                        # Use scaled features for linear regression
-                        features_scaled = self.scaler.transform(current_features)
-                        pred = model.predict(features_scaled)[0]
-                    else:
-                        pred = model.predict(current_features)[0]
-                else:
-                    pred = y.iloc[-1]  # Fallback to last known value
-                
-                predictions.append(pred)
-                
-                # Update features for next prediction (simple approach)
-                # In a more sophisticated model, you would update lag features properly
-                if f'{target_column}_lag_1' in current_features.columns:
-                    current_features[f'{target_column}_lag_1'] = pred
+            horizons = np.asarray(forecaster['horizons'])
+            max_horizon = int(horizons[-1])
+            periods = max_horizon if periods_ahead is None else min(periods_ahead, max_horizon)
+            
+            # One prediction per trained horizon from the last feature row,
+            # interpolated to every step (a zero change at step 0)
+            changes = forecaster['model'].predict(X.iloc[-1:])[0]
+            steps = np.arange(1, periods + 1)
+            path = np.interp(steps, np.concatenate(([0], horizons)), np.concatenate(([0.0], changes)))
+            
+            last_value = float(y.iloc[-1])
+            if forecaster['transform'] == 'log_return':
+                predictions = last_value * np.exp(path)
+            else:
+                predictions = last_value + path
             
             # Calculate prediction intervals (simple approach using historical volatility)
             historical_volatility = y.std()
-            confidence_intervals = []
-            
-            for i, pred in enumerate(predictions):
-                # Increase uncertainty over time
-                uncertainty = historical_volatility * np.sqrt(i + 1) * 0.5
-                confidence_intervals.append({
-                    'lower': pred - 1.96 * uncertainty,
-                    'upper': pred + 1.96 * uncertainty
-                })
+            uncertainty = historical_volatility * np.sqrt(steps) * 0.5  # Increase uncertainty over time
+            confidence_intervals = [{'lower': pred - 1.96 * u, 'upper': pred + 1.96 * u}
+                                    for pred, u in zip(predictions.tolist(), uncertainty.tolist())]
             
             return {
-                'predictions': predictions,
+                'predictions': predictions.tolist(),
                 'confidence_intervals': confidence_intervals,
                 'prediction_dates': [(datetime.now() + timedelta(days=i+1)).isoformat() 
-                                   for i in range(periods_ahead)],
+                                   for i in range(periods)],
+                'max_horizon': max_horizon,
                 'historical_volatility': historical_volatility,
-                'last_actual_value': float(y.iloc[-1])
+                'last_actual_value': last_value
             }
             
         except Exception as e:
             self.logger.error(f"Error generating predictions: {e}")
             return {'error': str(e)}
     
-    def get_feature_importance(self, model_name: str, feature_names: List[str]) -> Dict[str, float]:
-        """Get feature importance from trained model"""
-        if model_name not in self.trained_models:
-            return {}
-        
-        model = self.trained_models[model_name]
+    @staticmethod
+    def limit_predictions(predictions: Dict[str, Any], periods: int) -> Dict[str, Any]:
+        """The first `periods` steps of generated predictions"""
+        if 'error' in predictions:
+            return predictions
+        return {**predictions,
+                'predictions': predictions['predictions'][:periods],
+                'confidence_intervals': predictions['confidence_intervals'][:periods],
+                'prediction_dates': predictions['prediction_dates'][:periods]}
+    
+    def get_feature_importance(self, model, feature_names: List[str]) -> Dict[str, float]:
+        """Get feature importance from a trained model or pipeline"""
+        if isinstance(model, Pipeline):
+            # Coefficients of the final estimator (on scaled features)
+            model = model[-1]
         
         try:
             if hasattr(model, 'feature_importances_'):
@@ -354,7 +582,7 @@ class MLPredictor(BaseAnalyzer):
             classifier = RandomForestClassifier(n_estimators=100, random_state=42)
             
             # Split data
-            X_train, X_test, y_train, y_test = train_test_split(X_clean, y_clean, test_size=0.2, random_state=42)
+            X_train, X_test, y_train, y_test = train_test_split(X_clean, y_clean, test_size=0.2, shuffle=False)
             
             # Train classifier
             classifier.fit(X_train, y_train)
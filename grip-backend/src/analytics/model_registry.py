@@ -0,0 +1,131 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+import joblib
+import sklearn
+from flask import current_app
+
+# On-disk registry of fitted ML models.
+#
+# A trained bundle (fitted estimators or pipelines, feature columns, metrics
+# and training time) is stored per (commodity, target, data fingerprint) as
+#   <directory>/<commodity_id>/<target>/<digest>.joblib
+# with a JSON sidecar holding everything but the fitted objects, so the
+# registry can be listed without unpickling models. The digest covers the
+# data fingerprint and the predictor's MODEL_VERSION; a bundle is reused
+# only for exactly the data it was trained on, by the same scikit-learn
+# version. Saving a bundle removes older bundles of the same commodity and
+# target.
+
+# Bundle entries that are fitted objects rather than metadata
+FITTED_ENTRIES = ('model', 'forecaster')
+
+
+class ModelRegistry:
+    """Fitted ML model bundles keyed by commodity, target and data fingerprint"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.logger = logging.getLogger("analytics.ModelRegistry")
+
+    @staticmethod
+    def digest(fingerprint: str, model_version: int) -> str:
+        return hashlib.sha1(f'{model_version}:{fingerprint}'.encode()).hexdigest()[:20]
+
+    def _path(self, commodity_id: int, target: str, fingerprint: str, model_version: int) -> str:
+        return os.path.join(self.directory, str(commodity_id), target,
+                            f'{self.digest(fingerprint, model_version)}.joblib')
+
+    def contains(self, commodity_id: int, target: str, fingerprint: str, model_version: int) -> bool:
+        """Whether a bundle was stored for this data (without loading it)"""
+        return os.path.exists(self._path(commodity_id, target, fingerprint, model_version))
+
+    def load(self, commodity_id: int, target: str, fingerprint: str,
+             model_version: int) -> Optional[Dict[str, Any]]:
+        """The bundle trained on this data, or None if there is none or it cannot be used"""
+        path = self._path(commodity_id, target, fingerprint, model_version)
+        if not os.path.exists(path):
+            return None
+        try:
+            bundle = joblib.load(path)
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable model bundle {path}: {e}")
+            return None
+        if bundle.get('sklearn_version') != sklearn.__version__ or bundle.get('fingerprint') != fingerprint:
+            return None
+        return bundle
+
+    def save(self, commodity_id: int, target: str, fingerprint: str, model_version: int,
+             bundle: Dict[str, Any]) -> str:
+        """Store a trained bundle, replacing older bundles of the commodity and target"""
+        path = self._path(commodity_id, target, fingerprint, model_version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        bundle = {**bundle,
+                  'commodity_id': commodity_id,
+                  'target': target,
+                  'fingerprint': fingerprint,
+                  'model_version': model_version,
+                  'sklearn_version': sklearn.__version__,
+                  'saved_at': datetime.utcnow().isoformat()}
+
+        # Write then rename, so readers never see a partial file; temporary
+        # names are per writer, as concurrent trainings may save the same key
+        suffix = f'.{os.getpid()}.{threading.get_ident()}.tmp'
+        joblib.dump(bundle, path + suffix)
+        os.replace(path + suffix, path)
+        metadata_path = path[:-len('.joblib')] + '.json'
+        with open(metadata_path + suffix, 'w') as f:
+            json.dump(self._metadata(bundle), f, default=float)
+        os.replace(metadata_path + suffix, metadata_path)
+
+        for stale in glob.glob(os.path.join(os.path.dirname(path), '*.joblib')):
+            if stale != path:
+                for stale_path in (stale, stale[:-len('.joblib')] + '.json'):
+                    try:
+                        os.remove(stale_path)
+                    except OSError:
+                        pass
+        return path
+
+    def list(self, commodity_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Metadata of the stored bundles, optionally of one commodity"""
+        pattern = os.path.join(self.directory, str(commodity_id) if commodity_id is not None else '*', '*', '*.json')
+        entries = []
+        for path in sorted(glob.glob(pattern)):
+            try:
+                with open(path) as f:
+                    entries.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return entries
+
+    @staticmethod
+    def _metadata(bundle: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in bundle.items() if key not in FITTED_ENTRIES}
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_model_registry() -> Optional[ModelRegistry]:
+    """
+    Get the model registry configured by MODEL_REGISTRY_DIR, if any
+
+    Expects an active application context. Without the setting, fitted
+    models are not persisted.
+    """
+    directory = current_app.config.get('MODEL_REGISTRY_DIR')
+    if not directory:
+        return None
+    with _registries_lock:
+        registry = _registries.get(directory)
+        if registry is None:
+            registry = _registries[directory] = ModelRegistry(directory)
+    return registry
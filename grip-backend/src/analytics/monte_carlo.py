@@ -0,0 +1,190 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Any, Optional, Sequence
+from datetime import datetime
+from .base_analyzer import BaseAnalyzer
+
+class MonteCarloSimulator(BaseAnalyzer):
+    """Monte Carlo price path simulation for forecast intervals"""
+
+    METHODS = ('gbm', 'bootstrap')
+    DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+    # Upper bound on float32 values held per chunk (about 32 MB)
+    MAX_CHUNK_ELEMENTS = 8_000_000
+
+    def __init__(self):
+        super().__init__("MonteCarloSimulator")
+
+    def analyze(self, data: pd.DataFrame, horizon: int = 30, paths: int = 10000, method: str = 'gbm',
+                seed: Optional[int] = None, quantiles: Sequence[float] = DEFAULT_QUANTILES,
+                **kwargs) -> Dict[str, Any]:
+        """
+        Simulate future prices and summarize them as a quantile fan chart
+
+        Args:
+            data: DataFrame with columns ['date', 'price']
+            horizon: Number of future observations to simulate
+            paths: Number of simulated paths
+            method: 'gbm' (geometric Brownian motion fitted to log returns) or
+                'bootstrap' (resampled historical log returns)
+            seed: Random seed; the same seed gives the same paths
+            quantiles: Quantiles reported at every step
+        """
+        if method not in self.METHODS:
+            return {'error': f'Unknown simulation method: {method}'}
+
+        if not self.validate_data(data, ['date', 'price']):
+            return {'error': 'Invalid data format'}
+
+        data = self.clean_data(data).dropna(subset=['price']).sort_values('date')
+        prices = data['price'].to_numpy(dtype=np.float64)
+        log_returns = self.calculate_log_returns(prices)
+        if len(log_returns) < 2:
+            return {'error': 'Insufficient data for simulation'}
+
+        current_price = float(prices[-1])
+        fan = self.fan_chart(current_price, log_returns, horizon, paths, method, seed, quantiles)
+
+        return {
+            'analysis_date': datetime.utcnow().isoformat(),
+            'method': method,
+            'paths': paths,
+            'horizon': horizon,
+            'seed': seed,
+            'current_price': current_price,
+            'parameters': {
+                'drift': float(log_returns.mean()),
+                'volatility': float(log_returns.std(ddof=1)),
+                'observations': len(log_returns)
+            },
+            'steps': list(range(1, horizon + 1)),
+            'dates': self.project_dates(data['date'], horizon),
+            'quantiles': {self._quantile_label(q): values.tolist() for q, values in fan['quantiles'].items()},
+            'terminal': fan['terminal']
+        }
+
+    @staticmethod
+    def calculate_log_returns(prices: np.ndarray) -> np.ndarray:
+        """Finite log returns between consecutive positive prices"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_returns = np.diff(np.log(prices))
+        return log_returns[np.isfinite(log_returns)]
+
+    def _increment_chunks(self, log_returns: np.ndarray, horizon: int, paths: int, method: str,
+                          seed: Optional[int], chunk_steps: int):
+        """
+        Yield (steps x paths) float32 blocks of log-price increments
+
+        Draws are made step by step across all paths, so the generated paths
+        depend only on the seed, never on the chunk size.
+        """
+        rng = np.random.default_rng(seed)
+        drift = np.float32(log_returns.mean())
+        volatility = np.float32(log_returns.std(ddof=1))
+        history = log_returns.astype(np.float32)
+        half = (paths + 1) // 2
+
+        for start in range(0, horizon, chunk_steps):
+            steps = min(chunk_steps, horizon - start)
+            if method == 'gbm':
+                # Antithetic pairs: every normal draw is used with both signs
+                shocks = rng.standard_normal((steps, half), dtype=np.float32)
+                shocks *= volatility
+                block = np.concatenate([shocks, -shocks], axis=1)[:, :paths]
+                block += drift
+            else:
+                block = np.take(history, rng.integers(0, len(history), size=(steps, paths), dtype=np.int32))
+            yield block
+
+    def _chunk_steps(self, paths: int, horizon: int) -> int:
+        return int(max(1, min(horizon, self.MAX_CHUNK_ELEMENTS // max(paths, 1))))
+
+    def simulate_paths(self, current_price: float, log_returns: np.ndarray, horizon: int, paths: int,
+                       method: str = 'gbm', seed: Optional[int] = None) -> np.ndarray:
+        """
+        Simulate full price paths
+
+        Returns a (paths x horizon) float64 array of prices; column t is the
+        price t + 1 observations ahead. Memory grows with paths x horizon, so
+        use fan_chart for large simulations.
+        """
+        levels = np.empty((horizon, paths), dtype=np.float32)
+        position = 0
+        for block in self._increment_chunks(log_returns, horizon, paths, method, seed,
+                                            self._chunk_steps(paths, horizon)):
+            levels[position:position + len(block)] = block
+            position += len(block)
+
+        self._accumulate(levels, np.zeros(paths, dtype=np.float32))
+        return current_price * np.exp(levels.T.astype(np.float64))
+
+    def fan_chart(self, current_price: float, log_returns: np.ndarray, horizon: int, paths: int,
+                  method: str = 'gbm', seed: Optional[int] = None,
+                  quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, Any]:
+        """
+        Per-step price quantiles of a simulation, computed chunk by chunk
+
+        Only one (chunk x paths) block is held in memory at a time; the
+        simulated paths are identical to simulate_paths for the same seed.
+        """
+        quantiles = np.asarray(sorted(quantiles), dtype=np.float64)
+        bands = np.empty((len(quantiles), horizon))
+        level = np.zeros(paths, dtype=np.float32)
+        position = 0
+
+        for block in self._increment_chunks(log_returns, horizon, paths, method, seed,
+                                            self._chunk_steps(paths, horizon)):
+            self._accumulate(block, level)
+            level = block[-1].copy()
+
+            # Sorting each step's paths is cheaper than np.quantile's selection
+            block.sort(axis=1)
+            bands[:, position:position + len(block)] = self._sorted_quantiles(block, quantiles).T
+            position += len(block)
+
+        terminal = current_price * np.exp(level.astype(np.float64))
+        terminal_quantiles = current_price * np.exp(bands[:, -1])
+
+        return {
+            'quantiles': {float(q): current_price * np.exp(bands[i]) for i, q in enumerate(quantiles)},
+            'terminal': {
+                'mean': float(terminal.mean()),
+                'median': float(np.median(terminal)),
+                'probability_above_current': float((terminal > current_price).mean()),
+                'quantiles': {self._quantile_label(q): float(v) for q, v in zip(quantiles, terminal_quantiles)}
+            }
+        }
+
+    @staticmethod
+    def _accumulate(block: np.ndarray, level: np.ndarray):
+        """In-place running sum down the steps of a block, starting from level"""
+        # Row-by-row adds over contiguous paths beat cumsum along axis 0
+        block[0] += level
+        for step in range(1, len(block)):
+            np.add(block[step], block[step - 1], out=block[step])
+
+    @staticmethod
+    def _sorted_quantiles(sorted_rows: np.ndarray, quantiles: np.ndarray) -> np.ndarray:
+        """Linearly interpolated quantiles (as np.quantile) of every pre-sorted row"""
+        n = sorted_rows.shape[1]
+        position = quantiles * (n - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, n - 1)
+        weight = position - lower
+        low = sorted_rows[:, lower].astype(np.float64)
+        high = sorted_rows[:, upper].astype(np.float64)
+        return low + (high - low) * weight
+
+    @staticmethod
+    def project_dates(dates: pd.Series, horizon: int) -> List[str]:
+        """Future dates spaced by the median interval of recent observations"""
+        recent = pd.to_datetime(dates).dropna().tail(60)
+        if len(recent) < 2:
+            return []
+        spacing = recent.diff().dropna().median()
+        last = recent.iloc[-1]
+        return [(last + spacing * step).isoformat() for step in range(1, horizon + 1)]
+
+    @staticmethod
+    def _quantile_label(q: float) -> str:
+        return f"p{q * 100:g}"
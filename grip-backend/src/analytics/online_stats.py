@@ -0,0 +1,547 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Iterable
+
+# Online (streaming) statistics that can be updated one observation at a time
+# and serialized to plain dicts so they can be persisted next to the series.
+
+
+class OnlineTrend:
+    """Streaming least-squares trend of a series against its observation index
+
+    Keeps bivariate Welford co-moments of (x, y) where x is the 0-based
+    observation index, so slope and r² can be updated in O(1) per point
+    without the cancellation of raw sums of squares.
+    """
+
+    def __init__(self, n: int = 0, mean_x: float = 0.0, mean_y: float = 0.0,
+                 m2_x: float = 0.0, m2_y: float = 0.0, c_xy: float = 0.0):
+        self.n = n
+        self.mean_x = mean_x
+        self.mean_y = mean_y
+        self.m2_x = m2_x
+        self.m2_y = m2_y
+        self.c_xy = c_xy
+
+    def update(self, y: float):
+        """Add the next observation of the series"""
+        x = float(self.n)
+        self.n += 1
+        dx = x - self.mean_x
+        dy = y - self.mean_y
+        self.mean_x += dx / self.n
+        self.mean_y += dy / self.n
+        self.c_xy += dx * (y - self.mean_y)
+        self.m2_x += dx * (x - self.mean_x)
+        self.m2_y += dy * (y - self.mean_y)
+
+    @classmethod
+    def from_values(cls, values: Iterable[float]) -> 'OnlineTrend':
+        """Build the state for a whole series in one vectorized pass"""
+        y = np.asarray(values, dtype=np.float64)
+        n = len(y)
+        if n == 0:
+            return cls()
+
+        x = np.arange(n, dtype=np.float64)
+        dx = x - x.mean()
+        dy = y - y.mean()
+        return cls(n=n, mean_x=float(x.mean()), mean_y=float(y.mean()),
+                   m2_x=float(dx @ dx), m2_y=float(dy @ dy), c_xy=float(dx @ dy))
+
+    @classmethod
+    def from_batch(cls, fit: Dict[str, Any], i: int) -> 'OnlineTrend':
+        """Build the state of row i of a batch_linear_trend fit over observation indexes"""
+        return cls(n=int(fit['n'][i]), mean_x=float(fit['mean_x'][i]), mean_y=float(fit['mean_y'][i]),
+                   m2_x=float(fit['sxx'][i]), m2_y=float(fit['syy'][i]), c_xy=float(fit['sxy'][i]))
+
+    @property
+    def slope(self) -> float:
+        return self.c_xy / self.m2_x if self.m2_x > 0 else 0.0
+
+    @property
+    def intercept(self) -> float:
+        return self.mean_y - self.slope * self.mean_x
+
+    @property
+    def r_squared(self) -> float:
+        if self.m2_x <= 0 or self.m2_y <= 0:
+            return 0.0
+        return self.c_xy * self.c_xy / (self.m2_x * self.m2_y)
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation of the observed values"""
+        return float(np.sqrt(self.m2_y / (self.n - 1))) if self.n > 1 else float('nan')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'n': self.n,
+            'mean_x': self.mean_x,
+            'mean_y': self.mean_y,
+            'm2_x': self.m2_x,
+            'm2_y': self.m2_y,
+            'c_xy': self.c_xy
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'OnlineTrend':
+        return cls(**state)
+
+
+class RollingVolatility:
+    """Streaming mean of the rolling standard deviation of a series
+
+    Matches BaseAnalyzer.calculate_volatility: the average of every complete
+    window's sample standard deviation. Only the last window - 1 values are
+    kept, so each update costs O(window).
+    """
+
+    def __init__(self, window: int = 30, recent: list = None,
+                 window_sum: float = 0.0, window_count: int = 0):
+        self.window = window
+        self.recent = list(recent or [])
+        self.window_sum = window_sum
+        self.window_count = window_count
+
+    def update(self, y: float):
+        """Add the next observation of the series"""
+        values = self.recent + [y]
+        if len(values) == self.window:
+            self.window_sum += float(np.std(values, ddof=1))
+            self.window_count += 1
+        self.recent = values[-(self.window - 1):] if self.window > 1 else []
+
+    @classmethod
+    def from_values(cls, values: Iterable[float], window: int = 30) -> 'RollingVolatility':
+        """Build the state for a whole series in one vectorized pass"""
+        y = np.asarray(values, dtype=np.float64)
+        state = cls(window=window, recent=y[-(window - 1):].tolist() if window > 1 else [])
+        if len(y) >= window:
+            windows = np.lib.stride_tricks.sliding_window_view(y, window)
+            stds = windows.std(axis=1, ddof=1)
+            state.window_sum = float(stds.sum())
+            state.window_count = len(stds)
+        return state
+
+    def value(self, full_std: float) -> float:
+        """Current volatility; series shorter than one window use their full std"""
+        if self.window_count == 0:
+            return full_std
+        return self.window_sum / self.window_count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'window': self.window,
+            'recent': self.recent,
+            'window_sum': self.window_sum,
+            'window_count': self.window_count
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'RollingVolatility':
+        return cls(**state)
+
+
+class P2Quantile:
+    """P² streaming quantile estimator (Jain & Chlamtac, 1985)
+
+    Tracks one quantile with five markers whose heights are adjusted by
+    piecewise-parabolic interpolation, so memory and update cost are O(1).
+    """
+
+    def __init__(self, p: float, heights: list = None, positions: list = None,
+                 desired: list = None, count: int = 0):
+        self.p = p
+        self.heights = list(heights or [])
+        self.positions = list(positions or [1, 2, 3, 4, 5])
+        self.desired = list(desired or [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5])
+        self.count = count
+
+    @property
+    def increments(self) -> list:
+        return [0, self.p / 2, self.p, (1 + self.p) / 2, 1]
+
+    def update(self, x: float):
+        """Add an observation"""
+        self.count += 1
+        if self.count <= 5:
+            self.heights.append(x)
+            self.heights.sort()
+            return
+
+        q, n = self.heights, self.positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        self.desired = [d + inc for d, inc in zip(self.desired, self.increments)]
+
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = self._parabolic(i, d)
+                if q[i - 1] < candidate < q[i + 1]:
+                    q[i] = candidate
+                else:
+                    q[i] = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> float:
+        """Current quantile estimate"""
+        if self.count == 0:
+            return float('nan')
+        if self.count <= 5:
+            return float(np.quantile(self.heights, self.p))
+        return self.heights[2]
+
+    @classmethod
+    def from_values(cls, values: Iterable[float], p: float) -> 'P2Quantile':
+        """Initialize the markers directly from a full sample"""
+        x = np.sort(np.asarray(values, dtype=np.float64))
+        sketch = cls(p)
+        if len(x) <= 5:
+            for value in x:
+                sketch.update(float(value))
+            return sketch
+
+        count = len(x)
+        desired = [1 + inc * (count - 1) for inc in sketch.increments]
+        positions = [1]
+        for d in desired[1:4]:
+            positions.append(int(min(max(round(d), positions[-1] + 1), count - (4 - len(positions)))))
+        positions.append(count)
+
+        sketch.count = count
+        sketch.desired = desired
+        sketch.positions = positions
+        sketch.heights = [float(x[pos - 1]) for pos in positions]
+        return sketch
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'p': self.p,
+            'heights': self.heights,
+            'positions': self.positions,
+            'desired': self.desired,
+            'count': self.count
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'P2Quantile':
+        return cls(**state)
+
+
+class StreamingPriceStats:
+    """All streaming state needed to answer PriceAnalyzer's summary sections
+
+    Combines Welford moments of prices and returns, OLS trend co-moments,
+    running extrema and drawdown, rolling volatility windows and P² sketches
+    for the median price and the 5% return quantile (VaR). Each appended
+    price updates every component in constant time (rolling windows cost
+    O(window)).
+    """
+
+    VOLATILITY_WINDOWS = {'daily': 30, 'weekly': 7, 'monthly': 90}
+    VAR_QUANTILE = 0.05
+
+    def __init__(self, trend: OnlineTrend = None, min_price: float = None, max_price: float = None,
+                 median: P2Quantile = None, last_price: float = None,
+                 returns_n: int = 0, returns_mean: float = 0.0, returns_m2: float = 0.0,
+                 var_sketch: P2Quantile = None, tail_sum: float = 0.0, tail_count: int = 0,
+                 running_max: float = None, max_drawdown: float = 0.0, volatility: Dict[str, RollingVolatility] = None):
+        self.trend = trend or OnlineTrend()
+        self.min_price = min_price
+        self.max_price = max_price
+        self.median = median or P2Quantile(0.5)
+        self.last_price = last_price
+        self.returns_n = returns_n
+        self.returns_mean = returns_mean
+        self.returns_m2 = returns_m2
+        self.var_sketch = var_sketch or P2Quantile(self.VAR_QUANTILE)
+        self.tail_sum = tail_sum
+        self.tail_count = tail_count
+        self.running_max = running_max
+        self.max_drawdown = max_drawdown
+        self.volatility = volatility or {name: RollingVolatility(window)
+                                         for name, window in self.VOLATILITY_WINDOWS.items()}
+
+    @property
+    def count(self) -> int:
+        return self.trend.n
+
+    def update(self, price: float):
+        """Add the next price of the series"""
+        self.trend.update(price)
+        self.median.update(price)
+        self.min_price = price if self.min_price is None else min(self.min_price, price)
+        self.max_price = price if self.max_price is None else max(self.max_price, price)
+        for volatility in self.volatility.values():
+            volatility.update(price)
+
+        if self.last_price is not None and self.last_price != 0:
+            self._update_return(price / self.last_price - 1, price)
+        self.last_price = price
+
+    def _update_return(self, r: float, price: float):
+        # Welford moments of simple returns
+        self.returns_n += 1
+        delta = r - self.returns_mean
+        self.returns_mean += delta / self.returns_n
+        self.returns_m2 += delta * (r - self.returns_mean)
+
+        # VaR sketch; CVaR averages the returns at or below the VaR estimate at arrival
+        self.var_sketch.update(r)
+        if r <= self.var_sketch.value():
+            self.tail_sum += r
+            self.tail_count += 1
+
+        # Drawdown of cumulative returns, i.e. of prices from the first return onwards
+        self.running_max = price if self.running_max is None else max(self.running_max, price)
+        self.max_drawdown = min(self.max_drawdown, price / self.running_max - 1)
+
+    @classmethod
+    def from_values(cls, values: Iterable[float]) -> 'StreamingPriceStats':
+        """Build the state for a whole series in vectorized passes"""
+        prices = np.asarray(values, dtype=np.float64)
+        stats = cls(trend=OnlineTrend.from_values(prices),
+                    median=P2Quantile.from_values(prices, 0.5),
+                    volatility={name: RollingVolatility.from_values(prices, window)
+                                for name, window in cls.VOLATILITY_WINDOWS.items()})
+        if len(prices) == 0:
+            return stats
+
+        stats.min_price = float(prices.min())
+        stats.max_price = float(prices.max())
+        stats.last_price = float(prices[-1])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = prices[1:] / prices[:-1] - 1
+        valid = np.isfinite(returns)
+        returns = returns[valid]
+        if len(returns):
+            stats.returns_n = len(returns)
+            stats.returns_mean = float(returns.mean())
+            stats.returns_m2 = float(((returns - returns.mean()) ** 2).sum())
+            stats.var_sketch = P2Quantile.from_values(returns, cls.VAR_QUANTILE)
+            tail = returns[returns <= stats.var_sketch.value()]
+            stats.tail_sum = float(tail.sum())
+            stats.tail_count = len(tail)
+
+            after_first = prices[1:][valid]
+            running_max = np.maximum.accumulate(after_first)
+            stats.running_max = float(running_max[-1])
+            stats.max_drawdown = float(min((after_first / running_max - 1).min(), 0.0))
+
+        return stats
+
+    @property
+    def returns_std(self) -> float:
+        return float(np.sqrt(self.returns_m2 / (self.returns_n - 1))) if self.returns_n > 1 else float('nan')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trend': self.trend.to_dict(),
+            'min_price': self.min_price,
+            'max_price': self.max_price,
+            'median': self.median.to_dict(),
+            'last_price': self.last_price,
+            'returns_n': self.returns_n,
+            'returns_mean': self.returns_mean,
+            'returns_m2': self.returns_m2,
+            'var_sketch': self.var_sketch.to_dict(),
+            'tail_sum': self.tail_sum,
+            'tail_count': self.tail_count,
+            'running_max': self.running_max,
+            'max_drawdown': self.max_drawdown,
+            'volatility': {name: v.to_dict() for name, v in self.volatility.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'StreamingPriceStats':
+        state = dict(state)
+        state['trend'] = OnlineTrend.from_dict(state['trend'])
+        state['median'] = P2Quantile.from_dict(state['median'])
+        state['var_sketch'] = P2Quantile.from_dict(state['var_sketch'])
+        state['volatility'] = {name: RollingVolatility.from_dict(v) for name, v in state['volatility'].items()}
+        return cls(**state)
+
+
+class RobustAnomalyScorer:
+    """Streaming anomaly scores for the log returns of a price series
+
+    Every return is scored against the state before it arrived by two
+    measures: a robust z-score against the median and MAD of the previous
+    `window` accepted returns, and an EWMA z-score against the
+    RiskMetrics-style exponentially weighted return volatility. A point is
+    anomalous when both exceed their thresholds, so isolated moves are
+    flagged while volatility regime changes (which the EWMA adapts to
+    quickly) are not.
+
+    A flagged price is held out of the state until the next valid price
+    arrives. If that price is normal against the state without it, the
+    flagged price was a spike and is dropped, so its reversal is not flagged
+    again; otherwise it was a level shift and is accepted. Only the last
+    `window` returns are kept, and runs of prices are scored in vectorized
+    passes of at most CHUNK prices.
+    """
+
+    # Consistency constant making the MAD comparable to a standard deviation
+    MAD_SCALE = 1.4826
+    # Smallest MAD used, so flat series do not flag every tiny move
+    MIN_MAD = 1e-4
+    # Prices scored per pass; bounds the rescoring work after each anomaly
+    CHUNK = 8192
+
+    def __init__(self, window: int = 30, lam: float = 0.94, z_threshold: float = 6.0,
+                 ewma_threshold: float = 4.0, recent: list = None, last_price: float = None,
+                 ewma_var: float = None, count: int = 0, pending: float = None):
+        self.window = window
+        self.lam = lam
+        self.z_threshold = z_threshold
+        self.ewma_threshold = ewma_threshold
+        self.recent = list(recent or [])
+        self.last_price = last_price
+        self.ewma_var = ewma_var
+        self.count = count
+        self.pending = pending
+
+    def score(self, prices: Iterable[float]) -> Dict[str, np.ndarray]:
+        """
+        Score the next prices of the series and fold the accepted ones into the state
+
+        Returns arrays aligned with prices: log_return (from the last accepted
+        price), robust_z and ewma_z (NaN until enough history exists), and
+        boolean invalid (non-positive or non-finite prices, which are skipped)
+        and anomaly masks.
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        n = len(prices)
+        result = {
+            'log_return': np.full(n, np.nan),
+            'robust_z': np.full(n, np.nan),
+            'ewma_z': np.full(n, np.nan),
+            'invalid': ~(np.isfinite(prices) & (prices > 0)),
+            'anomaly': np.zeros(n, dtype=bool)
+        }
+
+        positions = np.flatnonzero(~result['invalid'])
+        while len(positions):
+            run = prices[positions[:self.CHUNK]]
+            returns, robust_z, ewma_z, variance, shift = self._score_run(run)
+            with np.errstate(invalid='ignore'):
+                flagged = np.flatnonzero((np.abs(robust_z) > self.z_threshold) &
+                                         (np.abs(ewma_z) > self.ewma_threshold)) + shift
+
+            if self.pending is not None:
+                pending, self.pending = self.pending, None
+                if len(flagged) and flagged[0] == 0:
+                    # Still far from the last accepted price: the pending price was a level shift
+                    single = np.array([pending])
+                    single_returns, _, _, single_variance, single_shift = self._score_run(single)
+                    self._accept(single, single_returns, single_variance, 0, single_shift)
+                    continue
+
+            scored = positions[shift:len(run)]
+            result['log_return'][scored] = returns
+            result['robust_z'][scored] = robust_z
+            result['ewma_z'][scored] = ewma_z
+
+            if len(flagged) == 0:
+                self._accept(run, returns, variance, len(run) - 1, shift)
+                positions = positions[len(run):]
+                continue
+
+            # Accept the run up to the first anomaly and hold that price back
+            k = int(flagged[0])
+            result['anomaly'][positions[k]] = True
+            self._accept(run, returns, variance, k - 1, shift)
+            self.pending = float(run[k])
+            positions = positions[k + 1:]
+
+        return result
+
+    def _score_run(self, prices: np.ndarray):
+        """Scores of a run of valid prices assuming all of them are accepted (state unchanged)"""
+        log_prices = np.log(prices)
+        if self.last_price is None:
+            returns = np.diff(log_prices)
+            shift = 1
+        else:
+            returns = np.diff(log_prices, prepend=np.log(self.last_price))
+            shift = 0
+
+        robust_z = np.full(len(returns), np.nan)
+        ewma_z = np.full(len(returns), np.nan)
+        variance = np.array([self.ewma_var if self.ewma_var is not None else np.nan])
+        if len(returns) == 0:
+            return returns, robust_z, ewma_z, variance, shift
+
+        # Robust z-score against the `window` returns before each return
+        history = np.concatenate([self.recent, returns])
+        offset = len(self.recent)
+        first = max(self.window - offset, 0)
+        if first < len(returns):
+            windows = np.lib.stride_tricks.sliding_window_view(history[:-1], self.window)
+            windows = windows[first + offset - self.window:]
+            median = np.median(windows, axis=1)
+            mad = np.median(np.abs(windows - median[:, None]), axis=1)
+            scale = np.maximum(self.MAD_SCALE * mad, self.MIN_MAD)
+            robust_z[first:] = (returns[first:] - median) / scale
+
+        # EWMA variance: v_t = lam * v_t-1 + (1 - lam) * r_t², seeded by the stored state
+        squares = returns * returns
+        seed = self.ewma_var if self.ewma_var is not None else squares[0]
+        variance = pd.Series(np.concatenate([[seed], squares])).ewm(alpha=1 - self.lam, adjust=False).mean()
+        variance = variance.to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = returns / np.sqrt(variance[:-1])
+        ewma_z[:] = np.where(np.isfinite(z), z, np.nan)
+        # The first return of a series has no prior volatility
+        if self.ewma_var is None:
+            ewma_z[0] = np.nan
+
+        return returns, robust_z, ewma_z, variance, shift
+
+    def _accept(self, prices: np.ndarray, returns: np.ndarray, variance: np.ndarray, last: int, shift: int):
+        """Fold prices[:last + 1] of a scored run into the state"""
+        if last < 0:
+            return
+        self.last_price = float(prices[last])
+        accepted = last + 1 - shift
+        if accepted > 0:
+            self.recent = np.concatenate([self.recent, returns[:accepted]])[-self.window:].tolist()
+            self.ewma_var = float(variance[accepted])
+            self.count += accepted
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'window': self.window,
+            'lam': self.lam,
+            'z_threshold': self.z_threshold,
+            'ewma_threshold': self.ewma_threshold,
+            'recent': self.recent,
+            'last_price': self.last_price,
+            'ewma_var': self.ewma_var,
+            'count': self.count,
+            'pending': self.pending
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'RobustAnomalyScorer':
+        return cls(**state)
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Optional, Sequence
+
+# Compact in-memory representation of many aligned series.
+#
+# A Panel holds one contiguous (index x series) matrix of float32 or float64
+# values, a shared sorted index (dates or years) and one integer code per
+# series (a commodity id, or a position in `labels` for composite keys).
+# Missing observations are NaN. Analyzers receive it directly or through
+# zero-copy DataFrame views, instead of one long DataFrame with object and
+# categorical columns per universe-wide computation.
+
+
+class Panel:
+    """Dense (index x series) value matrix with integer series codes"""
+
+    def __init__(self, values: np.ndarray, index: pd.Index, codes: Sequence[int],
+                 labels: Optional[List[Any]] = None, index_name: str = 'date', value_name: str = 'price'):
+        self.values = np.ascontiguousarray(values)
+        self.index = pd.Index(index, name=index_name)
+        self.codes = np.asarray(codes, dtype=np.int64)
+        self.labels = list(labels) if labels is not None else None
+        self.index_name = index_name
+        self.value_name = value_name
+        self._positions = {int(code): i for i, code in enumerate(self.codes)}
+
+    @classmethod
+    def from_long(cls, index_values, codes, values, dtype=np.float32, **kwargs) -> 'Panel':
+        """
+        Build a panel from aligned long-format arrays in one scatter
+
+        Args:
+            index_values: Index value (date or year) of every observation
+            codes: Integer series code of every observation
+            values: Observed values (NaN allowed)
+            dtype: Value dtype of the matrix (float32 or float64)
+            **kwargs: labels, index_name and value_name passed to Panel
+
+        Duplicate (index, code) pairs keep the last observation.
+        """
+        index_values = np.asarray(index_values)
+        codes = np.asarray(codes, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+
+        index, rows = np.unique(index_values, return_inverse=True)
+        series, columns = np.unique(codes, return_inverse=True)
+        matrix = np.full((len(index), len(series)), np.nan, dtype=dtype)
+
+        cells = rows.reshape(-1) * len(series) + columns.reshape(-1)
+        # Last occurrence of every cell: first occurrence in reversed order
+        _, reversed_first = np.unique(cells[::-1], return_index=True)
+        last = len(cells) - 1 - reversed_first
+        matrix.reshape(-1)[cells[last]] = values[last]
+
+        return cls(matrix, index, series, **kwargs)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, dtype=np.float32) -> 'Panel':
+        """Build a panel from a wide DataFrame with integer column labels"""
+        return cls(frame.to_numpy(dtype=dtype), frame.index, frame.columns.to_numpy(),
+                   index_name=frame.index.name or 'date')
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the matrix, index and codes"""
+        return self.values.nbytes + self.index.nbytes + self.codes.nbytes
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code) -> bool:
+        return int(code) in self._positions
+
+    def __repr__(self):
+        return f'<Panel {self.values.shape[0]}x{self.values.shape[1]} {self.values.dtype}>'
+
+    def position(self, code: int) -> int:
+        return self._positions[int(code)]
+
+    def column(self, code: int) -> np.ndarray:
+        """Values of one series (a view, NaN where unobserved)"""
+        return self.values[:, self.position(code)]
+
+    def series(self, code: int) -> pd.Series:
+        """Observed values of one series as a float64 Series indexed by the panel index"""
+        column = self.column(code)
+        observed = ~np.isnan(column)
+        return pd.Series(column[observed].astype(np.float64), index=self.index[observed], name=self.value_name)
+
+    def series_frame(self, code: int) -> pd.DataFrame:
+        """Observed values of one series in the long format analyzers take (e.g. ['date', 'price'])"""
+        series = self.series(code)
+        return pd.DataFrame({self.index_name: series.index, self.value_name: series.to_numpy()})
+
+    def to_frame(self) -> pd.DataFrame:
+        """Wide DataFrame over the panel matrix (index x series codes), without copying"""
+        return pd.DataFrame(self.values, index=self.index, columns=pd.Index(self.codes), copy=False)
+
+    def select(self, codes: Sequence[int]) -> 'Panel':
+        """Panel of a subset of series, in the given order"""
+        positions = [self.position(code) for code in codes]
+        labels = [self.labels[p] for p in positions] if self.labels is not None else None
+        return Panel(self.values[:, positions], self.index, self.codes[positions], labels,
+                     self.index_name, self.value_name)
+
+    def astype(self, dtype) -> 'Panel':
+        return Panel(self.values.astype(dtype), self.index, self.codes, self.labels,
+                     self.index_name, self.value_name)
+
+    def counts(self) -> np.ndarray:
+        """Observations per series"""
+        return (~np.isnan(self.values)).sum(axis=0)
+
+    def left_aligned(self) -> np.ndarray:
+        """
+        (series x max observations) float64 array of each series' observed values
+
+        Observations keep their order and are shifted to the left, with NaN
+        padding, as batch_trends.left_align builds from separate arrays.
+        """
+        values = self.values.T
+        observed = ~np.isnan(values)
+        width = int(observed.sum(axis=1).max()) if len(values) else 0
+        # A stable sort of the missing flags moves observations to the front in order
+        order = np.argsort(~observed, axis=1, kind='stable')[:, :width]
+        return np.take_along_axis(values, order, axis=1).astype(np.float64)
+
+    def memory_usage(self) -> Dict[str, int]:
+        return {
+            'values': int(self.values.nbytes),
+            'index': int(self.index.nbytes),
+            'codes': int(self.codes.nbytes),
+            'total': int(self.nbytes)
+        }
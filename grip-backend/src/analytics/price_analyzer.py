@@ -3,21 +3,52 @@ import numpy as np
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from .base_analyzer import BaseAnalyzer
+from .comparison_engine import ComparisonEngine
+from .online_stats import StreamingPriceStats
+from .kernels import run_lengths, max_drawdown, local_extrema
+from .volatility_surface import get_volatility_surface
+from .seasonal_decomposition import SeasonalDecomposer
 
 class PriceAnalyzer(BaseAnalyzer):
     """Analyzer for commodity price data"""
     
     def __init__(self):
         super().__init__("PriceAnalyzer")
+        self.comparison_engine = ComparisonEngine()
+        self.seasonal_decomposer = SeasonalDecomposer()
     
-    def analyze(self, data: pd.DataFrame, commodity: str = None, **kwargs) -> Dict[str, Any]:
+    # Sections produced by analyze() and the shared intermediates each one needs
+    SECTIONS = {
+        'statistics': (),
+        'trend': ('values',),
+        'volatility': ('values', 'surface'),
+        'price_movements': ('returns',),
+        'support_resistance': ('values',),
+        'seasonality': (),
+        'risk_metrics': ('returns',),
+        'forecast': ()
+    }
+    
+    # Intermediates in computation order (later ones may read earlier ones)
+    INTERMEDIATES = ('values', 'returns', 'surface')
+    
+    def analyze(self, data: pd.DataFrame, commodity: str = None, sections=None, **kwargs) -> Dict[str, Any]:
         """
         Analyze commodity price data
         
         Args:
             data: DataFrame with columns ['date', 'price', 'commodity']
             commodity: Specific commodity to analyze (optional)
+            sections: Result sections to compute (optional, defaults to all of SECTIONS)
         """
+        if sections is None:
+            sections = set(self.SECTIONS)
+        else:
+            sections = set(sections)
+            unknown = sections - set(self.SECTIONS)
+            if unknown:
+                return {'error': f"Unknown price analysis sections: {', '.join(sorted(unknown))}"}
+        
         if not self.validate_data(data, ['date', 'price']):
             return {'error': 'Invalid data format'}
         
@@ -34,7 +65,6 @@ class PriceAnalyzer(BaseAnalyzer):
         # Sort by date
         data = data.sort_values('date')
         
-        # Perform various analyses
         results = {
             'commodity': commodity,
             'analysis_date': datetime.utcnow().isoformat(),
@@ -45,41 +75,141 @@ class PriceAnalyzer(BaseAnalyzer):
             }
         }
         
-        # Basic statistics
-        results['statistics'] = self.calculate_statistics(data['price'])
+        # Shared intermediates are computed once for every section that needs them
+        needed = {dep for section in sections for dep in self.SECTIONS[section]}
+        intermediates = {}
+        for name in self.INTERMEDIATES:
+            if name in needed:
+                intermediates[name] = self._compute_intermediate(name, data, intermediates)
+        
+        # Keep the canonical section order of the full analysis
+        for section in self.SECTIONS:
+            if section in sections:
+                value = self._compute_section(section, data, intermediates)
+                if value is not None:
+                    results[section] = value
+        
+        return results
+    
+    def _compute_intermediate(self, name: str, data: pd.DataFrame, intermediates: Dict[str, Any]):
+        """Compute a value shared by several sections"""
+        if name == 'values':
+            return data['price'].to_numpy(dtype=np.float64)
+        if name == 'returns':
+            return data['price'].pct_change()
+        if name == 'surface':
+            # Every volatility measure reads the same cached surface
+            values = intermediates.get('values')
+            if values is None:
+                values = data['price'].to_numpy(dtype=np.float64)
+            return get_volatility_surface(values, ewma=True)
+        raise ValueError(f"Unknown intermediate: {name}")
+    
+    def _compute_section(self, section: str, data: pd.DataFrame, intermediates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Compute one result section (None when it does not apply to the data)"""
+        prices = data['price']
+        
+        if section == 'statistics':
+            return self.calculate_statistics(prices)
+        
+        if section == 'trend':
+            return self.calculate_trend(intermediates['values'])
+        
+        if section == 'volatility':
+            surface = intermediates['surface']
+            parkinson = surface.range_volatility(30)
+            parkinson = parkinson[~np.isnan(parkinson)]
+            return {
+                'daily': self.calculate_volatility(prices, window=30, surface=surface),
+                'weekly': self.calculate_volatility(prices, window=7, surface=surface),
+                'monthly': self.calculate_volatility(prices, window=90, surface=surface),
+                'ewma': surface.latest(surface.ewma),
+                'parkinson': float(parkinson.mean()) if len(parkinson) else None
+            }
+        
+        if section == 'price_movements':
+            return self.analyze_price_movements(data, returns=intermediates['returns'])
+        
+        if section == 'support_resistance':
+            return self.find_support_resistance_levels(intermediates['values'])
+        
+        if section == 'seasonality':
+            return self.analyze_seasonality(data)
         
-        # Trend analysis
-        results['trend'] = self.calculate_trend(data['price'])
+        if section == 'risk_metrics':
+            return self.calculate_risk_metrics(prices, returns=intermediates['returns'], dates=data['date'])
         
-        # Volatility analysis
-        results['volatility'] = {
-            'daily': self.calculate_volatility(data['price'], window=30),
-            'weekly': self.calculate_volatility(data['price'], window=7),
-            'monthly': self.calculate_volatility(data['price'], window=90)
+        if section == 'forecast':
+            return self.simple_forecast(prices)
+        
+        raise ValueError(f"Unknown section: {section}")
+    
+    def analyze_from_state(self, stats: StreamingPriceStats, commodity: str = None) -> Dict[str, Any]:
+        """
+        Answer the summary sections of analyze() from streaming statistics
+        
+        Args:
+            stats: Streaming state covering the commodity's full price history
+            commodity: Commodity name to report (optional)
+        
+        Statistics, trend and volatility match the full analysis; the median,
+        VaR and CVaR come from quantile sketches and are approximate.
+        """
+        if stats.count == 0:
+            return {'error': 'No data available for analysis'}
+        
+        trend = stats.trend
+        full_std = trend.std
+        
+        results = {
+            'commodity': commodity,
+            'analysis_date': datetime.utcnow().isoformat(),
+            'data_points': stats.count,
+            'source': 'streaming_state'
         }
         
-        # Price movements
-        results['price_movements'] = self.analyze_price_movements(data)
+        results['statistics'] = {
+            'mean': trend.mean_y,
+            'median': stats.median.value(),
+            'std': full_std,
+            'min': stats.min_price,
+            'max': stats.max_price,
+            'count': stats.count,
+            'null_count': 0
+        }
         
-        # Support and resistance levels
-        results['support_resistance'] = self.find_support_resistance_levels(data['price'])
+        if stats.count < 2:
+            results['trend'] = {'trend': 'insufficient_data', 'slope': 0, 'r_squared': 0}
+        else:
+            results['trend'] = {
+                'trend': self.classify_trend(trend.slope),
+                'slope': trend.slope,
+                'r_squared': trend.r_squared,
+                'periods_analyzed': stats.count
+            }
         
-        # Seasonal patterns
-        if len(data) > 365:  # Need at least a year of data
-            results['seasonality'] = self.analyze_seasonality(data)
+        results['volatility'] = {name: volatility.value(full_std)
+                                 for name, volatility in stats.volatility.items()}
         
-        # Risk metrics
-        results['risk_metrics'] = self.calculate_risk_metrics(data['price'])
+        returns_std = stats.returns_std
+        risk_free_rate = 0.02 / 252  # Daily risk-free rate
+        sharpe_ratio = (stats.returns_mean - risk_free_rate) / returns_std * np.sqrt(252) \
+            if returns_std and np.isfinite(returns_std) else 0
         
-        # Price forecasting (simple)
-        results['forecast'] = self.simple_forecast(data['price'])
+        results['risk_metrics'] = {
+            'var_95': stats.var_sketch.value(),
+            'cvar_95': stats.tail_sum / stats.tail_count if stats.tail_count else float('nan'),
+            'max_drawdown': stats.max_drawdown if stats.returns_n else float('nan'),
+            'sharpe_ratio': sharpe_ratio,
+            'annualized_volatility': returns_std * np.sqrt(252)
+        }
         
         return results
     
-    def analyze_price_movements(self, data: pd.DataFrame) -> Dict[str, Any]:
+    def analyze_price_movements(self, data: pd.DataFrame, returns: pd.Series = None) -> Dict[str, Any]:
         """Analyze price movements and returns"""
         data = data.copy()
-        data['returns'] = data['price'].pct_change()
+        data['returns'] = returns if returns is not None else data['price'].pct_change()
         data['log_returns'] = np.log(data['price'] / data['price'].shift(1))
         
         # Daily returns statistics
@@ -103,82 +233,98 @@ class PriceAnalyzer(BaseAnalyzer):
     
     def find_consecutive_movements(self, returns: pd.Series, positive: bool = True) -> Dict[str, Any]:
         """Find consecutive positive or negative movements"""
-        if positive:
-            condition = returns > 0
-        else:
-            condition = returns < 0
+        values = returns.to_numpy(dtype=np.float64)
+        with np.errstate(invalid='ignore'):
+            condition = values > 0 if positive else values < 0
         
-        # Find consecutive sequences
-        groups = (condition != condition.shift()).cumsum()
-        consecutive = returns[condition].groupby(groups[condition])
+        streak_lengths = run_lengths(condition)
         
-        if len(consecutive) == 0:
+        if len(streak_lengths) == 0:
             return {'max_streak': 0, 'avg_streak': 0, 'total_streaks': 0}
         
-        streak_lengths = consecutive.size()
-        
         return {
-            'max_streak': streak_lengths.max(),
-            'avg_streak': streak_lengths.mean(),
+            'max_streak': int(streak_lengths.max()),
+            'avg_streak': float(streak_lengths.mean()),
             'total_streaks': len(streak_lengths)
         }
     
-    def find_support_resistance_levels(self, prices: pd.Series, window: int = 20) -> Dict[str, Any]:
-        """Identify support and resistance levels"""
-        # Rolling min/max for support/resistance
-        rolling_min = prices.rolling(window=window).min()
-        rolling_max = prices.rolling(window=window).max()
-        
-        # Find local minima and maxima
-        local_mins = prices[(prices == rolling_min) & (prices.shift(1) > prices) & (prices.shift(-1) > prices)]
-        local_maxs = prices[(prices == rolling_max) & (prices.shift(1) < prices) & (prices.shift(-1) < prices)]
+    def find_support_resistance_levels(self, prices, window: int = 20) -> Dict[str, Any]:
+        """Identify support and resistance levels (prices as a Series or array)"""
+        # Local minima/maxima that are also the rolling min/max of their window
+        values = np.asarray(prices, dtype=np.float64)
+        minima, maxima = local_extrema(values, window)
+        local_mins = values[minima]
+        local_maxs = values[maxima]
         
         return {
-            'support_levels': local_mins.tolist()[-5:] if len(local_mins) > 0 else [],  # Last 5 support levels
-            'resistance_levels': local_maxs.tolist()[-5:] if len(local_maxs) > 0 else [],  # Last 5 resistance levels
-            'current_support': local_mins.iloc[-1] if len(local_mins) > 0 else None,
-            'current_resistance': local_maxs.iloc[-1] if len(local_maxs) > 0 else None
+            'support_levels': local_mins[-5:].tolist(),  # Last 5 support levels
+            'resistance_levels': local_maxs[-5:].tolist(),  # Last 5 resistance levels
+            'current_support': float(local_mins[-1]) if len(local_mins) > 0 else None,
+            'current_resistance': float(local_maxs[-1]) if len(local_maxs) > 0 else None
         }
     
-    def analyze_seasonality(self, data: pd.DataFrame) -> Dict[str, Any]:
-        """Analyze seasonal patterns in price data"""
-        data = data.copy()
-        data['month'] = data['date'].dt.month
-        data['quarter'] = data['date'].dt.quarter
-        data['day_of_week'] = data['date'].dt.dayofweek
-        
-        # Monthly patterns
-        monthly_avg = data.groupby('month')['price'].mean()
-        monthly_std = data.groupby('month')['price'].std()
+    def analyze_seasonality(self, data: pd.DataFrame) -> Optional[Dict[str, Any]]:
+        """Analyze seasonal patterns in price data (None for less than a year of history)"""
+        data = data.dropna(subset=['price'])
+        if len(data) < 2 or data['date'].iloc[-1] - data['date'].iloc[0] < timedelta(days=365):
+            return None
         
-        # Quarterly patterns
-        quarterly_avg = data.groupby('quarter')['price'].mean()
+        # The decomposition needs two full seasonal cycles
+        decomposition = self.seasonal_decomposer.analyze(data.set_index('date')[['price']])
+        decomposed = decomposition['series'].get('price')
+        frequency = self.seasonal_decomposer.detect_frequency(pd.DatetimeIndex(data['date']))
         
-        # Day of week patterns
-        dow_avg = data.groupby('day_of_week')['price'].mean()
+        dates = data['date'].dt
+        prices = data['price'].to_numpy(dtype=np.float64)
+        monthly_avg, monthly_std = self._group_moments(dates.month.to_numpy(), prices)
+        quarterly_avg, _ = self._group_moments(dates.quarter.to_numpy(), prices)
         
-        return {
+        result = {
+            'frequency': frequency,
+            'decomposition': decomposed,
             'monthly_patterns': {
-                'averages': monthly_avg.to_dict(),
-                'volatility': monthly_std.to_dict(),
-                'best_month': monthly_avg.idxmax(),
-                'worst_month': monthly_avg.idxmin()
+                'averages': monthly_avg,
+                'volatility': monthly_std,
+                'best_month': max(monthly_avg, key=monthly_avg.get),
+                'worst_month': min(monthly_avg, key=monthly_avg.get)
             },
             'quarterly_patterns': {
-                'averages': quarterly_avg.to_dict(),
-                'best_quarter': quarterly_avg.idxmax(),
-                'worst_quarter': quarterly_avg.idxmin()
-            },
-            'day_of_week_patterns': {
-                'averages': dow_avg.to_dict(),
-                'best_day': dow_avg.idxmax(),
-                'worst_day': dow_avg.idxmin()
+                'averages': quarterly_avg,
+                'best_quarter': max(quarterly_avg, key=quarterly_avg.get),
+                'worst_quarter': min(quarterly_avg, key=quarterly_avg.get)
             }
         }
+        
+        # Day of week patterns only exist for daily series
+        if frequency == 'daily':
+            dow_avg, _ = self._group_moments(dates.dayofweek.to_numpy(), prices)
+            result['day_of_week_patterns'] = {
+                'averages': dow_avg,
+                'best_day': max(dow_avg, key=dow_avg.get),
+                'worst_day': min(dow_avg, key=dow_avg.get)
+            }
+        
+        return result
     
-    def calculate_risk_metrics(self, prices: pd.Series) -> Dict[str, Any]:
-        """Calculate various risk metrics"""
-        returns = prices.pct_change().dropna()
+    @staticmethod
+    def _group_moments(codes: np.ndarray, values: np.ndarray):
+        """Mean and sample standard deviation of values for every observed integer code"""
+        counts = np.bincount(codes)
+        means = np.bincount(codes, weights=values) / np.maximum(counts, 1)
+        deviations = values - means[codes]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stds = np.sqrt(np.bincount(codes, weights=deviations * deviations) / (counts - 1))
+        observed = np.flatnonzero(counts)
+        means = {int(code): float(means[code]) for code in observed}
+        stds = {int(code): float(stds[code]) if counts[code] > 1 else float('nan') for code in observed}
+        return means, stds
+    
+    def calculate_risk_metrics(self, prices: pd.Series, returns: pd.Series = None,
+                               dates: pd.Series = None) -> Dict[str, Any]:
+        """Calculate various risk metrics (dates, aligned with prices, locate the drawdown)"""
+        if returns is None:
+            returns = prices.pct_change()
+        returns = returns.dropna()
         
         # Value at Risk (VaR) - 95% confidence
         var_95 = returns.quantile(0.05)
@@ -186,24 +332,32 @@ class PriceAnalyzer(BaseAnalyzer):
         # Conditional Value at Risk (CVaR)
         cvar_95 = returns[returns <= var_95].mean()
         
-        # Maximum Drawdown
-        cumulative = (1 + returns).cumprod()
-        running_max = cumulative.expanding().max()
-        drawdown = (cumulative - running_max) / running_max
-        max_drawdown = drawdown.min()
+        # Maximum Drawdown of cumulative returns
+        cumulative = np.cumprod(1 + returns.to_numpy(dtype=np.float64))
+        worst_drawdown, peak, trough = max_drawdown(cumulative)
         
         # Sharpe Ratio (assuming risk-free rate of 2%)
         risk_free_rate = 0.02 / 252  # Daily risk-free rate
         excess_returns = returns - risk_free_rate
         sharpe_ratio = excess_returns.mean() / returns.std() * np.sqrt(252) if returns.std() != 0 else 0
         
-        return {
+        risk_metrics = {
             'var_95': var_95,
             'cvar_95': cvar_95,
-            'max_drawdown': max_drawdown,
+            'max_drawdown': worst_drawdown,
             'sharpe_ratio': sharpe_ratio,
             'annualized_volatility': returns.std() * np.sqrt(252)
         }
+        
+        if dates is not None and len(returns) > 0:
+            # Kernel positions index the returns; map them back to the price dates
+            drawdown_dates = dates.loc[returns.index]
+            risk_metrics['max_drawdown_period'] = {
+                'peak': drawdown_dates.iloc[peak].isoformat(),
+                'trough': drawdown_dates.iloc[trough].isoformat()
+            }
+        
+        return risk_metrics
     
     def simple_forecast(self, prices: pd.Series, periods: int = 30) -> Dict[str, Any]:
         """Simple price forecasting using moving averages and trend"""
@@ -247,19 +401,25 @@ class PriceAnalyzer(BaseAnalyzer):
         if 'commodity' not in data.columns:
             return {'error': 'Commodity column required for comparison'}
         
-        comparison_results = {}
+        # Pivot all requested series into one panel and compare them in a single pass
+        data = data[data['commodity'].isin(commodities)].dropna(subset=['price'])
+        if len(data) == 0:
+            return {}
+        
+        panel = data.pivot_table(index='date', columns='commodity', values='price', aggfunc='last')
+        comparison = self.comparison_engine.analyze(panel)
         
+        comparison_results = {}
         for commodity in commodities:
-            commodity_data = data[data['commodity'] == commodity]
-            if len(commodity_data) > 0:
-                analysis = self.analyze(commodity_data, commodity)
+            analysis = comparison.get(commodity)
+            if analysis and 'error' not in analysis:
                 comparison_results[commodity] = {
-                    'current_price': commodity_data['price'].iloc[-1] if len(commodity_data) > 0 else None,
-                    'volatility': analysis.get('volatility', {}).get('daily', 0),
-                    'trend': analysis.get('trend', {}).get('trend', 'unknown'),
-                    'performance_1m': self.calculate_performance(commodity_data, 30),
-                    'performance_3m': self.calculate_performance(commodity_data, 90),
-                    'performance_1y': self.calculate_performance(commodity_data, 365)
+                    'current_price': analysis['current_price'],
+                    'volatility': analysis['volatility']['daily'],
+                    'trend': analysis['trend']['trend'],
+                    'performance_1m': analysis['performance']['1m'],
+                    'performance_3m': analysis['performance']['3m'],
+                    'performance_1y': analysis['performance']['1y']
                 }
         
         return comparison_results
@@ -0,0 +1,124 @@
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from .data_loaders import load_price_frame
+from .online_stats import RobustAnomalyScorer
+from ..models.user import db
+from ..models.commodity import Commodity
+from ..models.price_anomaly import PriceAnomaly, AnomalyDetectorState
+
+class PriceAnomalyDetector:
+    """Flags suspicious prices into the price_anomalies table as they are ingested
+
+    Each AnomalyDetectorState row holds the RobustAnomalyScorer state of one
+    commodity's price series. Appended prices are scored against that state
+    in one vectorized pass per batch, and anomalous or invalid points are
+    written as PriceAnomaly rows. Methods expect an active application
+    context.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger("analytics.PriceAnomalyDetector")
+
+    def rebuild(self, commodity_ids: Optional[List[int]] = None) -> int:
+        """Rescore full price histories (all commodities by default), replacing their anomalies"""
+        if commodity_ids is None:
+            commodity_ids = [row[0] for row in db.session.query(Commodity.id).all()]
+        if not commodity_ids:
+            return 0
+
+        prices = load_price_frame(commodity_ids)
+        existing = {row.commodity_id: row
+                    for row in AnomalyDetectorState.query.filter(
+                        AnomalyDetectorState.commodity_id.in_(commodity_ids)).all()}
+        PriceAnomaly.query.filter(PriceAnomaly.commodity_id.in_(commodity_ids)).delete(synchronize_session=False)
+
+        rebuilt = 0
+        flagged = 0
+        if not prices.empty:
+            for commodity_id, series in prices.groupby('commodity_id', sort=False):
+                scorer = RobustAnomalyScorer()
+                timestamps = [ts.to_pydatetime() for ts in series['date']]
+                flagged += self._record(int(commodity_id), scorer, timestamps, series['price'].to_numpy())
+                entry = existing.pop(commodity_id, None) or AnomalyDetectorState(commodity_id=int(commodity_id))
+                self._store(entry, scorer, timestamps[-1])
+                db.session.add(entry)
+                rebuilt += 1
+
+        for entry in existing.values():
+            db.session.delete(entry)
+
+        db.session.commit()
+        self.logger.info(f"Rescored prices of {rebuilt} commodities, {flagged} anomalies flagged")
+        return rebuilt
+
+    def append_prices(self, commodity_id: int, points: List[Tuple[datetime, float]]) -> int:
+        """
+        Score newly stored prices of a commodity and flag anomalies
+
+        Args:
+            commodity_id: Commodity the prices belong to
+            points: (timestamp, price) pairs that were just stored
+
+        Returns the number of anomalies flagged. Backfilled points (not newer
+        than the scored history) trigger a rescore of that commodity, since
+        every later score depends on them.
+        """
+        points = sorted((ts, price) for ts, price in points if price is not None)
+        if not points:
+            return 0
+
+        entry = AnomalyDetectorState.query.filter_by(commodity_id=commodity_id).first()
+        if entry is None or entry.state is None or points[0][0] <= entry.last_timestamp:
+            self.rebuild([commodity_id])
+            return PriceAnomaly.query.filter(PriceAnomaly.commodity_id == commodity_id,
+                                             PriceAnomaly.timestamp >= points[0][0]).count()
+
+        scorer = RobustAnomalyScorer.from_dict(json.loads(entry.state))
+        timestamps = [ts for ts, _ in points]
+        flagged = self._record(commodity_id, scorer, timestamps, np.array([price for _, price in points], dtype=np.float64))
+        self._store(entry, scorer, timestamps[-1])
+        db.session.commit()
+        return flagged
+
+    def get_anomalies(self, commodity_id: Optional[int] = None, since: Optional[datetime] = None,
+                      limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent flagged anomalies, optionally for one commodity and after a date"""
+        query = PriceAnomaly.query
+        if commodity_id is not None:
+            query = query.filter(PriceAnomaly.commodity_id == commodity_id)
+        if since is not None:
+            query = query.filter(PriceAnomaly.timestamp >= since)
+        return [row.to_dict() for row in query.order_by(PriceAnomaly.timestamp.desc()).limit(limit).all()]
+
+    def _record(self, commodity_id: int, scorer: RobustAnomalyScorer, timestamps: List[datetime],
+                prices: np.ndarray) -> int:
+        """Score prices and insert a PriceAnomaly row for every flagged point"""
+        scores = scorer.score(prices)
+        flagged = np.flatnonzero(scores['anomaly'] | scores['invalid'])
+        if len(flagged) == 0:
+            return 0
+
+        def optional(value):
+            return float(value) if np.isfinite(value) else None
+
+        db.session.bulk_insert_mappings(PriceAnomaly, [{
+            'commodity_id': commodity_id,
+            'timestamp': timestamps[i],
+            'price': optional(prices[i]),
+            'anomaly_type': 'invalid_price' if scores['invalid'][i] else 'outlier',
+            'log_return': optional(scores['log_return'][i]),
+            'robust_z': optional(scores['robust_z'][i]),
+            'ewma_z': optional(scores['ewma_z'][i])
+        } for i in flagged])
+        return len(flagged)
+
+    def _store(self, entry: AnomalyDetectorState, scorer: RobustAnomalyScorer, last_timestamp: datetime):
+        """Write the scorer state onto a state row"""
+        entry.data_points = scorer.count + 1 if scorer.last_price is not None else 0
+        entry.last_timestamp = last_timestamp
+        entry.state = json.dumps(scorer.to_dict())
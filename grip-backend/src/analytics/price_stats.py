@@ -0,0 +1,121 @@
+import json
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from .data_loaders import load_price_frame
+from .online_stats import StreamingPriceStats
+from ..models.user import db
+from ..models.commodity import Commodity
+from ..models.price_stats_state import PriceStatsState
+
+class PriceStatsTracker:
+    """Maintains the persisted streaming statistics of every price series
+
+    Each PriceStatsState row holds a StreamingPriceStats state for the full
+    price history of one commodity. Appending prices folds them into the
+    state in O(1) per point, and PriceAnalyzer.analyze_from_state answers the
+    summary sections from it without loading the history. Methods expect an
+    active application context.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger("analytics.PriceStatsTracker")
+
+    def rebuild(self, commodity_ids: Optional[List[int]] = None) -> int:
+        """
+        Recompute states from full price history (all commodities by default)
+
+        A state row inserted concurrently by another process fails the
+        commit on its unique commodity; the rows are then re-read and the
+        rebuild is written over them.
+        """
+        if commodity_ids is None:
+            commodity_ids = [row[0] for row in db.session.query(Commodity.id).all()]
+        if not commodity_ids:
+            return 0
+
+        try:
+            rebuilt = self._rebuild(commodity_ids)
+        except IntegrityError:
+            db.session.rollback()
+            rebuilt = self._rebuild(commodity_ids)
+
+        self.logger.info(f"Rebuilt price statistics for {rebuilt} commodities")
+        return rebuilt
+
+    def _rebuild(self, commodity_ids: List[int]) -> int:
+        """Write the states of some commodities and commit, returning how many were written"""
+        prices = load_price_frame(commodity_ids)
+        existing = {row.commodity_id: row
+                    for row in PriceStatsState.query.filter(PriceStatsState.commodity_id.in_(commodity_ids)).all()}
+
+        rebuilt = 0
+        if not prices.empty:
+            for commodity_id, series in prices.groupby('commodity_id', sort=False):
+                stats = StreamingPriceStats.from_values(series['price'].to_numpy())
+                entry = existing.pop(commodity_id, None) or PriceStatsState(commodity_id=int(commodity_id))
+                entry.first_timestamp = series['date'].iloc[0].to_pydatetime()
+                self._store(entry, stats, series['date'].iloc[-1].to_pydatetime())
+                db.session.add(entry)
+                rebuilt += 1
+
+        for entry in existing.values():
+            db.session.delete(entry)
+
+        db.session.commit()
+        return rebuilt
+
+    def append_prices(self, commodity_id: int, points: List[Tuple[datetime, float]]) -> bool:
+        """
+        Fold newly stored prices into a commodity's statistics state
+
+        Args:
+            commodity_id: Commodity the prices belong to
+            points: (timestamp, price) pairs that were just stored
+
+        Backfilled points (not newer than the tracked history) trigger a
+        rebuild of that commodity, since order-dependent statistics such as
+        returns and drawdown change after them.
+        """
+        points = sorted((ts, price) for ts, price in points if price is not None)
+        if not points:
+            return False
+
+        entry = PriceStatsState.query.filter_by(commodity_id=commodity_id).first()
+        if entry is None or entry.state is None or points[0][0] <= entry.last_timestamp:
+            self.rebuild([commodity_id])
+            return True
+
+        stats = StreamingPriceStats.from_dict(json.loads(entry.state))
+        for _, price in points:
+            stats.update(float(price))
+
+        self._store(entry, stats, points[-1][0])
+        db.session.commit()
+        return True
+
+    def get_state(self, commodity_id: int) -> Optional[Tuple[PriceStatsState, StreamingPriceStats]]:
+        """Load a commodity's state, building it on first use"""
+        loaded = self.load_state(commodity_id)
+        if loaded is None:
+            self.rebuild([commodity_id])
+            loaded = self.load_state(commodity_id)
+        return loaded
+
+    def load_state(self, commodity_id: int) -> Optional[Tuple[PriceStatsState, StreamingPriceStats]]:
+        """Load a commodity's state, or None when it has not been built"""
+        entry = PriceStatsState.query.filter_by(commodity_id=commodity_id).first()
+        if entry is None or entry.state is None:
+            return None
+
+        return entry, StreamingPriceStats.from_dict(json.loads(entry.state))
+
+    def _store(self, entry: PriceStatsState, stats: StreamingPriceStats, last_timestamp: datetime):
+        """Write summary columns and streaming state onto a state row"""
+        entry.data_points = stats.count
+        entry.last_price = stats.last_price
+        entry.last_timestamp = last_timestamp
+        entry.state = json.dumps(stats.to_dict())
@@ -0,0 +1,35 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from .trend_index import TrendIndexer
+from .price_stats import PriceStatsTracker
+from .price_anomalies import PriceAnomalyDetector
+from ..models.user import db
+
+logger = logging.getLogger("analytics.price_updates")
+
+
+def notify_prices_appended(new_prices: Dict[int, List[Tuple[datetime, float]]]):
+    """
+    Propagate newly committed prices to the incrementally maintained analytics
+
+    Args:
+        new_prices: (timestamp, price) pairs keyed by commodity id
+
+    Failures are logged and never undo the already committed prices; the
+    affected rows are corrected by the next rebuild.
+    """
+    stages = [
+        ('trend index', TrendIndexer()),
+        ('price statistics', PriceStatsTracker()),
+        ('price anomalies', PriceAnomalyDetector())
+    ]
+
+    for commodity_id, points in new_prices.items():
+        for stage_name, stage in stages:
+            try:
+                stage.append_prices(commodity_id, points)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error updating {stage_name} for commodity {commodity_id}: {e}")
@@ -3,10 +3,16 @@ import numpy as np
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from .base_analyzer import BaseAnalyzer
+from .concentration import concentration_series, concentration_level, CONCENTRATION_RATIOS
 
 class ProductionAnalyzer(BaseAnalyzer):
     """Analyzer for commodity production data"""
     
+    # Columns of country_summary
+    SUMMARY_COLUMNS = ['observations', 'first_year', 'last_year', 'first_production', 'last_production',
+                       'total_production', 'average_production', 'std_production', 'growth_std',
+                       'latest_share', 'cagr']
+    
     def __init__(self):
         super().__init__("ProductionAnalyzer")
     
@@ -70,43 +76,119 @@ class ProductionAnalyzer(BaseAnalyzer):
         
         return results
     
+    def clean_data(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Clean production data, keeping years as calendar numbers"""
+        data = data.dropna(how='all').copy()
+        data['year'] = pd.to_numeric(data['year'], errors='coerce')
+        return data
+    
     def analyze_by_country(self, data: pd.DataFrame) -> Dict[str, Any]:
         """Analyze production by country"""
-        # Total production by country
-        country_totals = data.groupby('country')['production_volume'].sum().sort_values(ascending=False)
-        
-        # Average annual production by country
-        country_averages = data.groupby('country')['production_volume'].mean().sort_values(ascending=False)
+        summary = self.country_summary(data)
+        return self._format_country_analysis(summary, data['country'].nunique())
+    
+    def analyze_countries(self, data: pd.DataFrame, by: str = 'commodity_id') -> Dict[Any, Dict[str, Any]]:
+        """
+        Country analysis and efficiency comparison of many commodities in one pass
         
-        # Production share by country (latest year)
-        latest_year = data['year'].max()
-        latest_data = data[data['year'] == latest_year]
-        total_latest = latest_data['production_volume'].sum()
+        Args:
+            data: DataFrame with columns ['year', 'production_volume', 'country']
+                and the commodity column `by`
+            by: Column identifying the commodity of each row
         
-        if total_latest > 0:
-            country_shares = (latest_data.groupby('country')['production_volume'].sum() / total_latest * 100).sort_values(ascending=False)
-        else:
-            country_shares = pd.Series()
-        
-        # Growth rates by country
-        country_growth = {}
-        for country in data['country'].unique():
-            country_data = data[data['country'] == country].sort_values('year')
-            if len(country_data) >= 2:
-                first_year_prod = country_data['production_volume'].iloc[0]
-                last_year_prod = country_data['production_volume'].iloc[-1]
-                years_span = country_data['year'].iloc[-1] - country_data['year'].iloc[0]
-                
-                if first_year_prod > 0 and years_span > 0:
-                    cagr = ((last_year_prod / first_year_prod) ** (1/years_span) - 1) * 100
-                    country_growth[country] = cagr
+        Returns {commodity: {'country_analysis': ..., 'efficiency': ...}} with
+        the same sections analyze_by_country and compare_production_efficiency
+        give for each commodity alone.
+        """
+        summary = self.country_summary(data, by=by)
+        if summary.empty:
+            return {}
+        
+        country_counts = data.groupby(by, observed=True, sort=False)['country'].nunique()
+        results = {}
+        for commodity, countries in summary.groupby(level=0, sort=False):
+            countries = countries.droplevel(0)
+            results[commodity] = {
+                'country_analysis': self._format_country_analysis(countries, int(country_counts[commodity])),
+                'efficiency': self._format_efficiency(countries)
+            }
+        return results
+    
+    def country_summary(self, data: pd.DataFrame, by: Optional[str] = None) -> pd.DataFrame:
+        """
+        Per-country production aggregates from one sorted groupby
         
+        Args:
+            data: DataFrame with columns ['year', 'production_volume', 'country']
+            by: Optional column (e.g. 'commodity_id') summarized separately,
+                giving one row per (by, country)
+        
+        Returns a DataFrame indexed by country (or (by, country)) in order of
+        first appearance, with observations, first/last year and
+        production, total, average and standard deviation of production,
+        standard deviation of year-over-year growth, share of the latest
+        year's production (%) and CAGR (%).
+        """
+        keys = [by, 'country'] if by else ['country']
+        data = data.dropna(subset=keys + ['year'])
+        if data.empty:
+            return pd.DataFrame(columns=self.SUMMARY_COLUMNS, dtype=np.float64)
+        
+        # Countries keep their order of first appearance, as in the per-country loops this replaces
+        order = (pd.MultiIndex.from_frame(data[keys].drop_duplicates()) if by
+                 else pd.Index(data['country'].unique(), name='country'))
+        data = data.sort_values(keys + ['year'], kind='stable')
+        volumes = data['production_volume'].astype(np.float64)
+        
+        # Growth within each country, and production in the latest year of
+        # its commodity (shares are taken per commodity when several are
+        # summarized together)
+        growth = volumes / volumes.groupby([data[key] for key in keys], observed=True, sort=False).shift() - 1
+        latest_year = data.groupby(by, observed=True, sort=False)['year'].transform('max') if by else data['year'].max()
+        in_latest = data['year'] == latest_year
+        data = data.assign(production_volume=volumes, growth=growth, in_latest=in_latest,
+                           latest=volumes.where(in_latest, 0).fillna(0))
+        
+        # Growth from zero production is infinite; its deviation is undefined (NaN)
+        with np.errstate(invalid='ignore'):
+            summary = data.groupby(keys, observed=True, sort=False).agg(
+                observations=('year', 'size'),
+                first_year=('year', 'first'),
+                last_year=('year', 'last'),
+                first_production=('production_volume', 'first'),
+                last_production=('production_volume', 'last'),
+                total_production=('production_volume', 'sum'),
+                average_production=('production_volume', 'mean'),
+                std_production=('production_volume', 'std'),
+                growth_std=('growth', 'std'),
+                reported=('in_latest', 'any'),
+                latest=('latest', 'sum')
+            ).astype({'first_year': np.float64, 'last_year': np.float64})
+        
+        latest_totals = (summary.groupby(level=0, sort=False)['latest'].transform('sum') if by
+                         else summary['latest'].sum())
+        with np.errstate(invalid='ignore', divide='ignore'):
+            summary['latest_share'] = (summary['latest'] / latest_totals * 100).where(
+                summary['reported'] & (latest_totals > 0))
+            span = summary['last_year'] - summary['first_year']
+            grows = (summary['observations'] >= 2) & (summary['first_production'] > 0) & (span > 0)
+            summary['cagr'] = (((summary['last_production'] / summary['first_production']) ** (1 / span) - 1)
+                               * 100).where(grows)
+        
+        return summary.reindex(order)[self.SUMMARY_COLUMNS]
+    
+    @staticmethod
+    def _top(values: pd.Series, n: int = 10) -> Dict[Any, float]:
+        return values.dropna().sort_values(ascending=False, kind='stable').head(n).to_dict()
+    
+    def _format_country_analysis(self, summary: pd.DataFrame, total_countries: int) -> Dict[str, Any]:
+        """analyze_by_country sections from a country summary"""
         return {
-            'top_producers': country_totals.head(10).to_dict(),
-            'market_share': country_shares.head(10).to_dict(),
-            'average_production': country_averages.head(10).to_dict(),
-            'growth_rates': country_growth,
-            'total_countries': len(data['country'].unique())
+            'top_producers': self._top(summary['total_production']),
+            'market_share': self._top(summary['latest_share']),
+            'average_production': self._top(summary['average_production']),
+            'growth_rates': summary['cagr'].dropna().to_dict(),
+            'total_countries': total_countries
         }
     
     def analyze_growth(self, data: pd.DataFrame) -> Dict[str, Any]:
@@ -170,34 +252,16 @@ class ProductionAnalyzer(BaseAnalyzer):
         if total_production == 0:
             return {'error': 'No production data for latest year'}
         
-        country_shares = (latest_data.groupby('country')['production_volume'].sum() / total_production).sort_values(ascending=False)
-        
-        # Calculate Herfindahl-Hirschman Index (HHI)
-        hhi = (country_shares ** 2).sum() * 10000  # Multiply by 10000 for standard HHI scale
-        
-        # Concentration ratios
-        cr3 = country_shares.head(3).sum() * 100  # Top 3 countries
-        cr5 = country_shares.head(5).sum() * 100  # Top 5 countries
-        cr10 = country_shares.head(10).sum() * 100  # Top 10 countries
-        
-        # Interpret concentration level
-        if hhi < 1500:
-            concentration_level = 'Low'
-        elif hhi < 2500:
-            concentration_level = 'Moderate'
-        else:
-            concentration_level = 'High'
+        country_totals = latest_data.groupby('country', observed=True)['production_volume'].sum()
+        metrics = concentration_series(country_totals.to_numpy(dtype=np.float64).reshape(1, -1, 1))
+        hhi = float(metrics['hhi'][0, 0])
         
         return {
             'hhi': hhi,
-            'concentration_level': concentration_level,
-            'concentration_ratios': {
-                'cr3': cr3,
-                'cr5': cr5,
-                'cr10': cr10
-            },
-            'top_producer_share': country_shares.iloc[0] * 100 if len(country_shares) > 0 else 0,
-            'number_of_producers': len(country_shares)
+            'concentration_level': concentration_level(hhi),
+            'concentration_ratios': {f'cr{n}': float(metrics[f'cr{n}'][0, 0]) for n in CONCENTRATION_RATIOS},
+            'top_producer_share': float(metrics['top_share'][0, 0]),
+            'number_of_producers': len(country_totals)
         }
     
     def assess_supply_risk(self, data: pd.DataFrame) -> Dict[str, Any]:
@@ -309,41 +373,39 @@ class ProductionAnalyzer(BaseAnalyzer):
         if 'country' not in data.columns:
             return {'error': 'Country data required for efficiency analysis'}
         
-        # Calculate production per country over time
-        country_efficiency = {}
-        
-        for country in data['country'].unique():
-            country_data = data[data['country'] == country].sort_values('year')
-            
-            if len(country_data) >= 2:
-                # Calculate average annual production
-                avg_production = country_data['production_volume'].mean()
-                
-                # Calculate production stability (inverse of coefficient of variation)
-                std_production = country_data['production_volume'].std()
-                stability = 1 / (std_production / avg_production) if avg_production > 0 and std_production > 0 else 1
-                
-                # Calculate growth consistency
-                country_data['yoy_growth'] = country_data['production_volume'].pct_change()
-                growth_volatility = country_data['yoy_growth'].std()
-                growth_consistency = 1 / (1 + growth_volatility) if not np.isnan(growth_volatility) else 1
-                
-                country_efficiency[country] = {
-                    'avg_production': avg_production,
-                    'stability_score': stability,
-                    'growth_consistency': growth_consistency,
-                    'efficiency_score': (stability + growth_consistency) / 2
-                }
+        return self._format_efficiency(self.country_summary(data))
+    
+    def _format_efficiency(self, summary: pd.DataFrame) -> Dict[str, Any]:
+        """compare_production_efficiency sections from a country summary"""
+        summary = summary[summary['observations'] >= 2]
+        average = summary['average_production'].to_numpy(dtype=np.float64)
+        std = summary['std_production'].to_numpy(dtype=np.float64)
+        growth_std = summary['growth_std'].to_numpy(dtype=np.float64)
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Production stability (inverse of coefficient of variation)
+            stability = np.where((average > 0) & (std > 0), average / std, 1.0)
+            # Growth consistency
+            consistency = np.where(np.isnan(growth_std), 1.0, 1 / (1 + growth_std))
+        efficiency = (stability + consistency) / 2
+        
+        country_efficiency = {
+            country: {
+                'avg_production': float(average[i]),
+                'stability_score': float(stability[i]),
+                'growth_consistency': float(consistency[i]),
+                'efficiency_score': float(efficiency[i])
+            }
+            for i, country in enumerate(summary.index)
+        }
         
         # Rank countries by efficiency
-        efficiency_ranking = sorted(country_efficiency.items(), 
-                                  key=lambda x: x[1]['efficiency_score'], 
-                                  reverse=True)
+        ranking = [(summary.index[i], float(efficiency[i])) for i in np.argsort(-efficiency, kind='stable')]
         
         return {
             'country_efficiency': country_efficiency,
-            'efficiency_ranking': [(country, scores['efficiency_score']) for country, scores in efficiency_ranking],
-            'most_efficient': efficiency_ranking[0][0] if efficiency_ranking else None,
-            'least_efficient': efficiency_ranking[-1][0] if efficiency_ranking else None
+            'efficiency_ranking': ranking,
+            'most_efficient': ranking[0][0] if ranking else None,
+            'least_efficient': ranking[-1][0] if ranking else None
         }
 
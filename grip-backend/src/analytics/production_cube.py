@@ -0,0 +1,374 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sqlalchemy import func
+
+from .data_loaders import load_volume_cells
+from ..models.user import db
+from ..models.country import Country
+from ..models.production_data import ProductionData
+from ..models.reserves_data import ReservesData
+
+# Dense production and reserves volumes of every commodity, country and year.
+#
+# Each measure is one (commodity x country x year) float64 array addressed
+# by integer codes: commodity and country codes are positions on the
+# commodity_ids / country_ids axes, year codes are offsets from first_year.
+# Slices and aggregations along any axis are numpy indexing and reductions
+# instead of a query and a groupby per request. The cube is built once per
+# process and database, absorbs newly ingested rows incrementally, and is
+# rebuilt when the tables changed in a way it did not see.
+
+MEASURES = ('production', 'reserves')
+AXES = ('commodity', 'country', 'year')
+MODELS = {'production': ProductionData, 'reserves': ReservesData}
+
+
+class ProductionCube:
+    """Production and reserves volumes as dense (commodity x country x year) arrays
+
+    Cells without data are NaN. Several rows for the same cell (different
+    data sources) are summed, as the production loaders do. With a
+    `directory` the arrays are memory-mapped .npy files there, which the next
+    process maps again instead of rebuilding while the tables are unchanged.
+    Methods expect an active application context.
+    """
+
+    METADATA_FILE = 'cube.json'
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.first_year = 0
+        self.country_names = {}
+        self.arrays = {measure: np.empty((0, 0, 0)) for measure in MEASURES}
+        # (row count, largest row id) of each table the arrays reflect
+        self.absorbed = {measure: None for measure in MEASURES}
+        self._set_axes(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), 0)
+        self._pending = {}
+        self._lock = threading.RLock()
+        self.logger = logging.getLogger("analytics.ProductionCube")
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self.arrays['production'].shape
+
+    @property
+    def years(self) -> np.ndarray:
+        return np.arange(self.first_year, self.first_year + self.shape[2], dtype=np.int64)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays.values())
+
+    @staticmethod
+    def table_states() -> Dict[str, Tuple[int, int]]:
+        """(row count, largest row id) of the production and reserves tables"""
+        states = {}
+        for measure, model in MODELS.items():
+            row_count, max_id = db.session.query(func.count(model.id), func.max(model.id)).one()
+            states[measure] = (int(row_count), int(max_id or 0))
+        return states
+
+    def ensure_current(self):
+        """Map the saved arrays or rebuild unless the cube reflects the current tables"""
+        with self._lock:
+            states = self.table_states()
+            if self.absorbed == states:
+                return
+            never_loaded = all(state is None for state in self.absorbed.values())
+            if never_loaded and self.directory and self._load(states):
+                return
+            self.build()
+
+    def build(self):
+        """Rebuild both arrays from the production and reserves tables"""
+        with self._lock:
+            cells = {measure: load_volume_cells(measure) for measure in MEASURES}
+            commodity_ids = np.unique(np.concatenate([c[0] for c in cells.values()]))
+            country_ids = np.unique(np.concatenate([c[1] for c in cells.values()]))
+            years = np.concatenate([c[2] for c in cells.values()])
+            first_year = int(years.min()) if len(years) else 0
+            n_years = int(years.max()) - first_year + 1 if len(years) else 0
+
+            self._set_axes(commodity_ids, country_ids, first_year)
+            shape = (len(commodity_ids), len(country_ids), n_years)
+            for measure, (commodities, countries, years, volumes, state) in cells.items():
+                array = self._allocate(measure, shape)
+                self._accumulate(array, self._codes(commodities, countries, years), volumes)
+                self.arrays[measure] = array
+                self.absorbed[measure] = state
+
+            self.country_names = self._load_country_names(country_ids)
+            self._save()
+            self.logger.info(f"Built production cube of shape {shape} ({self.nbytes / 1e6:.1f} MB)")
+
+    def append_volumes(self, production: Sequence[Tuple] = (), reserves: Sequence[Tuple] = ()):
+        """
+        Add newly committed rows to the arrays
+
+        Args:
+            production: (row id, commodity id, country id, year, volume) of
+                every new production row
+            reserves: The same for every new reserves row
+
+        Rows the arrays already reflect (ids up to the last absorbed id) are
+        skipped. Axes grow for unseen commodities, countries and years.
+        """
+        with self._lock:
+            if any(state is None for state in self.absorbed.values()):
+                return
+
+            for measure, rows in (('production', production), ('reserves', reserves)):
+                row_count, max_id = self.absorbed[measure]
+                rows = [row for row in rows if row[0] > max_id]
+                if not rows:
+                    continue
+
+                ids, commodities, countries, years, volumes = zip(*rows)
+                commodities = np.array(commodities, dtype=np.int64)
+                countries = np.array(countries, dtype=np.int64)
+                years = np.array(years, dtype=np.int64)
+                self._extend_axes(commodities, countries, years)
+                self._accumulate(self.arrays[measure], self._codes(commodities, countries, years),
+                                 np.array(volumes, dtype=np.float64))
+                self.absorbed[measure] = (row_count + len(rows), max(max_id, max(ids)))
+
+            self._save()
+
+    def slice(self, measure: str = 'production', commodity_ids: Optional[Sequence[int]] = None,
+              country_ids: Optional[Sequence[int]] = None, start_year: Optional[int] = None,
+              end_year: Optional[int] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Sub-cube of one measure
+
+        Args:
+            measure: 'production' or 'reserves'
+            commodity_ids: Commodities to select, in order (all by default)
+            country_ids: Countries to select, in order (all by default)
+            start_year: First year to select (inclusive)
+            end_year: Last year to select (inclusive)
+
+        Ids not in the cube are ignored. Returns a copy of the selected
+        (commodity x country x year) cells and the ids and years along its
+        axes, keyed by axis name.
+        """
+        with self._lock:
+            commodity_codes = self._axis_codes(self._commodity_index, commodity_ids)
+            country_codes = self._axis_codes(self._country_index, country_ids)
+            years = self.years
+            selected = np.ones(len(years), dtype=bool)
+            if start_year is not None:
+                selected &= years >= start_year
+            if end_year is not None:
+                selected &= years <= end_year
+            year_codes = np.flatnonzero(selected)
+
+            values = self.arrays[measure][np.ix_(commodity_codes, country_codes, year_codes)]
+            return values, {
+                'commodity': self.commodity_ids[commodity_codes],
+                'country': self.country_ids[country_codes],
+                'year': years[year_codes]
+            }
+
+    def aggregate(self, measure: str = 'production', by: Sequence[str] = ('commodity', 'year'),
+                  **selection) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Sum a sub-cube over every axis not in `by`
+
+        Keyword arguments select the sub-cube as in slice. Returns the totals
+        (NaN where no cell has data), with axes in commodity, country, year
+        order, and the ids and years along them.
+        """
+        values, axes = self.slice(measure, **selection)
+        reduced = tuple(i for i, axis in enumerate(AXES) if axis not in by)
+        observed = (~np.isnan(values)).any(axis=reduced)
+        totals = np.where(observed, np.nansum(values, axis=reduced), np.nan)
+        return totals, {axis: axes[axis] for axis in AXES if axis in by}
+
+    def frame(self, commodity_ids: Sequence[int], measure: str = 'production') -> pd.DataFrame:
+        """
+        Observed cells of some commodities in the long format of load_production_frame
+
+        Returns a DataFrame with columns ['year', '<measure>_volume',
+        'country', 'commodity_id'] sorted by commodity and year, with a
+        categorical country column (empty when there is no data).
+        """
+        values, axes = self.slice(measure, commodity_ids=commodity_ids)
+        commodity_codes, country_codes, year_codes = np.nonzero(~np.isnan(values))
+        if len(commodity_codes) == 0:
+            return pd.DataFrame()
+
+        commodities = axes['commodity'][commodity_codes]
+        years = axes['year'][year_codes]
+        order = np.lexsort((country_codes, years, commodities))
+        names = np.array([self.country_names.get(int(c)) for c in axes['country']], dtype=object)
+
+        return pd.DataFrame({
+            'year': years[order],
+            f'{measure}_volume': values[commodity_codes, country_codes, year_codes][order],
+            'country': pd.Categorical(names[country_codes[order]]),
+            'commodity_id': commodities[order]
+        })
+
+    def describe(self) -> Dict[str, Any]:
+        """Axes, memory use and fill of the cube"""
+        with self._lock:
+            years = self.years
+            return {
+                'shape': dict(zip(AXES, map(int, self.shape))),
+                'years': {'start': int(years[0]), 'end': int(years[-1])} if len(years) else None,
+                'nbytes': int(self.nbytes),
+                'memory_mapped': isinstance(self.arrays['production'], np.memmap),
+                'observed_cells': {measure: int((~np.isnan(array)).sum()) for measure, array in self.arrays.items()},
+                'absorbed_rows': {measure: state[0] if state else 0 for measure, state in self.absorbed.items()}
+            }
+
+    def _set_axes(self, commodity_ids: np.ndarray, country_ids: np.ndarray, first_year: int):
+        self.commodity_ids = commodity_ids
+        self.country_ids = country_ids
+        self.first_year = first_year
+        self._commodity_index = pd.Index(commodity_ids)
+        self._country_index = pd.Index(country_ids)
+
+    def _codes(self, commodities: np.ndarray, countries: np.ndarray, years: np.ndarray):
+        return (self._commodity_index.get_indexer(commodities),
+                self._country_index.get_indexer(countries),
+                years - self.first_year)
+
+    @staticmethod
+    def _axis_codes(index: pd.Index, ids: Optional[Sequence[int]]) -> np.ndarray:
+        if ids is None:
+            return np.arange(len(index))
+        codes = index.get_indexer(np.asarray(ids, dtype=np.int64))
+        return codes[codes >= 0]
+
+    @staticmethod
+    def _accumulate(array: np.ndarray, codes, volumes: np.ndarray):
+        """Add volumes into their cells, empty cells counting as zero"""
+        observed = ~np.isnan(volumes)
+        if not observed.any():
+            return
+        flat = np.ravel_multi_index(tuple(c[observed] for c in codes), array.shape)
+        cells, inverse = np.unique(flat, return_inverse=True)
+        sums = np.bincount(inverse, weights=volumes[observed])
+        values = array.reshape(-1)
+        current = values[cells]
+        values[cells] = np.where(np.isnan(current), sums, current + sums)
+
+    def _extend_axes(self, commodities: np.ndarray, countries: np.ndarray, years: np.ndarray):
+        """Grow the axes (and arrays) to cover new commodities, countries and years"""
+        new_commodities = np.setdiff1d(commodities, self.commodity_ids)
+        new_countries = np.setdiff1d(countries, self.country_ids)
+        old_years = self.years
+        first_year = int(min(years.min(), old_years[0])) if len(old_years) else int(years.min())
+        last_year = int(max(years.max(), old_years[-1])) if len(old_years) else int(years.max())
+        if not len(new_commodities) and not len(new_countries) and len(old_years) == last_year - first_year + 1:
+            return
+
+        shape = (len(self.commodity_ids) + len(new_commodities), len(self.country_ids) + len(new_countries),
+                 last_year - first_year + 1)
+        offset = self.first_year - first_year if len(old_years) else 0
+        for measure in MEASURES:
+            old = self.arrays[measure]
+            array = self._allocate(measure, shape)
+            array[:old.shape[0], :old.shape[1], offset:offset + old.shape[2]] = old
+            self.arrays[measure] = array
+
+        self._set_axes(np.concatenate([self.commodity_ids, new_commodities]),
+                       np.concatenate([self.country_ids, new_countries]), first_year)
+        self.country_names.update(self._load_country_names(new_countries))
+
+    def _allocate(self, measure: str, shape: Tuple[int, int, int]) -> np.ndarray:
+        """NaN-filled array, memory-mapped (to a file renamed into place by _save) when configured"""
+        if not self.directory or 0 in shape:
+            return np.full(shape, np.nan)
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{measure}.npy.tmp')
+        array = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=shape)
+        array[...] = np.nan
+        self._pending[measure] = path
+        return array
+
+    def _save(self):
+        """Flush memory-mapped arrays and write the metadata describing them"""
+        if not self.directory or not all(isinstance(a, np.memmap) for a in self.arrays.values()):
+            return
+        for array in self.arrays.values():
+            array.flush()
+        for measure, path in self._pending.items():
+            os.replace(path, os.path.join(self.directory, f'{measure}.npy'))
+        self._pending = {}
+
+        metadata = {
+            'commodity_ids': self.commodity_ids.tolist(),
+            'country_ids': self.country_ids.tolist(),
+            'first_year': self.first_year,
+            'country_names': {str(k): v for k, v in self.country_names.items()},
+            'absorbed': {measure: list(state) for measure, state in self.absorbed.items()}
+        }
+        path = os.path.join(self.directory, self.METADATA_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(metadata, f)
+        os.replace(path + '.tmp', path)
+
+    def _load(self, states: Dict[str, Tuple[int, int]]) -> bool:
+        """Map the arrays saved in `directory` if they reflect the current tables"""
+        path = os.path.join(self.directory, self.METADATA_FILE)
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path) as f:
+                metadata = json.load(f)
+            if {measure: tuple(metadata['absorbed'][measure]) for measure in MEASURES} != states:
+                return False
+            arrays = {measure: np.load(os.path.join(self.directory, f'{measure}.npy'), mmap_mode='r+')
+                      for measure in MEASURES}
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.warning(f"Ignoring saved production cube in {self.directory}: {e}")
+            return False
+
+        self._set_axes(np.array(metadata['commodity_ids'], dtype=np.int64),
+                       np.array(metadata['country_ids'], dtype=np.int64), metadata['first_year'])
+        self.country_names = {int(k): v for k, v in metadata['country_names'].items()}
+        self.arrays = arrays
+        self.absorbed = dict(states)
+        self.logger.info(f"Mapped production cube of shape {self.shape} from {self.directory}")
+        return True
+
+    @staticmethod
+    def _load_country_names(country_ids: np.ndarray) -> Dict[int, str]:
+        if not len(country_ids):
+            return {}
+        return dict(db.session.query(Country.id, Country.name)
+                    .filter(Country.id.in_([int(c) for c in country_ids])).all())
+
+
+_cubes = {}
+_cubes_lock = threading.Lock()
+
+
+def get_production_cube() -> ProductionCube:
+    """
+    Get the production cube of the current database, built or refreshed as needed
+
+    Expects an active application context. PRODUCTION_CUBE_DIR in the app
+    config keeps the arrays memory-mapped in that directory.
+    """
+    key = str(db.engine.url)
+    with _cubes_lock:
+        cube = _cubes.get(key)
+        if cube is None:
+            cube = _cubes[key] = ProductionCube(current_app.config.get('PRODUCTION_CUBE_DIR'))
+    cube.ensure_current()
+    return cube
+
+
+def loaded_production_cube() -> Optional[ProductionCube]:
+    """The production cube of the current database, if this process built one"""
+    return _cubes.get(str(db.engine.url))
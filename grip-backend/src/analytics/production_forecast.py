@@ -0,0 +1,126 @@
+import numpy as np
+from typing import Dict
+
+from .batch_trends import batch_linear_trend
+
+# Trend forecasts of many annual production series at once.
+#
+# Series are rows of a (series x year) array with NaN for unreported years.
+# Three trend models are fitted to every row with the closed-form batched
+# least squares of batch_trends:
+#   linear      y = a + b * t
+#   log_linear  log y = a + b * t (constant growth rate; positive series only)
+#   damped      the linear trend with its slope damped by DAMPING per year
+#               beyond the last observation
+# The last HOLDOUT_YEARS observations of every series are held out, the
+# model with the lowest holdout RMSE is selected per series, and the
+# selected model is refitted on the full series to forecast.
+
+MODELS = ('linear', 'log_linear', 'damped')
+HOLDOUT_YEARS = 3
+# Observations required before the holdout for a series to be forecast
+MIN_TRAINING_YEARS = 4
+FORECAST_YEARS = 5
+DAMPING = 0.8
+
+
+def _last_positions(observed: np.ndarray) -> np.ndarray:
+    """Column of the last observation of every row, -1 for empty rows"""
+    last = observed.shape[1] - 1 - np.argmax(observed[:, ::-1], axis=1)
+    return np.where(observed.any(axis=1), last, -1)
+
+
+def model_predictions(values: np.ndarray, at: np.ndarray, anchor: np.ndarray,
+                      damping: float = DAMPING) -> np.ndarray:
+    """
+    Fit every model to every row and predict at the given positions
+
+    Args:
+        values: (series x year) observations, NaN where missing
+        at: (series x k) column positions to predict
+        anchor: (series,) position damping starts from (the last fitted observation)
+        damping: Per-year damping factor of the damped trend's slope
+
+    Returns a (model x series x k) array of predictions in MODELS order;
+    log-linear predictions of rows with non-positive values are NaN.
+    """
+    positions = np.arange(values.shape[1], dtype=np.float64)
+    linear = batch_linear_trend(values, positions)
+
+    positive = ~(values <= 0).any(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        logs = np.where(positive[:, None], np.log(values), np.nan)
+    log_linear = batch_linear_trend(logs, positions)
+
+    slope = linear['slope'][:, None]
+    intercept = linear['intercept'][:, None]
+    anchor = anchor[:, None].astype(np.float64)
+    steps = np.maximum(at - anchor, 0)
+    # Sum of damping ** i for i = 1 .. steps
+    damped_steps = damping * (1 - damping ** steps) / (1 - damping)
+    with np.errstate(over='ignore'):
+        return np.stack([
+            intercept + slope * at,
+            np.exp(log_linear['intercept'][:, None] + log_linear['slope'][:, None] * at),
+            intercept + slope * np.minimum(at, anchor) + slope * damped_steps
+        ])
+
+
+def forecast_series(values: np.ndarray, horizon: int = FORECAST_YEARS, holdout: int = HOLDOUT_YEARS,
+                    damping: float = DAMPING) -> Dict[str, np.ndarray]:
+    """
+    Select a trend model per series by holdout error and forecast it
+
+    Args:
+        values: (series x year) production volumes, NaN where unreported
+        horizon: Years forecast after each series' last observation
+        holdout: Trailing observations held out for model selection
+        damping: Per-year damping factor of the damped trend
+
+    Returns per-series arrays: eligible (enough observations to forecast),
+    observations, last (column of the last observation), model (index into
+    MODELS), holdout_rmse ((series x model), NaN where a model does not
+    apply), holdout_mape (percent, of the selected model) and a (series x
+    horizon) forecast of the years after last, clipped at zero. Figures of
+    ineligible series are NaN.
+    """
+    n_series, n_years = values.shape
+    observed = ~np.isnan(values)
+    observations = observed.sum(axis=1)
+    last = _last_positions(observed)
+    eligible = observations >= holdout + MIN_TRAINING_YEARS
+
+    # Observations after each column: the trailing `holdout` are held out
+    after = np.cumsum(observed[:, ::-1], axis=1)[:, ::-1] - observed
+    held_out = observed & (after < holdout)
+    training = np.where(observed & ~held_out, values, np.nan)
+    training_last = _last_positions(~np.isnan(training))
+
+    positions = np.broadcast_to(np.arange(n_years, dtype=np.float64), values.shape)
+    predicted = model_predictions(training, positions, training_last, damping)
+    with np.errstate(invalid='ignore'):
+        squared = np.where(held_out, (predicted - values) ** 2, 0.0)
+        rmse = np.sqrt(squared.sum(axis=2) / held_out.sum(axis=1)).T
+        rmse = np.where(eligible[:, None] & np.isfinite(rmse), rmse, np.nan)
+
+    selectable = np.where(np.isnan(rmse), np.inf, rmse)
+    model = np.argmin(selectable, axis=1)
+    eligible &= np.isfinite(selectable).any(axis=1)
+    rows = np.arange(n_series)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        errors = np.abs(predicted[model, rows] - values) / np.abs(values)
+        mape = np.where(held_out & np.isfinite(errors), errors, 0.0).sum(axis=1) / held_out.sum(axis=1) * 100
+
+    ahead = last[:, None] + np.arange(1, horizon + 1, dtype=np.float64)
+    forecast = np.maximum(model_predictions(values, ahead, last, damping)[model, rows], 0)
+
+    return {
+        'eligible': eligible,
+        'observations': observations,
+        'last': last,
+        'model': model,
+        'holdout_rmse': rmse,
+        'holdout_mape': np.where(eligible, mape, np.nan),
+        'forecast': np.where(eligible[:, None], forecast, np.nan)
+    }
@@ -0,0 +1,68 @@
+import json
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from .production_forecast import forecast_series, MODELS
+from .production_cube import get_production_cube
+from .production_index import ProductionIndexer
+from ..models.user import db
+from ..models.commodity import Commodity
+from ..models.country import Country
+from ..models.production_forecast import ProductionForecast
+
+class ProductionForecastIndexer(ProductionIndexer):
+    """Per-country production forecasts (/api/analytics/production/forecasts)
+
+    Every ProductionForecast row holds the selected trend model, holdout
+    errors and yearly forecasts of one (commodity, country) production
+    series; all series of the rebuilt commodities are fitted in one batch.
+    """
+
+    model = ProductionForecast
+    row_description = 'production series forecasts'
+
+    def compute_rows(self, commodity_ids: Optional[List[int]]) -> List[Dict[str, Any]]:
+        volumes, axes = get_production_cube().slice('production', commodity_ids=commodity_ids)
+        n_commodities, n_countries, n_years = volumes.shape
+
+        rows = []
+        if volumes.size:
+            series = volumes.reshape(n_commodities * n_countries, n_years)
+            result = forecast_series(series)
+            years = axes['year']
+
+            for i in np.flatnonzero(result['eligible']):
+                c, k = divmod(int(i), n_countries)
+                base_year = int(years[result['last'][i]])
+                rmse = {name: float(e) for name, e in zip(MODELS, result['holdout_rmse'][i]) if np.isfinite(e)}
+                forecasts = {base_year + h: float(v) for h, v in enumerate(result['forecast'][i], start=1)}
+                rows.append({
+                    'commodity_id': int(axes['commodity'][c]),
+                    'country_id': int(axes['country'][k]),
+                    'model': MODELS[result['model'][i]],
+                    'observations': int(result['observations'][i]),
+                    'base_year': base_year,
+                    'base_production': float(series[i, result['last'][i]]),
+                    'holdout_rmse': json.dumps(rmse),
+                    'holdout_mape': float(result['holdout_mape'][i]),
+                    'forecasts': json.dumps(forecasts)
+                })
+        return rows
+
+    def get_forecasts(self, commodity_id: Optional[int] = None, country_id: Optional[int] = None,
+                      model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Stored forecasts ordered by commodity and country, with their names"""
+        query = (db.session.query(ProductionForecast, Commodity.name, Country.name)
+                 .join(Commodity, ProductionForecast.commodity_id == Commodity.id)
+                 .join(Country, ProductionForecast.country_id == Country.id))
+        if commodity_id is not None:
+            query = query.filter(ProductionForecast.commodity_id == commodity_id)
+        if country_id is not None:
+            query = query.filter(ProductionForecast.country_id == country_id)
+        if model is not None:
+            query = query.filter(ProductionForecast.model == model)
+
+        rows = query.order_by(ProductionForecast.commodity_id, ProductionForecast.country_id).all()
+        return [{**entry.to_dict(), 'commodity': commodity, 'country': country}
+                for entry, commodity, country in rows]
@@ -0,0 +1,53 @@
+import logging
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+from ..models.user import db
+
+class ProductionIndexer:
+    """Base of the analytics tables materialized from the production cube
+
+    A subclass names its table (`model`) and computes the rows of some
+    commodities in compute_rows; rebuild replaces the rows of those
+    commodities, and append_volumes rebuilds the commodities touched by an
+    ingest. Rows depend on production only, unless `uses_reserves` is set.
+    An empty table is left alone on ingest: it is built in full on first
+    use. Methods expect an active application context.
+    """
+
+    model = None
+    uses_reserves = False
+    # What the rows are, for the rebuild log line
+    row_description = 'rows'
+
+    def __init__(self):
+        self.logger = logging.getLogger(f"analytics.{type(self).__name__}")
+
+    def compute_rows(self, commodity_ids: Optional[List[int]]) -> List[Dict[str, Any]]:
+        """Rows of some commodities (all when None), as column mappings"""
+        raise NotImplementedError
+
+    def rebuild(self, commodity_ids: Optional[List[int]] = None) -> int:
+        """Recompute the rows of some commodities (all by default)"""
+        rows = self.compute_rows(commodity_ids)
+
+        query = self.model.query
+        if commodity_ids is not None:
+            query = query.filter(self.model.commodity_id.in_(list(commodity_ids)))
+        query.delete(synchronize_session=False)
+
+        db.session.bulk_insert_mappings(self.model, rows)
+        db.session.commit()
+
+        self.logger.info(f"Computed {len(rows)} {self.row_description}")
+        return len(rows)
+
+    def append_volumes(self, production: Sequence[Tuple] = (), reserves: Sequence[Tuple] = ()):
+        """Rebuild the commodities with newly ingested production (and reserves, if used)"""
+        commodity_ids = {row[1] for row in production}
+        if self.uses_reserves:
+            commodity_ids |= {row[1] for row in reserves}
+        if commodity_ids and not self.is_empty():
+            self.rebuild(sorted(commodity_ids))
+
+    def is_empty(self) -> bool:
+        return db.session.query(self.model.id).first() is None
@@ -0,0 +1,81 @@
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+from .production_cube import loaded_production_cube
+from .concentration_index import ConcentrationIndexer
+from .supply_risk_index import SupplyRiskIndexer
+from .depletion_index import DepletionIndexer
+from .production_forecast_index import ProductionForecastIndexer
+from ..models.user import db
+
+logger = logging.getLogger("analytics.production_updates")
+
+# (row id, commodity id, country id, year, volume) of a stored production or reserves row
+VolumeRow = Tuple[int, int, int, int, Optional[float]]
+
+
+def volume_rows(records: Sequence, attribute: str) -> List[VolumeRow]:
+    """
+    Describe flushed ProductionData or ReservesData rows for notify_volumes_appended
+
+    Call after a flush (so ids are assigned) and before the commit expires
+    the instances.
+    """
+    rows = []
+    for record in records:
+        try:
+            volume = float(getattr(record, attribute))
+        except (TypeError, ValueError):
+            volume = None
+        rows.append((record.id, record.commodity_id, record.country_id, int(record.year), volume))
+    return rows
+
+
+def notify_volumes_appended(production: Sequence[VolumeRow] = (), reserves: Sequence[VolumeRow] = ()):
+    """
+    Propagate newly committed production and reserves rows to the incrementally maintained analytics
+
+    Args:
+        production: Rows of the new ProductionData records (see volume_rows)
+        reserves: Rows of the new ReservesData records
+
+    Failures are logged and never undo the already committed rows; the
+    affected analytics are corrected by the next rebuild.
+    """
+    if not production and not reserves:
+        return
+
+    stages = [
+        ('production cube', loaded_production_cube()),
+        ('production concentration', ConcentrationIndexer()),
+        ('supply risk', SupplyRiskIndexer()),
+        ('depletion horizons', DepletionIndexer()),
+        ('production forecasts', ProductionForecastIndexer())
+    ]
+
+    for stage_name, stage in stages:
+        # Stages that were never built pick the rows up when they are
+        if stage is None:
+            continue
+        try:
+            stage.append_volumes(production, reserves)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error updating {stage_name} with {len(production)} production and "
+                         f"{len(reserves)} reserves rows: {e}")
+
+
+def notify_stability_changed(country_ids: Sequence[int]):
+    """
+    Rescore the supply risk of commodities produced by countries whose political_stability_score changed
+
+    Call after the new scores are committed. Failures are logged; the
+    ranking is corrected by the next rebuild.
+    """
+    if not country_ids:
+        return
+    try:
+        SupplyRiskIndexer().update_countries(country_ids)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error updating supply risk for countries {list(country_ids)}: {e}")
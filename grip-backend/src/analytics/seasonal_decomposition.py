@@ -0,0 +1,251 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Any, Optional
+from datetime import datetime
+from .base_analyzer import BaseAnalyzer
+from .panel import Panel
+
+class SeasonalDecomposer(BaseAnalyzer):
+    """Classical trend/seasonal/residual decomposition of many price series at once"""
+
+    # Seasonal grid (resampling rule, observations per year) for each native
+    # frequency. Daily series are decomposed on weekly means: an annual cycle
+    # of ~260 business days is too long a window to be useful at daily grain.
+    GRIDS = {
+        'daily': ('W-FRI', 52),
+        'weekly': ('W-FRI', 52),
+        'monthly': ('MS', 12),
+        'quarterly': ('QS', 4)
+    }
+    MODELS = ('additive', 'multiplicative')
+    # Full seasonal cycles required before a series is decomposed
+    MIN_CYCLES = 2
+
+    def __init__(self):
+        super().__init__("SeasonalDecomposer")
+
+    def analyze(self, data, model: str = 'multiplicative',
+                include_components: bool = False, **kwargs) -> Dict[str, Any]:
+        """
+        Decompose every series of a price panel
+
+        Args:
+            data: Panel, or DataFrame indexed by date with one price column per series
+            model: 'multiplicative' (price = trend * seasonal * residual) or
+                'additive'; series with non-positive values are always additive
+            include_components: Also return the dated trend, seasonal and
+                residual components of every series
+        """
+        if model not in self.MODELS:
+            return {'error': f'Unknown decomposition model: {model}'}
+
+        if isinstance(data, Panel):
+            data = data.to_frame()
+        data = data.sort_index()
+        frequencies = {column: self.detect_frequency(data[column].dropna().index) for column in data.columns}
+
+        series = {}
+        skipped = {}
+        for frequency in self.GRIDS:
+            columns = [column for column, detected in frequencies.items() if detected == frequency]
+            if columns:
+                decomposed, too_short = self._decompose_group(data[columns], frequency, model, include_components)
+                series.update(decomposed)
+                skipped.update({column: 'Insufficient data for seasonal decomposition' for column in too_short})
+
+        for column, frequency in frequencies.items():
+            if frequency not in self.GRIDS:
+                skipped[column] = f'No seasonal cycle for {frequency} series'
+
+        return {
+            'analysis_date': datetime.utcnow().isoformat(),
+            'model': model,
+            'series': series,
+            'skipped': skipped
+        }
+
+    def analyze_panel(self, panel: Panel, **kwargs) -> Dict[str, Any]:
+        """Analyze all series of a Panel together"""
+        return self.analyze(panel, **kwargs)
+
+    @staticmethod
+    def detect_frequency(dates: pd.Index) -> Optional[str]:
+        """Native frequency of a series from the median spacing of its observations"""
+        if len(dates) < 2:
+            return None
+        spacing = np.median(np.diff(dates.values).astype('timedelta64[s]').astype(np.float64)) / 86400
+        if spacing <= 3.5:
+            # Business-day series have a median spacing of one day
+            return 'daily'
+        if spacing <= 10:
+            return 'weekly'
+        if spacing <= 45:
+            return 'monthly'
+        if spacing <= 135:
+            return 'quarterly'
+        return 'annual'
+
+    def _decompose_group(self, data: pd.DataFrame, frequency: str, model: str, include_components: bool):
+        """Decompose series sharing a native frequency on one aligned grid"""
+        rule, period = self.GRIDS[frequency]
+        grid = data.resample(rule).mean().interpolate(limit_area='inside')
+        phases = self.calendar_phases(grid.index, period)
+
+        values = grid.to_numpy(dtype=np.float64).T
+        observations = (~np.isnan(values)).sum(axis=1)
+        enough = observations >= self.MIN_CYCLES * period
+
+        columns = list(grid.columns)
+        too_short = [column for column, ok in zip(columns, enough) if not ok]
+        if not enough.any():
+            return {}, too_short
+
+        values = values[enough]
+        multiplicative = np.full(len(values), model == 'multiplicative')
+        with np.errstate(invalid='ignore'):
+            multiplicative &= ~(values <= 0).any(axis=1)
+
+        components = self.decompose(values, phases, period, multiplicative)
+        dates = [d.isoformat() for d in grid.index]
+
+        results = {}
+        for row, column in enumerate(c for c, ok in zip(columns, enough) if ok):
+            defined = ~np.isnan(values[row])
+            first, last = np.flatnonzero(defined)[[0, -1]]
+            index = components['seasonal_index'][row]
+            result = {
+                'frequency': frequency,
+                'period': period,
+                'model': 'multiplicative' if multiplicative[row] else 'additive',
+                'observations': int(observations[enough][row]),
+                'date_range': {'start': dates[first], 'end': dates[last]},
+                'seasonal_index': {int(phase) + 1: float(v) for phase, v in enumerate(index)},
+                'peak_period': int(np.argmax(index)) + 1,
+                'trough_period': int(np.argmin(index)) + 1,
+                'seasonal_amplitude': float(index.max() - index.min()),
+                'seasonal_strength': float(components['seasonal_strength'][row]),
+                'trend_strength': float(components['trend_strength'][row])
+            }
+            if include_components:
+                window = slice(first, last + 1)
+                result['components'] = {
+                    'dates': dates[window],
+                    'observed': self._to_list(values[row, window]),
+                    'trend': self._to_list(components['trend'][row, window]),
+                    'seasonal': self._to_list(components['seasonal'][row, window]),
+                    'residual': self._to_list(components['residual'][row, window])
+                }
+            results[column] = result
+
+        return results, too_short
+
+    @staticmethod
+    def calendar_phases(dates: pd.DatetimeIndex, period: int) -> np.ndarray:
+        """Position of every grid date within the year (0 .. period - 1)"""
+        if period == 12:
+            return dates.month.to_numpy() - 1
+        if period == 4:
+            return dates.quarter.to_numpy() - 1
+        # Weeks are counted from 1 January; the 53rd partial week joins the 52nd
+        return np.minimum((dates.dayofyear.to_numpy() - 1) // 7, period - 1)
+
+    @staticmethod
+    def centered_moving_average(values: np.ndarray, period: int) -> np.ndarray:
+        """
+        Centered moving average of every row spanning one seasonal period
+
+        Even periods use the 2 x period average (half weights on both ends), so
+        every phase of the cycle gets equal weight. Windows touching a NaN are
+        NaN, as are the period // 2 values at each end.
+        """
+        n_series, n_time = values.shape
+        span = period + 1 if period % 2 == 0 else period
+        result = np.full((n_series, n_time), np.nan)
+        if n_time < span:
+            return result
+
+        # Centering each row keeps the cumulative sums well conditioned
+        missing = np.isnan(values)
+        counts = (~missing).sum(axis=1)
+        row_mean = np.where(missing, 0, values).sum(axis=1) / np.maximum(counts, 1)
+        centered = np.where(missing, 0, values - row_mean[:, None])
+
+        def window_sums(a, width):
+            c = np.concatenate([np.zeros((n_series, 1)), np.cumsum(a, axis=1)], axis=1)
+            return c[:, width:] - c[:, :-width]
+
+        sums = window_sums(centered, period)
+        gaps = window_sums(missing.astype(np.float64), period)
+        means = np.where(gaps > 0, np.nan, sums / period)
+        if period % 2 == 0:
+            # Average adjacent windows: ends get half weight
+            means = (means[:, :-1] + means[:, 1:]) / 2
+
+        half = span // 2
+        result[:, half:n_time - half] = means + row_mean[:, None]
+        return result
+
+    @classmethod
+    def decompose(cls, values: np.ndarray, phases: np.ndarray, period: int,
+                  multiplicative: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Classical decomposition of every row of a (series x time) array
+
+        Args:
+            values: Series on a common regular grid; NaN outside each series
+            phases: Calendar phase (0 .. period - 1) of every column
+            period: Observations per seasonal cycle
+            multiplicative: Per-row flag selecting the multiplicative model
+
+        Returns (series x time) trend, seasonal and residual arrays, the
+        (series x period) seasonal_index (averaging 1 for multiplicative rows
+        and 0 for additive rows), and per-series seasonal_strength and
+        trend_strength in [0, 1].
+        """
+        ratio = multiplicative[:, None]
+        trend = cls.centered_moving_average(values, period)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            detrended = np.where(ratio, values / trend, values - trend)
+
+        # Average the detrended values of each calendar phase across cycles
+        defined = ~np.isnan(detrended)
+        one_hot = np.zeros((len(phases), period))
+        one_hot[np.arange(len(phases)), phases] = 1
+        phase_sums = np.where(defined, detrended, 0) @ one_hot
+        phase_counts = defined.astype(np.float64) @ one_hot
+        with np.errstate(invalid='ignore', divide='ignore'):
+            index = phase_sums / phase_counts
+            # Phases never observed are neutral
+            index = np.where(phase_counts > 0, index, np.where(multiplicative[:, None], 1.0, 0.0))
+            index = np.where(ratio, index / index.mean(axis=1, keepdims=True),
+                             index - index.mean(axis=1, keepdims=True))
+
+        seasonal = np.where(np.isnan(values), np.nan, index[:, phases])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            residual = np.where(ratio, values / (trend * seasonal), values - trend - seasonal)
+
+            # Strengths compare residual variance with seasonal + residual and
+            # trend + residual variance (in logs for multiplicative rows)
+            def log_or_level(a):
+                return np.where(ratio, np.log(a), a)
+
+            r = log_or_level(residual)
+            s = log_or_level(seasonal)
+            t = log_or_level(trend)
+            resid_var = np.nanvar(r, axis=1)
+            seasonal_strength = 1 - resid_var / np.nanvar(s + r, axis=1)
+            trend_strength = 1 - resid_var / np.nanvar(t + r, axis=1)
+
+        return {
+            'trend': trend,
+            'seasonal': seasonal,
+            'residual': residual,
+            'seasonal_index': index,
+            'seasonal_strength': np.clip(np.nan_to_num(seasonal_strength), 0, 1),
+            'trend_strength': np.clip(np.nan_to_num(trend_strength), 0, 1)
+        }
+
+    @staticmethod
+    def _to_list(values: np.ndarray) -> List[Optional[float]]:
+        return [None if np.isnan(v) else float(v) for v in values]
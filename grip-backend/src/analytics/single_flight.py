@@ -0,0 +1,70 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _InFlightCall:
+    """A computation shared by every caller that asked for the same key"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into a single computation
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is still running wait for the leader and receive the same
+    result (or exception). Nothing is remembered once the call completes, so
+    caching stays the responsibility of the caller.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _InFlightCall] = {}
+        self.total_calls = 0
+        self.coalesced_calls = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn for key, or wait for an identical call that is already running"""
+        with self._lock:
+            self.total_calls += 1
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+            else:
+                self.coalesced_calls += 1
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics"""
+        with self._lock:
+            total = self.total_calls
+            coalesced = self.coalesced_calls
+            in_flight = len(self._calls)
+
+        return {
+            'total_calls': total,
+            'coalesced_calls': coalesced,
+            'coalescing_rate': coalesced / total if total else 0.0,
+            'in_flight': in_flight
+        }
@@ -0,0 +1,80 @@
+import numpy as np
+from typing import Dict
+
+# Stability-weighted supply concentration risk.
+#
+# Each producer's squared share of a commodity's latest production year is
+# weighted by its political instability (1 - political_stability_score),
+# so a market concentrated in stable countries scores lower than one of the
+# same HHI concentrated in unstable ones. The score is on the HHI scale
+# (0-10000) and equals HHI * instability for a single producer.
+
+# Stability assumed for countries without a political_stability_score
+DEFAULT_STABILITY = 0.5
+# HHI thresholds (see concentration.HHI_MODERATE / HHI_HIGH) at the default stability
+RISK_MODERATE = 750
+RISK_HIGH = 1250
+
+
+def supply_risk_scores(volumes: np.ndarray, stability: np.ndarray,
+                       default_stability: float = DEFAULT_STABILITY) -> Dict[str, np.ndarray]:
+    """
+    Stability-weighted concentration risk of every commodity
+
+    Args:
+        volumes: (commodity x country x year) production volumes, NaN where a
+            country reported nothing
+        stability: (country,) political stability scores in [0, 1], NaN where unknown
+        default_stability: Score used for countries without one
+
+    Returns per-commodity arrays: year (position on the year axis of the
+    latest year with positive production, -1 if none), total and producers
+    of that year, hhi and risk (0-10000), weighted_instability (share-weighted
+    mean instability, 0-1), stability_coverage (percent of production from
+    countries with a score), top_country (position of the largest risk
+    contributor on the country axis) and top_contribution (its percent of
+    the risk). Metrics of commodities without production are NaN.
+    """
+    n_commodities, n_countries, n_years = volumes.shape
+    totals = np.where(np.isnan(volumes), 0.0, volumes).sum(axis=1)
+    produced = totals > 0
+    valid = produced.any(axis=1)
+    # Last year with production: first positive total from the end
+    latest = np.where(valid, n_years - 1 - np.argmax(produced[:, ::-1], axis=1), -1)
+
+    rows = np.arange(n_commodities)
+    current = volumes[rows, :, np.maximum(latest, 0)] if n_years else np.full((n_commodities, n_countries), np.nan)
+    reported = ~np.isnan(current)
+    current = np.where(reported, current, 0.0)
+    total = current.sum(axis=1)
+
+    known = ~np.isnan(stability)
+    instability = 1 - np.where(known, np.clip(stability, 0, 1), default_stability)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shares = current / np.where(valid, total, np.nan)[:, None]
+        contributions = shares * shares * instability
+        risk = contributions.sum(axis=1)
+        top_country = np.argmax(np.nan_to_num(contributions), axis=1) if n_countries else np.zeros(n_commodities, dtype=np.int64)
+        top_contribution = contributions[rows, top_country] / risk * 100 if n_countries else np.full(n_commodities, np.nan)
+
+    return {
+        'year': latest,
+        'total': np.where(valid, total, np.nan),
+        'producers': reported.sum(axis=1),
+        'hhi': np.where(valid, (shares * shares).sum(axis=1) * 10000, np.nan),
+        'risk': np.where(valid, risk * 10000, np.nan),
+        'weighted_instability': np.where(valid, (shares * instability).sum(axis=1), np.nan),
+        'stability_coverage': np.where(valid, (shares * known).sum(axis=1) * 100, np.nan),
+        'top_country': top_country,
+        'top_contribution': np.where(valid & (risk > 0), top_contribution, np.nan)
+    }
+
+
+def risk_level(risk: float) -> str:
+    """Low, Moderate or High supply risk of a stability-weighted HHI"""
+    if risk < RISK_MODERATE:
+        return 'Low'
+    if risk < RISK_HIGH:
+        return 'Moderate'
+    return 'High'
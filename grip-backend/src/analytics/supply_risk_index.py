@@ -0,0 +1,77 @@
+from typing import Dict, List, Any, Optional, Sequence
+
+import numpy as np
+
+from .supply_risk import supply_risk_scores, risk_level
+from .production_cube import get_production_cube
+from .production_index import ProductionIndexer
+from ..models.user import db
+from ..models.commodity import Commodity
+from ..models.country import Country
+from ..models.supply_risk_score import SupplyRiskScore
+
+class SupplyRiskIndexer(ProductionIndexer):
+    """Stability-weighted supply risk ranking (/api/analytics/supply-risk/ranking)
+
+    Every SupplyRiskScore row holds the concentration risk of one
+    commodity's latest production year, weighted by the producers'
+    political stability scores. Commodities are also rescored when a
+    producer's stability score changes.
+    """
+
+    model = SupplyRiskScore
+    row_description = 'supply risk scores'
+
+    def compute_rows(self, commodity_ids: Optional[List[int]]) -> List[Dict[str, Any]]:
+        volumes, axes = get_production_cube().slice('production', commodity_ids=commodity_ids)
+        scores = dict(db.session.query(Country.id, Country.political_stability_score)
+                      .filter(Country.political_stability_score.isnot(None)).all())
+        stability = np.array([float(scores[c]) if c in scores else np.nan for c in axes['country']],
+                             dtype=np.float64)
+        metrics = supply_risk_scores(volumes, stability)
+
+        def optional(value):
+            return float(value) if np.isfinite(value) else None
+
+        rows = []
+        for c in np.flatnonzero(metrics['year'] >= 0):
+            risk = float(metrics['risk'][c])
+            rows.append({
+                'commodity_id': int(axes['commodity'][c]),
+                'year': int(axes['year'][metrics['year'][c]]),
+                'total_production': float(metrics['total'][c]),
+                'number_of_producers': int(metrics['producers'][c]),
+                'hhi': float(metrics['hhi'][c]),
+                'risk_score': risk,
+                'risk_level': risk_level(risk),
+                'weighted_instability': float(metrics['weighted_instability'][c]),
+                'stability_coverage': float(metrics['stability_coverage'][c]),
+                'top_risk_country_id': int(axes['country'][metrics['top_country'][c]]),
+                'top_risk_contribution': optional(metrics['top_contribution'][c])
+            })
+        return rows
+
+    def update_countries(self, country_ids: Sequence[int]) -> int:
+        """Rescore commodities produced by countries whose stability score changed"""
+        if self.is_empty():
+            return 0
+        volumes, axes = get_production_cube().slice('production', country_ids=country_ids)
+        produced = ~np.isnan(volumes).all(axis=(1, 2))
+        commodity_ids = [int(c) for c in axes['commodity'][produced]]
+        if not commodity_ids:
+            return 0
+        return self.rebuild(commodity_ids)
+
+    def get_ranking(self, limit: Optional[int] = None, level: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Scores ranked from highest to lowest risk, with commodity and top contributor names"""
+        query = (db.session.query(SupplyRiskScore, Commodity.name, Country.name)
+                 .join(Commodity, SupplyRiskScore.commodity_id == Commodity.id)
+                 .outerjoin(Country, SupplyRiskScore.top_risk_country_id == Country.id))
+        if level is not None:
+            query = query.filter(SupplyRiskScore.risk_level == level)
+        query = query.order_by(SupplyRiskScore.risk_score.desc(), SupplyRiskScore.commodity_id)
+        if limit is not None:
+            query = query.limit(limit)
+
+        return [{'rank': rank, **entry.to_dict(), 'commodity': commodity, 'top_risk_country': country}
+                for rank, (entry, commodity, country) in enumerate(query.all(), start=1)]
@@ -0,0 +1,154 @@
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+from .base_analyzer import BaseAnalyzer
+from .data_loaders import load_price_frame
+from .batch_trends import batch_linear_trend, left_align
+from .online_stats import OnlineTrend, RollingVolatility
+from ..models.user import db
+from ..models.commodity import Commodity
+from ..models.trend_index import TrendIndex
+
+class TrendIndexer:
+    """Maintains the per-commodity trend index behind /api/analytics/trends
+
+    Each TrendIndex row stores the streaming trend and volatility state of a
+    commodity's full price history, so appending new prices updates the row
+    in O(1) per point instead of re-analyzing the whole series. Methods
+    expect an active application context.
+    """
+
+    HIGH_VOLATILITY_THRESHOLD = 0.05
+    VOLATILITY_WINDOW = 30
+
+    def __init__(self):
+        self.logger = logging.getLogger("analytics.TrendIndexer")
+
+    def rebuild(self, commodity_ids: Optional[List[int]] = None) -> int:
+        """Recompute index rows from full price history (all commodities by default)"""
+        if commodity_ids is None:
+            commodity_ids = [row[0] for row in db.session.query(Commodity.id).all()]
+        if not commodity_ids:
+            return 0
+
+        prices = load_price_frame(commodity_ids)
+        existing = {row.commodity_id: row
+                    for row in TrendIndex.query.filter(TrendIndex.commodity_id.in_(commodity_ids)).all()}
+
+        rebuilt = 0
+        if not prices.empty:
+            groups = list(prices.groupby('commodity_id', sort=False))
+            # One batched regression over every series, aligned on observation index
+            fit = batch_linear_trend(left_align([series['price'].to_numpy() for _, series in groups]))
+            
+            for i, (commodity_id, series) in enumerate(groups):
+                values = series['price'].to_numpy()
+                trend = OnlineTrend.from_batch(fit, i)
+                volatility = RollingVolatility.from_values(values, self.VOLATILITY_WINDOW)
+                entry = existing.pop(commodity_id, None) or TrendIndex(commodity_id=int(commodity_id))
+                self._store(entry, trend, volatility, float(values[-1]), series['date'].iloc[-1].to_pydatetime())
+                db.session.add(entry)
+                rebuilt += 1
+
+        # Commodities whose prices disappeared no longer have a trend
+        for entry in existing.values():
+            db.session.delete(entry)
+
+        db.session.commit()
+        self.logger.info(f"Rebuilt trend index for {rebuilt} commodities")
+        return rebuilt
+
+    def append_prices(self, commodity_id: int, points: List[Tuple[datetime, float]]) -> bool:
+        """
+        Fold newly stored prices into a commodity's index row
+
+        Args:
+            commodity_id: Commodity the prices belong to
+            points: (timestamp, price) pairs that were just stored
+
+        Points older than the indexed history (backfills) trigger a rebuild of
+        that commodity, since they change every observation index after them.
+        """
+        points = sorted((ts, price) for ts, price in points if price is not None)
+        if not points:
+            return False
+
+        entry = TrendIndex.query.filter_by(commodity_id=commodity_id).first()
+        if entry is None or entry.state is None or points[0][0] <= entry.last_timestamp:
+            self.rebuild([commodity_id])
+            return True
+
+        state = json.loads(entry.state)
+        trend = OnlineTrend.from_dict(state['trend'])
+        volatility = RollingVolatility.from_dict(state['volatility'])
+        for _, price in points:
+            trend.update(float(price))
+            volatility.update(float(price))
+
+        self._store(entry, trend, volatility, float(points[-1][1]), points[-1][0])
+        db.session.commit()
+        return True
+
+    def get_trends(self) -> Dict[str, Any]:
+        """Read the whole index with one query and group it by classification"""
+        rows = (db.session.query(TrendIndex, Commodity.name)
+                .join(Commodity, TrendIndex.commodity_id == Commodity.id)
+                .order_by(TrendIndex.r_squared.desc())
+                .all())
+
+        trends = {
+            'analysis_date': datetime.utcnow().isoformat(),
+            'trending_up': [],
+            'trending_down': [],
+            'stable': [],
+            'high_volatility': [],
+            'total_commodities': len(rows)
+        }
+
+        for entry, name in rows:
+            if entry.trend == 'insufficient_data':
+                continue
+
+            commodity_info = {
+                'id': entry.commodity_id,
+                'name': name,
+                'trend_strength': entry.r_squared,
+                'slope': entry.slope,
+                'last_updated': entry.last_timestamp.isoformat() if entry.last_timestamp else None
+            }
+
+            if entry.trend == 'increasing':
+                trends['trending_up'].append(commodity_info)
+            elif entry.trend == 'decreasing':
+                trends['trending_down'].append(commodity_info)
+            else:
+                trends['stable'].append(commodity_info)
+
+            if entry.high_volatility:
+                trends['high_volatility'].append({
+                    **commodity_info,
+                    'volatility': entry.volatility
+                })
+
+        return trends
+
+    def is_empty(self) -> bool:
+        return db.session.query(TrendIndex.id).first() is None
+
+    def _store(self, entry: TrendIndex, trend: OnlineTrend, volatility: RollingVolatility,
+               last_price: float, last_timestamp: datetime):
+        """Write derived columns and streaming state onto an index row"""
+        current_volatility = volatility.value(trend.std)
+
+        entry.trend = BaseAnalyzer.classify_trend(trend.slope) if trend.n >= 2 else 'insufficient_data'
+        entry.slope = trend.slope
+        entry.r_squared = trend.r_squared
+        entry.volatility = current_volatility
+        entry.high_volatility = bool(current_volatility > self.HIGH_VOLATILITY_THRESHOLD)
+        entry.data_points = trend.n
+        entry.last_price = last_price
+        entry.last_timestamp = last_timestamp
+        entry.state = json.dumps({'trend': trend.to_dict(), 'volatility': volatility.to_dict()})
+
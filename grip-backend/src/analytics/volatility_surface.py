@@ -0,0 +1,220 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .kernels import rolling_extreme
+
+# Rolling volatility measures for many windows of one series.
+#
+# Rolling means and standard deviations of each window come from one
+# vectorized pass over block-local cumulative sums; EWMA volatility and
+# Parkinson-style range volatility are added alongside. Surfaces are cached by series content so every
+# consumer of the same prices (analyzers, ML features, risk endpoints)
+# shares one computation.
+
+DEFAULT_WINDOWS = (7, 14, 20, 30, 90)
+EWMA_LAMBDA = 0.94  # RiskMetrics decay for daily returns
+
+
+class VolatilitySurface:
+    """Rolling statistics of one series for a set of windows
+
+    Arrays have the series length; entries whose trailing window is
+    incomplete or contains NaN are NaN, matching pandas rolling(window).
+    """
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+        self.mean = {}
+        self.std = {}
+        self.range = {}
+        self.ewma = None
+        self._lock = threading.Lock()
+
+    def add_windows(self, windows: Iterable[int]):
+        """Compute the statistics of any windows not yet on the surface"""
+        with self._lock:
+            missing = sorted(set(windows) - set(self.std))
+            for window in missing:
+                self._add_window(window)
+
+    def _add_window(self, window: int):
+        n = len(self.values)
+        mean = np.full(n, np.nan)
+        std = np.full(n, np.nan)
+        if 1 <= window <= n:
+            count, total, squares, center = self._window_sums(window)
+            complete = count == window
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean[window - 1:] = np.where(complete, center + total / window, np.nan)
+                if window > 1:
+                    var = np.maximum((squares - total * total / window) / (window - 1), 0)
+                    std[window - 1:] = np.where(complete, np.sqrt(var), np.nan)
+        self.mean[window] = mean
+        self.std[window] = std
+
+    def _window_sums(self, window: int):
+        """
+        Count, centered sum and centered sum of squares of every trailing window
+
+        The series is cut into blocks of `window` values, each centered on its
+        own mean, and prefix/suffix cumulative sums are taken inside every
+        block. A window is the suffix of one block plus the prefix of the
+        next, so all sums stay local to the window: a single global
+        cumulative sum of squares loses most of its precision on long
+        trending series.
+        """
+        values = self.values
+        n = len(values)
+        n_blocks = -(-n // window)
+        padded = np.full(n_blocks * window, np.nan)
+        padded[:n] = values
+        blocks = padded.reshape(n_blocks, window)
+
+        valid = ~np.isnan(blocks)
+        block_count = valid.sum(axis=1)
+        centers = np.where(valid, blocks, 0).sum(axis=1) / np.maximum(block_count, 1)
+        d = np.where(valid, blocks - centers[:, None], 0.0)
+
+        m = valid.astype(np.float64)
+
+        def prefix(a):
+            return np.cumsum(a, axis=1).ravel()
+
+        def suffix(a):
+            return np.cumsum(a[:, ::-1], axis=1)[:, ::-1].ravel()
+
+        # In flattened block coordinates a window is the suffix of its first
+        # block from its start, plus (unless it starts on a block boundary)
+        # the prefix of the next block up to its end
+        first = slice(0, n - window + 1)
+        last = slice(window - 1, n)
+        aligned = np.arange(n - window + 1) % window == 0
+        center_at = np.repeat(centers, window)
+        centers_first = center_at[first]
+
+        # Second part re-centered on the first block's center
+        delta = center_at[last] - centers_first
+        p0, p1, p2 = prefix(m)[last], prefix(d)[last], prefix(d * d)[last]
+        n2 = np.where(aligned, 0.0, p0)
+        t2 = np.where(aligned, 0.0, p1 + n2 * delta)
+        q2 = np.where(aligned, 0.0, p2 + 2 * delta * p1 + n2 * delta * delta)
+
+        count = suffix(m)[first] + n2
+        total = suffix(d)[first] + t2
+        squares = suffix(d * d)[first] + q2
+        return count, total, squares, centers_first
+
+    def range_volatility(self, window: int) -> np.ndarray:
+        """Parkinson estimator over the high/low of each window's closes (computed on first use)"""
+        with self._lock:
+            if window not in self.range:
+                self.range[window] = self._range_volatility(window)
+            return self.range[window]
+
+    def _range_volatility(self, window: int) -> np.ndarray:
+        n = len(self.values)
+        result = np.full(n, np.nan)
+        if window < 2 or window > n:
+            return result
+        with np.errstate(invalid='ignore', divide='ignore'):
+            high = rolling_extreme(self.values, window, np.maximum)
+            low = rolling_extreme(self.values, window, np.minimum)
+            result[window - 1:] = np.abs(np.log(high / low)) / np.sqrt(4 * np.log(2))
+        return result
+
+    def add_ewma(self, lam: float = EWMA_LAMBDA):
+        """EWMA volatility of simple returns (sigma²_t = lam sigma²_t-1 + (1 - lam) r²_t)"""
+        with self._lock:
+            if self.ewma is not None:
+                return
+            returns = pd.Series(self.values).pct_change(fill_method=None)
+            variance = (returns ** 2).ewm(alpha=1 - lam, adjust=False, ignore_na=True).mean()
+            self.ewma = np.sqrt(variance.to_numpy())
+
+    def mean_std(self, window: int) -> float:
+        """Average rolling standard deviation (NaN when no window is complete)"""
+        std = self.std[window]
+        valid = std[~np.isnan(std)]
+        return float(valid.mean()) if len(valid) else float('nan')
+
+    def latest(self, array: np.ndarray) -> Optional[float]:
+        """Last defined value of a surface array"""
+        defined = array[~np.isnan(array)] if array is not None else []
+        return float(defined[-1]) if len(defined) else None
+
+
+class _SurfaceCache:
+    """Thread-safe LRU of volatility surfaces keyed by series content"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[VolatilitySurface]:
+        with self._lock:
+            surface = self._entries.get(key)
+            if surface is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return surface
+
+    def put(self, key, surface: VolatilitySurface):
+        with self._lock:
+            self._entries[key] = surface
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+surface_cache = _SurfaceCache()
+
+
+def get_volatility_surface(values, windows: Iterable[int] = DEFAULT_WINDOWS,
+                           ewma: bool = False) -> VolatilitySurface:
+    """
+    Get the (cached) volatility surface of a series
+
+    Args:
+        values: 1-D series of prices (array or pandas Series)
+        windows: Windows required; DEFAULT_WINDOWS are always included so
+            consumers asking for different subsets share one surface
+        ewma: Also compute EWMA volatility
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    key = hashlib.blake2b(values.tobytes(), digest_size=16).hexdigest()
+
+    surface = surface_cache.get(key)
+    if surface is None:
+        surface = VolatilitySurface(values)
+        surface.add_windows(DEFAULT_WINDOWS)
+        surface_cache.put(key, surface)
+
+    surface.add_windows(windows)
+    if ewma:
+        surface.add_ewma()
+    return surface
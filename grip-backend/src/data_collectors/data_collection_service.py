@@ -15,6 +15,8 @@ from ..models.production_data import ProductionData
 from ..models.reserves_data import ReservesData
 from ..models.price_data import PriceData
 from ..models.data_source import DataSource
+from ..analytics.price_updates import notify_prices_appended
+from ..analytics.production_updates import notify_volumes_appended, volume_rows
 
 class DataCollectionService:
     """Service to orchestrate data collection from multiple sources"""
@@ -210,6 +212,8 @@ class DataCollectionService:
         if not source:
             return
         
+        new_prices = {}
+        
         for item in data:
             # Find commodity
             commodity = Commodity.query.filter_by(name__icontains=item['commodity']).first()
@@ -226,8 +230,11 @@ class DataCollectionService:
             )
             
             db.session.add(price_data)
+            if item.get('price') is not None:
+                new_prices.setdefault(commodity.id, []).append((price_data.timestamp, float(item['price'])))
         
         db.session.commit()
+        notify_prices_appended(new_prices)
     
     def _store_worldbank_data(self, data: List[Dict]):
         """Store World Bank data in the database"""
@@ -249,8 +256,8 @@ class DataCollectionService:
         commodities = {c.name.lower(): c.id for c in Commodity.query.all()}
         countries = {c.name.lower(): c.id for c in Country.query.all()}
         
-        production_records = 0
-        reserves_records = 0
+        new_production = []
+        new_reserves = []
         
         for item in data:
             # Skip items without required data
@@ -304,7 +311,7 @@ class DataCollectionService:
                         validation_status='pending'
                     )
                     db.session.add(production_data)
-                    production_records += 1
+                    new_production.append(production_data)
             
             # Store reserves data if available
             if 'reserves_volume' in item and item['reserves_volume'] is not None:
@@ -327,14 +334,20 @@ class DataCollectionService:
                         validation_status='pending'
                     )
                     db.session.add(reserves_data)
-                    reserves_records += 1
+                    new_reserves.append(reserves_data)
         
         try:
+            db.session.flush()
+            production_rows = volume_rows(new_production, 'production_volume')
+            reserves_rows = volume_rows(new_reserves, 'reserves_volume')
             db.session.commit()
-            self.logger.info(f"Stored USGS data: {production_records} production records, {reserves_records} reserves records")
+            self.logger.info(f"Stored USGS data: {len(new_production)} production records, {len(new_reserves)} reserves records")
         except Exception as e:
             db.session.rollback()
             self.logger.error(f"Error storing USGS data: {e}")
+            return
+        
+        notify_volumes_appended(production_rows, reserves_rows)
     
     def schedule_collections(self):
         """Schedule regular data collections"""
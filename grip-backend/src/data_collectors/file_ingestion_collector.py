@@ -9,6 +9,8 @@ from src.models.production_data import ProductionData
 from src.models.reserves_data import ReservesData
 from src.models.price_data import PriceData
 from src.models.data_source import DataSource
+from src.analytics.price_updates import notify_prices_appended
+from src.analytics.production_updates import notify_volumes_appended, volume_rows
 from sqlalchemy.exc import IntegrityError
 
 class FileIngestionCollector(BaseDataCollector):
@@ -133,6 +135,8 @@ class FileIngestionCollector(BaseDataCollector):
             'records_ingested': 0,
             'commodities_created': 0
         }
+        new_production = []
+        new_reserves = []
         
         try:
             with open(filepath, 'r') as f:
@@ -214,6 +218,7 @@ class FileIngestionCollector(BaseDataCollector):
                             confidence_score=min(0.95, self.calculate_data_quality_score(record) + 0.1)  # Slightly higher confidence
                         )
                         db.session.add(production_data)
+                        new_production.append(production_data)
                         results['records_ingested'] += 1
                 
                 # Extract reserves volume
@@ -239,11 +244,18 @@ class FileIngestionCollector(BaseDataCollector):
                             confidence_score=min(0.95, self.calculate_data_quality_score(record) + 0.1)  # Slightly higher confidence
                         )
                         db.session.add(reserves_data)
+                        new_reserves.append(reserves_data)
                         results['records_ingested'] += 1
-                        
+            
+            db.session.flush()
+            production_rows = volume_rows(new_production, 'production_volume')
+            reserves_rows = volume_rows(new_reserves, 'reserves_volume')
             db.session.commit()
             self.logger.info(f"Ingested {results['records_ingested']} records from {filepath}")
             
+            # Fold the new volumes into the incrementally maintained analytics
+            notify_volumes_appended(production_rows, reserves_rows)
+            
         except Exception as e:
             db.session.rollback()
             self.logger.error(f"Error ingesting USGS file {filepath}: {str(e)}")
@@ -311,6 +323,7 @@ class FileIngestionCollector(BaseDataCollector):
                 data = json.load(f)
                 
             records = data.get('data', [])
+            new_prices = {}
             
             for record in records:
                 # Validate data point
@@ -379,11 +392,15 @@ class FileIngestionCollector(BaseDataCollector):
                             confidence_score=min(0.95, quality_score + 0.1)  # Slightly higher confidence
                         )
                         db.session.add(price_data)
+                        new_prices.setdefault(commodity.id, []).append((price_data.timestamp, float(price)))
                         results['records_ingested'] += 1
                         
             db.session.commit()
             self.logger.info(f"Ingested {results['records_ingested']} FRED price records from {filepath}")
             
+            # Fold the new prices into the incrementally maintained analytics
+            notify_prices_appended(new_prices)
+            
         except Exception as e:
             db.session.rollback()
             self.logger.error(f"Error ingesting FRED commodities file {filepath}: {str(e)}")
@@ -30,6 +30,13 @@ from src.models.reserves_data import ReservesData
 from src.models.price_data import PriceData
 from src.models.data_source import DataSource
 from src.models.api_key import APIKey
+from src.models.trend_index import TrendIndex
+from src.models.price_stats_state import PriceStatsState
+from src.models.price_anomaly import PriceAnomaly, AnomalyDetectorState
+from src.models.production_concentration import ProductionConcentration
+from src.models.supply_risk_score import SupplyRiskScore
+from src.models.depletion_horizon import DepletionHorizon
+from src.models.production_forecast import ProductionForecast
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'fallback-secret-key')
@@ -56,6 +63,17 @@ print(f"Database URI: {database_uri}")
 print(f"Database path: {database_path}")
 app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Optional directory for the memory-mapped production cube arrays
+app.config['PRODUCTION_CUBE_DIR'] = os.getenv('PRODUCTION_CUBE_DIR')
+# Directory where trained ML models are stored and reused until their data changes
+app.config['MODEL_REGISTRY_DIR'] = os.getenv('MODEL_REGISTRY_DIR',
+                                             os.path.join(os.path.dirname(__file__), 'database', 'models'))
+# Worker threads that train ML models in the background
+app.config['ML_JOB_WORKERS'] = int(os.getenv('ML_JOB_WORKERS', '2'))
+# Walk-forward validation of ML models: rows left out between every training
+# and test window, and parallel fold fits (-1 uses every core)
+app.config['ML_CV_GAP'] = int(os.getenv('ML_CV_GAP', '0'))
+app.config['ML_CV_JOBS'] = int(os.getenv('ML_CV_JOBS', '1'))
 db.init_app(app)
 
 # Uncomment to create database tables on startup
@@ -0,0 +1,34 @@
+from flask_sqlalchemy import SQLAlchemy
+from src.models.user import db
+
+class DepletionHorizon(db.Model):
+    __tablename__ = 'depletion_horizons'
+
+    id = db.Column(db.Integer, primary_key=True)
+    commodity_id = db.Column(db.Integer, db.ForeignKey('commodities.id'), nullable=False, index=True)
+    country_id = db.Column(db.Integer, db.ForeignKey('countries.id'), index=True)  # NULL for world totals
+    year = db.Column(db.Integer, nullable=False)  # Latest year reporting reserves and production
+    reserves = db.Column(db.Float)
+    production = db.Column(db.Float)
+    rp_ratio = db.Column(db.Float)  # Years of reserves at current production
+    production_growth = db.Column(db.Float)  # Continuous annual growth rate of production
+    depletion_years = db.Column(db.Float)  # Years of reserves at trend growth, NULL if never exhausted
+    computed_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f'<DepletionHorizon {self.commodity_id}-{self.country_id or "world"} R/P={self.rp_ratio}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'commodity_id': self.commodity_id,
+            'country_id': self.country_id,
+            'year': self.year,
+            'reserves': self.reserves,
+            'production': self.production,
+            'rp_ratio': self.rp_ratio,
+            'production_growth': self.production_growth,
+            'depletion_years': self.depletion_years,
+            'depletion_year': int(self.year + self.depletion_years) if self.depletion_years is not None else None,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
@@ -0,0 +1,44 @@
+from flask_sqlalchemy import SQLAlchemy
+from src.models.user import db
+
+class PriceAnomaly(db.Model):
+    __tablename__ = 'price_anomalies'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    commodity_id = db.Column(db.Integer, db.ForeignKey('commodities.id'), nullable=False, index=True)
+    timestamp = db.Column(db.DateTime, nullable=False, index=True)
+    price = db.Column(db.Float)
+    anomaly_type = db.Column(db.String(50), nullable=False)  # 'outlier', 'invalid_price'
+    log_return = db.Column(db.Float)
+    robust_z = db.Column(db.Float)
+    ewma_z = db.Column(db.Float)
+    detected_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f'<PriceAnomaly {self.commodity_id} {self.timestamp} {self.anomaly_type}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'commodity_id': self.commodity_id,
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
+            'price': self.price,
+            'anomaly_type': self.anomaly_type,
+            'log_return': self.log_return,
+            'robust_z': self.robust_z,
+            'ewma_z': self.ewma_z,
+            'detected_at': self.detected_at.isoformat() if self.detected_at else None
+        }
+
+class AnomalyDetectorState(db.Model):
+    __tablename__ = 'anomaly_detector_states'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    commodity_id = db.Column(db.Integer, db.ForeignKey('commodities.id'), nullable=False, unique=True, index=True)
+    data_points = db.Column(db.Integer)
+    last_timestamp = db.Column(db.DateTime)
+    state = db.Column(db.Text)  # JSON RobustAnomalyScorer state
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f'<AnomalyDetectorState {self.commodity_id} n={self.data_points}>'
@@ -0,0 +1,28 @@
+from flask_sqlalchemy import SQLAlchemy
+from src.models.user import db
+
+class PriceStatsState(db.Model):
+    __tablename__ = 'price_stats_states'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    commodity_id = db.Column(db.Integer, db.ForeignKey('commodities.id'), nullable=False, unique=True, index=True)
+    data_points = db.Column(db.Integer)
+    last_price = db.Column(db.Float)
+    first_timestamp = db.Column(db.DateTime)
+    last_timestamp = db.Column(db.DateTime)
+    state = db.Column(db.Text)  # JSON StreamingPriceStats state
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f'<PriceStatsState {self.commodity_id} n={self.data_points}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'commodity_id': self.commodity_id,
+            'data_points': self.data_points,
+            'last_price': self.last_price,
+            'first_timestamp': self.first_timestamp.isoformat() if self.first_timestamp else None,
+            'last_timestamp': self.last_timestamp.isoformat() if self.last_timestamp else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
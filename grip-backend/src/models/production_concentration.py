@@ -0,0 +1,43 @@
+from flask_sqlalchemy import SQLAlchemy
+from src.models.user import db
+
+class ProductionConcentration(db.Model):
+    __tablename__ = 'production_concentration'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    commodity_id = db.Column(db.Integer, db.ForeignKey('commodities.id'), nullable=False, index=True)
+    year = db.Column(db.Integer, nullable=False, index=True)
+    total_production = db.Column(db.Float)
+    number_of_producers = db.Column(db.Integer)
+    hhi = db.Column(db.Float)  # Herfindahl-Hirschman Index, 0-10000
+    concentration_level = db.Column(db.String(20))  # Low, Moderate, High
+    cr3 = db.Column(db.Float)  # Share of the top 3 producers (%)
+    cr5 = db.Column(db.Float)
+    cr10 = db.Column(db.Float)
+    top_producer_share = db.Column(db.Float)  # %
+    top_producer_country_id = db.Column(db.Integer, db.ForeignKey('countries.id'))
+    computed_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    
+    __table_args__ = (db.UniqueConstraint('commodity_id', 'year'),)
+
+    def __repr__(self):
+        return f'<ProductionConcentration {self.commodity_id}-{self.year} HHI={self.hhi}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'commodity_id': self.commodity_id,
+            'year': self.year,
+            'total_production': self.total_production,
+            'number_of_producers': self.number_of_producers,
+            'hhi': self.hhi,
+            'concentration_level': self.concentration_level,
+            'concentration_ratios': {
+                'cr3': self.cr3,
+                'cr5': self.cr5,
+                'cr10': self.cr10
+            },
+            'top_producer_share': self.top_producer_share,
+            'top_producer_country_id': self.top_producer_country_id,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
@@ -0,0 +1,39 @@
+import json
+
+from flask_sqlalchemy import SQLAlchemy
+from src.models.user import db
+
+class ProductionForecast(db.Model):
+    __tablename__ = 'production_forecasts'
+
+    id = db.Column(db.Integer, primary_key=True)
+    commodity_id = db.Column(db.Integer, db.ForeignKey('commodities.id'), nullable=False, index=True)
+    country_id = db.Column(db.Integer, db.ForeignKey('countries.id'), nullable=False, index=True)
+    model = db.Column(db.String(20))  # linear, log_linear, damped
+    observations = db.Column(db.Integer)
+    base_year = db.Column(db.Integer)  # Last reported year
+    base_production = db.Column(db.Float)
+    holdout_rmse = db.Column(db.Text)  # JSON {model: RMSE on the held-out years}
+    holdout_mape = db.Column(db.Float)  # % error of the selected model on the held-out years
+    forecasts = db.Column(db.Text)  # JSON {year: production}
+    computed_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    __table_args__ = (db.UniqueConstraint('commodity_id', 'country_id'),)
+
+    def __repr__(self):
+        return f'<ProductionForecast {self.commodity_id}-{self.country_id} {self.model}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'commodity_id': self.commodity_id,
+            'country_id': self.country_id,
+            'model': self.model,
+            'observations': self.observations,
+            'base_year': self.base_year,
+            'base_production': self.base_production,
+            'holdout_rmse': json.loads(self.holdout_rmse) if self.holdout_rmse else {},
+            'holdout_mape': self.holdout_mape,
+            'forecasts': json.loads(self.forecasts) if self.forecasts else {},
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
@@ -0,0 +1,39 @@
+from flask_sqlalchemy import SQLAlchemy
+from src.models.user import db
+
+class SupplyRiskScore(db.Model):
+    __tablename__ = 'supply_risk_scores'
+
+    id = db.Column(db.Integer, primary_key=True)
+    commodity_id = db.Column(db.Integer, db.ForeignKey('commodities.id'), nullable=False, unique=True)
+    year = db.Column(db.Integer)  # Latest year with production
+    total_production = db.Column(db.Float)
+    number_of_producers = db.Column(db.Integer)
+    hhi = db.Column(db.Float)  # Herfindahl-Hirschman Index, 0-10000
+    risk_score = db.Column(db.Float, index=True)  # Stability-weighted HHI, 0-10000
+    risk_level = db.Column(db.String(20))  # Low, Moderate, High
+    weighted_instability = db.Column(db.Float)  # Share-weighted 1 - political stability, 0-1
+    stability_coverage = db.Column(db.Float)  # % of production from countries with a stability score
+    top_risk_country_id = db.Column(db.Integer, db.ForeignKey('countries.id'))
+    top_risk_contribution = db.Column(db.Float)  # % of the risk score
+    computed_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f'<SupplyRiskScore {self.commodity_id} {self.risk_score}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'commodity_id': self.commodity_id,
+            'year': self.year,
+            'total_production': self.total_production,
+            'number_of_producers': self.number_of_producers,
+            'hhi': self.hhi,
+            'risk_score': self.risk_score,
+            'risk_level': self.risk_level,
+            'weighted_instability': self.weighted_instability,
+            'stability_coverage': self.stability_coverage,
+            'top_risk_country_id': self.top_risk_country_id,
+            'top_risk_contribution': self.top_risk_contribution,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
@@ -0,0 +1,36 @@
+from flask_sqlalchemy import SQLAlchemy
+from src.models.user import db
+
+class TrendIndex(db.Model):
+    __tablename__ = 'trend_index'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    commodity_id = db.Column(db.Integer, db.ForeignKey('commodities.id'), nullable=False, unique=True, index=True)
+    trend = db.Column(db.String(20), index=True)  # increasing, decreasing, stable, insufficient_data
+    slope = db.Column(db.Float)
+    r_squared = db.Column(db.Float)
+    volatility = db.Column(db.Float)  # Mean 30-observation rolling std of price
+    high_volatility = db.Column(db.Boolean, default=False, index=True)
+    data_points = db.Column(db.Integer)
+    last_price = db.Column(db.Float)
+    last_timestamp = db.Column(db.DateTime)
+    state = db.Column(db.Text)  # JSON streaming state used for incremental updates
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f'<TrendIndex {self.commodity_id} {self.trend}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'commodity_id': self.commodity_id,
+            'trend': self.trend,
+            'slope': self.slope,
+            'r_squared': self.r_squared,
+            'volatility': self.volatility,
+            'high_volatility': self.high_volatility,
+            'data_points': self.data_points,
+            'last_price': self.last_price,
+            'last_timestamp': self.last_timestamp.isoformat() if self.last_timestamp else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
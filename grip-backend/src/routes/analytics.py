@@ -1,19 +1,54 @@
 from flask import Blueprint, request, jsonify, current_app
 from src.analytics.analytics_service import AnalyticsService
+from src.analytics.production_forecast import MODELS as FORECAST_MODELS
+from src.analytics.ml_predictor import MLPredictor
 import threading
+from datetime import datetime
 
 analytics_bp = Blueprint('analytics', __name__)
 
 # Global service instance
 analytics_service = None
+_analytics_service_lock = threading.Lock()
 
 def get_analytics_service():
     """Get or create the analytics service"""
     global analytics_service
     if analytics_service is None:
-        analytics_service = AnalyticsService(current_app)
+        # Concurrent first requests must share one service (and its single-flight group)
+        with _analytics_service_lock:
+            if analytics_service is None:
+                # The app object itself, as training jobs use it outside any request
+                analytics_service = AnalyticsService(current_app._get_current_object())
     return analytics_service
 
+def _invalid_periods_response(periods):
+    """400 response for a forecast length outside the forecaster's horizons, else None"""
+    max_periods = MLPredictor.FORECAST_HORIZONS[-1]
+    if periods is None or not 1 <= periods <= max_periods:
+        return jsonify({'error': f'periods must be an integer between 1 and {max_periods}'}), 400
+    return None
+
+def _pending_ml_response(result):
+    """
+    Response for ML output that cannot be served: unknown commodity (404),
+    no model trained yet (202 with the training job) or a failed training
+    on the current data (400); None when the output can be served
+    """
+    if 'error' in result:
+        return jsonify(result), 404
+    
+    analysis = result['analysis']
+    if analysis is None or ('error' in analysis and result['stale']):
+        return jsonify({
+            'commodity_id': result['commodity_id'],
+            'status': 'training',
+            'training_job': result['training_job']
+        }), 202
+    if 'error' in analysis:
+        return jsonify({'commodity_id': result['commodity_id'], 'error': analysis['error']}), 400
+    return None
+
 @analytics_bp.route('/analytics/commodity/<int:commodity_id>', methods=['GET'])
 def analyze_commodity(commodity_id):
     """Analyze a specific commodity"""
@@ -36,7 +71,10 @@ def analyze_commodity_price(commodity_id):
     """Analyze commodity price data specifically"""
     try:
         service = get_analytics_service()
-        result = service.analyze_commodity(commodity_id, ['price'])
+        
+        # Optional ?sections=trend,risk_metrics limits the computed sections
+        sections = [v.strip() for v in request.args.get('sections', '').split(',') if v.strip()]
+        result = service.analyze_commodity(commodity_id, ['price'], price_sections=sections or None)
         
         if 'analyses' in result and 'price' in result['analyses']:
             return jsonify(result['analyses']['price'])
@@ -46,6 +84,20 @@ def analyze_commodity_price(commodity_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@analytics_bp.route('/analytics/commodity/<int:commodity_id>/statistics', methods=['GET'])
+def get_commodity_statistics(commodity_id):
+    """Get streaming price statistics without re-reading the price history"""
+    try:
+        service = get_analytics_service()
+        result = service.get_price_statistics(commodity_id)
+        
+        if 'error' in result:
+            return jsonify(result), 404
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @analytics_bp.route('/analytics/commodity/<int:commodity_id>/production', methods=['GET'])
 def analyze_commodity_production(commodity_id):
     """Analyze commodity production data specifically"""
@@ -61,17 +113,171 @@ def analyze_commodity_production(commodity_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@analytics_bp.route('/analytics/production/countries', methods=['GET'])
+def get_country_production():
+    """Get per-country production shares, growth and efficiency across commodities"""
+    try:
+        service = get_analytics_service()
+        
+        commodity_ids = []
+        for value in request.args.getlist('commodity_ids'):
+            commodity_ids.extend(int(v) for v in value.split(',') if v.strip())
+        
+        result = service.get_country_production(commodity_ids or None)
+        if 'error' in result:
+            return jsonify(result), 404
+        return jsonify(result)
+    
+    except ValueError:
+        return jsonify({'error': 'commodity_ids must be integers'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/production/cube', methods=['GET'])
+def get_production_cube_summary():
+    """Get the axes, memory use and fill of the in-memory production cube"""
+    try:
+        service = get_analytics_service()
+        return jsonify(service.get_production_cube_summary())
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/production/aggregate', methods=['GET'])
+def aggregate_production():
+    """Sum production or reserves volumes by commodity, country and/or year"""
+    try:
+        service = get_analytics_service()
+        
+        def id_list(name):
+            ids = []
+            for value in request.args.getlist(name):
+                ids.extend(int(v) for v in value.split(',') if v.strip())
+            return ids or None
+        
+        by = [axis.strip() for axis in request.args.get('by', 'commodity,year').split(',') if axis.strip()]
+        result = service.aggregate_volumes(
+            measure=request.args.get('measure', 'production'),
+            by=by,
+            commodity_ids=id_list('commodity_ids'),
+            country_ids=id_list('country_ids'),
+            start_year=request.args.get('from', type=int),
+            end_year=request.args.get('to', type=int)
+        )
+        if 'error' in result:
+            return jsonify(result), 400
+        return jsonify(result)
+    
+    except ValueError:
+        return jsonify({'error': 'commodity_ids and country_ids must be integers'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/concentration', methods=['GET'])
+def get_production_concentration():
+    """Get yearly HHI, CR3/5/10 and top-producer share of production"""
+    try:
+        service = get_analytics_service()
+        
+        start_year = request.args.get('from', type=int)
+        end_year = request.args.get('to', type=int)
+        if start_year is not None and end_year is not None and start_year > end_year:
+            return jsonify({'error': 'from must not be after to'}), 400
+        
+        result = service.get_concentration(request.args.get('commodity_id', type=int), start_year, end_year)
+        if 'error' in result:
+            return jsonify(result), 404
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/supply-risk/ranking', methods=['GET'])
+def get_supply_risk_ranking():
+    """Rank commodities by production concentration weighted by producer political stability"""
+    try:
+        service = get_analytics_service()
+        
+        limit = request.args.get('limit', type=int)
+        if limit is not None and limit < 1:
+            return jsonify({'error': 'limit must be positive'}), 400
+        level = request.args.get('level')
+        if level is not None and level not in ('Low', 'Moderate', 'High'):
+            return jsonify({'error': 'level must be Low, Moderate or High'}), 400
+        
+        return jsonify(service.get_supply_risk_ranking(limit, level))
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/depletion/commodity/<int:commodity_id>', methods=['GET'])
+def get_commodity_depletion(commodity_id):
+    """Get reserves-to-production ratios and depletion horizons of a commodity, world and per country"""
+    try:
+        service = get_analytics_service()
+        result = service.get_commodity_depletion(commodity_id)
+        if 'error' in result:
+            return jsonify(result), 404
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/depletion/country/<int:country_id>', methods=['GET'])
+def get_country_depletion(country_id):
+    """Get reserves-to-production ratios and depletion horizons of every commodity of a country"""
+    try:
+        service = get_analytics_service()
+        result = service.get_country_depletion(country_id)
+        if 'error' in result:
+            return jsonify(result), 404
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/production/forecasts', methods=['GET'])
+def get_production_forecasts():
+    """Get stored trend forecasts of every (commodity, country) production series"""
+    try:
+        service = get_analytics_service()
+        
+        model = request.args.get('model')
+        if model is not None and model not in FORECAST_MODELS:
+            return jsonify({'error': f"model must be one of {', '.join(FORECAST_MODELS)}"}), 400
+        
+        result = service.get_production_forecasts(request.args.get('commodity_id', type=int),
+                                                  request.args.get('country_id', type=int), model)
+        if 'error' in result:
+            return jsonify(result), 404
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @analytics_bp.route('/analytics/commodity/<int:commodity_id>/ml', methods=['GET'])
 def analyze_commodity_ml(commodity_id):
     """Perform ML analysis on commodity data"""
     try:
         service = get_analytics_service()
-        result = service.analyze_commodity(commodity_id, ['ml'])
         
-        if 'analyses' in result and 'ml' in result['analyses']:
-            return jsonify(result['analyses']['ml'])
-        else:
-            return jsonify({'error': 'ML analysis not available'})
+        periods = request.args.get('periods', MLPredictor.DEFAULT_PERIODS, type=int)
+        invalid = _invalid_periods_response(periods)
+        if invalid is not None:
+            return invalid
+        
+        result = service.get_latest_ml_analysis(commodity_id, periods)
+        
+        pending = _pending_ml_response(result)
+        if pending is not None:
+            return pending
+        
+        return jsonify({
+            **result['analysis'],
+            'stale': result['stale'],
+            'model_completed_at': result['completed_at'],
+            'training_job': result['training_job']
+        })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -109,6 +315,53 @@ def get_market_overview():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@analytics_bp.route('/analytics/ml/models', methods=['GET'])
+def get_registered_models():
+    """List the stored ML models, their metrics and training time"""
+    try:
+        service = get_analytics_service()
+        return jsonify(service.get_registered_models(request.args.get('commodity_id', type=int)))
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/ml/jobs', methods=['POST'])
+def submit_ml_training():
+    """Queue ML training of one or more commodities"""
+    try:
+        service = get_analytics_service()
+        data = request.get_json(silent=True) or {}
+        
+        commodity_ids = data.get('commodity_ids')
+        if commodity_ids is None and 'commodity_id' in data:
+            commodity_ids = [data['commodity_id']]
+        
+        if (not isinstance(commodity_ids, list) or not commodity_ids
+                or not all(isinstance(c, int) and not isinstance(c, bool) for c in commodity_ids)):
+            return jsonify({'error': 'commodity_ids (list of integers) or commodity_id required in request body'}), 400
+        
+        result = service.submit_ml_training(commodity_ids)
+        if 'error' in result:
+            return jsonify(result), 404
+        return jsonify(result), 202
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/ml/jobs/<job_id>', methods=['GET'])
+def get_ml_job(job_id):
+    """Get the progress, timings and results of an ML training job"""
+    try:
+        service = get_analytics_service()
+        result = service.get_ml_job(job_id)
+        
+        if result is None:
+            return jsonify({'error': f'Training job {job_id} not found'}), 404
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @analytics_bp.route('/analytics/predict/<int:commodity_id>', methods=['GET'])
 def predict_commodity(commodity_id):
     """Get predictions for a commodity"""
@@ -116,25 +369,81 @@ def predict_commodity(commodity_id):
         service = get_analytics_service()
         
         # Get prediction parameters
-        periods = request.args.get('periods', 30, type=int)
+        periods = request.args.get('periods', MLPredictor.DEFAULT_PERIODS, type=int)
+        invalid = _invalid_periods_response(periods)
+        if invalid is not None:
+            return invalid
         
-        # Perform ML analysis to get predictions
-        result = service.analyze_commodity(commodity_id, ['ml'])
+        # Serve the last trained model; training runs in the background
+        result = service.get_latest_ml_analysis(commodity_id, periods)
         
-        if 'analyses' in result and 'ml' in result['analyses']:
-            ml_analysis = result['analyses']['ml']
-            predictions = ml_analysis.get('predictions', {})
-            
-            return jsonify({
-                'commodity_id': commodity_id,
-                'predictions': predictions,
-                'model_performance': ml_analysis.get('model_performance', {}),
-                'best_model': ml_analysis.get('best_model', 'unknown'),
-                'analysis_date': result.get('analysis_date')
-            })
-        else:
-            return jsonify({'error': 'Prediction analysis not available'})
+        pending = _pending_ml_response(result)
+        if pending is not None:
+            return pending
+        
+        ml_analysis = result['analysis']
+        return jsonify({
+            'commodity_id': commodity_id,
+            'predictions': ml_analysis.get('predictions', {}),
+            'model_performance': ml_analysis.get('model_performance', {}),
+            'best_model': ml_analysis.get('best_model', 'unknown'),
+            'analysis_date': result['completed_at'],
+            'stale': result['stale'],
+            'training_job': result['training_job']
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/seasonality', methods=['GET'])
+def get_seasonality():
+    """Get trend/seasonal/residual decompositions across commodities"""
+    try:
+        service = get_analytics_service()
+        
+        commodity_ids = []
+        for value in request.args.getlist('commodity_ids'):
+            commodity_ids.extend(int(v) for v in value.split(',') if v.strip())
+        
+        model = request.args.get('model', 'multiplicative')
+        include_components = request.args.get('components', 'false').lower() == 'true'
+        
+        result = service.get_seasonal_decomposition(commodity_ids or None, model, include_components)
+        if 'error' in result:
+            return jsonify(result), 400
+        return jsonify(result)
     
+    except ValueError:
+        return jsonify({'error': 'commodity_ids must be integers'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/simulate/<int:commodity_id>', methods=['GET'])
+def simulate_commodity_prices(commodity_id):
+    """Monte Carlo price simulation with quantile fan chart"""
+    try:
+        service = get_analytics_service()
+        
+        horizon = request.args.get('horizon', 30, type=int)
+        paths = request.args.get('paths', 10000, type=int)
+        method = request.args.get('method', 'gbm')
+        seed = request.args.get('seed', type=int)
+        quantiles = [float(q) for q in request.args.get('quantiles', '').split(',') if q.strip()]
+        
+        if not 1 <= horizon <= 3650:
+            return jsonify({'error': 'horizon must be between 1 and 3650'}), 400
+        if not 1 <= paths <= 1000000:
+            return jsonify({'error': 'paths must be between 1 and 1000000'}), 400
+        if any(not 0 <= q <= 1 for q in quantiles):
+            return jsonify({'error': 'quantiles must be between 0 and 1'}), 400
+        
+        result = service.simulate_prices(commodity_id, horizon, paths, method, seed, quantiles or None)
+        if 'error' in result:
+            return jsonify(result), 400
+        return jsonify(result)
+    
+    except ValueError:
+        return jsonify({'error': 'quantiles must be numbers'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -143,7 +452,9 @@ def assess_commodity_risk(commodity_id):
     """Get risk assessment for a commodity"""
     try:
         service = get_analytics_service()
-        result = service.analyze_commodity(commodity_id, ['price', 'production'])
+        # Only the price sections behind the risk metrics and summary are computed
+        result = service.analyze_commodity(commodity_id, ['price', 'production'],
+                                           price_sections=service.SUMMARY_PRICE_SECTIONS)
         
         risk_assessment = {
             'commodity_id': commodity_id,
@@ -159,6 +470,7 @@ def assess_commodity_risk(commodity_id):
                 price_analysis = result['analyses']['price']
                 risk_metrics = price_analysis.get('risk_metrics', {})
                 risk_assessment['risk_metrics']['price'] = risk_metrics
+                risk_assessment['risk_metrics']['volatility'] = price_analysis.get('volatility', {})
                 
                 # Check for high volatility
                 volatility = price_analysis.get('volatility', {}).get('daily', 0)
@@ -188,51 +500,78 @@ def get_market_trends():
     """Get current market trends"""
     try:
         service = get_analytics_service()
+        trends = service.get_market_trends()
+        return jsonify(trends)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/trends/scan', methods=['GET'])
+def scan_trends():
+    """Fit trends to every price or commodity/country production series"""
+    try:
+        service = get_analytics_service()
+        result = service.scan_trends(request.args.get('kind', 'price'))
         
-        # Get trend analysis for multiple commodities
-        from src.models.commodity import Commodity
-        commodities = Commodity.query.limit(10).all()
+        if 'error' in result:
+            return jsonify(result), 400
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/correlations', methods=['GET'])
+def get_correlations():
+    """Get return correlation and covariance matrices across commodities"""
+    try:
+        service = get_analytics_service()
         
-        trends = {
-            'analysis_date': service.analyzers['price'].logger.handlers[0].baseFilename if service.analyzers['price'].logger.handlers else None,
-            'trending_up': [],
-            'trending_down': [],
-            'stable': [],
-            'high_volatility': []
-        }
+        # Accept both ?commodity_ids=1,2,3 and repeated ?commodity_ids= parameters
+        commodity_ids = []
+        for value in request.args.getlist('commodity_ids'):
+            commodity_ids.extend(int(v) for v in value.split(',') if v.strip())
         
-        for commodity in commodities:
-            try:
-                analysis = service._perform_analysis(commodity.id, 'price')
-                
-                if 'error' not in analysis:
-                    trend = analysis.get('trend', {}).get('trend', 'stable')
-                    volatility = analysis.get('volatility', {}).get('daily', 0)
-                    
-                    commodity_info = {
-                        'id': commodity.id,
-                        'name': commodity.name,
-                        'trend_strength': analysis.get('trend', {}).get('r_squared', 0)
-                    }
-                    
-                    if trend == 'increasing':
-                        trends['trending_up'].append(commodity_info)
-                    elif trend == 'decreasing':
-                        trends['trending_down'].append(commodity_info)
-                    else:
-                        trends['stable'].append(commodity_info)
-                    
-                    if volatility > 0.05:  # 5% daily volatility threshold
-                        trends['high_volatility'].append({
-                            **commodity_info,
-                            'volatility': volatility
-                        })
-            
-            except Exception as e:
-                service.logger.error(f"Error analyzing trends for {commodity.name}: {e}")
+        window = request.args.get('window', 12, type=int)
+        frequency = request.args.get('frequency', 'monthly')
+        category = request.args.get('category')
+        # Full rolling matrices only for the latest windows (0 for every window)
+        rolling_windows = request.args.get('rolling_windows', 1, type=int)
         
-        return jsonify(trends)
+        if window < 2:
+            return jsonify({'error': 'window must be at least 2'}), 400
+        if rolling_windows < 0:
+            return jsonify({'error': 'rolling_windows must be non-negative'}), 400
+        
+        result = service.get_correlations(commodity_ids or None, category, window, frequency,
+                                          rolling_windows or None)
+        if 'error' in result:
+            return jsonify(result), 400
+        return jsonify(result)
+    
+    except ValueError:
+        return jsonify({'error': 'commodity_ids must be integers'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/anomalies', methods=['GET'])
+def get_price_anomalies():
+    """Get price anomalies flagged during ingestion"""
+    try:
+        service = get_analytics_service()
+        
+        commodity_id = request.args.get('commodity_id', type=int)
+        limit = request.args.get('limit', 100, type=int)
+        since = request.args.get('since')
+        if since:
+            since = datetime.fromisoformat(since)
+        
+        result = service.get_price_anomalies(commodity_id, since or None, max(1, min(limit, 1000)))
+        if 'error' in result:
+            return jsonify(result), 404
+        return jsonify(result)
     
+    except ValueError:
+        return jsonify({'error': 'since must be an ISO date'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -268,6 +607,7 @@ def health_check():
             'status': 'healthy',
             'analyzers': {},
             'cache_size': len(service.analysis_cache),
+            'coalescing_rate': service.single_flight.get_stats()['coalescing_rate'],
             'timestamp': service.analyzers['price'].logger.handlers[0].baseFilename if service.analyzers['price'].logger.handlers else None
         }
         
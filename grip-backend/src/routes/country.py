@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from src.models.user import db
 from src.models.country import Country
+from src.analytics.production_updates import notify_stability_changed
 
 country_bp = Blueprint('country', __name__)
 
@@ -59,6 +60,9 @@ def update_country(country_id):
         
         db.session.commit()
         
+        if 'political_stability_score' in data:
+            notify_stability_changed([country.id])
+        
         return jsonify(country.to_dict())
     except Exception as e:
         db.session.rollback()
@@ -5,6 +5,8 @@ from src.models.reserves_data import ReservesData
 from src.models.price_data import PriceData
 from src.models.data_source import DataSource
 from src.models.commodity import Commodity
+from src.analytics.price_updates import notify_prices_appended
+from src.analytics.production_updates import notify_volumes_appended, volume_rows
 from sqlalchemy import and_, func, case
 from datetime import datetime
 
@@ -50,7 +52,10 @@ def create_production_data():
         )
         
         db.session.add(production_data)
+        db.session.flush()
+        rows = volume_rows([production_data], 'production_volume')
         db.session.commit()
+        notify_volumes_appended(production=rows)
         
         return jsonify(production_data.to_dict()), 201
     except Exception as e:
@@ -97,7 +102,10 @@ def create_reserves_data():
         )
         
         db.session.add(reserves_data)
+        db.session.flush()
+        rows = volume_rows([reserves_data], 'reserves_volume')
         db.session.commit()
+        notify_volumes_appended(reserves=rows)
         
         return jsonify(reserves_data.to_dict()), 201
     except Exception as e:
@@ -141,6 +149,9 @@ def create_price_data():
         db.session.add(price_data)
         db.session.commit()
         
+        if price_data.price is not None:
+            notify_prices_appended({price_data.commodity_id: [(price_data.timestamp, float(price_data.price))]})
+        
         return jsonify(price_data.to_dict()), 201
     except Exception as e:
         db.session.rollback()
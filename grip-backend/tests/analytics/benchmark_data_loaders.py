@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Core-select DataFrame loaders against the previous ORM loaders
+
+Usage: python tests/analytics/benchmark_data_loaders.py [price_rows]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import pandas as pd
+from flask import Flask
+from sqlalchemy import event
+
+from src.analytics.data_loaders import load_price_frame, load_production_frame
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.country import Country
+from src.models.price_data import PriceData
+from src.models.production_data import ProductionData
+from src.models.reserves_data import ReservesData
+from src.models.data_source import DataSource
+
+
+def legacy_price_frame(commodity_id):
+    """Previous AnalyticsService._get_price_data implementation"""
+    price_records = PriceData.query.filter_by(commodity_id=commodity_id).order_by(PriceData.timestamp).all()
+    data = []
+    for record in price_records:
+        data.append({
+            'date': record.timestamp,
+            'price': float(record.price) if record.price else None,
+            'currency': record.currency,
+            'volume': float(record.volume) if record.volume else None,
+            'commodity_id': record.commodity_id
+        })
+    df = pd.DataFrame(data)
+    df['date'] = pd.to_datetime(df['date'])
+    return df.dropna(subset=['price'])
+
+
+def legacy_production_frame(commodity_id):
+    """Previous AnalyticsService._get_production_data implementation"""
+    production_records = (ProductionData.query
+                          .filter_by(commodity_id=commodity_id)
+                          .join(Country)
+                          .order_by(ProductionData.year)
+                          .all())
+    data = []
+    for record in production_records:
+        data.append({
+            'year': record.year,
+            'production_volume': float(record.production_volume) if record.production_volume else None,
+            'unit': record.unit,
+            'country': record.country.name if record.country else 'Unknown',
+            'commodity_id': record.commodity_id
+        })
+    df = pd.DataFrame(data)
+    return df.dropna(subset=['production_volume'])
+
+
+def seed(price_rows, countries=200, years=30):
+    commodity = Commodity(name='Benchmark', symbol='BEN')
+    db.session.add(commodity)
+    db.session.flush()
+
+    start = datetime(1970, 1, 1)
+    db.session.execute(PriceData.__table__.insert(), [
+        {'commodity_id': commodity.id, 'price': 100 + (i % 1000) / 10, 'currency': 'USD',
+         'timestamp': start + timedelta(minutes=i)}
+        for i in range(price_rows)
+    ])
+    db.session.execute(Country.__table__.insert(), [
+        {'name': f'Country {i}', 'iso_code': f'C{i:02d}'} for i in range(countries)
+    ])
+    country_ids = [c.id for c in Country.query.all()]
+    db.session.execute(ProductionData.__table__.insert(), [
+        {'commodity_id': commodity.id, 'country_id': country_id, 'year': 1996 + y,
+         'production_volume': 1000 + y, 'unit': 'metric tons'}
+        for country_id in country_ids for y in range(years)
+    ])
+    db.session.commit()
+    return commodity.id
+
+
+def timed(label, fn, commodity_id):
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    db.session.expunge_all()
+    event.listen(db.engine, 'before_cursor_execute', count)
+    start = time.perf_counter()
+    df = fn(commodity_id)
+    elapsed = time.perf_counter() - start
+    event.remove(db.engine, 'before_cursor_execute', count)
+
+    print(f"{label:<28} {elapsed:8.3f}s  {len(df):>9} rows  {len(statements):>5} SQL statements")
+    return elapsed
+
+
+def main():
+    price_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        db.init_app(app)
+
+        with app.app_context():
+            db.create_all()
+            print(f"Seeding {price_rows} price rows...")
+            commodity_id = seed(price_rows)
+
+            print("=" * 72)
+            legacy = timed('legacy price (ORM)', legacy_price_frame, commodity_id)
+            vectorized = timed('load_price_frame', load_price_frame, commodity_id)
+            print(f"price speedup: {legacy / vectorized:.1f}x")
+            print("-" * 72)
+            legacy = timed('legacy production (ORM)', legacy_production_frame, commodity_id)
+            vectorized = timed('load_production_frame', load_production_frame, commodity_id)
+            print(f"production speedup: {legacy / vectorized:.1f}x")
+            print("(each extra SQL statement beyond the first is a lazy relationship load)")
+
+
+if __name__ == "__main__":
+    main()
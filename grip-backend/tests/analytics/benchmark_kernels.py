@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark the NumPy price kernels against the previous pandas implementations
+
+Runs on synthetic 50-year daily price series.
+
+Usage: python tests/analytics/benchmark_kernels.py [series]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+
+from src.analytics import kernels
+from src.analytics.price_analyzer import PriceAnalyzer
+
+DAYS = 50 * 365
+
+
+def legacy_consecutive_movements(returns, positive=True):
+    """Previous PriceAnalyzer.find_consecutive_movements implementation"""
+    condition = returns > 0 if positive else returns < 0
+    groups = (condition != condition.shift()).cumsum()
+    consecutive = returns[condition].groupby(groups[condition])
+    if len(consecutive) == 0:
+        return {'max_streak': 0, 'avg_streak': 0, 'total_streaks': 0}
+    streak_lengths = consecutive.size()
+    return {
+        'max_streak': streak_lengths.max(),
+        'avg_streak': streak_lengths.mean(),
+        'total_streaks': len(streak_lengths)
+    }
+
+
+def legacy_max_drawdown(prices):
+    """Previous drawdown computation in PriceAnalyzer.calculate_risk_metrics"""
+    returns = prices.pct_change().dropna()
+    cumulative = (1 + returns).cumprod()
+    running_max = cumulative.expanding().max()
+    drawdown = (cumulative - running_max) / running_max
+    return drawdown.min()
+
+
+def legacy_support_resistance(prices, window=20):
+    """Previous PriceAnalyzer.find_support_resistance_levels implementation"""
+    rolling_min = prices.rolling(window=window).min()
+    rolling_max = prices.rolling(window=window).max()
+    local_mins = prices[(prices == rolling_min) & (prices.shift(1) > prices) & (prices.shift(-1) > prices)]
+    local_maxs = prices[(prices == rolling_max) & (prices.shift(1) < prices) & (prices.shift(-1) < prices)]
+    return local_mins.tolist()[-5:], local_maxs.tolist()[-5:]
+
+
+def kernel_max_drawdown(prices):
+    returns = prices.pct_change().dropna().to_numpy()
+    return kernels.max_drawdown(np.cumprod(1 + returns))[0]
+
+
+def time_call(fn, series, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for prices in series:
+            fn(prices)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    n_series = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rng = np.random.default_rng(0)
+    series = [pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, DAYS)))) for _ in range(n_series)]
+    returns = [prices.pct_change() for prices in series]
+    analyzer = PriceAnalyzer()
+
+    print(f"{n_series} series x {DAYS} daily prices (numba: {kernels.HAS_NUMBA})")
+
+    cases = [
+        ('consecutive movements',
+         lambda r: (legacy_consecutive_movements(r, True), legacy_consecutive_movements(r, False)),
+         lambda r: (analyzer.find_consecutive_movements(r, True), analyzer.find_consecutive_movements(r, False)),
+         returns),
+        ('max drawdown', legacy_max_drawdown, kernel_max_drawdown, series),
+        ('support/resistance', legacy_support_resistance, analyzer.find_support_resistance_levels, series)
+    ]
+
+    for name, legacy, kernel, inputs in cases:
+        legacy_time = time_call(legacy, inputs)
+        kernel_time = time_call(kernel, inputs)
+        print(f"  {name:<22} pandas {legacy_time * 1000:8.1f}ms  kernels {kernel_time * 1000:8.1f}ms  "
+              f"speedup {legacy_time / kernel_time:5.1f}x")
+
+    # Kernels and the previous implementations agree
+    for prices, r in zip(series, returns):
+        assert analyzer.find_consecutive_movements(r)['total_streaks'] == legacy_consecutive_movements(r)['total_streaks']
+        assert np.isclose(kernel_max_drawdown(prices), legacy_max_drawdown(prices))
+        levels = analyzer.find_support_resistance_levels(prices)
+        assert (levels['support_levels'], levels['resistance_levels']) == legacy_support_resistance(prices)
+
+
+if __name__ == '__main__':
+    main()
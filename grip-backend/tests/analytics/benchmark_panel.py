@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Measure the memory of the FRED and USGS series held as DataFrames and as Panels
+
+Loads every FRED commodity price history and every USGS production and
+reserves series from the JSON files under data/ and compares:
+
+  - long DataFrames with object columns (the shape the ORM loaders built)
+  - typed long DataFrames (the shape data_loaders builds)
+  - the wide float64 pivot (Panel.to_frame of the price Panel)
+  - float64 and float32 Panels
+
+Usage: python tests/analytics/benchmark_panel.py [data_dir]
+"""
+
+import glob
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.panel import Panel
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data'))
+
+
+def load_fred_records(data_dir):
+    """Price records of every FRED commodity (the enhanced collection when present)"""
+    records = []
+    for subdir in ['fred_enhanced', 'fred']:
+        for path in sorted(glob.glob(os.path.join(data_dir, subdir, 'commodities', '*', '*_data.json'))):
+            with open(path) as f:
+                records.extend(json.load(f).get('data', []))
+        if records:
+            break
+    return records
+
+
+def load_usgs_records(data_dir):
+    records = []
+    for path in sorted(glob.glob(os.path.join(data_dir, 'usgs', '*_data_*.json'))):
+        with open(path) as f:
+            data = json.load(f)
+        records.extend(data if isinstance(data, list) else data.get('data', []))
+    return records
+
+
+def deep_bytes(frame):
+    return int(frame.memory_usage(deep=True, index=True).sum())
+
+
+def report(title, rows):
+    baseline = rows[0][1]
+    print(title)
+    for name, size in rows:
+        print(f"  {name:<34} {size / 1024:10.1f} KiB  {size / baseline:7.1%}")
+
+
+def main():
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else DATA_DIR
+
+    fred = load_fred_records(data_dir)
+    commodities = sorted({r['commodity'] for r in fred})
+    ids = {name: i + 1 for i, name in enumerate(commodities)}
+
+    # Object-dtype long frame, as built from ORM rows
+    legacy = pd.DataFrame({
+        'date': pd.to_datetime([r['date'] for r in fred]),
+        'price': [float(r['price']) if r.get('price') is not None else None for r in fred],
+        'currency': ['USD'] * len(fred),
+        'volume': [None] * len(fred),
+        'commodity': [r['commodity'] for r in fred],
+        'commodity_id': [ids[r['commodity']] for r in fred]
+    })
+    typed = pd.DataFrame({
+        'date': legacy['date'],
+        'price': legacy['price'].to_numpy(dtype=np.float64),
+        'currency': pd.Categorical(legacy['currency']),
+        'volume': np.full(len(legacy), np.nan),
+        'commodity_id': legacy['commodity_id'].to_numpy(dtype=np.int64)
+    })
+    wide = typed.pivot_table(index='date', columns='commodity_id', values='price', aggfunc='last')
+    panel64 = Panel.from_long(typed['date'].to_numpy(), typed['commodity_id'], typed['price'], dtype=np.float64)
+    panel32 = panel64.astype(np.float32)
+
+    print(f"FRED: {len(fred)} observations of {len(commodities)} commodity price series, "
+          f"{panel32.shape[0]} distinct dates")
+    report('', [
+        ('long DataFrame, object columns', deep_bytes(legacy)),
+        ('long DataFrame, typed columns', deep_bytes(typed)),
+        ('wide float64 DataFrame', deep_bytes(wide)),
+        ('Panel float64', panel64.nbytes),
+        ('Panel float32', panel32.nbytes)
+    ])
+
+    usgs = load_usgs_records(data_dir)
+    legacy = pd.DataFrame({
+        'year': [r.get('year') for r in usgs],
+        'production_volume': [r.get('production_volume') for r in usgs],
+        'reserves_volume': [r.get('reserves_volume') for r in usgs],
+        'unit': [r.get('unit') for r in usgs],
+        'country': [r.get('country') for r in usgs],
+        'commodity': [r.get('commodity') for r in usgs]
+    })
+    legacy = legacy.dropna(subset=['year', 'country', 'commodity'])
+    legacy['production_volume'] = pd.to_numeric(legacy['production_volume'], errors='coerce')
+    legacy['reserves_volume'] = pd.to_numeric(legacy['reserves_volume'], errors='coerce')
+    typed = pd.DataFrame({
+        'year': legacy['year'].to_numpy(dtype=np.int64),
+        'production_volume': legacy['production_volume'].to_numpy(dtype=np.float64),
+        'reserves_volume': legacy['reserves_volume'].to_numpy(dtype=np.float64),
+        'unit': pd.Categorical(legacy['unit']),
+        'country': pd.Categorical(legacy['country']),
+        'commodity': pd.Categorical(legacy['commodity'])
+    })
+
+    codes, keys = pd.factorize(pd.MultiIndex.from_arrays([typed['commodity'], typed['country']]))
+    panels = {dtype: [Panel.from_long(typed['year'], codes, typed[column], dtype=dtype, labels=list(keys),
+                                      index_name='year', value_name=column)
+                      for column in ['production_volume', 'reserves_volume']]
+              for dtype in [np.float64, np.float32]}
+    # The (commodity, country) labels are shared by both panels and counted once
+    labels = sum(sys.getsizeof(c) + sys.getsizeof(country) for c, country in keys) + 8 * len(keys)
+
+    print(f"USGS: {len(typed)} production/reserves records of {len(keys)} commodity/country series, "
+          f"{panels[np.float32][0].shape[0]} years")
+    report('', [
+        ('long DataFrame, object columns', deep_bytes(legacy)),
+        ('long DataFrame, typed columns', deep_bytes(typed)),
+        ('Panels float64 (+ labels)', sum(p.nbytes for p in panels[np.float64]) + labels),
+        ('Panels float32 (+ labels)', sum(p.nbytes for p in panels[np.float32]) + labels)
+    ])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-country production analysis on the USGS 1996-2025 data
+
+Runs the country analysis and efficiency comparison of every commodity,
+one commodity at a time and all together in one call, and compares with
+the per-country filtering loops they replace.
+
+Usage: python tests/analytics/benchmark_production_analyzer.py [data_dir] [repeat]
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.production_analyzer import ProductionAnalyzer
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data'))
+
+
+def load_usgs_frame(data_dir):
+    records = []
+    for path in sorted(glob.glob(os.path.join(data_dir, 'usgs', '*_data_*.json'))):
+        with open(path) as f:
+            data = json.load(f)
+        records.extend(data if isinstance(data, list) else data.get('data', []))
+
+    df = pd.DataFrame(records)[['year', 'production_volume', 'country', 'commodity']]
+    df['production_volume'] = pd.to_numeric(df['production_volume'], errors='coerce')
+    df = df.dropna(subset=['year', 'production_volume', 'country'])
+    df['year'] = df['year'].astype(np.int64)
+    return df.sort_values('year', kind='stable').reset_index(drop=True)
+
+
+def legacy_country_growth(data):
+    """Country CAGRs with one filter of the full frame per country"""
+    growth = {}
+    for country in data['country'].unique():
+        country_data = data[data['country'] == country].sort_values('year')
+        if len(country_data) >= 2:
+            first = country_data['production_volume'].iloc[0]
+            last = country_data['production_volume'].iloc[-1]
+            span = country_data['year'].iloc[-1] - country_data['year'].iloc[0]
+            if first > 0 and span > 0:
+                growth[country] = ((last / first) ** (1 / span) - 1) * 100
+    return growth
+
+
+def legacy_efficiency(data):
+    """Country efficiency scores with one filter of the full frame per country"""
+    scores = {}
+    for country in data['country'].unique():
+        country_data = data[data['country'] == country].sort_values('year')
+        if len(country_data) >= 2:
+            average = country_data['production_volume'].mean()
+            std = country_data['production_volume'].std()
+            stability = 1 / (std / average) if average > 0 and std > 0 else 1
+            growth_volatility = country_data['production_volume'].pct_change().std()
+            consistency = 1 / (1 + growth_volatility) if not np.isnan(growth_volatility) else 1
+            scores[country] = (stability + consistency) / 2
+    return scores
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else DATA_DIR
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    data = load_usgs_frame(data_dir)
+    commodities = [group for _, group in data.groupby('commodity', sort=True)]
+    analyzer = ProductionAnalyzer()
+    print(f"{len(data)} production records, {len(commodities)} commodities, "
+          f"{data.groupby(['commodity', 'country']).ngroups} commodity/country series")
+
+    legacy, legacy_result = timed(lambda: [(legacy_country_growth(g), legacy_efficiency(g)) for g in commodities],
+                                  repeat)
+    per_commodity, _ = timed(lambda: [(analyzer.analyze_by_country(g), analyzer.compare_production_efficiency(g))
+                                      for g in commodities], repeat)
+    combined, result = timed(lambda: analyzer.analyze_countries(data, by='commodity'), repeat)
+
+    print(f"  per-country loops        {legacy * 1000:9.1f}ms")
+    print(f"  per commodity            {per_commodity * 1000:9.1f}ms  {legacy / per_commodity:5.1f}x")
+    print(f"  all commodities, 1 call  {combined * 1000:9.1f}ms  {legacy / combined:5.1f}x")
+
+    # Same CAGRs and efficiency scores as the loops
+    for group, (growth, efficiency) in zip(commodities, legacy_result):
+        analysis = result[group['commodity'].iloc[0]]
+        assert analysis['country_analysis']['growth_rates'].keys() == growth.keys()
+        np.testing.assert_allclose(list(analysis['country_analysis']['growth_rates'].values()),
+                                   list(growth.values()), rtol=1e-9)
+        scores = {country: entry['efficiency_score']
+                  for country, entry in analysis['efficiency']['country_efficiency'].items()}
+        assert scores.keys() == efficiency.keys()
+        np.testing.assert_allclose(list(scores.values()), list(efficiency.values()), rtol=1e-9)
+
+
+if __name__ == '__main__':
+    main()
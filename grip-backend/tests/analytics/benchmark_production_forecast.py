@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark the batched production forecasts on the USGS 1996-2025 data
+
+Fits the linear, log-linear and damped trends to every (commodity,
+country) production series at once, selects a model per series by
+holdout error and forecasts it, and compares with fitting the series one
+at a time with np.polyfit.
+
+Usage: python tests/analytics/benchmark_production_forecast.py [data_dir] [repeat]
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.production_forecast import forecast_series, MODELS, HOLDOUT_YEARS, MIN_TRAINING_YEARS, DAMPING
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data'))
+
+
+def load_usgs_series(data_dir):
+    """(series x year) production array of every commodity/country pair"""
+    records = []
+    for path in sorted(glob.glob(os.path.join(data_dir, 'usgs', '*_data_*.json'))):
+        with open(path) as f:
+            data = json.load(f)
+        records.extend(data if isinstance(data, list) else data.get('data', []))
+
+    df = pd.DataFrame(records)[['year', 'production_volume', 'country', 'commodity']]
+    df['production_volume'] = pd.to_numeric(df['production_volume'], errors='coerce')
+    df = df.dropna(subset=['year', 'production_volume', 'country'])
+    df['year'] = df['year'].astype(np.int64)
+    wide = df.pivot_table(index=['commodity', 'country'], columns='year', values='production_volume', aggfunc='sum')
+    return wide.to_numpy(dtype=np.float64)
+
+
+def legacy_forecasts(values, horizon=5):
+    """Holdout selection and forecast of one series at a time"""
+    results = []
+    for row in values:
+        years = np.flatnonzero(~np.isnan(row))
+        if len(years) < HOLDOUT_YEARS + MIN_TRAINING_YEARS:
+            results.append(None)
+            continue
+        train, test = years[:-HOLDOUT_YEARS], years[-HOLDOUT_YEARS:]
+
+        def predict(fit_years, at):
+            slope, intercept = np.polyfit(fit_years, row[fit_years], 1)
+            predictions = [intercept + slope * at]
+            if (row[fit_years] > 0).all():
+                log_slope, log_intercept = np.polyfit(fit_years, np.log(row[fit_years]), 1)
+                predictions.append(np.exp(log_intercept + log_slope * at))
+            else:
+                predictions.append(np.full(len(at), np.nan))
+            steps = at - fit_years[-1]
+            predictions.append(intercept + slope * fit_years[-1]
+                               + slope * DAMPING * (1 - DAMPING ** steps) / (1 - DAMPING))
+            return predictions
+
+        rmse = [np.sqrt(np.mean((p - row[test]) ** 2)) for p in predict(train, test)]
+        model = int(np.nanargmin(rmse))
+        ahead = years[-1] + np.arange(1, horizon + 1)
+        results.append((model, np.maximum(predict(years, ahead)[model], 0)))
+    return results
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else DATA_DIR
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    values = load_usgs_series(data_dir)
+    print(f"{values.shape[0]} commodity/country series over {values.shape[1]} years")
+
+    legacy, legacy_result = timed(lambda: legacy_forecasts(values), repeat)
+    batched, result = timed(lambda: forecast_series(values), repeat)
+
+    print(f"  per-series polyfit  {legacy * 1000:9.1f}ms")
+    print(f"  batched             {batched * 1000:9.1f}ms  {legacy / batched:5.1f}x")
+    print(f"  forecast series     {int(result['eligible'].sum())}")
+    for i, name in enumerate(MODELS):
+        print(f"    {name:<12} {int((result['eligible'] & (result['model'] == i)).sum())}")
+
+    # Same selections and forecasts as the per-series fits, up to exact ties
+    # (constant series fit every model perfectly)
+    for i, expected in enumerate(legacy_result):
+        if expected is None:
+            assert not result['eligible'][i]
+            continue
+        model, forecast = expected
+        if result['model'][i] != model:
+            rmse = result['holdout_rmse'][i]
+            assert np.isclose(rmse[model], rmse[result['model'][i]], atol=1e-6)
+            continue
+        np.testing.assert_allclose(result['forecast'][i], forecast, rtol=1e-6, atol=1e-6)
+
+
+if __name__ == '__main__':
+    main()
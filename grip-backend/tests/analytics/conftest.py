@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+# Make the backend package importable when running from any directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from flask import Flask
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.country import Country
+from src.models.production_data import ProductionData
+from src.models.reserves_data import ReservesData
+from src.models.price_data import PriceData
+from src.models.data_source import DataSource
+from src.models.trend_index import TrendIndex
+from src.models.price_stats_state import PriceStatsState
+from src.models.price_anomaly import PriceAnomaly, AnomalyDetectorState
+from src.models.production_concentration import ProductionConcentration
+from src.models.supply_risk_score import SupplyRiskScore
+from src.models.depletion_horizon import DepletionHorizon
+from src.models.production_forecast import ProductionForecast
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Flask app bound to a throwaway SQLite database"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'test.db'}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analytics.analytics_service import AnalyticsService
+from src.analytics.base_analyzer import BaseAnalyzer
+from src.analytics.batch_trends import batch_linear_trend, rolling_linear_trend, left_align
+from src.analytics.price_analyzer import PriceAnalyzer
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.country import Country
+from src.models.price_data import PriceData
+from src.models.production_data import ProductionData
+
+
+def _polyfit(x, y):
+    mask = ~np.isnan(y)
+    slope, intercept = np.polyfit(x[mask], y[mask], 1)
+    residual = y[mask] - (slope * x[mask] + intercept)
+    total = y[mask] - y[mask].mean()
+    return slope, intercept, 1 - (residual @ residual) / (total @ total)
+
+
+def _panel(seed, n_series=40, n_time=300):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0, 1, (n_series, n_time)).cumsum(axis=1) + rng.normal(0, 0.5, (n_series, 1)) * np.arange(n_time)
+    values[rng.random(values.shape) < 0.1] = np.nan
+    return values
+
+
+def test_batch_trend_matches_polyfit_per_series():
+    values = _panel(0)
+    x = np.arange(values.shape[1], dtype=np.float64) + 1990
+    fit = batch_linear_trend(values, x=x)
+
+    for i, row in enumerate(values):
+        slope, intercept, r_squared = _polyfit(x, row)
+        assert fit['slope'][i] == pytest.approx(slope, rel=1e-8)
+        assert fit['intercept'][i] == pytest.approx(intercept, rel=1e-6)
+        assert fit['r_squared'][i] == pytest.approx(r_squared, rel=1e-8)
+        assert fit['n'][i] == (~np.isnan(row)).sum()
+
+
+def test_batch_trend_flags_series_without_enough_observations():
+    fit = batch_linear_trend(np.array([[np.nan, 1.0, np.nan], [np.nan] * 3, [2.0, 2.0, 2.0]]))
+    assert np.isnan(fit['slope'][:2]).all()
+    assert list(fit['r_squared']) == [0.0, 0.0, 0.0]
+    assert fit['slope'][2] == 0.0
+
+
+def test_rolling_trend_matches_per_window_fit():
+    values = _panel(1, n_series=5, n_time=120)
+    window = 24
+    rolling = rolling_linear_trend(values, window, min_periods=10)
+    assert rolling['slope'].shape == (5, 120 - window + 1)
+
+    x = np.arange(window, dtype=np.float64)
+    for i in range(values.shape[0]):
+        for k in range(0, 120 - window + 1, 7):
+            segment = values[i, k:k + window]
+            if (~np.isnan(segment)).sum() < 10:
+                assert np.isnan(rolling['slope'][i, k])
+                continue
+            slope, intercept, r_squared = _polyfit(x, segment)
+            assert rolling['slope'][i, k] == pytest.approx(slope, rel=1e-6, abs=1e-9)
+            assert rolling['intercept'][i, k] == pytest.approx(intercept, rel=1e-6, abs=1e-9)
+            assert rolling['r_squared'][i, k] == pytest.approx(r_squared, rel=1e-6, abs=1e-9)
+
+
+def test_calculate_trend_matches_polyfit():
+    series = pd.Series(_panel(2, n_series=1)[0])
+    trend = PriceAnalyzer().calculate_trend(series)
+    slope, _, r_squared = _polyfit(np.arange(len(series), dtype=np.float64), series.to_numpy())
+
+    assert trend['slope'] == pytest.approx(slope, rel=1e-8)
+    assert trend['r_squared'] == pytest.approx(r_squared, rel=1e-8)
+    assert trend['trend'] == BaseAnalyzer.classify_trend(slope)
+    assert trend['periods_analyzed'] == series.notna().sum()
+
+
+def test_left_align_pads_with_nan():
+    panel = left_align([np.array([1.0, 2.0, 3.0]), np.array([4.0])])
+    np.testing.assert_array_equal(panel, [[1.0, 2.0, 3.0], [4.0, np.nan, np.nan]])
+
+
+def test_scan_trends_covers_price_and_country_series(app):
+    copper = Commodity(name='Copper', symbol='CU')
+    tin = Commodity(name='Tin', symbol='SN')
+    chile = Country(name='Chile', iso_code='CHL')
+    peru = Country(name='Peru', iso_code='PER')
+    db.session.add_all([copper, tin, chile, peru])
+    db.session.flush()
+
+    start = datetime(2020, 1, 1)
+    for i in range(50):
+        db.session.add(PriceData(commodity_id=copper.id, price=100.0 + 2 * i, timestamp=start + timedelta(days=i)))
+    for i in range(20):
+        db.session.add(PriceData(commodity_id=tin.id, price=50.0 - 0.5 * i + (i % 3), timestamp=start + timedelta(days=i)))
+    for year in range(2000, 2010):
+        db.session.add(ProductionData(commodity_id=copper.id, country_id=chile.id, year=year,
+                                      production_volume=1000 + 50 * (year - 2000), unit='t'))
+        if year % 2 == 0:
+            db.session.add(ProductionData(commodity_id=copper.id, country_id=peru.id, year=year,
+                                          production_volume=800 - 10 * (year - 2000), unit='t'))
+    db.session.commit()
+
+    service = AnalyticsService(app)
+
+    prices = service.scan_trends('price')
+    assert prices['series_count'] == 2
+    by_name = {entry['commodity']: entry for entry in prices['series']}
+    assert by_name['Copper']['trend'] == 'increasing'
+    assert by_name['Copper']['slope'] == pytest.approx(2.0)
+    assert by_name['Tin']['trend'] == 'decreasing'
+
+    production = service.scan_trends('production')
+    by_country = {entry['country']: entry for entry in production['series']}
+    assert by_country['Chile']['slope'] == pytest.approx(50.0)
+    assert by_country['Chile']['r_squared'] == pytest.approx(1.0)
+    assert by_country['Peru']['slope'] == pytest.approx(-10.0)
+    assert by_country['Peru']['periods_analyzed'] == 5
+
+    assert 'error' in service.scan_trends('reserves')
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analytics.comparison_engine import ComparisonEngine
+from src.analytics.price_analyzer import PriceAnalyzer
+
+
+def _series(dates, seed, drift):
+    rng = np.random.default_rng(seed)
+    prices = 100 + np.cumsum(rng.normal(drift, 1.0, len(dates)))
+    return pd.Series(prices, index=dates)
+
+
+@pytest.fixture
+def panel():
+    daily = _series(pd.date_range('2020-01-01', periods=400, freq='D'), 1, 0.2)
+    monthly = _series(pd.date_range('2015-01-01', periods=45, freq='MS'), 2, -0.5)
+    short = _series(pd.date_range('2020-06-01', periods=12, freq='D'), 3, 0.0)
+    return pd.DataFrame({1: daily, 2: monthly, 3: short})
+
+
+def test_matches_per_series_price_analysis(panel):
+    comparison = ComparisonEngine().analyze(panel)
+    analyzer = PriceAnalyzer()
+
+    for column in panel.columns:
+        prices = panel[column].dropna()
+        result = comparison[column]
+        expected_trend = analyzer.calculate_trend(prices)
+
+        assert result['data_points'] == len(prices)
+        assert result['current_price'] == pytest.approx(prices.iloc[-1])
+        assert result['trend']['trend'] == expected_trend['trend']
+        assert result['trend']['slope'] == pytest.approx(expected_trend['slope'])
+        assert result['trend']['r_squared'] == pytest.approx(expected_trend['r_squared'])
+        assert result['volatility']['daily'] == pytest.approx(analyzer.calculate_volatility(prices, window=30))
+
+        frame = pd.DataFrame({'date': prices.index, 'price': prices.values})
+        for label, days in ComparisonEngine.PERFORMANCE_HORIZONS.items():
+            expected = analyzer.calculate_performance(frame, days)
+            if expected is None:
+                assert result['performance'][label] is None
+            else:
+                assert result['performance'][label] == pytest.approx(expected)
+
+        returns = prices.pct_change().dropna()
+        assert result['returns']['mean'] == pytest.approx(returns.mean())
+        assert result['returns']['std'] == pytest.approx(returns.std())
+
+
+def test_price_analyzer_compare_uses_long_format(panel):
+    long = panel.rename(columns={1: 'gold', 2: 'copper', 3: 'tin'}).stack().reset_index()
+    long.columns = ['date', 'commodity', 'price']
+
+    results = PriceAnalyzer().compare_commodities(long, ['gold', 'copper', 'missing'])
+
+    assert set(results) == {'gold', 'copper'}
+    assert results['gold']['current_price'] == pytest.approx(panel[1].dropna().iloc[-1])
+    assert results['copper']['performance_1y'] is None
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+from src.analytics.analytics_service import AnalyticsService
+from src.analytics.concentration import concentration_series
+from src.analytics.production_analyzer import ProductionAnalyzer
+from src.analytics.production_updates import notify_volumes_appended, volume_rows
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.country import Country
+from src.models.production_data import ProductionData
+
+
+def test_series_match_per_commodity_year_sort():
+    rng = np.random.default_rng(3)
+    volumes = rng.lognormal(5, 2, (4, 12, 6))
+    volumes[rng.random(volumes.shape) < 0.4] = np.nan
+    volumes[1, :, 2] = np.nan  # a year without production
+    volumes[2, 5:, :] = np.nan  # fewer producers than CR10
+
+    metrics = concentration_series(volumes)
+    for c in range(volumes.shape[0]):
+        for y in range(volumes.shape[2]):
+            reported = pd.Series(volumes[c, :, y]).dropna()
+            assert metrics['producers'][c, y] == len(reported)
+            if reported.sum() <= 0:
+                assert np.isnan(metrics['hhi'][c, y]) and np.isnan(metrics['cr3'][c, y])
+                continue
+            shares = (reported / reported.sum()).sort_values(ascending=False)
+            assert np.isclose(metrics['hhi'][c, y], (shares ** 2).sum() * 10000)
+            for n in (3, 5, 10):
+                assert np.isclose(metrics[f'cr{n}'][c, y], shares.head(n).sum() * 100)
+            assert np.isclose(metrics['top_share'][c, y], shares.iloc[0] * 100)
+            assert metrics['top_country'][c, y] == shares.index[0]
+
+
+def test_analyzer_concentration_uses_latest_year():
+    data = pd.DataFrame({
+        'year': [2019, 2019, 2020, 2020, 2020],
+        'production_volume': [10.0, 10.0, 60.0, 30.0, 10.0],
+        'country': ['A', 'B', 'A', 'B', 'C']
+    })
+    result = ProductionAnalyzer().analyze_concentration(data)
+    assert np.isclose(result['hhi'], 3600 + 900 + 100)
+    assert result['concentration_level'] == 'High'
+    assert set(result['concentration_ratios']) == {'cr3', 'cr5', 'cr10'}
+    assert np.allclose(list(result['concentration_ratios'].values()), 100)
+    assert np.isclose(result['top_producer_share'], 60)
+    assert result['number_of_producers'] == 3
+
+
+def test_concentration_endpoint_and_ingest(app):
+    copper = Commodity(name='Copper', symbol='CU')
+    chile = Country(name='Chile', iso_code='CHL')
+    peru = Country(name='Peru', iso_code='PER')
+    db.session.add_all([copper, chile, peru])
+    db.session.flush()
+    for year in range(2015, 2020):
+        db.session.add(ProductionData(commodity_id=copper.id, country_id=chile.id, year=year,
+                                      production_volume=100 - 10 * (year - 2015)))
+        db.session.add(ProductionData(commodity_id=copper.id, country_id=peru.id, year=year,
+                                      production_volume=10 * (year - 2015)))
+    db.session.commit()
+
+    import src.routes.analytics as analytics_routes
+
+    app.register_blueprint(analytics_routes.analytics_bp, url_prefix='/api')
+    analytics_routes.analytics_service = AnalyticsService(app)
+    client = app.test_client()
+
+    body = client.get(f'/api/analytics/concentration?commodity_id={copper.id}&from=2016&to=2018').get_json()
+    assert [r['year'] for r in body['records']] == [2016, 2017, 2018]
+    first = body['records'][0]
+    assert np.isclose(first['hhi'], (90 ** 2 + 10 ** 2) / 100 ** 2 * 10000)
+    assert first['top_producer'] == 'Chile' and np.isclose(first['top_producer_share'], 90)
+    assert first['number_of_producers'] == 2
+
+    # 2015 is a monopoly
+    assert client.get('/api/analytics/concentration?to=2015').get_json()['records'][0]['hhi'] == 10000
+
+    # Newly ingested production is reflected without a full rebuild
+    record = ProductionData(commodity_id=copper.id, country_id=peru.id, year=2020, production_volume=80)
+    db.session.add(record)
+    db.session.flush()
+    rows = volume_rows([record], 'production_volume')
+    db.session.commit()
+    notify_volumes_appended(production=rows)
+
+    latest = client.get('/api/analytics/concentration?from=2020').get_json()['records']
+    assert len(latest) == 1 and latest[0]['top_producer'] == 'Peru' and latest[0]['hhi'] == 10000
+
+    assert client.get('/api/analytics/concentration?commodity_id=999').status_code == 404
+    assert client.get('/api/analytics/concentration?from=2020&to=2010').status_code == 400
+    analytics_routes.analytics_service = None
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analytics.analytics_service import AnalyticsService
+from src.analytics.correlation_analyzer import CorrelationAnalyzer
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.price_data import PriceData
+
+
+def _panel():
+    rng = np.random.default_rng(7)
+    dates = pd.date_range('2010-01-31', periods=60, freq='ME')
+    common = rng.normal(0, 0.03, 60)
+    panel = pd.DataFrame({
+        'copper': 100 * np.cumprod(1 + common + rng.normal(0, 0.01, 60)),
+        'zinc': 50 * np.cumprod(1 + 0.5 * common + rng.normal(0, 0.02, 60)),
+        'wheat': 20 * np.cumprod(1 + rng.normal(0, 0.02, 60)),
+    }, index=dates)
+    panel.iloc[10:14, 2] = np.nan  # gap to exercise pairwise-complete statistics
+    return panel
+
+
+def _matrix(nested):
+    return np.array([[np.nan if v is None else v for v in row] for row in nested])
+
+
+def test_full_and_rolling_matrices_match_pandas():
+    panel = _panel()
+    analyzer = CorrelationAnalyzer()
+    result = analyzer.analyze(panel, window=12, frequency='monthly', rolling_windows=None)
+    returns = analyzer.calculate_returns(panel, 'monthly')
+
+    np.testing.assert_allclose(_matrix(result['correlation']), returns.corr().to_numpy(), rtol=1e-9)
+    np.testing.assert_allclose(_matrix(result['covariance']), returns.cov().to_numpy(), rtol=1e-9)
+
+    assert len(result['rolling']['dates']) == len(result['rolling']['matrix_dates']) == len(returns) - 11
+    for k in (0, 5, 20, len(returns) - 12):
+        window = returns.iloc[k:k + 12]
+        expected = window.corr(min_periods=12).to_numpy()
+        np.testing.assert_allclose(_matrix(result['rolling']['correlation'][k]), expected,
+                                   rtol=1e-7, atol=1e-9, equal_nan=True)
+        np.testing.assert_allclose(_matrix(result['rolling']['covariance'][k]),
+                                   window.cov(min_periods=12).to_numpy(),
+                                   rtol=1e-7, atol=1e-12, equal_nan=True)
+
+
+def test_daily_returns_keep_mondays():
+    dates = pd.bdate_range('2024-01-01', periods=30)
+    rng = np.random.default_rng(3)
+    panel = pd.DataFrame({'oil': 80 * np.exp(np.cumsum(rng.normal(0, 0.01, 30))),
+                          'gas': 3 * np.exp(np.cumsum(rng.normal(0, 0.01, 30)))}, index=dates)
+
+    returns = CorrelationAnalyzer().calculate_returns(panel, 'daily')
+    assert len(returns) == 29 and returns.notna().all().all()
+    assert (returns.index.dayofweek == 0).sum() == 5
+
+
+def test_rolling_matrices_limited_to_latest_windows():
+    panel = _panel()
+    analyzer = CorrelationAnalyzer()
+    full = analyzer.analyze(panel, window=12, rolling_windows=None)['rolling']
+    latest = analyzer.analyze(panel, window=12)['rolling']
+    last_three = analyzer.analyze(panel, window=12, rolling_windows=3)['rolling']
+
+    assert latest['dates'] == full['dates'] and latest['average_correlation'] == full['average_correlation']
+    assert latest['matrix_dates'] == full['dates'][-1:] and latest['correlation'] == full['correlation'][-1:]
+    assert last_three['covariance'] == full['covariance'][-3:]
+
+    # Only the kept windows' matrices are held while rolling
+    values = analyzer.calculate_returns(panel, 'monthly').to_numpy()
+    averages, correlations, covariances = analyzer.rolling_correlation_matrices(values, 12, 12, keep=2)
+    assert averages == full['average_correlation']
+    assert len(correlations) == len(covariances) == 2
+
+
+def test_requires_two_series_and_known_frequency():
+    panel = _panel()
+    analyzer = CorrelationAnalyzer()
+    assert 'error' in analyzer.analyze(panel[['copper']])
+    assert 'error' in analyzer.analyze(panel, frequency='hourly')
+
+
+def test_correlations_endpoint_caches_per_universe(app):
+    from src.routes.analytics import analytics_bp
+    import src.routes.analytics as analytics_routes
+
+    panel = _panel()
+    ids = []
+    for name in panel.columns:
+        commodity = Commodity(name=name.title(), symbol=name[:3].upper())
+        db.session.add(commodity)
+        db.session.flush()
+        ids.append(commodity.id)
+        for date, price in panel[name].dropna().items():
+            db.session.add(PriceData(commodity_id=commodity.id, price=float(price),
+                                     timestamp=date.to_pydatetime()))
+    db.session.commit()
+
+    app.register_blueprint(analytics_bp, url_prefix='/api')
+    analytics_routes.analytics_service = AnalyticsService(app)
+    client = app.test_client()
+
+    response = client.get(f"/api/analytics/correlations?commodity_ids={ids[0]},{ids[1]}&window=6")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [c['name'] for c in body['commodities']] == ['Copper', 'Zinc']
+    assert body['correlation'][0][1] > 0.5
+
+    service = analytics_routes.analytics_service
+    assert f"correlation_{ids[0]},{ids[1]}_6_monthly_1" in service.analysis_cache
+    assert len(body['rolling']['correlation']) == 1
+
+    assert client.get('/api/analytics/correlations?window=1').status_code == 400
+    analytics_routes.analytics_service = None
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import event
+
+from src.analytics.data_loaders import load_price_frame, load_production_frame
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.country import Country
+from src.models.price_data import PriceData
+from src.models.production_data import ProductionData
+
+
+def _seed():
+    copper = Commodity(name='Copper', symbol='CU')
+    chile = Country(name='Chile', iso_code='CHL')
+    peru = Country(name='Peru', iso_code='PER')
+    db.session.add_all([copper, chile, peru])
+    db.session.flush()
+
+    start = datetime(2020, 1, 1)
+    for i in range(10):
+        db.session.add(PriceData(commodity_id=copper.id, price=None if i == 3 else 100.5 + i,
+                                 volume=1000 + i if i % 2 else None,
+                                 timestamp=start + timedelta(days=i)))
+    for year in range(2015, 2020):
+        db.session.add(ProductionData(commodity_id=copper.id, country_id=chile.id,
+                                      year=year, production_volume=5000 + year))
+        db.session.add(ProductionData(commodity_id=copper.id, country_id=peru.id,
+                                      year=year, production_volume=2000 + year))
+    db.session.commit()
+    return copper.id
+
+
+def _count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return statements, lambda: event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def test_price_frame_is_typed_and_loaded_in_one_query(app):
+    commodity_id = _seed()
+    db.session.expunge_all()
+
+    statements, stop = _count_statements()
+    df = load_price_frame(commodity_id)
+    stop()
+
+    assert len(statements) == 1
+    assert list(df.columns) == ['date', 'price', 'currency', 'volume', 'commodity_id']
+    assert len(df) == 9
+    assert df['price'].dtype == np.float64
+    assert df['volume'].dtype == np.float64
+    assert pd.api.types.is_datetime64_any_dtype(df['date'])
+    assert df['date'].is_monotonic_increasing
+    assert df['price'].iloc[0] == 100.5
+    assert np.isnan(df['volume'].iloc[0])
+
+
+def test_production_frame_joins_country_names(app):
+    commodity_id = _seed()
+    db.session.expunge_all()
+
+    statements, stop = _count_statements()
+    df = load_production_frame(commodity_id)
+    stop()
+
+    assert len(statements) == 1
+    assert isinstance(df['country'].dtype, pd.CategoricalDtype)
+    assert df['production_volume'].dtype == np.float64
+    assert set(df['country']) == {'Chile', 'Peru'}
+    assert df['year'].is_monotonic_increasing
+    assert df.loc[df['country'] == 'Chile', 'production_volume'].sum() == sum(5000 + y for y in range(2015, 2020))
+
+
+def test_empty_result_returns_empty_frame(app):
+    assert load_price_frame(12345).empty
+    assert load_production_frame(12345).empty
@@ -0,0 +1,99 @@
+import numpy as np
+
+from src.analytics.analytics_service import AnalyticsService
+from src.analytics.depletion import depletion_horizons, depletion_years, TREND_YEARS
+from src.analytics.production_updates import notify_volumes_appended, volume_rows
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.country import Country
+from src.models.production_data import ProductionData
+from src.models.reserves_data import ReservesData
+
+
+def test_horizons_match_per_series_fit():
+    rng = np.random.default_rng(11)
+    production = rng.lognormal(3, 0.3, (3, 6, 15)) * np.exp(0.03 * np.arange(15))
+    production[rng.random(production.shape) < 0.2] = np.nan
+    reserves = rng.lognormal(7, 1, production.shape)
+    reserves[rng.random(reserves.shape) < 0.5] = np.nan
+    reserves[2, 4] = np.nan  # no reserves reported
+
+    metrics = depletion_horizons(production, reserves)
+    for c in range(3):
+        for k in range(6):
+            paired = np.flatnonzero((production[c, k] > 0) & ~np.isnan(reserves[c, k]))
+            if len(paired) == 0:
+                assert metrics['year'][c, k] == -1 and np.isnan(metrics['rp_ratio'][c, k])
+                continue
+            year = paired[-1]
+            assert metrics['year'][c, k] == year
+            rp = reserves[c, k, year] / production[c, k, year]
+            assert np.isclose(metrics['rp_ratio'][c, k], rp)
+
+            window = np.arange(max(0, year - TREND_YEARS + 1), year + 1)
+            window = window[~np.isnan(production[c, k, window])]
+            if len(window) >= 3:
+                growth = np.polyfit(window, np.log(production[c, k, window]), 1)[0]
+                assert np.isclose(metrics['growth'][c, k], growth)
+                with np.errstate(invalid='ignore'):
+                    expected = np.log(1 + growth * rp) / growth
+                assert np.isclose(metrics['depletion_years'][c, k], expected, equal_nan=True)
+            else:
+                assert np.isnan(metrics['growth'][c, k])
+                assert np.isclose(metrics['depletion_years'][c, k], rp)
+
+    world_year = metrics['world_year'][0]
+    assert np.isclose(metrics['world_production'][0], np.nansum(production[0, :, world_year]))
+
+    # Constant production lasts R/P years; a steep decline never exhausts reserves
+    assert np.allclose(depletion_years(np.array([40.0, 40.0]), np.array([np.nan, -0.05])), [40, np.nan],
+                       equal_nan=True)
+
+
+def test_depletion_endpoints_follow_ingest(app):
+    lithium = Commodity(name='Lithium', symbol='LI')
+    chile = Country(name='Chile', iso_code='CHL')
+    australia = Country(name='Australia', iso_code='AUS')
+    db.session.add_all([lithium, chile, australia])
+    db.session.flush()
+    for year in range(2018, 2023):
+        db.session.add(ProductionData(commodity_id=lithium.id, country_id=chile.id, year=year, production_volume=100))
+        db.session.add(ProductionData(commodity_id=lithium.id, country_id=australia.id, year=year,
+                                      production_volume=50 * 1.1 ** (year - 2018)))
+    db.session.add(ReservesData(commodity_id=lithium.id, country_id=chile.id, year=2022, reserves_volume=5000))
+    db.session.add(ReservesData(commodity_id=lithium.id, country_id=australia.id, year=2021, reserves_volume=1000))
+    db.session.commit()
+
+    import src.routes.analytics as analytics_routes
+
+    app.register_blueprint(analytics_routes.analytics_bp, url_prefix='/api')
+    analytics_routes.analytics_service = AnalyticsService(app)
+    client = app.test_client()
+
+    body = client.get(f'/api/analytics/depletion/commodity/{lithium.id}').get_json()
+    assert [c['country'] for c in body['countries']] == ['Australia', 'Chile']
+    chile_row = body['countries'][1]
+    assert chile_row['year'] == 2022 and np.isclose(chile_row['rp_ratio'], 50)
+    assert np.isclose(chile_row['production_growth'], 0) and np.isclose(chile_row['depletion_years'], 50)
+    australia_row = body['countries'][0]
+    assert australia_row['year'] == 2021 and np.isclose(australia_row['production_growth'], np.log(1.1))
+    assert australia_row['depletion_years'] < australia_row['rp_ratio']
+    assert body['world']['year'] == 2022 and np.isclose(body['world']['reserves'], 5000)
+
+    # Reserves reported for a later year move the reference year
+    record = ReservesData(commodity_id=lithium.id, country_id=australia.id, year=2022, reserves_volume=2000)
+    db.session.add(record)
+    db.session.flush()
+    rows = volume_rows([record], 'reserves_volume')
+    db.session.commit()
+    notify_volumes_appended(reserves=rows)
+
+    commodities = client.get(f'/api/analytics/depletion/country/{australia.id}').get_json()['commodities']
+    assert len(commodities) == 1 and commodities[0]['year'] == 2022
+    assert commodities[0]['commodity'] == 'Lithium'
+    world = client.get(f'/api/analytics/depletion/commodity/{lithium.id}').get_json()['world']
+    assert np.isclose(world['reserves'], 7000)
+
+    assert client.get('/api/analytics/depletion/commodity/999').status_code == 404
+    assert client.get('/api/analytics/depletion/country/999').status_code == 404
+    analytics_routes.analytics_service = None
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analytics import kernels
+from src.analytics.price_analyzer import PriceAnalyzer
+
+
+def _prices(n, seed):
+    rng = np.random.default_rng(seed)
+    # Rounding creates ties, which the extrema definition is sensitive to
+    return np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), 1)
+
+
+def _pandas_streaks(returns, positive):
+    """Previous groupby implementation of find_consecutive_movements"""
+    condition = returns > 0 if positive else returns < 0
+    groups = (condition != condition.shift()).cumsum()
+    return returns[condition].groupby(groups[condition]).size().to_numpy()
+
+
+def _pandas_extrema(prices, window):
+    """Previous shift-based implementation of find_support_resistance_levels"""
+    rolling_min = prices.rolling(window=window).min()
+    rolling_max = prices.rolling(window=window).max()
+    minima = (prices == rolling_min) & (prices.shift(1) > prices) & (prices.shift(-1) > prices)
+    maxima = (prices == rolling_max) & (prices.shift(1) < prices) & (prices.shift(-1) < prices)
+    return minima.to_numpy(), maxima.to_numpy()
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_run_lengths_match_groupby_streaks(seed):
+    returns = pd.Series(_prices(3000, seed)).pct_change()
+    for positive in [True, False]:
+        condition = (returns > 0 if positive else returns < 0).to_numpy()
+        expected = _pandas_streaks(returns, positive)
+        np.testing.assert_array_equal(kernels.run_lengths(condition), expected)
+        np.testing.assert_array_equal(kernels._run_lengths_loop(condition), expected)
+
+    assert len(kernels.run_lengths(np.zeros(5, dtype=bool))) == 0
+    np.testing.assert_array_equal(kernels.run_lengths(np.ones(4, dtype=bool)), [4])
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_max_drawdown_matches_expanding_max(seed):
+    cumulative = pd.Series(_prices(3000, seed) / 100)
+    running_max = cumulative.expanding().max()
+    drawdown = (cumulative - running_max) / running_max
+    trough = int(drawdown.idxmin())
+
+    for result in [kernels.max_drawdown(cumulative.to_numpy()),
+                   kernels._max_drawdown_loop(cumulative.to_numpy())]:
+        worst, peak, found_trough = result
+        assert worst == pytest.approx(drawdown.min(), rel=1e-12)
+        assert found_trough == trough
+        assert cumulative[peak] == running_max[trough]
+        assert peak <= trough
+
+    assert kernels.max_drawdown(np.arange(1.0, 5.0)) == (0.0, 0, 0)
+    assert np.isnan(kernels.max_drawdown(np.array([]))[0])
+
+
+@pytest.mark.parametrize('window', [1, 2, 20])
+def test_local_extrema_match_shifted_comparisons(window):
+    values = _prices(2000, window)
+    values[100:105] = np.nan
+    expected_min, expected_max = _pandas_extrema(pd.Series(values), window)
+
+    for minima, maxima in [kernels.local_extrema(values, window),
+                           kernels._local_extrema_loop(values, window)]:
+        np.testing.assert_array_equal(minima, expected_min)
+        np.testing.assert_array_equal(maxima, expected_max)
+
+    short_min, short_max = kernels.local_extrema(values[:2], window)
+    assert not short_min.any() and not short_max.any()
+
+
+def test_price_analyzer_reports_drawdown_dates():
+    dates = pd.Series(pd.date_range('2020-01-01', periods=6, freq='D'))
+    data = pd.DataFrame({'date': dates, 'price': [10.0, 12.0, 9.0, 6.0, 8.0, 13.0]})
+    risk = PriceAnalyzer().analyze(data, sections={'risk_metrics'})['risk_metrics']
+
+    assert risk['max_drawdown'] == pytest.approx(6.0 / 12.0 - 1)
+    assert risk['max_drawdown_period'] == {'peak': dates[1].isoformat(), 'trough': dates[3].isoformat()}
@@ -0,0 +1,54 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.ml_predictor import MLPredictor
+from src.analytics.model_registry import ModelRegistry
+
+
+def _series(seed, n=120):
+    rng = np.random.default_rng(seed)
+    drift = [0.003, -0.002, 0.0][seed % 3]
+    return pd.DataFrame({
+        'date': pd.date_range('2023-01-01', periods=n, freq='D'),
+        'price': 50 * (seed + 1) * np.exp(np.cumsum(rng.normal(drift, 0.015, n)))
+    })
+
+
+def _comparable(result):
+    return {
+        'best_model': result['best_model'],
+        'model_performance': result['model_performance'],
+        'feature_importance': result['feature_importance'],
+        'predictions': result['predictions']['predictions']
+    }
+
+
+def test_concurrent_analyses_match_sequential_results(tmp_path):
+    datasets = {commodity_id: _series(commodity_id) for commodity_id in range(3)}
+    sequential = {commodity_id: _comparable(MLPredictor().analyze(data))
+                  for commodity_id, data in datasets.items()}
+
+    # One shared predictor, as held by AnalyticsService, serving every
+    # commodity twice at once; the twins also race to store the same model
+    predictor = MLPredictor()
+    registry = ModelRegistry(str(tmp_path))
+    jobs = [commodity_id for commodity_id in datasets for _ in range(2)]
+
+    def run(commodity_id):
+        return commodity_id, predictor.analyze(datasets[commodity_id], registry=registry,
+                                               commodity_id=commodity_id, fingerprint='v1')
+
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        results = list(pool.map(run, jobs))
+
+    for commodity_id, result in results:
+        assert 'error' not in result
+        assert _comparable(result) == sequential[commodity_id]
+
+    # Every stored model is intact and predicts like the sequential run
+    for commodity_id, data in datasets.items():
+        reused = MLPredictor().analyze(data, registry=registry, commodity_id=commodity_id, fingerprint='v1')
+        assert reused['training']['reused_stored_model'] is True
+        assert _comparable(reused) == sequential[commodity_id]
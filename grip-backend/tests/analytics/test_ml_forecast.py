@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from src.analytics.ml_predictor import MLPredictor
+
+
+def _trend(n=200, growth=0.01):
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=n, freq='D'),
+        'price': 100 * np.exp(growth * np.arange(n))
+    })
+
+
+def test_direct_forecast_follows_the_trend_at_every_horizon():
+    data = _trend()
+    result = MLPredictor().analyze(data)
+
+    # 111 feature rows leave at least 20 training rows up to 90 steps ahead
+    assert result['predictions']['max_horizon'] == 90
+    predictions = np.array(result['predictions']['predictions'])
+    assert len(predictions) == 90
+
+    # Every step, including those interpolated between trained horizons,
+    # continues the constant growth from the last price
+    expected = data['price'].iloc[-1] * np.exp(0.01 * np.arange(1, 91))
+    np.testing.assert_allclose(predictions, expected, rtol=1e-6)
+
+
+def test_forecaster_horizons_and_limits():
+    predictor = MLPredictor()
+    X, y = predictor.prepare_features(_trend(150), 'price')
+    forecaster = predictor.train_forecaster('gradient_boosting', X, y)
+    assert forecaster['horizons'] == [h for h in MLPredictor.FORECAST_HORIZONS if h <= len(X) - 20]
+    assert forecaster['transform'] == 'log_return'
+
+    # One model per horizon
+    assert len(forecaster['model'].estimators_) == len(forecaster['horizons'])
+
+    # Too few rows for any horizon
+    assert predictor.train_forecaster('linear', X.iloc[:20], y.iloc[:20]) is None
+
+    predictions = predictor.generate_predictions(_trend(150), forecaster, 'price', periods_ahead=7)
+    limited = MLPredictor.limit_predictions(predictions, 3)
+    assert len(predictions['predictions']) == 7 and len(limited['prediction_dates']) == 3
+    assert limited['predictions'] == predictions['predictions'][:3]
+
+
+def test_short_horizons_train_on_the_most_recent_rows():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=500, freq='D'),
+        'price': 100 * np.exp(np.cumsum(rng.normal(0.001, 0.01, 500)))
+    })
+    predictor = MLPredictor()
+    X, y = predictor.prepare_features(data, 'price')
+    forecaster = predictor.train_forecaster('linear', X, y)
+    assert forecaster['horizons'][-1] == 365
+
+    # Every horizon, the shortest included, is fitted up to the latest
+    # target, so a jump in the last ten prices changes each forecast
+    jumped = y.copy()
+    jumped.iloc[-10:] *= 1.2
+    retrained = predictor.train_forecaster('linear', X, jumped)
+
+    before = forecaster['model'].predict(X.iloc[-1:])[0]
+    after = retrained['model'].predict(X.iloc[-1:])[0]
+    assert not np.isclose(before, after).any()
+
+
+def test_horizons_count_observations_across_dropped_rows():
+    data = _trend(200)
+    data['volume'] = 1000.0
+    data.loc[[120, 121, 150], 'volume'] = np.nan  # gaps drop interior feature rows
+    predictor = MLPredictor()
+    X, y = predictor.prepare_features(data, 'price')
+    assert len(X) < len(data) - 91
+
+    # Every target h observations ahead is the same constant-growth return
+    forecaster = predictor.train_forecaster('linear', X, y, history=data['price'])
+    changes = forecaster['model'].predict(X)
+    for column, h in enumerate(forecaster['horizons']):
+        np.testing.assert_allclose(changes[:, column], 0.01 * h, rtol=1e-6)
@@ -0,0 +1,146 @@
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import src.routes.analytics as analytics_routes
+from src.analytics.analytics_service import AnalyticsService
+from src.analytics.ml_jobs import MLJobQueue, COMPLETED, COMPLETED_WITH_ERRORS
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.price_data import PriceData
+
+
+def _add_prices(commodity_id, n=120, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0.001, 0.01, n)))
+    start = datetime(2024, 1, 1)
+    for i, price in enumerate(prices):
+        db.session.add(PriceData(commodity_id=commodity_id, price=float(price), timestamp=start + timedelta(days=i)))
+    db.session.commit()
+
+
+def test_job_queue_tracks_progress_and_failures():
+    queue = MLJobQueue(max_workers=2)
+
+    def train(commodity_id):
+        if commodity_id == 3:
+            raise ValueError('Insufficient data')
+        return {'best_model': 'linear'}
+
+    job = queue.submit([1, 2, 3, 2], train)
+    assert job['commodity_ids'] == [1, 2, 3] and job['progress']['total'] == 3
+
+    finished = queue.wait(job['id'], timeout=10)
+    assert finished['status'] == COMPLETED_WITH_ERRORS
+    assert finished['progress'] == {'completed': 2, 'failed': 1, 'total': 3, 'percent': 100.0}
+    assert finished['results']['1']['best_model'] == 'linear'
+    assert finished['results']['3'] == {**finished['results']['3'], 'status': 'failed', 'error': 'Insufficient data'}
+    assert finished['duration_seconds'] >= 0 and finished['results']['2']['duration_seconds'] >= 0
+    assert queue.active_job(1) is None and queue.get('missing') is None
+
+
+def test_predictions_are_served_from_the_last_trained_model(app):
+    copper = Commodity(name='Copper', symbol='CU')
+    nickel = Commodity(name='Nickel', symbol='NI')
+    db.session.add_all([copper, nickel])
+    db.session.flush()
+    _add_prices(copper.id)
+    _add_prices(nickel.id, seed=1)
+
+    app.register_blueprint(analytics_routes.analytics_bp, url_prefix='/api')
+    service = analytics_routes.analytics_service = AnalyticsService(app)
+    client = app.test_client()
+
+    # Nothing trained yet: analyses and predictions queue training instead of blocking
+    analysis = client.get(f'/api/analytics/commodity/{nickel.id}').get_json()
+    assert analysis['analyses']['ml']['status'] == 'training'
+    assert 'price' in analysis['analyses']
+    service.ml_jobs.wait(analysis['analyses']['ml']['training_job']['id'], timeout=60)
+    assert client.get(f'/api/analytics/commodity/{nickel.id}').get_json()['analyses']['ml']['stale'] is False
+
+    response = client.get(f'/api/analytics/predict/{copper.id}')
+    assert response.status_code == 202
+    pending = response.get_json()
+    assert pending['status'] == 'training'
+    service.ml_jobs.wait(pending['training_job']['id'], timeout=60)
+
+    response = client.get(f'/api/analytics/predict/{copper.id}?periods=5')
+    assert response.status_code == 200
+    fresh = response.get_json()
+    assert fresh['stale'] is False and fresh['training_job'] is None
+    assert len(fresh['predictions']['predictions']) == 5
+
+    # Training several commodities through the jobs endpoint
+    response = client.post('/api/analytics/ml/jobs', json={'commodity_ids': [copper.id, nickel.id]})
+    assert response.status_code == 202
+    job_id = response.get_json()['id']
+    service.ml_jobs.wait(job_id, timeout=60)
+    job = client.get(f'/api/analytics/ml/jobs/{job_id}').get_json()
+    assert job['status'] == COMPLETED and job['progress']['percent'] == 100.0
+    assert job['results'][str(nickel.id)]['best_model'] in service.analyzers['ml'].MODEL_NAMES
+    assert job['results'][str(nickel.id)]['training_seconds'] > 0
+
+    # New prices: the previous model's output is served at once, flagged stale
+    db.session.add(PriceData(commodity_id=copper.id, price=150.0, timestamp=datetime(2024, 6, 1)))
+    db.session.commit()
+    stale = client.get(f'/api/analytics/predict/{copper.id}?periods=5').get_json()
+    assert stale['stale'] is True
+    assert stale['predictions'] == fresh['predictions']
+    service.ml_jobs.wait(stale['training_job']['id'], timeout=60)
+    assert client.get(f'/api/analytics/commodity/{copper.id}/ml').get_json()['stale'] is False
+
+    assert client.get('/api/analytics/ml/jobs/unknown').status_code == 404
+    assert client.post('/api/analytics/ml/jobs', json={'commodity_ids': 'x'}).status_code == 400
+    assert client.post('/api/analytics/ml/jobs', json={'commodity_id': 999}).status_code == 404
+    assert client.get('/api/analytics/predict/999').status_code == 404
+    assert client.get(f'/api/analytics/predict/{copper.id}?periods=0').status_code == 400
+    analytics_routes.analytics_service = None
+
+
+def test_concurrent_requests_queue_one_job_per_commodity():
+    queue = MLJobQueue(max_workers=2)
+    release = threading.Event()
+    barrier = threading.Barrier(4)
+    jobs = []
+
+    def train(commodity_id):
+        release.wait(10)
+        return {'best_model': 'linear'}
+
+    def request():
+        barrier.wait()
+        jobs.append(queue.submit_unless_active(5, train)['id'])
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    release.set()
+
+    assert len(set(jobs)) == 1
+    assert queue.wait(jobs[0], timeout=10)['status'] == COMPLETED
+    assert queue.submit_unless_active(5, train)['id'] != jobs[0]
+
+
+def test_commodity_without_prices_reports_an_error_without_retraining(app):
+    tin = Commodity(name='Tin', symbol='SN')
+    db.session.add(tin)
+    db.session.commit()
+
+    app.register_blueprint(analytics_routes.analytics_bp, url_prefix='/api')
+    service = analytics_routes.analytics_service = AnalyticsService(app)
+    client = app.test_client()
+
+    pending = client.get(f'/api/analytics/predict/{tin.id}').get_json()
+    assert pending['status'] == 'training'
+    assert service.ml_jobs.wait(pending['training_job']['id'], timeout=60)['status'] == 'failed'
+
+    # The failure is recorded for the current data: reported, not queued again
+    response = client.get(f'/api/analytics/predict/{tin.id}')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'No data available for ml analysis'
+    assert client.get(f'/api/analytics/commodity/{tin.id}/ml').status_code == 400
+    assert service.ml_jobs.get_stats()['failed'] == 1
+    analytics_routes.analytics_service = None
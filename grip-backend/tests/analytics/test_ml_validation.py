@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from src.analytics.ml_predictor import MLPredictor
+
+
+def _prices(n=150, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=n, freq='D'),
+        'price': 100 * np.exp(np.cumsum(rng.normal(0.001, 0.01, n)))
+    })
+
+
+def test_folds_train_only_on_earlier_rows_with_gap():
+    predictor = MLPredictor(n_splits=4, gap=3)
+    folds = predictor.walk_forward_splits(100)
+    assert len(folds) == 4
+
+    previous_train = 0
+    for train, test in folds:
+        # Expanding window that ends `gap` rows before its test window
+        assert train[0] == 0 and len(train) > previous_train
+        assert train[-1] + 3 + 1 == test[0]
+        previous_train = len(train)
+
+    # Fewer folds when the rows cannot fill every window, none below two
+    assert len(MLPredictor(n_splits=5).walk_forward_splits(10)) == 4
+    assert MLPredictor(n_splits=5, gap=2).walk_forward_splits(5) == []
+
+
+def test_validation_is_chronological_and_parallel_folds_match_serial():
+    data = _prices()
+    serial = MLPredictor(gap=2, n_jobs=1).analyze(data)
+    parallel = MLPredictor(gap=2, n_jobs=2).analyze(data)
+
+    assert serial['model_performance'] == parallel['model_performance']
+    assert serial['best_model'] == parallel['best_model']
+    assert np.allclose(serial['predictions']['predictions'], parallel['predictions']['predictions'])
+
+    validation = serial['validation']
+    X, _ = MLPredictor().prepare_features(data, 'price')
+    holdout = validation['holdout']
+    assert validation['method'] == 'walk_forward' and validation['gap'] == 2
+    assert holdout['train_size'] + 2 + holdout['test_size'] == len(X)
+    assert holdout['test_size'] == round(len(X) * MLPredictor.HOLDOUT_FRACTION)
+
+    # Every fold runs inside the training rows, and is timed per model
+    for fold in validation['folds']:
+        assert fold['test_start'] + fold['test_size'] <= holdout['train_size']
+    for model_name in MLPredictor.MODEL_NAMES:
+        timings = validation['timings'][model_name]
+        assert timings['holdout']['fit_seconds'] > 0
+        assert [f['fold'] for f in timings['folds']] == list(range(len(validation['folds'])))
+        assert serial['model_performance'][model_name]['cv_mean'] is not None
+    assert validation['wall_seconds'] > 0 and validation['refit_seconds'] > 0
+
+
+def test_gap_larger_than_the_data_allows_is_reported():
+    result = MLPredictor(gap=40).analyze(_prices(60))
+    assert result == {'error': 'Insufficient data for walk-forward validation'}
+
+
+def test_features_never_contain_the_target_row():
+    data = _prices()
+    data['volume'] = np.arange(len(data), dtype=np.float64)
+    data['commodity_id'] = 7
+    X, y = MLPredictor().prepare_features(data, 'price')
+
+    # Changing the price and volume of one row leaves that row's features unchanged
+    t = X.index[len(X) // 2]
+    changed = data.copy()
+    changed.loc[t, ['price', 'volume']] *= 1.5
+    X_changed, y_changed = MLPredictor().prepare_features(changed, 'price')
+    pd.testing.assert_series_equal(X.loc[t], X_changed.loc[t])
+    assert y_changed[t] != y[t]
+    assert 'commodity_id' not in X.columns
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.analytics_service import AnalyticsService
+from src.analytics.ml_predictor import MLPredictor
+from src.analytics.model_registry import ModelRegistry
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.price_data import PriceData
+
+
+def _prices(n=150, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=n, freq='D'),
+        'price': 100 * np.exp(np.cumsum(rng.normal(0.001, 0.01, n)))
+    })
+
+
+def _fail_training(X, y):
+    raise AssertionError('model was retrained')
+
+
+def test_stored_model_is_reused_until_the_data_changes(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    data = _prices()
+
+    first = MLPredictor().analyze(data, registry=registry, commodity_id=7, fingerprint='150:150:a')
+    assert first['training']['reused_stored_model'] is False
+
+    # A fresh predictor (as after a restart) loads the stored model instead of training
+    predictor = MLPredictor()
+    predictor.train = _fail_training
+    second = predictor.analyze(data, registry=registry, commodity_id=7, fingerprint='150:150:a')
+    assert second['training']['reused_stored_model'] is True
+    assert second['best_model'] == first['best_model']
+    assert second['training']['trained_at'] == first['training']['trained_at']
+    assert np.allclose(second['predictions']['predictions'], first['predictions']['predictions'])
+
+    # New data retrains and replaces the stored model
+    third = MLPredictor().analyze(_prices(151), registry=registry, commodity_id=7, fingerprint='151:151:b')
+    assert third['training']['reused_stored_model'] is False
+    entries = registry.list(7)
+    assert len(entries) == 1 and entries[0]['fingerprint'] == '151:151:b'
+    assert entries[0]['training_seconds'] > 0 and set(entries[0]['model_performance']) == set(MLPredictor.MODEL_NAMES)
+    assert registry.list(8) == []
+
+
+def test_service_reuses_models_across_instances(app, tmp_path):
+    app.config['MODEL_REGISTRY_DIR'] = str(tmp_path / 'models')
+    copper = Commodity(name='Copper', symbol='CU')
+    db.session.add(copper)
+    db.session.flush()
+    start = datetime(2024, 1, 1)
+    for i, price in enumerate(_prices()['price']):
+        db.session.add(PriceData(commodity_id=copper.id, price=float(price), timestamp=start + timedelta(days=i)))
+    db.session.commit()
+
+    trainer = AnalyticsService(app)
+    job = trainer.submit_ml_training([copper.id])
+    first = trainer.ml_jobs.wait(job['id'], timeout=60)['results'][str(copper.id)]
+    assert first['reused_stored_model'] is False
+
+    # Another instance serves the stored model for the same data without a training job
+    second = AnalyticsService(app).analyze_commodity(copper.id, ['ml'])['analyses']['ml']
+    assert second['training']['reused_stored_model'] is True
+    assert second['stale'] is False and second['training_job'] is None
+
+    import src.routes.analytics as analytics_routes
+
+    app.register_blueprint(analytics_routes.analytics_bp, url_prefix='/api')
+    analytics_routes.analytics_service = AnalyticsService(app)
+    body = app.test_client().get(f'/api/analytics/ml/models?commodity_id={copper.id}').get_json()
+    assert body['enabled'] and body['model_count'] == 1
+    assert body['models'][0]['target'] == 'price' and body['models'][0]['model_name'] == first['best_model']
+    analytics_routes.analytics_service = None
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analytics.analytics_service import AnalyticsService
+from src.analytics.monte_carlo import MonteCarloSimulator
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.price_data import PriceData
+
+
+def _history(n=1000, drift=0.0005, volatility=0.02, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(drift, volatility, n)))
+
+
+@pytest.mark.parametrize('method', ['gbm', 'bootstrap'])
+def test_fan_chart_matches_full_paths_and_ignores_chunk_size(method):
+    simulator = MonteCarloSimulator()
+    log_returns = simulator.calculate_log_returns(_history())
+
+    paths = simulator.simulate_paths(100.0, log_returns, horizon=50, paths=2001, method=method, seed=7)
+    assert paths.shape == (2001, 50)
+
+    simulator.MAX_CHUNK_ELEMENTS = 2001 * 7  # 7 steps per chunk
+    fan = simulator.fan_chart(100.0, log_returns, horizon=50, paths=2001, method=method, seed=7,
+                              quantiles=[0.05, 0.5, 0.95])
+    for q, band in fan['quantiles'].items():
+        np.testing.assert_allclose(band, np.quantile(paths, q, axis=0), rtol=1e-6)
+    assert fan['terminal']['mean'] == pytest.approx(paths[:, -1].mean(), rel=1e-6)
+
+    repeat = simulator.simulate_paths(100.0, log_returns, horizon=50, paths=2001, method=method, seed=7)
+    np.testing.assert_array_equal(paths, repeat)
+
+
+def test_gbm_matches_analytic_lognormal_quantiles():
+    simulator = MonteCarloSimulator()
+    log_returns = simulator.calculate_log_returns(_history(volatility=0.01, seed=1))
+    mu, sigma = log_returns.mean(), log_returns.std(ddof=1)
+
+    fan = simulator.fan_chart(50.0, log_returns, horizon=100, paths=50000, method='gbm', seed=3,
+                              quantiles=[0.05, 0.5, 0.95])
+    for q, z in [(0.05, -1.6448536), (0.5, 0.0), (0.95, 1.6448536)]:
+        expected = 50.0 * np.exp(mu * 100 + z * sigma * np.sqrt(100))
+        assert fan['quantiles'][q][-1] == pytest.approx(expected, rel=0.01)
+
+
+def test_analyze_reports_fan_chart_with_projected_dates():
+    history = _history(n=300)
+    data = pd.DataFrame({'date': pd.date_range('2024-01-01', periods=300, freq='D'), 'price': history})
+    result = MonteCarloSimulator().analyze(data, horizon=10, paths=1000, seed=0)
+
+    assert result['current_price'] == pytest.approx(history[-1])
+    assert len(result['dates']) == 10
+    assert result['dates'][0] == (data['date'].iloc[-1] + timedelta(days=1)).isoformat()
+    assert set(result['quantiles']) == {'p5', 'p25', 'p50', 'p75', 'p95'}
+    bands = [result['quantiles'][label] for label in ['p5', 'p25', 'p50', 'p75', 'p95']]
+    assert np.all(np.diff(np.array(bands), axis=0) >= 0)
+
+    assert 'error' in MonteCarloSimulator().analyze(data, method='heston')
+    assert 'error' in MonteCarloSimulator().analyze(data.head(2))
+
+
+def test_simulate_endpoint(app):
+    commodity = Commodity(name='Copper', symbol='CU')
+    db.session.add(commodity)
+    db.session.flush()
+    start = datetime(2024, 1, 1)
+    for i, price in enumerate(_history(n=200)):
+        db.session.add(PriceData(commodity_id=commodity.id, price=float(price), timestamp=start + timedelta(days=i)))
+    db.session.commit()
+
+    import src.routes.analytics as analytics_routes
+
+    app.register_blueprint(analytics_routes.analytics_bp, url_prefix='/api')
+    analytics_routes.analytics_service = AnalyticsService(app)
+    client = app.test_client()
+
+    response = client.get(f'/api/analytics/simulate/{commodity.id}?horizon=20&paths=500&seed=1&method=bootstrap')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['commodity'] == 'Copper'
+    assert len(body['quantiles']['p50']) == 20
+
+    assert client.get(f'/api/analytics/simulate/{commodity.id}?paths=0').status_code == 400
+    assert client.get(f'/api/analytics/simulate/{commodity.id}?method=heston').status_code == 400
+    analytics_routes.analytics_service = None
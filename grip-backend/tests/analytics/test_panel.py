@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.batch_trends import left_align
+from src.analytics.correlation_analyzer import CorrelationAnalyzer
+from src.analytics.data_loaders import load_price_matrix, load_production_matrix
+from src.analytics.panel import Panel
+from src.analytics.price_analyzer import PriceAnalyzer
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.country import Country
+from src.models.price_data import PriceData
+from src.models.production_data import ProductionData
+
+
+def _panel(dtype=np.float32):
+    dates = pd.to_datetime(['2020-01-03', '2020-01-01', '2020-01-02', '2020-01-01', '2020-01-03', '2020-01-03'])
+    codes = [7, 7, 7, 3, 3, 3]
+    values = [3.0, 1.0, 2.0, 10.0, 30.0, 31.0]
+    return Panel.from_long(dates.to_numpy(), codes, values, dtype=dtype)
+
+
+def test_from_long_builds_sorted_matrix_keeping_last_duplicate():
+    panel = _panel()
+    assert panel.shape == (3, 2) and panel.dtype == np.float32
+    assert list(panel.codes) == [3, 7] and 7 in panel and 5 not in panel
+    np.testing.assert_array_equal(panel.column(3), [10.0, np.nan, 31.0])
+    np.testing.assert_array_equal(panel.column(7), [1.0, 2.0, 3.0])
+    assert panel.nbytes == panel.memory_usage()['total']
+
+
+def test_to_frame_is_a_view_of_the_matrix():
+    panel = _panel()
+    frame = panel.to_frame()
+    assert list(frame.columns) == [3, 7] and frame.index.name == 'date'
+    assert np.shares_memory(frame.to_numpy(), panel.values)
+
+
+def test_series_frame_and_left_aligned_drop_missing_observations():
+    panel = _panel(np.float64)
+    frame = panel.series_frame(3)
+    assert list(frame.columns) == ['date', 'price']
+    assert list(frame['price']) == [10.0, 31.0]
+
+    expected = left_align([panel.series(code).to_numpy() for code in panel.codes])
+    np.testing.assert_array_equal(panel.left_aligned(), expected)
+
+    subset = panel.select([7])
+    assert list(subset.codes) == [7] and subset.shape == (3, 1)
+
+
+def _seed():
+    copper = Commodity(name='Copper', symbol='CU')
+    zinc = Commodity(name='Zinc', symbol='ZN')
+    chile = Country(name='Chile', iso_code='CHL')
+    peru = Country(name='Peru', iso_code='PER')
+    db.session.add_all([copper, zinc, chile, peru])
+    db.session.flush()
+
+    rng = np.random.default_rng(0)
+    start = datetime(2020, 1, 1)
+    for commodity, offset in [(copper, 0), (zinc, 5)]:
+        prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 200)))
+        for i, price in enumerate(prices):
+            db.session.add(PriceData(commodity_id=commodity.id, price=float(price),
+                                     timestamp=start + timedelta(days=i + offset)))
+    db.session.add(PriceData(commodity_id=zinc.id, price=None, timestamp=start))
+
+    for year in range(2015, 2020):
+        db.session.add(ProductionData(commodity_id=copper.id, country_id=chile.id,
+                                      year=year, production_volume=5000 + year))
+        db.session.add(ProductionData(commodity_id=copper.id, country_id=peru.id,
+                                      year=year, production_volume=2000 + year))
+    db.session.add(ProductionData(commodity_id=copper.id, country_id=peru.id,
+                                  year=2019, production_volume=100))
+    db.session.commit()
+    return copper.id, zinc.id
+
+
+def test_load_price_matrix_matches_pivot(app):
+    copper_id, zinc_id = _seed()
+    panel = load_price_matrix([copper_id, zinc_id], dtype=np.float64)
+
+    rows = PriceData.query.filter(PriceData.price.isnot(None)).all()
+    expected = (pd.DataFrame({'date': [r.timestamp for r in rows], 'price': [float(r.price) for r in rows],
+                              'commodity_id': [r.commodity_id for r in rows]})
+                .pivot(index='date', columns='commodity_id', values='price'))
+    pd.testing.assert_frame_equal(panel.to_frame(), expected, check_names=False, check_index_type=False)
+
+    assert len(load_price_matrix([999])) == 0
+
+
+def test_load_production_matrix_sums_by_country(app):
+    copper_id, _ = _seed()
+    panel = load_production_matrix([copper_id])
+
+    assert panel.labels == [(copper_id, 'Chile'), (copper_id, 'Peru')]
+    assert list(panel.index) == list(range(2015, 2020)) and panel.index.name == 'year'
+    peru = panel.column(panel.codes[panel.labels.index((copper_id, 'Peru'))])
+    np.testing.assert_allclose(peru, [2000 + year for year in range(2015, 2020)] + np.array([0, 0, 0, 0, 100]))
+
+
+def test_analyzers_accept_panels(app):
+    copper_id, zinc_id = _seed()
+    panel32 = load_price_matrix([copper_id, zinc_id])
+    panel64 = load_price_matrix([copper_id, zinc_id], dtype=np.float64)
+
+    correlations32 = CorrelationAnalyzer().analyze_panel(panel32, window=30)
+    correlations64 = CorrelationAnalyzer().analyze(panel64.to_frame(), window=30)
+    assert 'error' not in correlations32
+    np.testing.assert_allclose(correlations32['correlation'], correlations64['correlation'],
+                               atol=1e-4)
+
+    # The default analyze_panel runs the single-series analysis for every series
+    results = PriceAnalyzer().analyze_panel(panel64)
+    assert set(results) == {copper_id, zinc_id}
+    expected = PriceAnalyzer().analyze(panel64.series_frame(zinc_id))
+    assert results[zinc_id]['statistics'] == expected['statistics']
+    assert results[zinc_id]['data_points'] == 200
@@ -0,0 +1,129 @@
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.analytics.analytics_service import AnalyticsService
+from src.analytics.online_stats import RobustAnomalyScorer
+from src.analytics.price_anomalies import PriceAnomalyDetector
+from src.analytics.price_updates import notify_prices_appended
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.price_data import PriceData
+from src.models.price_anomaly import PriceAnomaly, AnomalyDetectorState
+
+START = datetime(2020, 1, 1)
+
+
+def _random_walk(seed, n, volatility=0.01):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, volatility, n)))
+
+
+def test_streamed_batches_match_one_pass():
+    prices = _random_walk(0, 3000)
+    prices[1200] *= 1.6
+
+    full = RobustAnomalyScorer().score(prices)
+
+    streamed = RobustAnomalyScorer()
+    parts = []
+    for chunk in np.array_split(prices, 41):
+        # The state survives a JSON round trip between batches
+        streamed = RobustAnomalyScorer.from_dict(json.loads(json.dumps(streamed.to_dict())))
+        parts.append(streamed.score(chunk))
+
+    for key in ['log_return', 'robust_z', 'ewma_z', 'anomaly']:
+        np.testing.assert_allclose(np.concatenate([p[key] for p in parts]), full[key], equal_nan=True)
+    assert 1200 in np.flatnonzero(full['anomaly'])
+    # The spike is dropped from the state: one return fewer than prices - 1
+    assert streamed.count == len(prices) - 2
+
+
+def test_robust_z_matches_trailing_median_and_mad():
+    prices = _random_walk(1, 200)
+    scorer = RobustAnomalyScorer(window=20)
+    scores = scorer.score(prices)
+
+    returns = np.diff(np.log(prices))
+    assert np.isnan(scores['robust_z'][:21]).all()
+    for t in [21, 100, 199]:
+        window = returns[t - 21:t - 1]
+        median = np.median(window)
+        mad = np.median(np.abs(window - median))
+        assert scores['robust_z'][t] == pytest.approx((returns[t - 1] - median) / (1.4826 * mad))
+
+
+def test_flags_spikes_and_invalid_prices_but_not_volatility_regimes():
+    calm = _random_walk(2, 1000, volatility=0.005)
+    turbulent = calm[-1] * _random_walk(3, 1000, volatility=0.03) / 100
+    prices = np.concatenate([calm, turbulent])
+    prices[500] *= 1.3
+    prices[700] = -1.0
+
+    scores = RobustAnomalyScorer().score(prices)
+    assert list(np.flatnonzero(scores['invalid'])) == [700]
+    anomalies = set(np.flatnonzero(scores['anomaly']))
+    assert 500 in anomalies
+    # Neither the invalid price nor the spike's reversal is scored against
+    assert scores['log_return'][701] == pytest.approx(np.log(prices[701] / prices[699]))
+    assert scores['log_return'][501] == pytest.approx(np.log(prices[501] / prices[499]))
+    # The switch to a turbulent regime is flagged only while the EWMA adapts
+    assert max(anomalies - {500}) < 1020
+    assert len(anomalies) <= 5
+
+
+def test_level_shift_is_flagged_once_and_accepted():
+    prices = _random_walk(5, 600)
+    prices[300:] *= 2
+
+    scorer = RobustAnomalyScorer()
+    scores = scorer.score(prices[:301])
+    assert scores['anomaly'][300] and scorer.pending == prices[300]
+
+    # The next price confirms the new level, so it is not flagged itself
+    scores = scorer.score(prices[301:])
+    assert not scores['anomaly'].any()
+    assert scorer.last_price == prices[-1]
+
+
+def test_ingestion_stage_records_anomalies(app):
+    prices = _random_walk(4, 400)
+    prices[350] *= 1.5
+    commodity = Commodity(name='Copper', symbol='CU')
+    db.session.add(commodity)
+    db.session.flush()
+    for i, price in enumerate(prices[:300]):
+        db.session.add(PriceData(commodity_id=commodity.id, price=float(price), timestamp=START + timedelta(days=i)))
+    db.session.commit()
+
+    detector = PriceAnomalyDetector()
+    assert detector.rebuild() == 1
+    assert PriceAnomaly.query.count() == 0
+
+    new_points = []
+    for i, price in enumerate(prices[300:], start=300):
+        timestamp = START + timedelta(days=i)
+        db.session.add(PriceData(commodity_id=commodity.id, price=float(price), timestamp=timestamp))
+        new_points.append((timestamp, float(price)))
+    db.session.commit()
+    notify_prices_appended({commodity.id: new_points})
+
+    flagged = PriceAnomaly.query.all()
+    assert [row.timestamp for row in flagged] == [START + timedelta(days=350)]
+    assert flagged[0].anomaly_type == 'outlier'
+    assert AnomalyDetectorState.query.one().last_timestamp == START + timedelta(days=399)
+
+    # A backfilled point rescores the series without duplicating anomalies
+    backfill = (START - timedelta(days=1), float(prices[0]))
+    db.session.add(PriceData(commodity_id=commodity.id, price=backfill[1], timestamp=backfill[0]))
+    db.session.commit()
+    detector.append_prices(commodity.id, [backfill])
+    assert PriceAnomaly.query.count() == 1
+
+    result = AnalyticsService(app).get_price_anomalies(commodity.id)
+    assert result['count'] == 1
+    assert result['anomalies'][0]['commodity'] == 'Copper'
+    assert 'error' in AnalyticsService(app).get_price_anomalies(commodity.id + 1)
+
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analytics.analytics_service import AnalyticsService
+from src.analytics.price_analyzer import PriceAnalyzer
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.price_data import PriceData
+
+START = datetime(2020, 1, 1)
+
+
+def _price_frame(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({'date': pd.date_range(START, periods=n, freq='D'), 'price': prices})
+
+
+def _strip_dates(result):
+    return {key: value for key, value in result.items() if key != 'analysis_date'}
+
+
+def test_selected_sections_match_full_analysis():
+    data = _price_frame()
+    analyzer = PriceAnalyzer()
+    full = analyzer.analyze(data)
+    assert set(PriceAnalyzer.SECTIONS) <= set(full)
+
+    partial = analyzer.analyze(data, sections={'risk_metrics', 'volatility'})
+    assert set(partial) & set(PriceAnalyzer.SECTIONS) == {'risk_metrics', 'volatility'}
+    assert partial['risk_metrics'] == full['risk_metrics']
+    assert partial['volatility'] == full['volatility']
+    assert partial['data_points'] == full['data_points']
+
+
+def test_intermediates_are_computed_once_for_dependent_sections(monkeypatch):
+    analyzer = PriceAnalyzer()
+    calls = []
+    original = analyzer._compute_intermediate
+    monkeypatch.setattr(analyzer, '_compute_intermediate',
+                        lambda name, data, intermediates: calls.append(name) or original(name, data, intermediates))
+
+    analyzer.analyze(_price_frame(), sections={'risk_metrics', 'price_movements'})
+    assert calls == ['returns']
+
+    calls.clear()
+    analyzer.analyze(_price_frame(), sections={'trend', 'volatility', 'support_resistance'})
+    assert calls == ['values', 'surface']
+
+    calls.clear()
+    analyzer.analyze(_price_frame(), sections={'statistics'})
+    assert calls == []
+
+
+def test_short_series_skip_seasonality_and_unknown_sections_error():
+    analyzer = PriceAnalyzer()
+    assert 'seasonality' not in analyzer.analyze(_price_frame(n=100), sections={'seasonality', 'trend'})
+    assert 'error' in analyzer.analyze(_price_frame(), sections={'trend', 'bogus'})
+
+
+def test_service_caches_each_section_and_computes_only_missing_ones(app):
+    commodity = Commodity(name='Copper', symbol='CU')
+    db.session.add(commodity)
+    db.session.flush()
+    for row in _price_frame(n=200).itertuples():
+        db.session.add(PriceData(commodity_id=commodity.id, price=float(row.price),
+                                 timestamp=row.date.to_pydatetime()))
+    db.session.commit()
+
+    service = AnalyticsService(app)
+    analyzer = service.analyzers['price']
+    original_analyze = analyzer.analyze
+    computed = []
+    analyzer.analyze = lambda data, sections=None, **kwargs: (
+        computed.append(set(sections)) or original_analyze(data, sections=sections, **kwargs))
+
+    with app.app_context():
+        risk_sections = service.SUMMARY_PRICE_SECTIONS
+        partial = service._perform_analysis(commodity.id, 'price', risk_sections)
+        assert set(partial) & set(PriceAnalyzer.SECTIONS) == set(risk_sections)
+        assert computed == [set(risk_sections)]
+        assert {f"{commodity.id}_price_{section}" for section in risk_sections} <= set(service.analysis_cache)
+
+        # The full analysis computes only the sections not cached yet
+        full = service._perform_analysis(commodity.id, 'price')
+        assert computed[1] == set(PriceAnalyzer.SECTIONS) - set(risk_sections)
+        assert 'forecast' in full and list(full).index('statistics') < list(full).index('trend')
+        assert _strip_dates(full) == _strip_dates(original_analyze(_price_frame(n=200)))
+
+        # Narrower requests are served from the cached sections
+        trend = service._perform_analysis(commodity.id, 'price', {'trend'})
+        assert len(computed) == 2
+        assert trend['trend'] == full['trend'] and 'volatility' not in trend
+        assert 'error' in service._perform_analysis(commodity.id, 'price', {'bogus'})
+
+        # New prices change the data version, so every section is recomputed
+        db.session.add(PriceData(commodity_id=commodity.id, price=90.0, timestamp=datetime(2021, 1, 1)))
+        db.session.commit()
+        service._perform_analysis(commodity.id, 'price', {'trend'})
+        assert computed[2] == {'trend'}
@@ -0,0 +1,136 @@
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analytics.online_stats import P2Quantile, StreamingPriceStats
+from src.analytics.price_analyzer import PriceAnalyzer
+from src.analytics.price_stats import PriceStatsTracker
+from src.analytics.price_updates import notify_prices_appended
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.price_data import PriceData
+from src.models.price_stats_state import PriceStatsState
+
+START = datetime(2020, 1, 1)
+
+
+def _random_walk(seed, n):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, n)))
+
+
+def _assert_matches_full_analysis(result, prices):
+    series = pd.Series(prices, dtype=float)
+    analyzer = PriceAnalyzer()
+
+    expected_stats = analyzer.calculate_statistics(series)
+    for key in ['mean', 'std', 'min', 'max', 'count']:
+        assert result['statistics'][key] == pytest.approx(expected_stats[key], rel=1e-9)
+    assert result['statistics']['median'] == pytest.approx(expected_stats['median'], rel=0.02)
+
+    expected_trend = analyzer.calculate_trend(series)
+    assert result['trend']['trend'] == expected_trend['trend']
+    assert result['trend']['slope'] == pytest.approx(expected_trend['slope'], rel=1e-6)
+    assert result['trend']['r_squared'] == pytest.approx(expected_trend['r_squared'], rel=1e-6)
+
+    for name, window in [('daily', 30), ('weekly', 7), ('monthly', 90)]:
+        assert result['volatility'][name] == pytest.approx(analyzer.calculate_volatility(series, window), rel=1e-6)
+
+    expected_risk = analyzer.calculate_risk_metrics(series)
+    for key in ['max_drawdown', 'sharpe_ratio', 'annualized_volatility']:
+        assert result['risk_metrics'][key] == pytest.approx(expected_risk[key], rel=1e-6)
+    assert result['risk_metrics']['var_95'] == pytest.approx(expected_risk['var_95'], abs=0.005)
+    assert result['risk_metrics']['cvar_95'] == pytest.approx(expected_risk['cvar_95'], abs=0.01)
+
+
+def test_p2_quantile_tracks_sample_quantile():
+    values = np.random.default_rng(3).normal(0, 1, 20000)
+    for p in [0.05, 0.5, 0.95]:
+        sketch = P2Quantile(p)
+        for value in values:
+            sketch.update(float(value))
+        assert sketch.value() == pytest.approx(np.quantile(values, p), abs=0.05)
+
+    # Initializing from a sample and continuing to stream stays accurate
+    sketch = P2Quantile.from_values(values[:5000], 0.05)
+    for value in values[5000:]:
+        sketch.update(float(value))
+    assert sketch.value() == pytest.approx(np.quantile(values, 0.05), abs=0.05)
+
+
+def test_streamed_state_matches_full_analysis():
+    prices = _random_walk(0, 1500)
+
+    streamed = StreamingPriceStats()
+    for price in prices:
+        streamed.update(float(price))
+    batch = StreamingPriceStats.from_values(prices)
+
+    analyzer = PriceAnalyzer()
+    _assert_matches_full_analysis(analyzer.analyze_from_state(streamed), prices)
+    _assert_matches_full_analysis(analyzer.analyze_from_state(batch), prices)
+
+    # State survives a JSON round trip and keeps updating
+    restored = StreamingPriceStats.from_dict(json.loads(json.dumps(batch.to_dict())))
+    more = _random_walk(1, 200) * prices[-1] / 100
+    for price in more:
+        restored.update(float(price))
+    _assert_matches_full_analysis(analyzer.analyze_from_state(restored), np.concatenate([prices, more]))
+
+
+def test_appended_prices_update_persisted_state(app):
+    prices = _random_walk(2, 600)
+    commodity = Commodity(name='Copper', symbol='CU')
+    db.session.add(commodity)
+    db.session.flush()
+    for i, price in enumerate(prices[:500]):
+        db.session.add(PriceData(commodity_id=commodity.id, price=float(price), timestamp=START + timedelta(days=i)))
+    db.session.commit()
+
+    tracker = PriceStatsTracker()
+    assert tracker.rebuild() == 1
+
+    new_points = []
+    for i, price in enumerate(prices[500:], start=500):
+        timestamp = START + timedelta(days=i)
+        db.session.add(PriceData(commodity_id=commodity.id, price=float(price), timestamp=timestamp))
+        new_points.append((timestamp, float(price)))
+    db.session.commit()
+    notify_prices_appended({commodity.id: new_points})
+
+    entry = PriceStatsState.query.filter_by(commodity_id=commodity.id).one()
+    assert entry.data_points == 600
+    assert entry.last_timestamp == START + timedelta(days=599)
+
+    _, stats = tracker.get_state(commodity.id)
+    _assert_matches_full_analysis(PriceAnalyzer().analyze_from_state(stats), prices)
+
+
+def test_rebuild_writes_over_a_state_inserted_concurrently(app, monkeypatch):
+    prices = _random_walk(4, 200)
+    commodity = Commodity(name='Zinc', symbol='ZN')
+    db.session.add(commodity)
+    db.session.flush()
+    for i, price in enumerate(prices):
+        db.session.add(PriceData(commodity_id=commodity.id, price=float(price), timestamp=START + timedelta(days=i)))
+    db.session.commit()
+
+    # Another process stores the state after this rebuild has read the rows
+    from_values = StreamingPriceStats.from_values
+    inserted = []
+
+    def from_values_racing(values):
+        if not inserted:
+            with db.engine.begin() as connection:
+                connection.execute(PriceStatsState.__table__.insert().values(commodity_id=commodity.id))
+            inserted.append(True)
+        return from_values(values)
+
+    monkeypatch.setattr(StreamingPriceStats, 'from_values', staticmethod(from_values_racing))
+    assert PriceStatsTracker().rebuild([commodity.id]) == 1
+
+    entry = PriceStatsState.query.filter_by(commodity_id=commodity.id).one()
+    assert inserted and entry.data_points == 200
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from src.analytics.analytics_service import AnalyticsService
+from src.analytics.production_analyzer import ProductionAnalyzer
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.country import Country
+from src.models.production_data import ProductionData
+
+
+def _production(seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for commodity in ['copper', 'zinc']:
+        for country, base in [('Chile', 5000), ('Peru', 2000), ('China', 3000), ('Mali', 0)]:
+            years = np.arange(2000, 2020) if country != 'Mali' else np.array([2018, 2019])
+            volumes = base * np.exp(np.cumsum(rng.normal(0.02, 0.1, len(years))))
+            if country == 'Mali':
+                volumes = np.array([0.0, 15.0])  # zero first year: no CAGR, infinite growth
+            frames.append(pd.DataFrame({'year': years, 'production_volume': volumes,
+                                        'country': country, 'commodity': commodity}))
+    frames.append(pd.DataFrame({'year': [2019], 'production_volume': [10.0],
+                                'country': ['Laos'], 'commodity': ['zinc']}))
+    return pd.concat(frames).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def _reference_growth(data):
+    growth = {}
+    for country in data['country'].unique():
+        country_data = data[data['country'] == country].sort_values('year')
+        first = country_data['production_volume'].iloc[0]
+        span = country_data['year'].iloc[-1] - country_data['year'].iloc[0]
+        if len(country_data) >= 2 and first > 0 and span > 0:
+            growth[country] = ((country_data['production_volume'].iloc[-1] / first) ** (1 / span) - 1) * 100
+    return growth
+
+
+def test_country_analysis_matches_per_country_loop():
+    data = _production()
+    zinc = data[data['commodity'] == 'zinc']
+    result = ProductionAnalyzer().analyze_by_country(zinc)
+
+    expected = _reference_growth(zinc)
+    assert list(result['growth_rates']) == list(expected)
+    np.testing.assert_allclose(list(result['growth_rates'].values()), list(expected.values()), rtol=1e-12)
+
+    totals = zinc.groupby('country')['production_volume'].sum().sort_values(ascending=False)
+    assert list(result['top_producers']) == list(totals.index)
+    np.testing.assert_allclose(list(result['top_producers'].values()), totals.to_numpy(), rtol=1e-12)
+
+    latest = zinc[zinc['year'] == 2019].groupby('country')['production_volume'].sum()
+    shares = (latest / latest.sum() * 100).sort_values(ascending=False)
+    np.testing.assert_allclose([result['market_share'][c] for c in shares.index], shares.to_numpy(), rtol=1e-12)
+    assert result['total_countries'] == 5
+
+
+def test_efficiency_matches_per_country_loop():
+    data = _production()
+    copper = data[data['commodity'] == 'copper']
+    result = ProductionAnalyzer().compare_production_efficiency(copper)
+
+    for country, scores in result['country_efficiency'].items():
+        volumes = copper[copper['country'] == country].sort_values('year')['production_volume']
+        stability = volumes.mean() / volumes.std() if volumes.std() > 0 else 1
+        growth_std = volumes.pct_change().std()
+        consistency = 1 / (1 + growth_std) if not np.isnan(growth_std) else 1
+        assert np.isclose(scores['efficiency_score'], (stability + consistency) / 2, rtol=1e-12)
+
+    # Infinite growth from zero production leaves growth consistency neutral
+    assert result['country_efficiency']['Mali']['growth_consistency'] == 1.0
+    ranking = [score for _, score in result['efficiency_ranking']]
+    assert ranking == sorted(ranking, reverse=True)
+    assert result['most_efficient'] == result['efficiency_ranking'][0][0]
+
+
+def test_all_commodities_in_one_call_match_single_commodity_results():
+    data = _production()
+    analyzer = ProductionAnalyzer()
+    combined = analyzer.analyze_countries(data, by='commodity')
+
+    assert set(combined) == {'copper', 'zinc'}
+    for commodity, group in data.groupby('commodity'):
+        assert combined[commodity]['country_analysis'] == analyzer.analyze_by_country(group)
+        assert combined[commodity]['efficiency'] == analyzer.compare_production_efficiency(group)
+
+
+def test_full_analysis_keeps_integer_years():
+    data = _production()
+    result = ProductionAnalyzer().analyze(data[data['commodity'] == 'copper'])
+    assert result['year_range'] == {'start': 2000, 'end': 2019}
+    assert result['forecast']['base_year'] == 2019
+    assert 'Chile' in result['country_analysis']['growth_rates']
+
+
+def test_service_analyzes_countries_of_every_commodity(app):
+    chile = Country(name='Chile', iso_code='CHL')
+    peru = Country(name='Peru', iso_code='PER')
+    copper = Commodity(name='Copper', symbol='CU')
+    zinc = Commodity(name='Zinc', symbol='ZN')
+    db.session.add_all([chile, peru, copper, zinc])
+    db.session.flush()
+    for year in range(2015, 2020):
+        db.session.add(ProductionData(commodity_id=copper.id, country_id=chile.id, year=year,
+                                      production_volume=100 * 1.1 ** (year - 2015)))
+        db.session.add(ProductionData(commodity_id=copper.id, country_id=peru.id, year=year,
+                                      production_volume=300))
+    db.session.commit()
+
+    service = AnalyticsService(app)
+    result = service.get_country_production()
+    assert [entry['commodity'] for entry in result['commodities']] == ['Copper']
+
+    analysis = result['commodities'][0]['country_analysis']
+    assert np.isclose(analysis['growth_rates']['Chile'], 10.0)
+    assert np.isclose(analysis['market_share']['Peru'], 300 / (300 + 100 * 1.1 ** 4) * 100)
+    assert service.get_country_production() is result
+    assert 'error' in service.get_country_production([zinc.id])
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+
+from src.analytics.analytics_service import AnalyticsService
+from src.analytics.data_loaders import load_production_frame
+from src.analytics.production_cube import ProductionCube, get_production_cube
+from src.analytics.production_updates import notify_volumes_appended, volume_rows
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.country import Country
+from src.models.data_source import DataSource
+from src.models.production_data import ProductionData
+from src.models.reserves_data import ReservesData
+
+
+def _seed():
+    copper = Commodity(name='Copper', symbol='CU')
+    zinc = Commodity(name='Zinc', symbol='ZN')
+    chile = Country(name='Chile', iso_code='CHL')
+    peru = Country(name='Peru', iso_code='PER')
+    usgs = DataSource(name='USGS')
+    other = DataSource(name='Other')
+    db.session.add_all([copper, zinc, chile, peru, usgs, other])
+    db.session.flush()
+
+    for year in range(2015, 2020):
+        db.session.add(ProductionData(commodity_id=copper.id, country_id=chile.id, year=year,
+                                      production_volume=5000 + year, data_source_id=usgs.id))
+        db.session.add(ProductionData(commodity_id=zinc.id, country_id=peru.id, year=year,
+                                      production_volume=1000 + year, data_source_id=usgs.id))
+        db.session.add(ReservesData(commodity_id=copper.id, country_id=chile.id, year=year,
+                                    reserves_volume=200000 - 1000 * (year - 2015), data_source_id=usgs.id))
+    # A second source for one cell is summed into it
+    db.session.add(ProductionData(commodity_id=copper.id, country_id=chile.id, year=2019,
+                                  production_volume=10, data_source_id=other.id))
+    db.session.commit()
+    return copper.id, zinc.id, chile.id, peru.id
+
+
+def _add(rows):
+    records = [ProductionData(**row) for row in rows]
+    db.session.add_all(records)
+    db.session.flush()
+    production = volume_rows(records, 'production_volume')
+    db.session.commit()
+    return production
+
+
+def test_cube_holds_summed_volumes_sliceable_by_any_axis(app):
+    copper_id, zinc_id, chile_id, peru_id = _seed()
+    cube = get_production_cube()
+
+    assert cube.shape == (2, 2, 5)
+    assert list(cube.years) == list(range(2015, 2020))
+
+    values, axes = cube.slice('production', commodity_ids=[copper_id], start_year=2018)
+    assert list(axes['year']) == [2018, 2019] and list(axes['country']) == [chile_id, peru_id]
+    np.testing.assert_array_equal(values[0, 0], [5000 + 2018, 5000 + 2019 + 10])
+    assert np.isnan(values[0, 1]).all()
+
+    totals, axes = cube.aggregate('production', by=['country'])
+    expected = load_production_frame([copper_id, zinc_id])
+    np.testing.assert_allclose(totals, [expected[expected['country'] == name]['production_volume'].sum()
+                                        for name in ['Chile', 'Peru']])
+
+    reserves, _ = cube.aggregate('reserves', by=['year'], country_ids=[chile_id])
+    np.testing.assert_allclose(reserves, 200000 - 1000 * np.arange(5))
+
+    frame = cube.frame([zinc_id])
+    assert list(frame.columns) == ['year', 'production_volume', 'country', 'commodity_id']
+    assert list(frame['country']) == ['Peru'] * 5 and list(frame['year']) == list(range(2015, 2020))
+
+
+def test_ingested_rows_are_absorbed_incrementally(app):
+    copper_id, zinc_id, chile_id, peru_id = _seed()
+    cube = get_production_cube()
+    builds = []
+    cube.build = lambda: builds.append(1)
+
+    mali = Country(name='Mali', iso_code='MLI')
+    db.session.add(mali)
+    db.session.commit()
+    rows = _add([
+        {'commodity_id': copper_id, 'country_id': mali.id, 'year': 2021, 'production_volume': 42},
+        {'commodity_id': zinc_id, 'country_id': peru_id, 'year': 2019, 'production_volume': 1}
+    ])
+    notify_volumes_appended(production=rows)
+    # Rows already absorbed are not counted twice
+    notify_volumes_appended(production=rows)
+
+    assert get_production_cube() is cube and not builds
+    assert cube.shape == (2, 3, 7)
+
+    rebuilt = ProductionCube()
+    rebuilt.build()
+    for measure in ('production', 'reserves'):
+        expected, expected_axes = rebuilt.slice(measure)
+        values, axes = cube.slice(measure, commodity_ids=expected_axes['commodity'],
+                                  country_ids=expected_axes['country'])
+        np.testing.assert_array_equal(values, expected)
+    assert cube.frame([copper_id])['country'].iloc[-1] == 'Mali'
+
+
+def test_unseen_table_changes_trigger_a_rebuild(app):
+    copper_id, _, chile_id, _ = _seed()
+    cube = get_production_cube()
+
+    ProductionData.query.filter_by(year=2015).delete()
+    db.session.commit()
+    values, _ = get_production_cube().slice('production', commodity_ids=[copper_id], country_ids=[chile_id])
+    assert np.isnan(values[0, 0, 0]) and values[0, 0, 1] == 5000 + 2016
+
+
+def _fail_rebuild():
+    raise AssertionError('the saved cube was rebuilt')
+
+
+def test_memory_mapped_cube_is_reused_while_tables_are_unchanged(app, tmp_path):
+    copper_id, *_ = _seed()
+    directory = str(tmp_path / 'cube')
+    first = ProductionCube(directory)
+    first.ensure_current()
+    assert isinstance(first.arrays['production'], np.memmap)
+
+    second = ProductionCube(directory)
+    second.build = _fail_rebuild
+    second.ensure_current()
+    np.testing.assert_array_equal(second.slice('reserves')[0], first.slice('reserves')[0])
+
+    rows = _add([{'commodity_id': copper_id, 'country_id': first.country_ids[0], 'year': 2030,
+                  'production_volume': 7}])
+    second.append_volumes(production=rows)
+    third = ProductionCube(directory)
+    third.build = _fail_rebuild
+    third.ensure_current()
+    assert third.slice('production', commodity_ids=[copper_id], start_year=2030)[0][0, 0, 0] == 7
+
+
+def test_service_aggregates_and_analyzes_from_the_cube(app):
+    copper_id, zinc_id, chile_id, peru_id = _seed()
+    service = AnalyticsService(app)
+
+    result = service.aggregate_volumes('production', by=['commodity'], start_year=2019)
+    assert result['records'] == [
+        {'commodity_id': copper_id, 'commodity': 'Copper', 'volume': 5000 + 2019 + 10},
+        {'commodity_id': zinc_id, 'commodity': 'Zinc', 'volume': 1000 + 2019}
+    ]
+    by_country = service.aggregate_volumes('reserves', by=['country', 'year'], end_year=2015)
+    assert by_country['records'] == [{'country_id': chile_id, 'country': 'Chile', 'year': 2015,
+                                      'volume': 200000.0}]
+    assert 'error' in service.aggregate_volumes('exports')
+    assert 'error' in service.aggregate_volumes(by=['region'])
+
+    summary = service.get_production_cube_summary()
+    assert summary['shape'] == {'commodity': 2, 'country': 2, 'year': 5}
+    assert summary['observed_cells'] == {'production': 10, 'reserves': 5}
+
+    analysis = service.analyze_commodity(copper_id, ['production'])['analyses']['production']
+    assert analysis['year_range'] == {'start': 2015, 'end': 2019}
+    assert analysis['statistics']['max'] == 5000 + 2019 + 10
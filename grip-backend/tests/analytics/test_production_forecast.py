@@ -0,0 +1,91 @@
+import numpy as np
+
+from src.analytics.analytics_service import AnalyticsService
+from src.analytics.production_forecast import forecast_series, MODELS, HOLDOUT_YEARS, DAMPING
+from src.analytics.production_updates import notify_volumes_appended, volume_rows
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.country import Country
+from src.models.production_data import ProductionData
+
+
+def test_selection_matches_per_series_fits():
+    rng = np.random.default_rng(2)
+    t = np.arange(20, dtype=np.float64)
+    values = np.vstack([
+        50 + 3 * t + rng.normal(0, 1, 20),
+        20 * np.exp(0.08 * t) * rng.lognormal(0, 0.01, 20),
+        100 + 8 * np.minimum(t, 15) + rng.normal(0, 0.5, 20),
+        rng.lognormal(3, 0.5, 20)
+    ])
+    values[rng.random(values.shape) < 0.15] = np.nan
+    values[3, :14] = np.nan  # too short to forecast
+
+    result = forecast_series(values)
+    assert list(result['eligible']) == [True, True, True, False]
+    assert [MODELS[m] for m in result['model'][:2]] == ['linear', 'log_linear']
+
+    for i in range(3):
+        years = np.flatnonzero(~np.isnan(values[i]))
+        train, test = years[:-HOLDOUT_YEARS], years[-HOLDOUT_YEARS:]
+        slope, intercept = np.polyfit(train, values[i, train], 1)
+        log_slope, log_intercept = np.polyfit(train, np.log(values[i, train]), 1)
+        steps = test - train[-1]
+        damped = intercept + slope * train[-1] + slope * DAMPING * (1 - DAMPING ** steps) / (1 - DAMPING)
+        predictions = [intercept + slope * test, np.exp(log_intercept + log_slope * test), damped]
+        rmse = [np.sqrt(np.mean((p - values[i, test]) ** 2)) for p in predictions]
+        assert np.allclose(result['holdout_rmse'][i], rmse)
+        assert result['model'][i] == np.argmin(rmse)
+
+        # The selected model is refitted on the full series
+        if MODELS[result['model'][i]] == 'linear':
+            slope, intercept = np.polyfit(years, values[i, years], 1)
+            ahead = years[-1] + np.arange(1, 6)
+            assert np.allclose(result['forecast'][i], intercept + slope * ahead)
+
+
+def test_forecast_endpoint_and_ingest(app):
+    nickel = Commodity(name='Nickel', symbol='NI')
+    indonesia = Country(name='Indonesia', iso_code='IDN')
+    canada = Country(name='Canada', iso_code='CAN')
+    db.session.add_all([nickel, indonesia, canada])
+    db.session.flush()
+    for year in range(2010, 2020):
+        db.session.add(ProductionData(commodity_id=nickel.id, country_id=indonesia.id, year=year,
+                                      production_volume=100 + 20 * (year - 2010)))
+    for year in range(2016, 2020):
+        db.session.add(ProductionData(commodity_id=nickel.id, country_id=canada.id, year=year,
+                                      production_volume=50))
+    db.session.commit()
+
+    import src.routes.analytics as analytics_routes
+
+    app.register_blueprint(analytics_routes.analytics_bp, url_prefix='/api')
+    analytics_routes.analytics_service = AnalyticsService(app)
+    client = app.test_client()
+
+    body = client.get(f'/api/analytics/production/forecasts?commodity_id={nickel.id}').get_json()
+    # Canada has too few years to hold any out
+    assert body['record_count'] == 1
+    forecast = body['forecasts'][0]
+    assert forecast['country'] == 'Indonesia' and forecast['model'] == 'linear'
+    assert forecast['base_year'] == 2019 and np.isclose(forecast['holdout_rmse']['linear'], 0)
+    assert np.allclose([forecast['forecasts'][str(y)] for y in range(2020, 2025)], [300, 320, 340, 360, 380])
+
+    records = []
+    for year in range(2020, 2024):
+        record = ProductionData(commodity_id=nickel.id, country_id=canada.id, year=year, production_volume=50)
+        db.session.add(record)
+        records.append(record)
+    db.session.flush()
+    rows = volume_rows(records, 'production_volume')
+    db.session.commit()
+    notify_volumes_appended(production=rows)
+
+    canada_forecasts = client.get(f'/api/analytics/production/forecasts?country_id={canada.id}').get_json()
+    assert canada_forecasts['record_count'] == 1
+    assert np.allclose(list(canada_forecasts['forecasts'][0]['forecasts'].values()), 50)
+
+    assert client.get('/api/analytics/production/forecasts?model=arima').status_code == 400
+    assert client.get('/api/analytics/production/forecasts?country_id=999').status_code == 404
+    analytics_routes.analytics_service = None
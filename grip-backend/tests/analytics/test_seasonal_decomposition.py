@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analytics.analytics_service import AnalyticsService
+from src.analytics.price_analyzer import PriceAnalyzer
+from src.analytics.seasonal_decomposition import SeasonalDecomposer
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.price_data import PriceData
+
+SEASON = 1 + 0.1 * np.sin(2 * np.pi * np.arange(12) / 12)
+
+
+def _monthly(n=120, seed=0, start='2000-01-01'):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=n, freq='MS')
+    trend = 100 * np.exp(np.linspace(0, 0.5, n))
+    return pd.Series(trend * SEASON[dates.month - 1] * np.exp(rng.normal(0, 0.005, n)), index=dates)
+
+
+def test_detect_frequency():
+    detect = SeasonalDecomposer.detect_frequency
+    assert detect(pd.bdate_range('2020-01-01', periods=100)) == 'daily'
+    assert detect(pd.date_range('2020-01-01', periods=100, freq='W-FRI')) == 'weekly'
+    assert detect(pd.date_range('2020-01-01', periods=100, freq='MS')) == 'monthly'
+    assert detect(pd.date_range('2020-01-01', periods=20, freq='QS')) == 'quarterly'
+    assert detect(pd.date_range('2000-01-01', periods=20, freq='YS')) == 'annual'
+    assert detect(pd.DatetimeIndex(['2020-01-01'])) is None
+
+
+@pytest.mark.parametrize('period', [4, 7, 12])
+def test_centered_moving_average_matches_pandas(period):
+    rng = np.random.default_rng(1)
+    values = 1000 + np.cumsum(rng.normal(0, 1, (3, 60)), axis=1)
+    values[1, 20] = np.nan
+
+    result = SeasonalDecomposer.centered_moving_average(values, period)
+    for row in range(len(values)):
+        series = pd.Series(values[row])
+        if period % 2 == 0:
+            expected = series.rolling(period).mean().rolling(2).mean().shift(-(period // 2))
+        else:
+            expected = series.rolling(period, center=True).mean()
+        np.testing.assert_allclose(result[row], expected.to_numpy(), rtol=1e-10)
+
+
+def test_recovers_seasonal_index_for_both_models():
+    panel = pd.DataFrame({'price': _monthly()})
+    decomposer = SeasonalDecomposer()
+
+    multiplicative = decomposer.analyze(panel)['series']['price']
+    assert multiplicative['frequency'] == 'monthly'
+    np.testing.assert_allclose(list(multiplicative['seasonal_index'].values()), SEASON / SEASON.mean(), atol=0.01)
+    assert multiplicative['peak_period'] == 4 and multiplicative['trough_period'] == 10
+    assert multiplicative['seasonal_strength'] > 0.9
+
+    additive = decomposer.analyze(panel - 200, model='additive')['series']['price']
+    assert additive['model'] == 'additive'
+    assert abs(sum(additive['seasonal_index'].values())) < 1e-9
+
+    # Non-positive series fall back to the additive model
+    assert decomposer.analyze(panel - 200)['series']['price']['model'] == 'additive'
+
+
+def test_batched_panel_matches_single_series_and_skips_short_ones():
+    rng = np.random.default_rng(2)
+    daily = pd.Series(50 + np.cumsum(rng.normal(0, 0.5, 1500)), index=pd.bdate_range('2015-01-01', periods=1500))
+    panel = pd.concat({'a': _monthly(seed=3), 'b': _monthly(n=90, seed=4, start='2003-07-01'),
+                       'daily': daily, 'short': _monthly(n=18)}, axis=1)
+
+    decomposer = SeasonalDecomposer()
+    result = decomposer.analyze(panel, include_components=True)
+    assert set(result['series']) == {'a', 'b', 'daily'}
+    assert set(result['skipped']) == {'short'}
+    assert result['series']['daily']['frequency'] == 'daily'
+    assert result['series']['daily']['period'] == 52
+
+    for name in ['b', 'daily']:
+        alone = decomposer.analyze(panel[[name]].dropna(), include_components=True)['series'][name]
+        assert alone['seasonal_index'] == pytest.approx(result['series'][name]['seasonal_index'])
+        assert alone['components']['dates'] == result['series'][name]['components']['dates']
+
+
+def test_price_analyzer_day_of_week_patterns_only_for_daily_series():
+    analyzer = PriceAnalyzer()
+    monthly = _monthly().rename('price').rename_axis('date').reset_index()
+    seasonality = analyzer.analyze_seasonality(monthly)
+    assert seasonality['frequency'] == 'monthly'
+    assert 'day_of_week_patterns' not in seasonality
+    assert seasonality['decomposition']['peak_period'] == 4
+    assert seasonality['monthly_patterns']['averages'][4] == pytest.approx(
+        monthly.loc[monthly['date'].dt.month == 4, 'price'].mean())
+
+    daily = pd.DataFrame({'date': pd.date_range('2020-01-01', periods=500, freq='D'),
+                          'price': np.linspace(100, 120, 500)})
+    seasonality = analyzer.analyze_seasonality(daily)
+    assert set(seasonality['day_of_week_patterns']['averages']) == set(range(7))
+    # Under two years of weekly means: patterns but no decomposition yet
+    assert seasonality['decomposition'] is None
+
+
+def test_service_recomputes_only_changed_series(app):
+    ids = []
+    for seed, name in enumerate(['Copper', 'Zinc', 'Nickel']):
+        commodity = Commodity(name=name, symbol=name[:2].upper())
+        db.session.add(commodity)
+        db.session.flush()
+        ids.append(commodity.id)
+        for date, price in _monthly(seed=seed).items():
+            db.session.add(PriceData(commodity_id=commodity.id, price=float(price), timestamp=date.to_pydatetime()))
+    db.session.commit()
+
+    service = AnalyticsService(app)
+    first = service.get_seasonal_decomposition()
+    assert first['recomputed'] == 3
+    assert [s['commodity'] for s in first['series']] == ['Copper', 'Zinc', 'Nickel']
+    assert 'components' not in first['series'][0]
+
+    assert service.get_seasonal_decomposition()['recomputed'] == 0
+
+    db.session.add(PriceData(commodity_id=ids[1], price=150.0, timestamp=datetime(2010, 1, 1)))
+    db.session.commit()
+    second = service.get_seasonal_decomposition(include_components=True)
+    assert second['recomputed'] == 1
+    assert second['series'][0]['seasonal_index'] == first['series'][0]['seasonal_index']
+    assert len(second['series'][1]['components']['dates']) == 121
+
+    assert 'error' in service.get_seasonal_decomposition(model='x13')
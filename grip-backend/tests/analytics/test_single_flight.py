@@ -0,0 +1,191 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.analytics.single_flight import SingleFlight
+from src.analytics.analytics_service import AnalyticsService
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.price_data import PriceData
+
+
+def test_concurrent_callers_share_one_computation():
+    group = SingleFlight()
+    calls = []
+    barrier = threading.Barrier(5)
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'value': 42}
+
+    def worker():
+        barrier.wait()
+        results.append(group.do('key', compute))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+    stats = group.get_stats()
+    assert stats['total_calls'] == 5
+    assert stats['coalesced_calls'] == 4
+    assert stats['coalescing_rate'] == pytest.approx(0.8)
+    assert stats['in_flight'] == 0
+
+
+def test_errors_propagate_to_waiters_and_are_not_remembered():
+    group = SingleFlight()
+    started = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError('boom')
+
+    def leader():
+        try:
+            group.do('key', failing)
+        except ValueError as e:
+            errors.append(e)
+
+    def follower():
+        started.wait()
+        try:
+            group.do('key', lambda: 'unused')
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=leader), threading.Thread(target=follower)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 2
+    assert group.do('key', lambda: 'fresh') == 'fresh'
+
+
+def test_perform_analysis_coalesces_cold_cache_requests(app):
+    commodity = Commodity(name='Copper', symbol='CU')
+    db.session.add(commodity)
+    db.session.flush()
+    start = datetime(2020, 1, 1)
+    for i in range(60):
+        db.session.add(PriceData(commodity_id=commodity.id, price=100 + i,
+                                 timestamp=start + timedelta(days=i)))
+    db.session.commit()
+    commodity_id = commodity.id
+
+    service = AnalyticsService(app)
+    analyzer = service.analyzers['price']
+    original_analyze = analyzer.analyze
+    analyze_calls = []
+
+    def slow_analyze(data, **kwargs):
+        analyze_calls.append(1)
+        time.sleep(0.3)
+        return original_analyze(data, **kwargs)
+
+    analyzer.analyze = slow_analyze
+    barrier = threading.Barrier(3)
+    results = []
+
+    def request():
+        with app.app_context():
+            barrier.wait()
+            results.append(service._perform_analysis(commodity_id, 'price'))
+
+    threads = [threading.Thread(target=request) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(analyze_calls) == 1
+    assert len(results) == 3 and all('error' not in r for r in results)
+    assert service.get_cache_stats()['single_flight']['coalesced_calls'] == 2
+
+    # New data changes the data version, so the cached result is not reused
+    db.session.add(PriceData(commodity_id=commodity_id, price=200,
+                             timestamp=start + timedelta(days=60)))
+    db.session.commit()
+    service._perform_analysis(commodity_id, 'price')
+    assert len(analyze_calls) == 2
+
+
+def test_concurrent_first_requests_materialize_an_index_once(app):
+    service = AnalyticsService(app)
+    indexer = service.concentration_indexer
+    original_rebuild = indexer.rebuild
+    rebuilds = []
+
+    def slow_rebuild(commodity_ids=None):
+        rebuilds.append(commodity_ids)
+        time.sleep(0.3)
+        return original_rebuild(commodity_ids)
+
+    indexer.rebuild = slow_rebuild
+    barrier = threading.Barrier(3)
+    results = []
+
+    def request():
+        with app.app_context():
+            barrier.wait()
+            results.append(service.get_concentration())
+
+    threads = [threading.Thread(target=request) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert rebuilds == [None]
+    assert len(results) == 3 and all('error' not in r for r in results)
+
+
+def test_concurrent_first_requests_build_price_statistics_once(app):
+    commodity = Commodity(name='Tin', symbol='SN')
+    db.session.add(commodity)
+    db.session.flush()
+    for i in range(50):
+        db.session.add(PriceData(commodity_id=commodity.id, price=100.0 + i,
+                                 timestamp=datetime(2024, 1, 1) + timedelta(days=i)))
+    db.session.commit()
+
+    service = AnalyticsService(app)
+    tracker = service.price_stats
+    original_rebuild = tracker.rebuild
+    rebuilds = []
+
+    def slow_rebuild(commodity_ids=None):
+        rebuilds.append(commodity_ids)
+        time.sleep(0.3)
+        return original_rebuild(commodity_ids)
+
+    tracker.rebuild = slow_rebuild
+    barrier = threading.Barrier(3)
+    results = []
+
+    def request():
+        with app.app_context():
+            barrier.wait()
+            results.append(service.get_price_statistics(commodity.id))
+
+    threads = [threading.Thread(target=request) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert rebuilds == [[commodity.id]]
+    assert len(results) == 3 and all(r['last_price'] == 149.0 for r in results)
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from src.analytics.analytics_service import AnalyticsService
+from src.analytics.production_updates import notify_volumes_appended, volume_rows
+from src.analytics.supply_risk import supply_risk_scores, DEFAULT_STABILITY
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.country import Country
+from src.models.production_data import ProductionData
+
+
+def test_scores_match_per_commodity_loop():
+    rng = np.random.default_rng(5)
+    volumes = rng.lognormal(4, 1.5, (5, 9, 7))
+    volumes[rng.random(volumes.shape) < 0.3] = np.nan
+    volumes[1, :, 4:] = np.nan  # latest production in an earlier year
+    volumes[3] = np.nan  # never produced
+    stability = rng.random(9)
+    stability[[2, 6]] = np.nan
+
+    metrics = supply_risk_scores(volumes, stability)
+    instability = 1 - np.where(np.isnan(stability), DEFAULT_STABILITY, stability)
+    for c in range(volumes.shape[0]):
+        totals = np.nansum(volumes[c], axis=0)
+        if not (totals > 0).any():
+            assert metrics['year'][c] == -1 and np.isnan(metrics['risk'][c])
+            continue
+        year = np.flatnonzero(totals > 0)[-1]
+        assert metrics['year'][c] == year
+        current = pd.Series(volumes[c, :, year]).dropna()
+        shares = current / current.sum()
+        contributions = shares ** 2 * instability[shares.index]
+        assert np.isclose(metrics['risk'][c], contributions.sum() * 10000)
+        assert np.isclose(metrics['hhi'][c], (shares ** 2).sum() * 10000)
+        assert np.isclose(metrics['weighted_instability'][c], (shares * instability[shares.index]).sum())
+        assert np.isclose(metrics['stability_coverage'][c],
+                          shares[~np.isnan(stability[shares.index])].sum() * 100)
+        assert metrics['top_country'][c] == contributions.idxmax()
+
+
+def test_ranking_endpoint_refreshes_on_ingest_and_stability(app):
+    tin = Commodity(name='Tin', symbol='SN')
+    zinc = Commodity(name='Zinc', symbol='ZN')
+    stable = Country(name='Stableland', iso_code='STB', political_stability_score=0.9)
+    shaky = Country(name='Shakyland', iso_code='SHK', political_stability_score=0.2)
+    db.session.add_all([tin, zinc, stable, shaky])
+    db.session.flush()
+    # Same concentration, different producers
+    db.session.add(ProductionData(commodity_id=tin.id, country_id=shaky.id, year=2020, production_volume=50))
+    db.session.add(ProductionData(commodity_id=zinc.id, country_id=stable.id, year=2020, production_volume=50))
+    db.session.commit()
+
+    import src.routes.analytics as analytics_routes
+    from src.routes.country import country_bp
+
+    app.register_blueprint(analytics_routes.analytics_bp, url_prefix='/api')
+    app.register_blueprint(country_bp, url_prefix='/api')
+    analytics_routes.analytics_service = AnalyticsService(app)
+    client = app.test_client()
+
+    ranking = client.get('/api/analytics/supply-risk/ranking').get_json()['ranking']
+    assert [r['commodity'] for r in ranking] == ['Tin', 'Zinc']
+    assert [r['rank'] for r in ranking] == [1, 2]
+    assert np.isclose(ranking[0]['risk_score'], 8000) and ranking[0]['risk_level'] == 'High'
+    assert ranking[0]['top_risk_country'] == 'Shakyland'
+    assert np.isclose(ranking[1]['risk_score'], 1000) and ranking[1]['risk_level'] == 'Moderate'
+
+    # Stabler producers lower the risk of the commodities they produce
+    assert client.put(f'/api/countries/{shaky.id}', json={'political_stability_score': 0.95}).status_code == 200
+    ranking = client.get('/api/analytics/supply-risk/ranking').get_json()['ranking']
+    assert [r['commodity'] for r in ranking] == ['Zinc', 'Tin']
+    assert np.isclose(ranking[1]['risk_score'], 500)
+
+    # A new producer splits tin's latest year
+    record = ProductionData(commodity_id=tin.id, country_id=stable.id, year=2021, production_volume=10)
+    db.session.add(record)
+    db.session.flush()
+    rows = volume_rows([record], 'production_volume')
+    db.session.commit()
+    notify_volumes_appended(production=rows)
+
+    body = client.get('/api/analytics/supply-risk/ranking?limit=1&level=High').get_json()
+    assert body['record_count'] == 0
+    tin_score = [r for r in client.get('/api/analytics/supply-risk/ranking').get_json()['ranking']
+                 if r['commodity'] == 'Tin'][0]
+    assert tin_score['year'] == 2021 and np.isclose(tin_score['risk_score'], 1000)
+
+    assert client.get('/api/analytics/supply-risk/ranking?level=Extreme').status_code == 400
+    assert client.get('/api/analytics/supply-risk/ranking?limit=0').status_code == 400
+    analytics_routes.analytics_service = None
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analytics.analytics_service import AnalyticsService
+from src.analytics.base_analyzer import BaseAnalyzer
+from src.analytics.price_analyzer import PriceAnalyzer
+from src.analytics.price_updates import notify_prices_appended
+from src.analytics.trend_index import TrendIndexer
+from src.models.user import db
+from src.models.commodity import Commodity
+from src.models.price_data import PriceData
+from src.models.trend_index import TrendIndex
+
+START = datetime(2020, 1, 1)
+
+
+def _add_commodity(name, prices):
+    commodity = Commodity(name=name, symbol=name[:3].upper())
+    db.session.add(commodity)
+    db.session.flush()
+    for i, price in enumerate(prices):
+        db.session.add(PriceData(commodity_id=commodity.id, price=float(price),
+                                 timestamp=START + timedelta(days=i)))
+    db.session.commit()
+    return commodity.id
+
+
+def _assert_matches_full_analysis(commodity_id, prices):
+    entry = TrendIndex.query.filter_by(commodity_id=commodity_id).one()
+    series = pd.Series(prices, dtype=float)
+    analyzer = PriceAnalyzer()
+    expected = analyzer.calculate_trend(series)
+
+    assert entry.trend == expected['trend']
+    assert entry.slope == pytest.approx(expected['slope'], abs=1e-6)
+    assert entry.r_squared == pytest.approx(expected['r_squared'], abs=1e-6)
+    assert entry.volatility == pytest.approx(analyzer.calculate_volatility(series, window=30), rel=1e-6)
+    assert entry.data_points == len(prices)
+
+
+def test_rebuild_matches_full_price_analysis(app):
+    rng = np.random.default_rng(0)
+    rising = 50 + np.arange(80) * 0.5 + rng.normal(0, 1, 80)
+    short = [10.0, 10.001, 10.002]
+    rising_id = _add_commodity('Copper', rising)
+    short_id = _add_commodity('Tin', short)
+
+    assert TrendIndexer().rebuild() == 2
+
+    _assert_matches_full_analysis(rising_id, rising)
+    _assert_matches_full_analysis(short_id, short)
+
+
+def test_appended_prices_update_index_incrementally(app):
+    rng = np.random.default_rng(1)
+    prices = list(100 - np.arange(60) * 0.3 + rng.normal(0, 2, 60))
+    commodity_id = _add_commodity('Nickel', prices)
+    indexer = TrendIndexer()
+    indexer.rebuild()
+
+    new_points = []
+    for i, price in enumerate(rng.normal(80, 2, 15)):
+        timestamp = START + timedelta(days=60 + i)
+        db.session.add(PriceData(commodity_id=commodity_id, price=float(price), timestamp=timestamp))
+        new_points.append((timestamp, float(price)))
+        prices.append(float(price))
+    db.session.commit()
+
+    notify_prices_appended({commodity_id: new_points})
+
+    _assert_matches_full_analysis(commodity_id, prices)
+    assert TrendIndex.query.filter_by(commodity_id=commodity_id).one().last_timestamp == new_points[-1][0]
+
+
+def test_backfilled_prices_rebuild_the_commodity(app):
+    prices = [float(p) for p in range(1, 41)]
+    commodity_id = _add_commodity('Zinc', prices)
+    TrendIndexer().rebuild()
+
+    backfill = START - timedelta(days=1)
+    db.session.add(PriceData(commodity_id=commodity_id, price=500.0, timestamp=backfill))
+    db.session.commit()
+    notify_prices_appended({commodity_id: [(backfill, 500.0)]})
+
+    _assert_matches_full_analysis(commodity_id, [500.0] + prices)
+
+
+def test_market_trends_read_the_whole_universe(app):
+    up = _add_commodity('Gold', np.linspace(100, 200, 40))
+    down = _add_commodity('Silver', np.linspace(200, 100, 40))
+    flat = _add_commodity('Lead', np.full(40, 5.0))
+
+    trends = AnalyticsService(app).get_market_trends()
+
+    assert [c['id'] for c in trends['trending_up']] == [up]
+    assert [c['id'] for c in trends['trending_down']] == [down]
+    assert [c['id'] for c in trends['stable']] == [flat]
+    assert {c['id'] for c in trends['high_volatility']} == {up, down}
+    assert trends['total_commodities'] == 3
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analytics.ml_predictor import MLPredictor
+from src.analytics.price_analyzer import PriceAnalyzer
+from src.analytics.volatility_surface import VolatilitySurface, get_volatility_surface, surface_cache
+
+
+def _prices(seed, n=5000, drift=0.0003):
+    rng = np.random.default_rng(seed)
+    return 10 * np.exp(np.cumsum(rng.normal(drift, 0.02, n)))
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_rolling_statistics_match_pandas(seed):
+    values = _prices(seed, n=18250)  # 50 years of daily prices with strong drift
+    values[500:503] = np.nan
+    surface = VolatilitySurface(values)
+    surface.add_windows([2, 7, 20, 30, 365])
+
+    series = pd.Series(values)
+    for window in [2, 7, 20, 30, 365]:
+        # Exact per-window statistics; pandas' online updates drift on short windows
+        expected_std = np.full(len(values), np.nan)
+        expected_std[window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window).std(axis=1, ddof=1)
+        expected_mean = series.rolling(window).mean().to_numpy()
+        np.testing.assert_array_equal(np.isnan(surface.std[window]), series.rolling(window).std().isna())
+        np.testing.assert_allclose(surface.std[window], expected_std, rtol=1e-8)
+        np.testing.assert_allclose(surface.mean[window], expected_mean, rtol=1e-12)
+
+
+def test_ewma_and_range_volatility():
+    values = _prices(3, n=400)
+    surface = VolatilitySurface(values)
+    surface.add_windows([20])
+    surface.add_ewma(0.94)
+
+    returns = values[1:] / values[:-1] - 1
+    variance = returns[0] ** 2
+    for r in returns[1:]:
+        variance = 0.94 * variance + 0.06 * r * r
+    assert surface.latest(surface.ewma) == pytest.approx(np.sqrt(variance), rel=1e-10)
+
+    window = values[-20:]
+    expected = np.log(window.max() / window.min()) / np.sqrt(4 * np.log(2))
+    assert surface.range_volatility(20)[-1] == pytest.approx(expected, rel=1e-12)
+    assert np.isnan(surface.range_volatility(20)[:19]).all()
+
+
+def test_consumers_share_one_cached_surface():
+    surface_cache.clear()
+    values = _prices(4, n=600)
+    data = pd.DataFrame({'date': pd.date_range('2020-01-01', periods=600, freq='D'), 'price': values})
+
+    before = surface_cache.get_stats()
+    PriceAnalyzer().analyze(data, sections={'volatility'})
+    MLPredictor().prepare_features(data, 'price')
+    after = surface_cache.get_stats()
+    assert after['size'] == 1
+    # The analyzer computes the surface once for all its measures; the ML features reuse it
+    assert after['misses'] - before['misses'] == 1
+    assert after['hits'] - before['hits'] >= 1
+
+    assert get_volatility_surface(values) is get_volatility_surface(pd.Series(values))
+
+
+def test_analyzer_and_ml_features_keep_pandas_results():
+    values = _prices(5, n=800)
+    series = pd.Series(values)
+    analyzer = PriceAnalyzer()
+    for window in [7, 30, 90]:
+        assert analyzer.calculate_volatility(series, window) == pytest.approx(series.rolling(window).std().mean(), rel=1e-9)
+    assert analyzer.calculate_volatility(series.head(5), 7) == pytest.approx(series.head(5).std())
+
+    data = pd.DataFrame({'date': pd.date_range('2020-01-01', periods=800, freq='D'), 'price': values})
+    X, _ = MLPredictor().prepare_features(data, 'price')
+    rows = X.index
+    # Features of row t summarize the prices up to t-1
+    for window in [7, 30, 90]:
+        np.testing.assert_allclose(X[f'price_ma_{window}'], series.rolling(window).mean().shift(1)[rows], rtol=1e-12)
+        np.testing.assert_allclose(X[f'price_std_{window}'], series.rolling(window).std().shift(1)[rows], rtol=1e-8)
+    np.testing.assert_allclose(X['volatility_20'], series.rolling(20).std().shift(1)[rows], rtol=1e-8)